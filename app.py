@@ -1,4 +1,5 @@
 import asyncio
+import functools
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -9,9 +10,12 @@ from starlette.middleware.cors import CORSMiddleware
 import settings
 from distributedinference import api_logger
 from distributedinference import dependencies
+from distributedinference.domain.agent.jobs import save_agent_logs_job
 from distributedinference.domain.node import set_nodes_inactive
 from distributedinference.domain.node.jobs import health_check_job
 from distributedinference.domain.node.jobs import metrics_update_job
+from distributedinference.domain.node.jobs import node_status_update_job
+from distributedinference.domain.node.jobs import peer_capacity_gossip_job
 from distributedinference.domain.node.jobs import save_daily_usage_job
 from distributedinference.domain.node.jobs import save_tokens_job
 from distributedinference.domain.orchestration.jobs import monitor_tee_instances
@@ -33,6 +37,7 @@ from distributedinference.service.middleware.request_enrichment_middleware impor
 from distributedinference.service.middleware.faucet_rate_limit_middleware import (
     FaucetRateLimitMiddleware,
 )
+from distributedinference.service.node import worker_ipc_service
 from distributedinference.service.node.protocol import protocol_handler
 
 logger = api_logger.get()
@@ -43,6 +48,15 @@ async def lifespan(_: FastAPI):
     connection.init_defaults()
     dependencies.init_globals()
 
+    worker_ipc_repository = dependencies.get_worker_ipc_repository()
+    await worker_ipc_repository.start_server(
+        functools.partial(
+            worker_ipc_service.execute,
+            connected_node_repository=dependencies.get_connected_node_repository(),
+            executor_factory=dependencies.create_worker_inference_executor,
+        )
+    )
+
     metrics_task = asyncio.create_task(
         metrics_update_job.execute(
             dependencies.get_metrics_queue_repository(),
@@ -63,6 +77,15 @@ async def lifespan(_: FastAPI):
             dependencies.get_connected_node_repository(),
             dependencies.get_analytics(),
             dependencies.get_protocol_handler(),
+            worker_ipc_repository,
+            dependencies.get_node_status_queue_repository(),
+        )
+    )
+    node_status_task = asyncio.create_task(
+        node_status_update_job.execute(
+            dependencies.get_node_status_queue_repository(),
+            dependencies.get_node_repository(),
+            dependencies.get_connected_node_repository(),
         )
     )
     save_daily_usage_task = asyncio.create_task(
@@ -77,13 +100,38 @@ async def lifespan(_: FastAPI):
             dependencies.get_tokens_queue_repository(),
         )
     )
-    monitor_tee_task = asyncio.create_task(
-        monitor_tee_instances.execute(
-            dependencies.get_agent_repository(),
-            dependencies.get_tee_orchestration_repository(),
-            dependencies.get_aws_storage_repository(),
-        )
+    peer_capacity_gossip_task = asyncio.create_task(
+        peer_capacity_gossip_job.execute(dependencies.get_peer_capacity_repository())
     )
+    tasks = [
+        metrics_task,
+        protocol_task,
+        health_task,
+        node_status_task,
+        save_daily_usage_task,
+        save_tokens_task,
+        peer_capacity_gossip_task,
+    ]
+    if settings.AGENT_LOGS_BUFFERED_ENABLED:
+        tasks.append(
+            asyncio.create_task(
+                save_agent_logs_job.execute(
+                    dependencies.get_agent_logs_repository(),
+                    dependencies.get_agent_logs_queue_repository(),
+                )
+            )
+        )
+    # TEE instances are shared by all the workers, only one of them monitors them
+    if worker_ipc_repository.try_become_primary():
+        tasks.append(
+            asyncio.create_task(
+                monitor_tee_instances.execute(
+                    dependencies.get_agent_repository(),
+                    dependencies.get_tee_orchestration_repository(),
+                    dependencies.get_aws_storage_repository(),
+                )
+            )
+        )
     yield
 
     # Clean up resources and database before shutting down
@@ -92,21 +140,10 @@ async def lifespan(_: FastAPI):
         dependencies.get_node_repository(),
         dependencies.get_connected_node_repository(),
     )
-    metrics_task.cancel()
-    protocol_task.cancel()
-    health_task.cancel()
-    save_daily_usage_task.cancel()
-    save_tokens_task.cancel()
-    monitor_tee_task.cancel()
-    await asyncio.gather(
-        metrics_task,
-        protocol_task,
-        health_task,
-        save_daily_usage_task,
-        save_tokens_task,
-        monitor_tee_task,
-        return_exceptions=True,
-    )
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await worker_ipc_repository.stop_server()
     logger.info("Cleanup complete.")
 
 
@@ -1,7 +1,16 @@
+import atexit
 import logging
 import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from typing import Any
+from typing import Dict
 from typing import Optional
+from typing import Tuple
 
 from pythonjsonlogger import jsonlogger
 
@@ -10,27 +19,55 @@ import settings
 LOGGING_MESSAGE_FORMAT = "%(asctime)s %(name)-12s %(levelname)s %(message)s"
 
 logger: Optional[Any] = None
+listener: Optional[QueueListener] = None
 
 
 # pylint: disable=W0603
 def get():
     global logger
+    global listener
     if logger:
         return logger
     name = settings.APPLICATION_NAME
     file_handler = get_file_logger()
     console_handler = get_console_logger()
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
     apply_default_formatter(file_handler)
     apply_default_formatter(console_handler)
 
+    # JSON formatting and the blocking file/console writes happen on the listener
+    # thread, the caller (usually the event loop) only pays for putting the record
+    # into the queue
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(
+        HighVolumeFilter(
+            max_per_second=settings.LOG_RATE_LIMIT_PER_SECOND,
+            sample_rate=settings.LOG_SAMPLE_RATE,
+        )
+    )
+    listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(stop)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(queue_handler)
+
     return logger
 
 
+def stop() -> None:
+    """
+    Flushes all the queued records and stops the background writer thread
+    """
+    global listener
+    if listener:
+        listener.stop()
+        listener = None
+
+
 def get_file_logger() -> logging.FileHandler:
     os.makedirs(os.path.dirname(settings.LOG_FILE_PATH), exist_ok=True)
     file_handler = logging.FileHandler(settings.LOG_FILE_PATH)
@@ -47,3 +84,78 @@ def get_console_logger() -> logging.StreamHandler:
 def apply_default_formatter(handler: logging.Handler):
     formatter = jsonlogger.JsonFormatter(LOGGING_MESSAGE_FORMAT)
     handler.setFormatter(formatter)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    The default QueueHandler formats the record before enqueueing it, we skip that
+    since the listener lives in the same process and formats the record itself.
+    If the queue is full the record is dropped and counted instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped_count = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+
+class HighVolumeFilter(logging.Filter):
+    """
+    Rate limits and samples high volume log messages.
+
+    Each call site (file and line number) gets a token bucket of `max_per_second`
+    records, records over the limit are dropped. The next record that gets through
+    from the same call site carries the number of suppressed records in the
+    `suppressed` field.
+    `sample_rate` (0..1) is applied on top of that to DEBUG and INFO records.
+    WARNING and above are never dropped.
+    """
+
+    def __init__(self, max_per_second: int, sample_rate: float = 1.0):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.sample_rate = sample_rate
+        # (pathname, lineno): [tokens, last_refill_time, suppressed_count]
+        self._buckets: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.max_per_second), now, 0]
+                self._buckets[key] = bucket
+            else:
+                bucket[0] = min(
+                    float(self.max_per_second),
+                    bucket[0] + (now - bucket[1]) * self.max_per_second,
+                )
+                bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed = bucket[2]
+            bucket[2] = 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
@@ -1,8 +1,16 @@
+from typing import Optional
+
 import settings
 from distributedinference.repository.agent_explorer_repository import (
     AgentExplorerRepository,
 )
 from distributedinference.repository.aws_storage_repository import AWSStorageRepository
+from distributedinference.domain.agent.logs.agent_logs_admission import (
+    AgentLogsAdmission,
+)
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
 from distributedinference.repository.agent_logs_repository import AgentLogsRepository
 from distributedinference.repository.blockchain_proof_repository import (
     BlockchainProofRepository,
@@ -49,6 +57,33 @@ from distributedinference.repository.verified_completions_repository import (
 from distributedinference.repository.faucet_repository import (
     FaucetRepository,
 )
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
+from distributedinference.domain.embedding.embedding_node_dispatcher import (
+    EmbeddingNodeDispatcher,
+)
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
+from distributedinference.domain.node.node_connect_pipeline import (
+    NodeConnectPipeline,
+)
+from distributedinference.domain.node.run_inference_use_case import InferenceExecutor
+from distributedinference.service.agent.logs import add_agent_logs_service
 from distributedinference.service.node.protocol.protocol_handler import ProtocolHandler
 from distributedinference.utils.google_cloud_storage import GoogleCloudStorage
 
@@ -65,6 +100,11 @@ _billing_repository: BillingRepository
 _tokens_queue_repository: TokensQueueRepository
 
 _embedding_api_repository: EmbeddingApiRepository
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+_embedding_cache_repository: Optional[EmbeddingCacheRepository] = None
+_image_generation_scheduler: Optional[ImageGenerationScheduler] = None
+_agent_logs_admission: Optional[AgentLogsAdmission] = None
+_agent_logs_queue_repository: Optional[AgentLogsQueueRepository] = None
 _authentication_api_repository: AuthenticationApiRepository
 _analytics: Analytics
 _protocol_handler: ProtocolHandler
@@ -82,6 +122,11 @@ _agent_repository: AgentRepository
 _agent_explorer_repository: AgentExplorerRepository
 _agent_logs_repository: AgentLogsRepository
 _faucet_repository: FaucetRepository
+_worker_ipc_repository: WorkerIpcRepository
+_peer_capacity_repository: PeerCapacityRepository
+_node_status_queue_repository: NodeStatusQueueRepository
+_response_cache_repository: ResponseCacheRepository
+_node_connect_pipeline: NodeConnectPipeline
 
 
 # pylint: disable=W0603, R0915
@@ -98,6 +143,11 @@ def init_globals():
     global _billing_repository
     global _tokens_queue_repository
     global _embedding_api_repository
+    global _embedding_batcher
+    global _embedding_cache_repository
+    global _image_generation_scheduler
+    global _agent_logs_admission
+    global _agent_logs_queue_repository
     global _authentication_api_repository
     global _analytics
     global _protocol_handler
@@ -113,6 +163,11 @@ def init_globals():
     global _agent_explorer_repository
     global _agent_logs_repository
     global _faucet_repository
+    global _worker_ipc_repository
+    global _peer_capacity_repository
+    global _node_status_queue_repository
+    global _response_cache_repository
+    global _node_connect_pipeline
 
     _node_repository_instance = NodeRepository(
         get_session_provider(),
@@ -157,6 +212,28 @@ def init_globals():
     _faucet_repository = FaucetRepository(
         get_session_provider(), get_session_provider_read()
     )
+    _worker_ipc_repository = WorkerIpcRepository(settings.WORKER_IPC_DIR)
+    _peer_capacity_repository = PeerCapacityRepository(
+        settings.PEER_NODES_LIST,
+        settings.PEER_CAPACITY_MAX_AGE_SECONDS,
+        settings.PEER_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        settings.PEER_CIRCUIT_BREAKER_RESET_SECONDS,
+    )
+
+    _node_status_queue_repository = NodeStatusQueueRepository()
+    _response_cache_repository = ResponseCacheRepository(
+        settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+    _node_connect_pipeline = NodeConnectPipeline(
+        _node_repository_instance,
+        _benchmark_repository_instance,
+        settings.NODE_CONNECT_MAX_CONCURRENT,
+        settings.NODE_CONNECT_PER_SECOND,
+        settings.NODE_CONNECT_ADMISSION_TIMEOUT_SECONDS,
+        settings.NODE_CONNECT_BATCH_SIZE,
+        settings.NODE_CONNECT_BATCH_DELAY_SECONDS,
+        settings.NODE_BENCHMARK_CACHE_TTL_SECONDS,
+    )
 
     _analytics = Analytics(
         posthog=init_posthog(
@@ -169,6 +246,46 @@ def init_globals():
     _embedding_api_repository = EmbeddingApiRepository(
         settings.EMBEDDING_API_BASE_URL, settings.SUPPORTED_EMBEDDING_MODELS[0]
     )
+    if settings.EMBEDDING_NODES_ENABLED:
+        # Node requests are always batched
+        _embedding_batcher = EmbeddingBatcher(
+            EmbeddingNodeDispatcher(
+                settings.SUPPORTED_EMBEDDING_MODELS[0],
+                _connected_node_repository_instance,
+                _embedding_api_repository if settings.EMBEDDING_API_BASE_URL else None,
+                settings.EMBEDDING_NODE_MAX_BATCH_SIZE,
+                settings.EMBEDDING_NODE_TIMEOUT_SECONDS,
+            ),
+            settings.EMBEDDING_BATCH_MAX_SIZE,
+            settings.EMBEDDING_BATCH_MAX_DELAY_SECONDS,
+        )
+    elif settings.EMBEDDING_BATCHING_ENABLED:
+        _embedding_batcher = EmbeddingBatcher(
+            _embedding_api_repository,
+            settings.EMBEDDING_BATCH_MAX_SIZE,
+            settings.EMBEDDING_BATCH_MAX_DELAY_SECONDS,
+        )
+    if settings.IMAGE_GENERATION_SCHEDULER_ENABLED:
+        _image_generation_scheduler = ImageGenerationScheduler(
+            _connected_node_repository_instance,
+            settings.IMAGE_GENERATION_NODE_CAPACITY,
+            settings.IMAGE_GENERATION_MAX_QUEUED_JOBS,
+        )
+    if settings.AGENT_LOGS_BUFFERED_ENABLED:
+        _agent_logs_admission = AgentLogsAdmission(
+            settings.AGENT_LOGS_OWNER_CACHE_TTL_SECONDS,
+            add_agent_logs_service.MAX_COUNT_IN_TIME,
+            add_agent_logs_service.RATE_LIMIT_TIME_SECONDS,
+        )
+        _agent_logs_queue_repository = AgentLogsQueueRepository(
+            settings.AGENT_LOGS_QUEUE_MAX_SIZE
+        )
+    if settings.EMBEDDING_CACHE_ENABLED:
+        _embedding_cache_repository = EmbeddingCacheRepository(
+            settings.EMBEDDING_CACHE_MAX_BYTES,
+            settings.EMBEDDING_CACHE_DISK_DIRECTORY,
+            settings.EMBEDDING_CACHE_DISK_SLOTS,
+        )
     if settings.is_production() or (
         settings.STYTCH_PROJECT_ID and settings.STYTCH_SECRET
     ):
@@ -259,6 +376,18 @@ def get_embedding_api_repository() -> EmbeddingApiRepository:
     return _embedding_api_repository
 
 
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    return _embedding_batcher
+
+
+def get_embedding_cache_repository() -> Optional[EmbeddingCacheRepository]:
+    return _embedding_cache_repository
+
+
+def get_image_generation_scheduler() -> Optional[ImageGenerationScheduler]:
+    return _image_generation_scheduler
+
+
 def get_authentication_api_repository() -> AuthenticationApiRepository:
     return _authentication_api_repository
 
@@ -319,6 +448,14 @@ def get_agent_logs_repository() -> AgentLogsRepository:
     return _agent_logs_repository
 
 
+def get_agent_logs_admission() -> Optional[AgentLogsAdmission]:
+    return _agent_logs_admission
+
+
+def get_agent_logs_queue_repository() -> Optional[AgentLogsQueueRepository]:
+    return _agent_logs_queue_repository
+
+
 def get_tee_orchestration_repository() -> TeeOrchestrationRepository:
     return _tee_orchestration_repository
 
@@ -329,3 +466,39 @@ def get_aws_storage_repository() -> AWSStorageRepository:
 
 def get_faucet_repository() -> FaucetRepository:
     return _faucet_repository
+
+
+def create_worker_inference_executor() -> InferenceExecutor:
+    """
+    Executor of an inference request forwarded by a sibling worker, it is not
+    forwarded again so the forwarding repositories are not set
+    """
+    return InferenceExecutor(
+        node_repository=_node_repository_instance,
+        connected_node_repository=_connected_node_repository_instance,
+        tokens_repository=get_tokens_repository(),
+        metrics_queue_repository=_metrics_queue_repository,
+        tokens_queue_repository=_tokens_queue_repository,
+        analytics=_analytics,
+        node_status_queue_repository=_node_status_queue_repository,
+    )
+
+
+def get_worker_ipc_repository() -> WorkerIpcRepository:
+    return _worker_ipc_repository
+
+
+def get_peer_capacity_repository() -> PeerCapacityRepository:
+    return _peer_capacity_repository
+
+
+def get_node_status_queue_repository() -> NodeStatusQueueRepository:
+    return _node_status_queue_repository
+
+
+def get_response_cache_repository() -> ResponseCacheRepository:
+    return _response_cache_repository
+
+
+def get_node_connect_pipeline() -> NodeConnectPipeline:
+    return _node_connect_pipeline
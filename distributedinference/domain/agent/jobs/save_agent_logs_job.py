@@ -0,0 +1,75 @@
+import asyncio
+from typing import List
+
+import settings
+from distributedinference import api_logger
+from distributedinference.domain.agent.entities import AgentLogInput
+from distributedinference.repository.agent_logs_repository import AgentLogsRepository
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    agent_logs_repository: AgentLogsRepository,
+    agent_logs_queue_repository: AgentLogsQueueRepository,
+) -> None:
+    batch: List[AgentLogInput] = []
+    # failed attempts to save the batch
+    attempts = 0
+    while True:
+        try:
+            if batch:
+                await asyncio.sleep(
+                    settings.AGENT_LOGS_SAVE_RETRY_SECONDS * 2 ** (attempts - 1)
+                )
+            else:
+                # get one with blocking
+                batch.append(await agent_logs_queue_repository.get())
+                # let more requests queue up, the batch is saved with one COPY
+                await asyncio.sleep(settings.AGENT_LOGS_FLUSH_INTERVAL_SECONDS)
+                # get the rest without blocking
+                batch.extend(
+                    agent_logs_queue_repository.fetch_bulk(
+                        settings.AGENT_LOGS_FLUSH_MAX_LOGS - len(batch[0].logs)
+                    )
+                )
+            logger.debug(
+                f"save_agent_logs_job.execute() processing {len(batch)} requests"
+            )
+            await agent_logs_repository.add_bulk(batch)
+            batch = []
+            attempts = 0
+        except asyncio.CancelledError:
+            # The logs were acknowledged already, save them before shutting down
+            await _flush(agent_logs_repository, agent_logs_queue_repository, batch)
+            raise
+        except Exception as e:
+            attempts += 1
+            if attempts < settings.AGENT_LOGS_SAVE_MAX_ATTEMPTS:
+                logger.warning(
+                    f"Error saving agent logs, attempt {attempts}, retrying: {str(e)}"
+                )
+            else:
+                logger.error(
+                    f"Error saving agent logs, dropping {len(batch)} requests: {str(e)}"
+                )
+                batch = []
+                attempts = 0
+
+
+async def _flush(
+    agent_logs_repository: AgentLogsRepository,
+    agent_logs_queue_repository: AgentLogsQueueRepository,
+    batch: List[AgentLogInput],
+) -> None:
+    try:
+        while batch:
+            await agent_logs_repository.add_bulk(batch)
+            batch = agent_logs_queue_repository.fetch_bulk(
+                settings.AGENT_LOGS_FLUSH_MAX_LOGS
+            )
+    except Exception as e:
+        logger.error(f"Error saving agent logs on shutdown: {str(e)}")
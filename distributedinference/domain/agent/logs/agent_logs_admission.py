@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from distributedinference.repository.agent_repository import AgentRepository
+
+# Least recently used owners are evicted above this many agents
+MAX_CACHED_OWNERS = 10000
+# Full token buckets are dropped above this many agents
+MAX_TRACKED_AGENTS = 10000
+
+
+class AgentLogsAdmission:
+    """
+    Checks done before accepting agent logs, without a database query on the hot
+    path:
+
+    * the owner of the agent, cached for owner_ttl_seconds
+    * a token bucket per agent refilled with max_logs every per_seconds. A request
+      is accepted while the bucket has a token and may take it below zero, like
+      the count of saved logs could go above the limit with one batch.
+
+    The state is per process, every worker applies the limit on its own.
+    """
+
+    def __init__(self, owner_ttl_seconds: float, max_logs: int, per_seconds: float):
+        self._owner_ttl_seconds = owner_ttl_seconds
+        self._max_logs = max_logs
+        self._refill_per_second = max_logs / per_seconds
+        # agent_id: (user_profile_id, expires_at)
+        self._owners: OrderedDict[UUID, Tuple[UUID, float]] = OrderedDict()
+        # agent_id: (tokens, updated_at)
+        self._buckets: Dict[UUID, Tuple[float, float]] = {}
+
+    async def get_owner(
+        self, agent_id: UUID, agent_repository: AgentRepository
+    ) -> Optional[UUID]:
+        now = time.monotonic()
+        cached = self._owners.get(agent_id)
+        if cached and cached[1] > now:
+            self._owners.move_to_end(agent_id)
+            return cached[0]
+        agent = await agent_repository.get_agent(agent_id)
+        if not agent:
+            # Not cached, the agent can be created right after
+            self._owners.pop(agent_id, None)
+            return None
+        self._owners[agent_id] = (agent.user_profile_id, now + self._owner_ttl_seconds)
+        self._owners.move_to_end(agent_id)
+        if len(self._owners) > MAX_CACHED_OWNERS:
+            self._owners.popitem(last=False)
+        return agent.user_profile_id
+
+    def try_acquire(self, agent_id: UUID, count: int) -> bool:
+        now = time.monotonic()
+        tokens = self._get_tokens(agent_id, now)
+        if tokens < 1:
+            self._buckets[agent_id] = (tokens, now)
+            return False
+        self._buckets[agent_id] = (tokens - count, now)
+        if len(self._buckets) > MAX_TRACKED_AGENTS:
+            self._drop_full_buckets(now)
+        return True
+
+    def _get_tokens(self, agent_id: UUID, now: float) -> float:
+        bucket = self._buckets.get(agent_id)
+        if not bucket:
+            return self._max_logs
+        tokens, updated_at = bucket
+        return min(
+            self._max_logs, tokens + (now - updated_at) * self._refill_per_second
+        )
+
+    def _drop_full_buckets(self, now: float) -> None:
+        # A full bucket is the same as no bucket
+        self._buckets = {
+            agent_id: bucket
+            for agent_id, bucket in self._buckets.items()
+            if self._get_tokens(agent_id, now) < self._max_logs
+        }
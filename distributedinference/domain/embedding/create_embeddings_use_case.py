@@ -1,3 +1,4 @@
+from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
@@ -5,14 +6,67 @@ from typing import Union
 
 from openai.types import CreateEmbeddingResponse
 
+from distributedinference.domain.embedding import embedding_cache
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
+from distributedinference.domain.embedding.entities import EmbeddingApiError
 from distributedinference.repository.embedding_api_repository import (
     EmbeddingApiRepository,
 )
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
 
 
 async def execute(
     inputs: Union[List[str], List[List[int]]],
     encoding_format: Optional[Literal["float", "base64"]],
     embedding_repository: EmbeddingApiRepository,
+    embedding_batcher: Optional[EmbeddingBatcher] = None,
+    embedding_cache_repository: Optional[EmbeddingCacheRepository] = None,
+) -> CreateEmbeddingResponse:
+    if not embedding_cache_repository:
+        return await _create_embeddings(
+            inputs, encoding_format, embedding_repository, embedding_batcher
+        )
+
+    model = embedding_repository.model
+    keys = [embedding_cache.get_key(model, i) for i in inputs]
+    vectors = embedding_cache.get_cached(keys, embedding_cache_repository)
+    # Only the inputs missing from the cache go upstream, each of them once
+    missing: Dict[bytes, List[int]] = {}
+    for index, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(keys[index], []).append(index)
+    prompt_tokens = 0
+    if missing:
+        missing_indexes = list(missing.values())
+        response = await _create_embeddings(
+            [inputs[indexes[0]] for indexes in missing_indexes],  # type: ignore
+            encoding_format,
+            embedding_repository,
+            embedding_batcher,
+        )
+        model = response.model
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+        for embedding in response.data:
+            vector = embedding_cache.to_vector(embedding.embedding)  # type: ignore
+            indexes = missing_indexes[embedding.index]
+            embedding_cache_repository.put(keys[indexes[0]], vector)
+            for index in indexes:
+                vectors[index] = vector
+    if any(vector is None for vector in vectors):
+        raise EmbeddingApiError(502, "Missing embedding in upstream response")
+    return embedding_cache.to_response(
+        model, vectors, encoding_format, prompt_tokens  # type: ignore
+    )
+
+
+async def _create_embeddings(
+    inputs: Union[List[str], List[List[int]]],
+    encoding_format: Optional[Literal["float", "base64"]],
+    embedding_repository: EmbeddingApiRepository,
+    embedding_batcher: Optional[EmbeddingBatcher],
 ) -> CreateEmbeddingResponse:
+    if embedding_batcher:
+        return await embedding_batcher.create_embeddings(inputs, encoding_format)
     return await embedding_repository.create_embeddings(inputs, encoding_format)
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from openai.types import CreateEmbeddingResponse
+from openai.types import Embedding
+from openai.types.create_embedding_response import Usage
+from prometheus_client import Counter
+from prometheus_client import Histogram
+
+from distributedinference.domain.embedding.embedding_node_dispatcher import (
+    EmbeddingNodeDispatcher,
+)
+from distributedinference.domain.embedding.entities import BatchedEmbedding
+from distributedinference.domain.embedding.entities import EmbeddingApiError
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+from distributedinference.utils.batcher import Batcher
+
+# A text, or a token array as a tuple so it can be a key
+EmbeddingInput = Union[str, Tuple[int, ...]]
+
+embedding_batch_size_histogram = Histogram(
+    "embedding_batch_size",
+    "Inputs per upstream embedding call",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048],
+)
+embedding_upstream_duration_histogram = Histogram(
+    "embedding_upstream_duration_seconds",
+    "Duration of the upstream embedding calls in seconds",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+embedding_inputs_counter = Counter(
+    "embedding_batched_inputs",
+    "Inputs embedded through the batcher",
+)
+
+
+class EmbeddingBatcher:
+    """
+    Gathers the inputs of the embedding requests arriving within max_delay_seconds
+    into one upstream call of at most max_batch_size inputs, and gives every request
+    its embeddings back in its own order. Identical inputs are embedded once.
+
+    Texts and token arrays, and the encoding formats, are batched separately since an
+    upstream call takes only one of each. The upstream only reports the prompt tokens
+    of the whole call, they are shared between the inputs by their length.
+    """
+
+    def __init__(
+        self,
+        repository: Union[EmbeddingApiRepository, EmbeddingNodeDispatcher],
+        max_batch_size: int,
+        max_delay_seconds: float,
+    ):
+        self._repository = repository
+        self._max_batch_size = max_batch_size
+        self._max_delay_seconds = max_delay_seconds
+        # (encoding_format, is_token_arrays): batcher
+        self._batchers: Dict[
+            Tuple[Optional[str], bool], Batcher[EmbeddingInput, BatchedEmbedding]
+        ] = {}
+
+    async def create_embeddings(
+        self,
+        inputs: Union[List[str], List[List[int]]],
+        encoding_format: Optional[Literal["float", "base64"]],
+    ) -> CreateEmbeddingResponse:
+        keys: List[EmbeddingInput] = [
+            tuple(i) if isinstance(i, list) else i for i in inputs
+        ]
+        batcher = self._get_batcher(encoding_format, isinstance(inputs[0], list))
+        results = await asyncio.gather(*[batcher.get(key) for key in keys])
+        data = []
+        prompt_tokens = 0
+        for index, result in enumerate(results):
+            if not result:
+                raise EmbeddingApiError(502, "Missing embedding in upstream response")
+            # Not validated, a base64 embedding is a string
+            data.append(
+                Embedding.construct(
+                    embedding=result.embedding, index=index, object="embedding"
+                )
+            )
+            prompt_tokens += result.prompt_tokens
+        return CreateEmbeddingResponse(
+            data=data,
+            model=results[0].model,  # type: ignore
+            object="list",
+            usage=Usage(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens),
+        )
+
+    def _get_batcher(
+        self, encoding_format: Optional[str], is_token_arrays: bool
+    ) -> Batcher[EmbeddingInput, BatchedEmbedding]:
+        batcher = self._batchers.get((encoding_format, is_token_arrays))
+        if not batcher:
+
+            async def _load(keys: List[EmbeddingInput]):
+                return await self._load(keys, encoding_format)
+
+            batcher = self._batchers[(encoding_format, is_token_arrays)] = Batcher(
+                _load, self._max_batch_size, self._max_delay_seconds
+            )
+        return batcher
+
+    async def _load(
+        self, keys: List[EmbeddingInput], encoding_format: Optional[str]
+    ) -> Dict[EmbeddingInput, BatchedEmbedding]:
+        inputs = [list(key) if isinstance(key, tuple) else key for key in keys]
+        embedding_batch_size_histogram.observe(len(inputs))
+        embedding_inputs_counter.inc(len(inputs))
+        start = time.perf_counter()
+        response = await self._repository.create_embeddings(
+            inputs, encoding_format  # type: ignore
+        )
+        embedding_upstream_duration_histogram.observe(time.perf_counter() - start)
+
+        total_length = sum(len(key) for key in keys) or 1
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+        return {
+            keys[embedding.index]: BatchedEmbedding(
+                embedding=embedding.embedding,
+                model=response.model,
+                prompt_tokens=round(
+                    prompt_tokens * len(keys[embedding.index]) / total_length
+                ),
+            )
+            for embedding in response.data
+        }
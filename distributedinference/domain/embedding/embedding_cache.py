@@ -0,0 +1,101 @@
+"""
+Content addressed embedding cache.
+
+An input is keyed by the model and a hash of its canonical bytes, the UTF-8 text or
+the token ids as int32, so re-embedding the same document chunk does not go
+upstream again. The vectors are stored as little-endian float32 bytes, the format
+of the OpenAI base64 encoding, and both `float` and `base64` responses are served
+from them.
+"""
+
+import base64
+import hashlib
+import sys
+from array import array
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Union
+
+from openai.types import CreateEmbeddingResponse
+from openai.types import Embedding
+from openai.types.create_embedding_response import Usage
+from prometheus_client import Counter
+
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
+
+embedding_cache_inputs_counter = Counter(
+    "embedding_cache_inputs",
+    "Embedding inputs by cache result, hit or miss",
+    ["result"],
+)
+
+
+def get_key(model: str, embedding_input: Union[str, List[int]]) -> bytes:
+    hasher = hashlib.sha256(model.encode())
+    if isinstance(embedding_input, str):
+        hasher.update(b"\x00text\x00")
+        hasher.update(embedding_input.encode())
+    else:
+        hasher.update(b"\x00tokens\x00")
+        hasher.update(_to_little_endian(array("i", embedding_input)).tobytes())
+    return hasher.digest()
+
+
+def to_vector(embedding: Union[List[float], str]) -> bytes:
+    """
+    Float32 bytes of an embedding in either encoding
+    """
+    if isinstance(embedding, str):
+        return base64.b64decode(embedding)
+    return _to_little_endian(array("f", embedding)).tobytes()
+
+
+def from_vector(
+    vector: bytes, encoding_format: Optional[Literal["float", "base64"]]
+) -> Union[List[float], str]:
+    if encoding_format == "base64":
+        return base64.b64encode(vector).decode()
+    values = array("f")
+    values.frombytes(vector)
+    return _to_little_endian(values).tolist()
+
+
+def get_cached(
+    keys: List[bytes], repository: EmbeddingCacheRepository
+) -> List[Optional[bytes]]:
+    vectors = [repository.get(key) for key in keys]
+    hits = sum(1 for vector in vectors if vector is not None)
+    embedding_cache_inputs_counter.labels("hit").inc(hits)
+    embedding_cache_inputs_counter.labels("miss").inc(len(vectors) - hits)
+    return vectors
+
+
+def to_response(
+    model: str,
+    vectors: List[bytes],
+    encoding_format: Optional[Literal["float", "base64"]],
+    prompt_tokens: int,
+) -> CreateEmbeddingResponse:
+    return CreateEmbeddingResponse(
+        data=[
+            # Not validated, a base64 embedding is a string
+            Embedding.construct(
+                embedding=from_vector(vector, encoding_format),
+                index=index,
+                object="embedding",
+            )
+            for index, vector in enumerate(vectors)
+        ],
+        model=model,
+        object="list",
+        usage=Usage(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens),
+    )
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
@@ -0,0 +1,157 @@
+import asyncio
+import uuid
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Union
+
+from openai.types import CreateEmbeddingResponse
+from openai.types import Embedding
+from openai.types.create_embedding_response import Usage
+from prometheus_client import Counter
+
+from distributedinference import api_logger
+from distributedinference.domain.embedding.entities import EmbeddingApiError
+from distributedinference.domain.node import select_node_use_case
+from distributedinference.domain.node.entities import EmbeddingWebsocketRequest
+from distributedinference.domain.node.entities import EmbeddingWebsocketResponse
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+
+logger = api_logger.get()
+
+embedding_node_requests_counter = Counter(
+    "embedding_node_requests",
+    "Embedding requests by target, node or upstream",
+    ["target"],
+)
+
+
+class EmbeddingNodeDispatcher:
+    """
+    Creates embeddings on the connected embedding nodes of the model. A batch is
+    split into requests of at most max_inputs_per_request inputs, sent to the nodes
+    in parallel, so the throughput grows with the number of nodes.
+
+    Without a node available the inputs go to the upstream API when there is one.
+    Same interface as EmbeddingApiRepository, so the EmbeddingBatcher and the use
+    case take either.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        connected_node_repository: ConnectedNodeRepository,
+        upstream_repository: Optional[EmbeddingApiRepository],
+        max_inputs_per_request: int,
+        timeout_seconds: float,
+    ):
+        self.model = model
+        self._connected_node_repository = connected_node_repository
+        self._upstream_repository = upstream_repository
+        self._max_inputs_per_request = max_inputs_per_request
+        self._timeout_seconds = timeout_seconds
+
+    async def create_embeddings(
+        self,
+        chunks: Union[List[str], List[List[int]]],
+        encoding_format: Optional[Literal["float", "base64"]],
+    ) -> CreateEmbeddingResponse:
+        encoding_format = encoding_format or "float"
+        size = self._max_inputs_per_request
+        responses = await asyncio.gather(
+            *[
+                self._create_embeddings(chunks[i : i + size], encoding_format)  # type: ignore
+                for i in range(0, len(chunks), size)
+            ]
+        )
+        if len(responses) == 1:
+            return responses[0]
+        data: List[Embedding] = []
+        prompt_tokens = 0
+        for response in responses:
+            for embedding in sorted(response.data, key=lambda e: e.index):
+                # Not validated, a base64 embedding is a string
+                data.append(
+                    Embedding.construct(
+                        embedding=embedding.embedding,
+                        index=len(data),
+                        object="embedding",
+                    )
+                )
+            prompt_tokens += response.usage.prompt_tokens if response.usage else 0
+        return CreateEmbeddingResponse(
+            data=data,
+            model=self.model,
+            object="list",
+            usage=Usage(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens),
+        )
+
+    async def _create_embeddings(
+        self,
+        inputs: Union[List[str], List[List[int]]],
+        encoding_format: Literal["float", "base64"],
+    ) -> CreateEmbeddingResponse:
+        node = select_node_use_case.execute(self.model, self._connected_node_repository)
+        if not node:
+            if not self._upstream_repository:
+                raise EmbeddingApiError(503, "No available embedding nodes")
+            embedding_node_requests_counter.labels("upstream").inc()
+            return await self._upstream_repository.create_embeddings(
+                inputs, encoding_format
+            )
+
+        embedding_node_requests_counter.labels("node").inc()
+        request = EmbeddingWebsocketRequest(
+            request_id=str(uuid.uuid4()),
+            model=self.model,
+            input=inputs,
+            encoding_format=encoding_format,
+        )
+        await self._connected_node_repository.send_embedding_request(node.uid, request)
+        try:
+            response = await asyncio.wait_for(
+                self._connected_node_repository.receive_for_embedding_request(
+                    node.uid, request.request_id
+                ),
+                self._timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                f"Embedding request {request.request_id} timed out on node {node.uid}"
+            )
+            self._connected_node_repository.cleanup_request(
+                node.uid, request.request_id
+            )
+            raise EmbeddingApiError(504, "Embedding node timed out")
+        return _to_response(self.model, inputs, response)
+
+
+def _to_response(
+    model: str,
+    inputs: Union[List[str], List[List[int]]],
+    response: Optional[EmbeddingWebsocketResponse],
+) -> CreateEmbeddingResponse:
+    if not response or response.error is not None:
+        logger.error(
+            f"Embedding node request failed with error response: {response.error if response else 'no response'}"
+        )
+        raise EmbeddingApiError(502, "Embedding node request failed")
+    if len(response.embeddings) != len(inputs):
+        raise EmbeddingApiError(502, "Missing embedding in node response")
+    return CreateEmbeddingResponse.construct(
+        data=[
+            Embedding.construct(embedding=embedding, index=index, object="embedding")
+            for index, embedding in enumerate(response.embeddings)
+        ],
+        model=model,
+        object="list",
+        usage=Usage(
+            prompt_tokens=response.prompt_tokens,
+            total_tokens=response.prompt_tokens,
+        ),
+    )
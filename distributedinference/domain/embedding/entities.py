@@ -1,7 +1,19 @@
+from dataclasses import dataclass
+from typing import List
 from typing import Optional
+from typing import Union
 
 
 class EmbeddingApiError(Exception):
     def __init__(self, status: int, message: Optional[str]):
         self.status = status
         self.message = message
+
+
+@dataclass
+class BatchedEmbedding:
+    # A list of floats, or a base64 string with the base64 encoding format
+    embedding: Union[List[float], str]
+    model: str
+    # The share of the batch's prompt tokens
+    prompt_tokens: int
@@ -0,0 +1,41 @@
+from typing import Dict
+from uuid import UUID
+
+from prometheus_client import Histogram
+
+import settings
+from distributedinference.domain.node.entities import NodeLatencyMetric
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+
+# Per node percentiles are kept in the ConnectedNodeRepository, the histograms are
+# labelled only by model and backend host to keep the scrape small
+node_rtt_histogram = Histogram(
+    "node_rtt_seconds",
+    "Node ping round trip time in seconds by model and backend host",
+    ["model_name", "backend_host"],
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+node_time_to_first_token_histogram = Histogram(
+    "node_time_to_first_token_seconds",
+    "Time to first token in seconds by model and backend host",
+    ["model_name", "backend_host"],
+    buckets=[0.01, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10],
+)
+
+_HISTOGRAMS: Dict[NodeLatencyMetric, Histogram] = {
+    NodeLatencyMetric.RTT: node_rtt_histogram,
+    NodeLatencyMetric.TIME_TO_FIRST_TOKEN: node_time_to_first_token_histogram,
+}
+
+
+def record(
+    connected_node_repository: ConnectedNodeRepository,
+    node_id: UUID,
+    model: str,
+    metric: NodeLatencyMetric,
+    seconds: float,
+) -> None:
+    connected_node_repository.record_node_latency(node_id, metric, seconds)
+    _HISTOGRAMS[metric].labels(model, settings.HOSTNAME).observe(seconds)
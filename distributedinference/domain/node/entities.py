@@ -1,14 +1,19 @@
 import asyncio
 import time
+from dataclasses import asdict
 from dataclasses import dataclass
+from dataclasses import field
 from datetime import datetime
 from enum import Enum
 from typing import Dict
 from typing import List
+from typing import Literal
 from typing import Optional
+from typing import Union
 from uuid import UUID
 
 from fastapi import WebSocket
+from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletionChunk
 from openai.types.chat import CompletionCreateParams
 from packaging.version import Version
@@ -87,6 +92,15 @@ class BackendHost(Enum):
         return cls(normalized_value)
 
 
+@dataclass(frozen=True)
+class NodeConnection:
+    node_id: UUID
+    model_name: str
+    connected_at: datetime
+    connected_host: BackendHost
+    status: NodeStatus
+
+
 @dataclass
 class NodeMetricsIncrement:
     node_id: UUID
@@ -182,6 +196,24 @@ class NodeHealth:
 class ModelType(Enum):
     LLM = 1
     DIFFUSION = 2
+    EMBEDDING = 3
+
+
+class NodeFrameEncoding(Enum):
+    JSON = 1
+    # Negotiated with the WebSocket subprotocol, see node_frame_codec
+    CBOR = 2
+
+
+@dataclass(frozen=True)
+class RequestTokens:
+    prompt_tokens: int
+    # max_tokens of the request or a default, the real count is only known at the end
+    completion_tokens: int
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
 
 
 @dataclass
@@ -198,10 +230,20 @@ class ConnectedNode:
     model_type: ModelType = ModelType.LLM
     is_self_hosted: bool = False
     version: Optional[Version] = None
+    frame_encoding: NodeFrameEncoding = NodeFrameEncoding.JSON
+    benchmark_tokens_per_second: Optional[float] = None
+    # request_id: estimated tokens of the requests sent to the node
+    request_tokens: Dict[str, RequestTokens] = field(default_factory=dict)
 
     def active_requests_count(self) -> int:
         return len(self.request_incoming_queues)
 
+    def active_tokens_count(self) -> int:
+        return sum(tokens.total_tokens for tokens in self.request_tokens.values())
+
+    def active_completion_tokens_count(self) -> int:
+        return sum(tokens.completion_tokens for tokens in self.request_tokens.values())
+
     def is_datacenter_gpu(self) -> bool:
         return self.vram > 80000
 
@@ -258,6 +300,10 @@ class InferenceRequest:
     model: str
     chat_request: CompletionCreateParams
 
+    def to_dict(self) -> Dict:
+        # Unlike asdict() does not deep copy the chat request
+        return {"id": self.id, "model": self.model, "chat_request": self.chat_request}
+
 
 @dataclass
 class InferenceResponse:
@@ -275,6 +321,110 @@ class InferenceResponse:
             "status": self.status.value if self.status else None,
         }
 
+    @staticmethod
+    def from_dict(node_id: UUID, data: Dict) -> "InferenceResponse":
+        return InferenceResponse(
+            node_id=node_id,
+            request_id=data["request_id"],
+            chunk=(ChatCompletionChunk(**data["chunk"]) if data.get("chunk") else None),
+            error=(InferenceError(**data["error"]) if data.get("error") else None),
+            status=(
+                InferenceStatusCodes(data["status"]) if data.get("status") else None
+            ),
+        )
+
+
+@dataclass
+class CachedResponse:
+    # JSON encoded chunks, as they were sent to the client
+    chunks: List[bytes]
+    usage: Optional[CompletionUsage]
+
+    @property
+    def size(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+
+class WorkerIpcMessageType(Enum):
+    INFERENCE = "inference"
+    INFERENCE_RESPONSE = "inference_response"
+    NO_NODE = "no_node"
+    GET_CONNECTED_NODES = "get_connected_nodes"
+    CONNECTED_NODES = "connected_nodes"
+    GET_CAPACITY = "get_capacity"
+    CAPACITY = "capacity"
+    GET_NODE_LATENCIES = "get_node_latencies"
+    NODE_LATENCIES = "node_latencies"
+
+
+@dataclass
+class ModelCapacity:
+    nodes: int
+    free_slots: int
+    average_time_to_first_token: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "nodes": self.nodes,
+            "free_slots": self.free_slots,
+            "average_time_to_first_token": self.average_time_to_first_token,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> "ModelCapacity":
+        return ModelCapacity(
+            nodes=int(data["nodes"]),
+            free_slots=int(data["free_slots"]),
+            average_time_to_first_token=data.get("average_time_to_first_token"),
+        )
+
+
+@dataclass
+class PeerCapacity:
+    peer_ip: str
+    # model name: ModelCapacity
+    models: Dict[str, ModelCapacity]
+    updated_at: float  # time.monotonic()
+
+
+class NodeLatencyMetric(Enum):
+    RTT = "rtt"
+    TIME_TO_FIRST_TOKEN = "time_to_first_token"
+
+
+@dataclass
+class LatencyPercentiles:
+    count: int
+    # seconds, None if there are no samples
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+@dataclass
+class NodeLatency:
+    node_id: UUID
+    model: str
+    rtt: LatencyPercentiles
+    time_to_first_token: LatencyPercentiles
+
+    def to_dict(self) -> Dict:
+        return {
+            "node_id": str(self.node_id),
+            "model": self.model,
+            "rtt": asdict(self.rtt),
+            "time_to_first_token": asdict(self.time_to_first_token),
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> "NodeLatency":
+        return NodeLatency(
+            node_id=UUID(data["node_id"]),
+            model=data["model"],
+            rtt=LatencyPercentiles(**data["rtt"]),
+            time_to_first_token=LatencyPercentiles(**data["time_to_first_token"]),
+        )
+
 
 @dataclass
 class CheckHealthResponse:
@@ -297,3 +447,25 @@ class ImageGenerationWebsocketResponse(BaseModel):
     request_id: str = Field(description="Unique ID for the request")
     images: List[str] = Field(description="Base64 encoded images as output")
     error: Optional[str] = Field(description="Error message if the request failed")
+
+
+# The websocket request for embeddings, a batch of inputs of the same kind
+class EmbeddingWebsocketRequest(BaseModel):
+    request_id: str = Field(description="A unique identifier for the request")
+    model: str = Field(description="Embedding model name")
+    input: Union[List[str], List[List[int]]] = Field(
+        description="Texts or token arrays to embed"
+    )
+    encoding_format: Literal["float", "base64"] = Field(
+        description="Format of the returned embeddings"
+    )
+
+
+class EmbeddingWebsocketResponse(BaseModel):
+    node_id: UUID = Field(description="The node ID that processed the request")
+    request_id: str = Field(description="Unique ID for the request")
+    embeddings: List[Union[List[float], str]] = Field(
+        description="Embeddings in the order of the inputs"
+    )
+    prompt_tokens: int = Field(description="Tokens of all the inputs")
+    error: Optional[str] = Field(description="Error message if the request failed")
@@ -1,2 +1,10 @@
 class NoAvailableNodesError(Exception):
     pass
+
+
+class NodeConnectRejectedError(Exception):
+    pass
+
+
+class InvalidImageChunkError(Exception):
+    pass
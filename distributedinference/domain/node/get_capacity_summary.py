@@ -0,0 +1,89 @@
+from typing import Dict
+from typing import Optional
+
+from distributedinference import api_logger
+from distributedinference.domain.node import select_node_use_case
+from distributedinference.domain.node.entities import ModelCapacity
+from distributedinference.domain.node.entities import ModelType
+from distributedinference.domain.node.entities import NodeLatencyMetric
+from distributedinference.domain.node.entities import WorkerIpcMessageType
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    connected_node_repository: ConnectedNodeRepository,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+) -> Dict[str, ModelCapacity]:
+    """
+    Per model capacity of all the nodes connected to this backend, shared with the
+    peer backends so they can forward requests only where there are free nodes.
+    """
+    summary = get_local(connected_node_repository)
+    if not worker_ipc_repository or not worker_ipc_repository.is_enabled():
+        return summary
+    for socket_path in worker_ipc_repository.get_sibling_socket_paths():
+        try:
+            response = await worker_ipc_repository.request(
+                socket_path, {"type": WorkerIpcMessageType.GET_CAPACITY.value}
+            )
+        except Exception:
+            logger.warning(
+                f"Failed to get capacity from worker, socket={socket_path}",
+                exc_info=True,
+            )
+            continue
+        if not response or response.get("type") != WorkerIpcMessageType.CAPACITY.value:
+            continue
+        for model, capacity in response["models"].items():
+            summary[model] = _merge(
+                summary.get(model), ModelCapacity.from_dict(capacity)
+            )
+    return summary
+
+
+def get_local(
+    connected_node_repository: ConnectedNodeRepository,
+) -> Dict[str, ModelCapacity]:
+    summary: Dict[str, ModelCapacity] = {}
+    for node in connected_node_repository.get_locally_connected_nodes():
+        if node.model_type != ModelType.LLM:
+            continue
+        # The node's median, averaged over the nodes of the model
+        time_to_first_token = connected_node_repository.get_node_latency_percentile(
+            node.uid, NodeLatencyMetric.TIME_TO_FIRST_TOKEN, 0.5
+        )
+        capacity = ModelCapacity(
+            nodes=1,
+            free_slots=select_node_use_case.get_free_slots(node),
+            average_time_to_first_token=time_to_first_token,
+        )
+        summary[node.model] = _merge(summary.get(node.model), capacity)
+    return summary
+
+
+def _merge(capacity: Optional[ModelCapacity], other: ModelCapacity) -> ModelCapacity:
+    if not capacity:
+        return other
+    return ModelCapacity(
+        nodes=capacity.nodes + other.nodes,
+        free_slots=capacity.free_slots + other.free_slots,
+        average_time_to_first_token=_weighted_average(capacity, other),
+    )
+
+
+def _weighted_average(capacity: ModelCapacity, other: ModelCapacity) -> Optional[float]:
+    if capacity.average_time_to_first_token is None:
+        return other.average_time_to_first_token
+    if other.average_time_to_first_token is None:
+        return capacity.average_time_to_first_token
+    return (
+        capacity.average_time_to_first_token * capacity.nodes
+        + other.average_time_to_first_token * other.nodes
+    ) / (capacity.nodes + other.nodes)
@@ -0,0 +1,45 @@
+from typing import List
+from typing import Optional
+
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import NodeLatency
+from distributedinference.domain.node.entities import WorkerIpcMessageType
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    connected_node_repository: ConnectedNodeRepository,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+) -> List[NodeLatency]:
+    """
+    RTT and time to first token percentiles of every node connected to this backend,
+    including the nodes owned by the sibling worker processes.
+    """
+    latencies = connected_node_repository.get_node_latencies()
+    if not worker_ipc_repository or not worker_ipc_repository.is_enabled():
+        return latencies
+    for socket_path in worker_ipc_repository.get_sibling_socket_paths():
+        try:
+            response = await worker_ipc_repository.request(
+                socket_path, {"type": WorkerIpcMessageType.GET_NODE_LATENCIES.value}
+            )
+        except Exception:
+            logger.warning(
+                f"Failed to get node latencies from worker, socket={socket_path}",
+                exc_info=True,
+            )
+            continue
+        if (
+            not response
+            or response.get("type") != WorkerIpcMessageType.NODE_LATENCIES.value
+        ):
+            continue
+        latencies.extend(NodeLatency.from_dict(node) for node in response["nodes"])
+    return latencies
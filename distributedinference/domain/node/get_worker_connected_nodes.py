@@ -0,0 +1,41 @@
+from typing import Set
+from uuid import UUID
+
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import WorkerIpcMessageType
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    connected_node_repository: ConnectedNodeRepository,
+    worker_ipc_repository: WorkerIpcRepository,
+) -> Set[UUID]:
+    """
+    Returns the ids of the nodes connected to any worker process of this backend
+    """
+    node_ids = set(connected_node_repository.get_locally_connected_node_keys())
+    if not worker_ipc_repository.is_enabled():
+        return node_ids
+    for socket_path in worker_ipc_repository.get_sibling_socket_paths():
+        try:
+            response = await worker_ipc_repository.request(
+                socket_path, {"type": WorkerIpcMessageType.GET_CONNECTED_NODES.value}
+            )
+        except Exception:
+            logger.warning(
+                f"Failed to get connected nodes from worker, socket={socket_path}",
+                exc_info=True,
+            )
+            continue
+        if response and response.get("type") == (
+            WorkerIpcMessageType.CONNECTED_NODES.value
+        ):
+            node_ids.update(UUID(node_id) for node_id in response["node_ids"])
+    return node_ids
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from prometheus_client import Counter
+
+import settings
+from distributedinference import api_logger
+from distributedinference.domain.node import is_inference_request_finished
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import InferenceResponse
+from distributedinference.domain.node.entities import InferenceStatusCodes
+from distributedinference.domain.node.entities import NodeLatencyMetric
+from distributedinference.domain.node.entities import RequestTokens
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+
+logger = api_logger.get()
+
+inference_hedging_requests_counter = Counter(
+    "inference_hedging_requests",
+    "Requests eligible for hedging by model name",
+    ["model_name"],
+)
+inference_hedged_requests_counter = Counter(
+    "inference_hedged_requests",
+    "Requests sent to a second node because the first token was late",
+    ["model_name"],
+)
+inference_hedge_wins_counter = Counter(
+    "inference_hedge_wins",
+    "Hedged requests by the node that sent the first token, primary or hedge",
+    ["model_name", "winner"],
+)
+
+# Below it the default delay is used, a few samples make a noisy percentile
+MIN_TIME_TO_FIRST_TOKEN_SAMPLES = 20
+
+# Keeps a reference to the draining tasks so they are not garbage collected
+_drain_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class HedgeResult:
+    node: ConnectedNode
+    # First response of the node, already consumed from its queue
+    response: Optional[InferenceResponse]
+    # time.time() when the winning node got the request
+    started_at: float
+
+
+async def wait_first_response(
+    node: ConnectedNode,
+    request: InferenceRequest,
+    started_at: float,
+    connected_node_repository: ConnectedNodeRepository,
+    select_hedge_node: Callable[[], Optional[ConnectedNode]],
+    request_tokens: Optional[RequestTokens] = None,
+) -> HedgeResult:
+    """
+    Waits for the first response of the node the request was sent to. If it takes
+    longer than the model's TTFT percentile the request is also sent to a second
+    node, the first one to send a chunk wins and the other one is drained in the
+    background so its output is discarded.
+    """
+    inference_hedging_requests_counter.labels(request.model).inc()
+    tasks: Dict[asyncio.Task, ConnectedNode] = {}
+    hedge_node: Optional[ConnectedNode] = None
+    try:
+        primary_task = asyncio.create_task(
+            connected_node_repository.receive_for_request(node.uid, request.id)
+        )
+        tasks[primary_task] = node
+        done, _ = await asyncio.wait(
+            {primary_task}, timeout=get_delay(request.model, connected_node_repository)
+        )
+        if done:
+            return HedgeResult(node, primary_task.result(), started_at)
+
+        hedge_node = select_hedge_node()
+        if not hedge_node or hedge_node.uid == node.uid:
+            hedge_node = None
+            return HedgeResult(node, await primary_task, started_at)
+
+        hedge_started_at = time.time()
+        inference_hedged_requests_counter.labels(request.model).inc()
+        logger.debug(
+            f"Hedging request {request.id}, node {node.uid} is slow, sending to {hedge_node.uid}"
+        )
+        await connected_node_repository.send_inference_request(
+            hedge_node.uid, request, request_tokens=request_tokens
+        )
+        hedge_task = asyncio.create_task(
+            connected_node_repository.receive_for_request(hedge_node.uid, request.id)
+        )
+        tasks[hedge_task] = hedge_node
+        winner, responses = await _wait_first_chunk(primary_task, hedge_task)
+    except BaseException:
+        # Cancelled, e.g. the client disconnected, or the hedge could not be sent.
+        # The caller cleans up the primary request.
+        for task in tasks:
+            task.cancel()
+        if hedge_node:
+            connected_node_repository.cleanup_request(hedge_node.uid, request.id)
+        raise
+
+    _drain_losers(tasks, winner, responses, request, connected_node_repository)
+    is_hedge_winner = winner is hedge_task
+    inference_hedge_wins_counter.labels(
+        request.model, "hedge" if is_hedge_winner else "primary"
+    ).inc()
+    return HedgeResult(
+        tasks[winner],
+        responses[winner],
+        hedge_started_at if is_hedge_winner else started_at,
+    )
+
+
+async def _wait_first_chunk(
+    primary_task: asyncio.Task, hedge_task: asyncio.Task
+) -> Tuple[asyncio.Task, Dict[asyncio.Task, Optional[InferenceResponse]]]:
+    """
+    The task that got a chunk first, the primary if both failed
+    """
+    responses: Dict[asyncio.Task, Optional[InferenceResponse]] = {}
+    pending = {primary_task, hedge_task}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        # Primary first if both are done at the same time
+        for task in sorted(done, key=lambda t: t is not primary_task):
+            responses[task] = task.result()
+            if _is_chunk(responses[task]):
+                return task, responses
+    # Both failed, the primary's response is handled as usual
+    return primary_task, responses
+
+
+def _drain_losers(
+    tasks: Dict[asyncio.Task, ConnectedNode],
+    winner: asyncio.Task,
+    responses: Dict[asyncio.Task, Optional[InferenceResponse]],
+    request: InferenceRequest,
+    connected_node_repository: ConnectedNodeRepository,
+) -> None:
+    for task, task_node in tasks.items():
+        if task is winner:
+            continue
+        if task not in responses and task.done() and not task.cancelled():
+            # Done at the same time as the winner, its response may be the last one
+            if task.exception() is None:
+                responses[task] = task.result()
+        task.cancel()
+        _drain(task_node, request, responses.get(task), connected_node_repository)
+
+
+def get_delay(model: str, connected_node_repository: ConnectedNodeRepository) -> float:
+    delay = connected_node_repository.get_model_latency_percentile(
+        model,
+        NodeLatencyMetric.TIME_TO_FIRST_TOKEN,
+        settings.INFERENCE_HEDGING_PERCENTILE,
+        min_count=MIN_TIME_TO_FIRST_TOKEN_SAMPLES,
+    )
+    if delay is None:
+        delay = settings.INFERENCE_HEDGING_DEFAULT_DELAY_SECONDS
+    return max(delay, settings.INFERENCE_HEDGING_MIN_DELAY_SECONDS)
+
+
+def _drain(
+    node: ConnectedNode,
+    request: InferenceRequest,
+    last_response: Optional[InferenceResponse],
+    connected_node_repository: ConnectedNodeRepository,
+) -> None:
+    """
+    Nodes can't cancel a request, so the loser keeps its request slot until it
+    finishes generating. Its chunks are read and dropped, the usage is not billed.
+    """
+    if last_response is not None and _is_finished(node, last_response):
+        connected_node_repository.cleanup_request(node.uid, request.id)
+        return
+    task = asyncio.create_task(_drain_queue(node, request, connected_node_repository))
+    _drain_tasks.add(task)
+    task.add_done_callback(_drain_tasks.discard)
+
+
+async def _drain_queue(
+    node: ConnectedNode,
+    request: InferenceRequest,
+    connected_node_repository: ConnectedNodeRepository,
+) -> None:
+    try:
+        async with asyncio.timeout(settings.INFERENCE_HEDGING_DRAIN_TIMEOUT_SECONDS):
+            while True:
+                response = await connected_node_repository.receive_for_request(
+                    node.uid, request.id
+                )
+                if response is None or _is_finished(node, response):
+                    break
+    except TimeoutError:
+        logger.warning(
+            f"Hedging loser node {node.uid} did not finish request {request.id} in time"
+        )
+    except Exception:
+        logger.warning(
+            f"Failed to drain hedging loser node {node.uid}, request_id={request.id}",
+            exc_info=True,
+        )
+    finally:
+        connected_node_repository.cleanup_request(node.uid, request.id)
+
+
+def _is_chunk(response: Optional[InferenceResponse]) -> bool:
+    return bool(response and response.chunk)
+
+
+def _is_finished(node: ConnectedNode, response: InferenceResponse) -> bool:
+    if response.error or response.status in (
+        InferenceStatusCodes.DONE,
+        InferenceStatusCodes.ERROR,
+    ):
+        return True
+    if not response.chunk:
+        return False
+    return is_inference_request_finished.execute(node, response, response.chunk.usage)
@@ -0,0 +1,214 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from prometheus_client import Counter
+from prometheus_client import Histogram
+
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.service import error_responses
+
+logger = api_logger.get()
+
+DEFAULT_IMAGE_SIZE = "1024x1024"
+# Stale fair queueing tags are dropped above this many users
+MAX_TRACKED_USERS = 1024
+
+image_generation_queue_wait_histogram = Histogram(
+    "image_generation_queue_wait_seconds",
+    "Time image generation jobs waited for a node in seconds",
+    ["model_name"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60],
+)
+image_generation_jobs_counter = Counter(
+    "image_generation_jobs",
+    "Image generation jobs by model name and outcome, dispatched, timeout or rejected",
+    ["model_name", "outcome"],
+)
+
+
+def get_cost(n: int, size: Optional[str], steps: int) -> int:
+    """
+    Pixels times denoising steps of all the images of a request
+    """
+    width, height = (size or DEFAULT_IMAGE_SIZE).split("x")
+    return n * int(width) * int(height) * steps
+
+
+@dataclass
+class _Job:
+    model: str
+    user_id: UUID
+    cost: int
+    deadline: float
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class ImageGenerationScheduler:
+    """
+    Queues the image generation jobs until a diffusion node has capacity for them.
+
+    A node runs jobs up to node_capacity, counted in pixels times steps, a job
+    bigger than that only runs on an idle node. The jobs of a model are dispatched
+    by start-time fair queueing: every user gets an equal share of the capacity
+    however many jobs they queue, and within a user the jobs run in order. A job
+    not dispatched before its deadline fails with NoAvailableInferenceNodesError,
+    like when the queue is full.
+
+    Besides a release, a waiting job retries the dispatch every poll_seconds so
+    newly connected nodes are used.
+    """
+
+    def __init__(
+        self,
+        connected_node_repository: ConnectedNodeRepository,
+        node_capacity: int,
+        max_queued_jobs: int,
+        poll_seconds: float = 1,
+    ):
+        self._connected_node_repository = connected_node_repository
+        self._node_capacity = node_capacity
+        self._max_queued_jobs = max_queued_jobs
+        self._poll_seconds = poll_seconds
+        # node_id: cost of the jobs running on the node
+        self._running_costs: Dict[UUID, int] = {}
+        # model: heap of (start tag, sequence, job)
+        self._queues: Dict[str, List[Tuple[float, int, _Job]]] = {}
+        # model: start tag of the last dispatched job
+        self._virtual_times: Dict[str, float] = {}
+        # (model, user_id): finish tag of the user's last queued job
+        self._finish_tags: Dict[Tuple[str, UUID], float] = {}
+        self._sequence = 0
+        self._queued_jobs = 0
+
+    async def acquire(
+        self, model: str, user_id: UUID, cost: int, timeout_seconds: float
+    ) -> ConnectedNode:
+        """
+        Waits for a node to run the job on, release must be called when the job is
+        done
+        """
+        now = time.monotonic()
+        if self._queued_jobs >= self._max_queued_jobs:
+            image_generation_jobs_counter.labels(model, "rejected").inc()
+            raise error_responses.NoAvailableInferenceNodesError()
+        job = _Job(
+            model=model,
+            user_id=user_id,
+            cost=cost,
+            deadline=now + timeout_seconds,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._enqueue(job)
+        self._dispatch(model)
+        try:
+            while not job.future.done():
+                remaining = job.deadline - time.monotonic()
+                if remaining <= 0:
+                    image_generation_jobs_counter.labels(model, "timeout").inc()
+                    raise error_responses.NoAvailableInferenceNodesError()
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(job.future), min(remaining, self._poll_seconds)
+                    )
+                except asyncio.TimeoutError:
+                    self._dispatch(model)
+        except BaseException:
+            # Timed out, or the request was cancelled while waiting
+            if job.future.done():
+                self.release(job.future.result().uid, cost)
+            else:
+                # Stays in the heap, skipped when popped
+                job.future.cancel()
+                self._queued_jobs -= 1
+            raise
+        return job.future.result()
+
+    def release(self, node_id: UUID, cost: int) -> None:
+        running_cost = self._running_costs.get(node_id, 0) - cost
+        if running_cost > 0:
+            self._running_costs[node_id] = running_cost
+        else:
+            self._running_costs.pop(node_id, None)
+        node = self._connected_node_repository.get_connected_node(node_id)
+        if node:
+            self._dispatch(node.model)
+
+    def get_running_cost(self, node_id: UUID) -> int:
+        return self._running_costs.get(node_id, 0)
+
+    def _enqueue(self, job: _Job) -> None:
+        if len(self._finish_tags) > MAX_TRACKED_USERS:
+            self._drop_stale_finish_tags()
+        key = (job.model, job.user_id)
+        start = max(
+            self._virtual_times.get(job.model, 0.0), self._finish_tags.get(key, 0.0)
+        )
+        self._finish_tags[key] = start + job.cost
+        self._sequence += 1
+        heapq.heappush(
+            self._queues.setdefault(job.model, []), (start, self._sequence, job)
+        )
+        self._queued_jobs += 1
+
+    def _dispatch(self, model: str) -> None:
+        queue = self._queues.get(model)
+        while queue:
+            start, _, job = queue[0]
+            if job.future.done():
+                # Timed out or cancelled
+                heapq.heappop(queue)
+                continue
+            node = self._get_node(model, job.cost)
+            if not node:
+                # The first job waits for a node, the smaller ones after it do not
+                # skip ahead so big jobs are not starved
+                return
+            heapq.heappop(queue)
+            self._queued_jobs -= 1
+            self._virtual_times[model] = start
+            self._running_costs[node.uid] = self.get_running_cost(node.uid) + job.cost
+            image_generation_queue_wait_histogram.labels(model).observe(
+                time.monotonic() - job.enqueued_at
+            )
+            image_generation_jobs_counter.labels(model, "dispatched").inc()
+            job.future.set_result(node)
+        if queue is not None:
+            del self._queues[model]
+
+    def _get_node(self, model: str, cost: int) -> Optional[ConnectedNode]:
+        """
+        The least loaded node with capacity for the cost
+        """
+        best_node = None
+        best_cost = 0
+        for node in self._connected_node_repository.get_nodes_by_model(model):
+            if not node.is_self_hosted and not node.node_status.is_healthy():
+                continue
+            running_cost = self.get_running_cost(node.uid)
+            if running_cost and running_cost + cost > self._node_capacity:
+                continue
+            if best_node is None or running_cost < best_cost:
+                best_node, best_cost = node, running_cost
+        return best_node
+
+    def _drop_stale_finish_tags(self) -> None:
+        # A tag behind the virtual time of its model no longer changes the next start
+        self._finish_tags = {
+            key: tag
+            for key, tag in self._finish_tags.items()
+            if tag > self._virtual_times.get(key[0], 0.0)
+        }
@@ -1,6 +1,10 @@
 import asyncio
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import cast
+from uuid import UUID
 
 from uuid_extensions import uuid7
 from openai._utils import async_maybe_transform
@@ -14,6 +18,7 @@ from distributedinference.analytics.analytics import (
     EventName,
 )
 from distributedinference import api_logger
+from distributedinference.domain.node import get_worker_connected_nodes
 from distributedinference.domain.node import is_node_performant
 from distributedinference.domain.node import node_status_transition
 from distributedinference.domain.node import is_inference_request_finished
@@ -32,6 +37,12 @@ from distributedinference.repository.connected_node_repository import (
 
 from distributedinference.repository.node_repository import ConnectedNode
 from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
 from distributedinference.service.completions.entities import Message
 from distributedinference.service.node.protocol.health_check.protocol import (
     HealthCheckProtocol,
@@ -49,6 +60,8 @@ async def execute(
     connected_node_repository: ConnectedNodeRepository,
     analytics: Analytics,
     protocol_handler: ProtocolHandler,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
 ) -> None:
     """
     Checks for unhealthy nodes and nodes that are marked as RUNNING_BENCHMARKING.
@@ -62,7 +75,7 @@ async def execute(
         logger.debug("Running health check job!")
         # 1. Connection checks for all nodes that are shown as connected to the current backend
         await _check_connected_nodes_consistency(
-            connected_node_repository, node_repository
+            connected_node_repository, node_repository, worker_ipc_repository
         )
 
         # 2. Clean up nodes that are in RUNNING% state but without connected_host
@@ -77,6 +90,7 @@ async def execute(
                 connected_node_repository,
                 analytics,
                 protocol_handler,
+                node_status_queue_repository,
             )
 
 
@@ -177,11 +191,14 @@ async def _check_node_health(
     connected_node_repository: ConnectedNodeRepository,
     analytics: Analytics,
     _: ProtocolHandler,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
 ) -> None:
     is_healthy = False
     try:
+        # Nodes are disabled directly in the database
         node_status = await node_repository.get_node_status(node.uid)
         if node_status and node_status.is_disabled():
+            connected_node_repository.update_node_status(node.uid, node_status)
             logger.debug(
                 f"Skipping node health check for node_id={node.uid}, current status: {node_status.value}"
             )
@@ -194,7 +211,10 @@ async def _check_node_health(
         status = NodeStatus.RUNNING
         if not is_healthy:
             status = await node_status_transition.execute(
-                node_repository, node.uid, NodeStatusEvent.DEGRADED
+                node_repository,
+                node.uid,
+                NodeStatusEvent.DEGRADED,
+                connected_node_repository=connected_node_repository,
             )
         # TODO: add back soon
         # if status == NodeStatus.STOPPED_BENCHMARK_FAILED:
@@ -207,7 +227,11 @@ async def _check_node_health(
         #     )
 
         await update_node_status_use_case.execute(
-            node.uid, status, node_repository, connected_node_repository
+            node.uid,
+            status,
+            node_repository,
+            connected_node_repository,
+            node_status_queue_repository,
         )
 
     except Exception:
@@ -256,7 +280,7 @@ async def _disconnect_node(
 ):
     await connected_node_repository.close_node_connection(node.uid)
     connected_node_repository.deregister_node(node.uid)
-    await node_repository.update_node_to_disconnected(node.uid, node_status)
+    await node_repository.update_nodes_to_disconnected({node.uid: node_status})
     ping_pong_protocol: PingPongProtocol = protocol_handler.get(
         settings.PING_PONG_PROTOCOL_NAME
     )
@@ -268,7 +292,9 @@ async def _disconnect_node(
 
 
 async def _check_connected_nodes_consistency(
-    connected_node_repository: ConnectedNodeRepository, node_repository: NodeRepository
+    connected_node_repository: ConnectedNodeRepository,
+    node_repository: NodeRepository,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
 ) -> None:
     backend_host = connected_node_repository.get_backend_host()
     if backend_host is None:
@@ -276,21 +302,34 @@ async def _check_connected_nodes_consistency(
             "Backend host is None! Skipping connected nodes consistency check."
         )
         return None
-    connected_nodes_locally = (
-        connected_node_repository.get_locally_connected_node_keys()
-    )
+    if worker_ipc_repository:
+        # Nodes connected to the other worker processes of this backend are fine too
+        connected_nodes_locally = await get_worker_connected_nodes.execute(
+            connected_node_repository, worker_ipc_repository
+        )
+    else:
+        connected_nodes_locally = set(
+            connected_node_repository.get_locally_connected_node_keys()
+        )
     connected_nodes_from_db = (
         await node_repository.get_connected_nodes_to_the_current_backend(backend_host)
     )
-    for node_uid in connected_nodes_from_db:
-        if node_uid not in connected_nodes_locally:
-            node_status = await node_status_transition.execute(
-                node_repository, node_uid, NodeStatusEvent.STOP
-            )
-            logger.error(
-                f"Node {node_uid} connection is corrupted. Setting state to {node_status} and disconnecting..."
-            )
-            await node_repository.update_node_to_disconnected(node_uid, node_status)
+    corrupted_node_ids = [
+        node_uid
+        for node_uid in connected_nodes_from_db
+        if node_uid not in connected_nodes_locally
+    ]
+    if not corrupted_node_ids:
+        return None
+    current_statuses = await node_repository.get_nodes_status(corrupted_node_ids)
+    statuses = _get_stopped_statuses(
+        [(uid, current_statuses.get(uid)) for uid in corrupted_node_ids]
+    )
+    logger.error(
+        f"Connection of {len(statuses)} nodes is corrupted. Setting states to "
+        f"{_format_statuses(statuses)} and disconnecting..."
+    )
+    await node_repository.update_nodes_to_disconnected(statuses)
     return None
 
 
@@ -300,12 +339,27 @@ async def _clean_up_running_nodes_without_connected_host(
     nodes_without_connected_host = (
         await node_repository.get_running_nodes_without_connected_host()
     )
-    for uid, current_status in nodes_without_connected_host:
-        node_status = await node_status_transition.execute(
-            node_repository, uid, NodeStatusEvent.STOP
-        )
-        logger.error(
-            f"Node {uid} is {current_status.value} but has no connected host. Setting state to {node_status} and disconnecting..."
-        )
-        await node_repository.update_node_to_disconnected(uid, node_status)
+    if not nodes_without_connected_host:
+        return None
+    statuses = _get_stopped_statuses(nodes_without_connected_host)
+    logger.error(
+        f"{len(statuses)} nodes are RUNNING but have no connected host. Setting "
+        f"states to {_format_statuses(statuses)} and disconnecting..."
+    )
+    await node_repository.update_nodes_to_disconnected(statuses)
     return None
+
+
+def _get_stopped_statuses(
+    nodes: List[Tuple[UUID, Optional[NodeStatus]]]
+) -> Dict[UUID, NodeStatus]:
+    return {
+        uid: node_status_transition.get_next_status(
+            uid, current_status, NodeStatusEvent.STOP
+        )
+        for uid, current_status in nodes
+    }
+
+
+def _format_statuses(statuses: Dict[UUID, NodeStatus]) -> str:
+    return ", ".join(f"{uid}: {status.value}" for uid, status in statuses.items())
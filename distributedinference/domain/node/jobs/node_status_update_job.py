@@ -0,0 +1,61 @@
+import asyncio
+from typing import Dict
+from uuid import UUID
+
+import settings
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    node_status_queue_repository: NodeStatusQueueRepository,
+    node_repository: NodeRepository,
+    connected_node_repository: ConnectedNodeRepository,
+) -> None:
+    """
+    Saves the in memory status of the locally connected nodes to the database,
+    so changing a node's status doesn't wait for the database.
+    """
+    timeout = settings.NODE_STATUS_JOB_TIMEOUT_BETWEEN_RUNS_SECONDS
+    while True:
+        try:
+            await asyncio.sleep(timeout)
+            await _save_node_statuses(
+                node_status_queue_repository, node_repository, connected_node_repository
+            )
+        except Exception:
+            logger.error(
+                f"Failed to run node status update job, restarting in {timeout} seconds",
+                exc_info=True,
+            )
+
+
+async def _save_node_statuses(
+    node_status_queue_repository: NodeStatusQueueRepository,
+    node_repository: NodeRepository,
+    connected_node_repository: ConnectedNodeRepository,
+) -> None:
+    statuses: Dict[UUID, NodeStatus] = {}
+    for node_id in node_status_queue_repository.pop_all():
+        node = connected_node_repository.get_connected_node(node_id)
+        # Disconnected nodes already got their final status saved on disconnect
+        if node:
+            statuses[node_id] = node.node_status
+    if not statuses:
+        return
+    try:
+        await node_repository.update_nodes_status(statuses)
+    except Exception:
+        # Retried on the next run with the status the nodes will have by then
+        for node_id in statuses:
+            node_status_queue_repository.push(node_id)
+        raise
@@ -0,0 +1,46 @@
+import asyncio
+
+import settings
+from distributedinference import api_logger
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(peer_capacity_repository: PeerCapacityRepository) -> None:
+    """
+    Periodically pulls the capacity summary of every peer backend
+    """
+    timeout = settings.PEER_CAPACITY_GOSSIP_INTERVAL_SECONDS
+    while True:
+        try:
+            await _update_capacities(peer_capacity_repository)
+        except Exception:
+            logger.error("Failed to update peer capacities", exc_info=True)
+        await asyncio.sleep(timeout)
+
+
+async def _update_capacities(peer_capacity_repository: PeerCapacityRepository) -> None:
+    await asyncio.gather(
+        *[
+            _update_capacity(peer_capacity_repository, peer_ip)
+            for peer_ip in peer_capacity_repository.get_peer_ips()
+        ]
+    )
+
+
+async def _update_capacity(
+    peer_capacity_repository: PeerCapacityRepository, peer_ip: str
+) -> None:
+    try:
+        models = await peer_capacity_repository.fetch_capacity(
+            peer_ip, settings.PEER_CAPACITY_GOSSIP_INTERVAL_SECONDS
+        )
+    except Exception as e:
+        logger.debug(f"Failed to fetch capacity from peer {peer_ip}: {e}")
+        peer_capacity_repository.record_failure(peer_ip)
+        return
+    if models is not None:
+        peer_capacity_repository.set_capacity(peer_ip, models)
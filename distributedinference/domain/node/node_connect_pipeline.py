@@ -0,0 +1,113 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from distributedinference.domain.node.entities import NodeBenchmark
+from distributedinference.domain.node.entities import NodeConnection
+from distributedinference.domain.node.entities import NodeMetrics
+from distributedinference.domain.node.exceptions import NodeConnectRejectedError
+from distributedinference.repository.benchmark_repository import BenchmarkRepository
+from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.utils.batcher import Batcher
+
+
+class NodeConnectPipeline:
+    """
+    Database access of the connecting nodes. After a backend restart all of its
+    nodes reconnect at once, so connects are admitted at a limited rate and
+    concurrency, and the reads and writes of the nodes connecting at the same time
+    are batched into single queries. Benchmarks rarely change, they are cached.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        node_repository: NodeRepository,
+        benchmark_repository: BenchmarkRepository,
+        max_concurrent_connects: int,
+        connects_per_second: float,
+        admission_timeout_seconds: float,
+        batch_size: int,
+        batch_delay_seconds: float,
+        benchmark_cache_ttl_seconds: float,
+    ):
+        self._node_repository = node_repository
+        self._semaphore = asyncio.Semaphore(max_concurrent_connects)
+        self._connect_interval_seconds = 1 / connects_per_second
+        self._next_connect_time = 0.0
+        self._admission_timeout_seconds = admission_timeout_seconds
+        self._benchmark_cache_ttl_seconds = benchmark_cache_ttl_seconds
+        # (user_profile_id, node_id, model_name): (time.monotonic(), benchmark)
+        self._benchmark_cache: Dict[
+            Tuple[UUID, UUID, str], Tuple[float, NodeBenchmark]
+        ] = {}
+
+        self._node_metrics_batcher: Batcher[UUID, NodeMetrics] = Batcher(
+            node_repository.get_node_metrics_by_ids, batch_size, batch_delay_seconds
+        )
+        self._benchmark_batcher: Batcher[Tuple[UUID, UUID, str], NodeBenchmark] = (
+            Batcher(
+                benchmark_repository.get_node_benchmarks,
+                batch_size,
+                batch_delay_seconds,
+            )
+        )
+        self._connection_batcher: Batcher[NodeConnection, None] = Batcher(
+            self._save_connections, batch_size, batch_delay_seconds
+        )
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Raises NodeConnectRejectedError if the node would wait longer than the
+        admission timeout, the node is expected to reconnect later.
+        """
+        now = time.monotonic()
+        wait_seconds = self._next_connect_time - now
+        if wait_seconds > self._admission_timeout_seconds:
+            raise NodeConnectRejectedError()
+        self._next_connect_time = (
+            max(self._next_connect_time, now) + self._connect_interval_seconds
+        )
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        try:
+            async with asyncio.timeout(self._admission_timeout_seconds):
+                await self._semaphore.acquire()
+        except TimeoutError as e:
+            raise NodeConnectRejectedError() from e
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def get_node_metrics(self, node_id: UUID) -> Optional[NodeMetrics]:
+        return await self._node_metrics_batcher.get(node_id)
+
+    async def get_node_benchmark(
+        self, user_id: UUID, node_id: UUID, model_name: str
+    ) -> Optional[NodeBenchmark]:
+        key = (user_id, node_id, model_name)
+        cached = self._benchmark_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self._benchmark_cache_ttl_seconds:
+            return cached[1]
+        benchmark = await self._benchmark_batcher.get(key)
+        # Missing benchmarks are not cached, the node may be benchmarking right now
+        if benchmark:
+            self._benchmark_cache[key] = (time.monotonic(), benchmark)
+        else:
+            self._benchmark_cache.pop(key, None)
+        return benchmark
+
+    async def set_node_connection_timestamp(self, connection: NodeConnection) -> None:
+        await self._connection_batcher.get(connection)
+
+    async def _save_connections(self, connections: List[NodeConnection]) -> Dict:
+        await self._node_repository.set_nodes_connection_timestamp(connections)
+        return {}
@@ -0,0 +1,237 @@
+"""
+Binary framing of the node WebSocket messages.
+
+A node offers the `galadriel.cbor.v1` WebSocket subprotocol to use it, nodes that do
+not offer it (and backends that do not accept it) keep using JSON text frames.
+With the subprotocol every message in both directions is a CBOR encoded map in a
+binary frame, with the same fields as the JSON messages.
+
+Streamed inference responses may omit the chunk envelope fields (`id`, `object`,
+`created`, `model`, `system_fingerprint`) that did not change since the previous
+frame of the same request, the backend fills them back in. The first frame of a
+request carries all of them.
+
+Any node may also batch the responses of several requests into one frame, see
+MULTIPLEXED_RESPONSES_FEATURE.
+
+Diffusion nodes may send the generated images as raw bytes in binary frames
+instead of base64 strings in the response, see BINARY_IMAGES_FEATURE. An image is
+sent in chunks, every chunk frame is IMAGE_CHUNK_HEADER followed by the UTF-8
+request id and the chunk bytes, in order. The response message follows the last
+chunk of the last image, with an empty `images` list.
+
+Compression is left to permessage-deflate, which uvicorn negotiates per connection
+when the node offers it.
+"""
+
+import struct
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import cbor2
+
+import settings
+from distributedinference.domain.node.entities import InferenceStatusCodes
+from distributedinference.domain.node.entities import NodeFrameEncoding
+from distributedinference.domain.node.exceptions import InvalidImageChunkError
+
+BINARY_SUBPROTOCOL = "galadriel.cbor.v1"
+
+# Sent in the handshake response of backends that accept frames of the form
+# {"responses": [<response frame>, ...]}, nodes may then send the chunks of
+# several requests in one frame. Nodes must not send them without the header.
+PROTOCOL_FEATURES_HEADER = "Protocol-Features"
+MULTIPLEXED_RESPONSES_FEATURE = "multiplexed-responses"
+# Diffusion nodes may send images in binary chunk frames
+BINARY_IMAGES_FEATURE = "binary-images"
+
+# magic, request id length, image index, offset of the chunk in the image, flags.
+# The magic is a CBOR byte string header, never the start of a CBOR map frame
+IMAGE_CHUNK_HEADER = struct.Struct("<2sBHIB")
+IMAGE_CHUNK_MAGIC = b"GI"
+IMAGE_CHUNK_LAST_FLAG = 1
+
+CHUNK_ENVELOPE_FIELDS = ("id", "object", "created", "model", "system_fingerprint")
+
+_FINAL_STATUSES = (InferenceStatusCodes.DONE.value, InferenceStatusCodes.ERROR.value)
+
+# A node runs a few parallel requests, this only guards against requests that are
+# never finished by the node
+MAX_TRACKED_REQUESTS = 1024
+
+
+def get_encoding(subprotocols: List[str]) -> NodeFrameEncoding:
+    if settings.NODE_BINARY_FRAMES_ENABLED and BINARY_SUBPROTOCOL in subprotocols:
+        return NodeFrameEncoding.CBOR
+    return NodeFrameEncoding.JSON
+
+
+def get_subprotocol(encoding: NodeFrameEncoding) -> Optional[str]:
+    if encoding is NodeFrameEncoding.CBOR:
+        return BINARY_SUBPROTOCOL
+    return None
+
+
+def get_handshake_headers() -> List[Tuple[bytes, bytes]]:
+    return [
+        (
+            PROTOCOL_FEATURES_HEADER.lower().encode(),
+            f"{MULTIPLEXED_RESPONSES_FEATURE},{BINARY_IMAGES_FEATURE}".encode(),
+        )
+    ]
+
+
+def get_responses(message: Dict) -> Optional[List[Dict]]:
+    """
+    Returns the responses of a multiplexed frame, None for other frames
+    """
+    return message.get("responses")
+
+
+def encode(message: Dict) -> bytes:
+    return cbor2.dumps(message)
+
+
+class FrameDecoder:
+    """
+    Decodes the binary frames of one node connection, keeps the last chunk envelope
+    of every running request.
+    """
+
+    def __init__(self):
+        self._envelopes: Dict[str, Dict] = {}
+
+    def decode(self, data: bytes) -> Dict:
+        """
+        Raises cbor2.CBORDecodeError if the frame is not a valid CBOR map
+        """
+        message = cbor2.loads(data)
+        if not isinstance(message, dict):
+            raise cbor2.CBORDecodeError("Frame is not a map")
+        responses = get_responses(message)
+        if isinstance(responses, list):
+            for response in responses:
+                if isinstance(response, dict):
+                    self._restore_response(response)
+        else:
+            self._restore_response(message)
+        return message
+
+    def _restore_response(self, response: Dict) -> None:
+        request_id = response.get("request_id")
+        if request_id is None:
+            return
+        chunk = response.get("chunk")
+        if isinstance(chunk, dict):
+            self._restore_envelope(request_id, chunk)
+        if response.get("status") in _FINAL_STATUSES:
+            self._envelopes.pop(request_id, None)
+
+    def _restore_envelope(self, request_id: str, chunk: Dict) -> None:
+        envelope = self._envelopes.get(request_id)
+        if envelope is None:
+            if len(self._envelopes) >= MAX_TRACKED_REQUESTS:
+                # Dicts keep the insertion order, the oldest request goes first
+                del self._envelopes[next(iter(self._envelopes))]
+            envelope = self._envelopes[request_id] = {}
+        for field in CHUNK_ENVELOPE_FIELDS:
+            if field in chunk:
+                envelope[field] = chunk[field]
+            elif field in envelope:
+                chunk[field] = envelope[field]
+
+
+def is_image_chunk(data: bytes) -> bool:
+    return data[:2] == IMAGE_CHUNK_MAGIC
+
+
+def encode_image_chunk(
+    request_id: str, index: int, offset: int, chunk: bytes, is_last: bool
+) -> bytes:
+    request_id_bytes = request_id.encode()
+    header = IMAGE_CHUNK_HEADER.pack(
+        IMAGE_CHUNK_MAGIC,
+        len(request_id_bytes),
+        index,
+        offset,
+        IMAGE_CHUNK_LAST_FLAG if is_last else 0,
+    )
+    return header + request_id_bytes + chunk
+
+
+class ImageChunkAssembler:
+    """
+    Joins the image chunk frames of one node connection. Returns the response
+    message of every completed image, the images are then available before the
+    rest of the request arrives. A request going over max_bytes_per_request gets
+    an error response and the rest of its chunks are dropped.
+    """
+
+    def __init__(self, max_bytes_per_request: int):
+        self._max_bytes_per_request = max_bytes_per_request
+        # request_id: image index: received bytes
+        self._images: Dict[str, Dict[int, bytearray]] = {}
+        # request_id: bytes received for the request
+        self._sizes: Dict[str, int] = {}
+        self._failed_request_ids: Dict[str, None] = {}
+
+    def add(self, data: bytes) -> Optional[Dict]:
+        """
+        Raises InvalidImageChunkError if the frame is not a valid image chunk
+        """
+        try:
+            _, request_id_size, index, offset, flags = IMAGE_CHUNK_HEADER.unpack_from(
+                data
+            )
+        except struct.error as e:
+            raise InvalidImageChunkError("Truncated image chunk header") from e
+        start = IMAGE_CHUNK_HEADER.size + request_id_size
+        try:
+            request_id = data[IMAGE_CHUNK_HEADER.size : start].decode()
+        except UnicodeDecodeError as e:
+            raise InvalidImageChunkError("Invalid image chunk request id") from e
+        if request_id in self._failed_request_ids:
+            return None
+        chunk = memoryview(data)[start:]
+
+        images = self._images.get(request_id)
+        if images is None:
+            if len(self._images) >= MAX_TRACKED_REQUESTS:
+                # Dicts keep the insertion order, the oldest request goes first
+                self.finish(next(iter(self._images)))
+            images = self._images[request_id] = {}
+            self._sizes[request_id] = 0
+        size = self._sizes[request_id] + len(chunk)
+        if size > self._max_bytes_per_request:
+            return self._fail(request_id, "Images exceed the size limit")
+        image = images.setdefault(index, bytearray())
+        if offset != len(image):
+            return self._fail(request_id, f"Image {index} chunk out of order")
+        image += chunk
+        self._sizes[request_id] = size
+        if not flags & IMAGE_CHUNK_LAST_FLAG:
+            return None
+        return {
+            "request_id": request_id,
+            "image_index": index,
+            "image": bytes(images.pop(index)),
+        }
+
+    def finish(self, request_id: str) -> None:
+        """
+        Forgets the request, called with its response message
+        """
+        self._images.pop(request_id, None)
+        self._sizes.pop(request_id, None)
+        self._failed_request_ids.pop(request_id, None)
+
+    def _fail(self, request_id: str, message: str) -> Dict:
+        self._images.pop(request_id, None)
+        self._sizes.pop(request_id, None)
+        if len(self._failed_request_ids) >= MAX_TRACKED_REQUESTS:
+            del self._failed_request_ids[next(iter(self._failed_request_ids))]
+        self._failed_request_ids[request_id] = None
+        return {"request_id": request_id, "images": [], "error": message}
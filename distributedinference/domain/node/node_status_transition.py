@@ -4,6 +4,9 @@ from uuid import UUID
 
 from distributedinference import api_logger
 from distributedinference.domain.node.entities import ModelType, NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
 from distributedinference.repository.node_repository import NodeRepository
 from distributedinference.service import error_responses
 
@@ -52,15 +55,24 @@ async def execute(
     node_id: UUID,
     event: NodeStatusEvent,
     node_model_type: Optional[ModelType] = None,
+    connected_node_repository: Optional[ConnectedNodeRepository] = None,
 ) -> NodeStatus:
-    status = await node_repository.get_node_status(node_id=node_id)
+    status = await _get_status(node_repository, node_id, connected_node_repository)
+    return get_next_status(node_id, status, event, node_model_type)
 
+
+def get_next_status(
+    node_id: UUID,
+    status: Optional[NodeStatus],
+    event: NodeStatusEvent,
+    node_model_type: Optional[ModelType] = None,
+) -> NodeStatus:
     # TODO: what if status in incorrect state?
     if event == event.START:
         # TODO: skip_benchmarking is a temp feature for image generation nodes only
-        if node_model_type is ModelType.DIFFUSION:
+        if node_model_type in (ModelType.DIFFUSION, ModelType.EMBEDDING):
             logger.info(
-                f"Node {node_id} is with a diffusion model, skipping benchmarking"
+                f"Node {node_id} is with a {node_model_type.name.lower()} model, skipping benchmarking"
             )
             return NodeStatus.RUNNING
         status = START_TRANSITIONS.get(status)
@@ -83,6 +95,20 @@ async def execute(
     raise error_responses.InternalServerAPIError()
 
 
+async def _get_status(
+    node_repository: NodeRepository,
+    node_id: UUID,
+    connected_node_repository: Optional[ConnectedNodeRepository],
+) -> Optional[NodeStatus]:
+    # The status of a locally connected node is kept up to date in memory,
+    # the database may not have the latest one yet
+    if connected_node_repository:
+        node = connected_node_repository.get_connected_node(node_id)
+        if node:
+            return node.node_status
+    return await node_repository.get_node_status(node_id=node_id)
+
+
 def _print_error(status, event):
     logger.error(
         f"Failed to do a valid Node Status Transition, current status: {status}"
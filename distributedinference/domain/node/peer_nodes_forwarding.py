@@ -1,62 +1,200 @@
-import ipaddress
+import asyncio
 from typing import AsyncGenerator
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 import openai
+from openai.types.chat import ChatCompletionChunk
 
 import settings
 from distributedinference import api_logger
+from distributedinference.domain.node.entities import InferenceError
+from distributedinference.domain.node.entities import InferenceErrorStatusCodes
 from distributedinference.domain.node.entities import InferenceRequest
 from distributedinference.domain.node.entities import InferenceResponse
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
 
 logger = api_logger.get()
 
+_Stream = Tuple[str, openai.AsyncStream, ChatCompletionChunk]
+
 
 # pylint: disable=R0801
 async def execute(
-    api_key: str, request: InferenceRequest
+    api_key: str,
+    request: InferenceRequest,
+    peer_capacity_repository: Optional[PeerCapacityRepository],
 ) -> AsyncGenerator[Optional[InferenceResponse], None]:
-    peer_node_ips = settings.PEER_NODES_LIST
+    """
+    Forwards the request to the peer backends that have free capacity for the model,
+    best time to first token first. If the first peer has not responded within
+    PEER_FORWARDING_FALLBACK_DELAY_SECONDS the next one is started in parallel and
+    the first to send a chunk wins.
 
-    for node_ip in peer_node_ips:
-        base_url = _concatenate_base_url(node_ip)
-        if not base_url:
-            continue
-        logger.debug(f"Forwarding request to peer node: {base_url}")
-
-        client = openai.AsyncOpenAI(base_url=base_url, api_key=api_key)
-
-        # Use Galadriel node id to for a place holder, and the response won't be inserted into database
-        node_uid = settings.GALADRIEL_NODE_INFO_ID
-        hostname = settings.HOSTNAME
-
-        # Force streaming and token usage inclusion
-        request.chat_request["stream"] = True  # type: ignore
-        request.chat_request["stream_options"] = {"include_usage": True}
-        # Add forwarding flag indicating this is a peer forwarding call
-        request.chat_request["extra_headers"] = {"Peer-Forwarding-From": hostname}  # type: ignore
-        try:
-            completion = await client.chat.completions.create(**request.chat_request)
-            async for chunk in completion:  # type: ignore
-                yield InferenceResponse(
-                    node_id=node_uid,
-                    request_id=request.id,
-                    chunk=chunk,
-                )
-            logger.debug(f"Inference completed by the peer node {node_ip}")
-            return
-        except Exception as e:
-            logger.debug(
-                f"Exception occurred by the peer node {node_ip}, continue: {e}"
+    Yields None if no peer could serve the request.
+    """
+    if not peer_capacity_repository:
+        yield None
+        return
+    peer_ips = get_candidate_peers(request.model, peer_capacity_repository)
+    if not peer_ips:
+        yield None
+        return
+
+    chat_request = _get_forwarding_chat_request(request)
+    stream = await _open_first_stream(
+        api_key, chat_request, peer_ips, peer_capacity_repository
+    )
+    if not stream:
+        yield None
+        return
+
+    # Use Galadriel node id to for a place holder, and the response won't be inserted into database
+    node_uid = settings.GALADRIEL_NODE_INFO_ID
+    peer_ip, completion, first_chunk = stream
+    logger.debug(f"Forwarded request {request.id} to the peer node {peer_ip}")
+    try:
+        yield InferenceResponse(
+            node_id=node_uid, request_id=request.id, chunk=first_chunk
+        )
+        async for chunk in completion:  # type: ignore
+            yield InferenceResponse(
+                node_id=node_uid, request_id=request.id, chunk=chunk
             )
+        peer_capacity_repository.record_success(peer_ip)
+        logger.debug(f"Inference completed by the peer node {peer_ip}")
+    except Exception as e:
+        # Chunks were already streamed to the user, can't retry anywhere else
+        logger.warning(f"Peer node {peer_ip} failed mid stream: {e}")
+        peer_capacity_repository.record_failure(peer_ip)
+        yield InferenceResponse(
+            node_id=node_uid,
+            request_id=request.id,
+            error=InferenceError(
+                status_code=InferenceErrorStatusCodes.INTERNAL_SERVER_ERROR,
+                message="Peer node disconnected",
+            ),
+        )
+    finally:
+        # The consumer may stop early, without a success or a failure recorded
+        peer_capacity_repository.record_attempt_ended(peer_ip)
+        await completion.close()
+
+
+def get_candidate_peers(
+    model: str, peer_capacity_repository: PeerCapacityRepository
+) -> List[str]:
+    """
+    Peers known to have free slots for the model go first, ordered by TTFT.
+    Peers that have not shared their capacity recently are tried after them,
+    peers that reported no free slots or have an open circuit breaker are skipped.
+    """
+    with_capacity: List[Tuple[float, str]] = []
+    unknown: List[str] = []
+    for peer_ip in peer_capacity_repository.get_peer_ips():
+        if not peer_capacity_repository.is_available(peer_ip):
+            continue
+        capacity = peer_capacity_repository.get_capacity(peer_ip)
+        if not capacity:
+            unknown.append(peer_ip)
+            continue
+        model_capacity = capacity.models.get(model)
+        if not model_capacity or model_capacity.free_slots <= 0:
             continue
-    yield None
+        ttft = model_capacity.average_time_to_first_token
+        with_capacity.append((ttft if ttft is not None else float("inf"), peer_ip))
+    return [peer_ip for _, peer_ip in sorted(with_capacity)] + unknown
 
 
-def _concatenate_base_url(ip: str) -> Optional[str]:
+async def _open_first_stream(
+    api_key: str,
+    chat_request: Dict,
+    peer_ips: List[str],
+    peer_capacity_repository: PeerCapacityRepository,
+) -> Optional[_Stream]:
+    remaining = list(peer_ips)
+    # task: peer ip
+    tasks: Dict[asyncio.Task, str] = {}
+    winner: Optional[_Stream] = None
+
+    def _start_next() -> None:
+        peer_ip = remaining.pop(0)
+        peer_capacity_repository.record_attempt(peer_ip)
+        tasks[asyncio.create_task(_open_stream(api_key, chat_request, peer_ip))] = (
+            peer_ip
+        )
+
+    _start_next()
+    try:
+        while tasks and not winner:
+            done, _ = await asyncio.wait(
+                tasks,
+                timeout=(
+                    settings.PEER_FORWARDING_FALLBACK_DELAY_SECONDS
+                    if remaining
+                    else None
+                ),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # Slow peer, start a fallback in parallel
+                _start_next()
+                continue
+            for task in done:
+                del tasks[task]
+                peer_ip, stream = task.result()
+                if not stream:
+                    peer_capacity_repository.record_failure(peer_ip)
+                elif winner:
+                    # Lost the race, the peer did respond
+                    peer_capacity_repository.record_success(peer_ip)
+                    await stream[1].close()
+                else:
+                    winner = stream
+            if not winner and not tasks and remaining:
+                _start_next()
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task, peer_ip in tasks.items():
+            peer_capacity_repository.record_attempt_ended(peer_ip)
+            try:
+                _, stream = await task
+                if stream:
+                    await stream[1].close()
+            except BaseException:
+                pass
+    return winner
+
+
+async def _open_stream(
+    api_key: str, chat_request: Dict, peer_ip: str
+) -> Tuple[str, Optional[_Stream]]:
+    """
+    Returns the stream once the peer sent its first chunk, None if the peer failed
+    """
+    client = openai.AsyncOpenAI(base_url=f"http://{peer_ip}/v1", api_key=api_key)
+    completion = None
     try:
-        ipaddress.ip_address(ip)
-        return f"http://{ip}/v1"
-    except ValueError:
-        logger.error(f"Invalid peer node IP address: {ip}")
-        return None
+        completion = await client.chat.completions.create(**chat_request)
+        first_chunk = await anext(completion)  # type: ignore
+        return peer_ip, (peer_ip, completion, first_chunk)  # type: ignore
+    except Exception as e:
+        logger.debug(f"Exception occurred by the peer node {peer_ip}, continue: {e}")
+        if completion:
+            await completion.close()  # type: ignore
+        return peer_ip, None
+
+
+def _get_forwarding_chat_request(request: InferenceRequest) -> Dict:
+    chat_request = dict(request.chat_request)
+    # Force streaming and token usage inclusion
+    chat_request["stream"] = True
+    chat_request["stream_options"] = {"include_usage": True}
+    # Add forwarding flag indicating this is a peer forwarding call
+    chat_request["extra_headers"] = {"Peer-Forwarding-From": settings.HOSTNAME}
+    return chat_request
@@ -0,0 +1,114 @@
+"""
+Prompt prefix affinity routing.
+
+Requests that start with the same long prefix (system prompt, agent context, earlier
+turns of a conversation) are sent to the same node, so the node can reuse the KV
+cache of the prefix instead of computing it again.
+
+The leading messages are hashed into a key that is looked up on a consistent hashing
+ring of the model's nodes. To not overload the node of a popular prefix, a node only
+takes the request while its load stays within PREFIX_AFFINITY_LOAD_FACTOR times the
+average load of the eligible nodes, otherwise the next node on the ring is tried
+("consistent hashing with bounded loads").
+"""
+
+import hashlib
+import math
+from typing import List
+from typing import Mapping
+from typing import Optional
+
+import orjson
+from openai.types import CompletionUsage
+from prometheus_client import Counter
+
+import settings
+from distributedinference.domain.node.entities import ConnectedNode
+
+inference_prefix_routed_requests_counter = Counter(
+    "inference_prefix_routed_requests",
+    "Requests by where they were routed: the home node of their prefix, "
+    "spilled to another node or without a long enough prefix",
+    ["model_name", "result"],
+)
+inference_prompt_tokens_counter = Counter(
+    "inference_prompt_tokens",
+    "Prompt tokens by model name and routing",
+    ["model_name", "routing"],
+)
+inference_cached_prompt_tokens_counter = Counter(
+    "inference_cached_prompt_tokens",
+    "Prompt tokens served from the node prefix cache by model name and routing",
+    ["model_name", "routing"],
+)
+
+
+def is_enabled() -> bool:
+    return settings.PREFIX_AFFINITY_ENABLED
+
+
+def get_prefix_key(chat_request: Mapping) -> Optional[int]:
+    """
+    Hashes the leading messages until they cover PREFIX_AFFINITY_MIN_CHARS, returns
+    None if the whole prompt is shorter than that
+    """
+    hasher = hashlib.blake2b(digest_size=8)
+    chars = 0
+    for message in chat_request.get("messages") or []:
+        content = message.get("content")
+        hasher.update(
+            orjson.dumps([message.get("role"), content], option=orjson.OPT_SORT_KEYS)
+        )
+        chars += _get_content_length(content)
+        if chars >= settings.PREFIX_AFFINITY_MIN_CHARS:
+            return int.from_bytes(hasher.digest(), "big")
+    return None
+
+
+def select_node(
+    model: str, ring_nodes: List[ConnectedNode], eligible_nodes: List[ConnectedNode]
+) -> Optional[ConnectedNode]:
+    """
+    ring_nodes: all the model's nodes in ring order for the prefix
+    eligible_nodes: the ones that can take the request, in the same order
+    """
+    if not eligible_nodes:
+        return None
+    total_load = sum(node.active_requests_count() for node in eligible_nodes)
+    bound = math.ceil(
+        settings.PREFIX_AFFINITY_LOAD_FACTOR * (total_load + 1) / len(eligible_nodes)
+    )
+    node = next(
+        (node for node in eligible_nodes if node.active_requests_count() + 1 <= bound),
+        None,
+    )
+    if not node:
+        node = min(eligible_nodes, key=lambda n: n.active_requests_count())
+    result = "home" if node is ring_nodes[0] else "spilled"
+    inference_prefix_routed_requests_counter.labels(model, result).inc()
+    return node
+
+
+def record_no_prefix(model: str) -> None:
+    inference_prefix_routed_requests_counter.labels(model, "no_prefix").inc()
+
+
+def record_usage(model: str, usage: CompletionUsage, is_prefix_routed: bool) -> None:
+    routing = "prefix" if is_prefix_routed else "random"
+    inference_prompt_tokens_counter.labels(model, routing).inc(usage.prompt_tokens)
+    if usage.prompt_tokens_details and usage.prompt_tokens_details.cached_tokens:
+        inference_cached_prompt_tokens_counter.labels(model, routing).inc(
+            usage.prompt_tokens_details.cached_tokens
+        )
+
+
+def _get_content_length(content) -> int:
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(
+            len(part["text"])
+            for part in content
+            if isinstance(part, dict) and isinstance(part.get("text"), str)
+        )
+    return 0
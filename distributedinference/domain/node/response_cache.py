@@ -0,0 +1,81 @@
+"""
+Exact match cache of deterministic chat completions.
+
+Requests with temperature 0 or a fixed seed are expected to get the same answer
+every time (evaluation harnesses, agents re-asking the same planning prompt), so
+the answer of the first one is replayed to the identical requests that follow
+instead of running them on a node again.
+
+The key is a hash of the user, the model and the whole chat request except the
+`user` field, the cache is not shared between users. Users opt out by setting
+`response_cache_disabled` in their profile data.
+
+Replayed usage is billed according to RESPONSE_CACHE_BILLING_POLICY:
+* "bill": saved like a node served it, with the Galadriel node as producer
+* "free": only counted in the metrics
+"""
+
+import hashlib
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from prometheus_client import Counter
+
+import settings
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.user.entities import User
+
+BILLING_POLICY_BILL = "bill"
+BILLING_POLICY_FREE = "free"
+
+OPT_OUT_PROFILE_KEY = "response_cache_disabled"
+
+response_cache_requests_counter = Counter(
+    "response_cache_requests",
+    "Deterministic requests by model name and cache result, hit or miss",
+    ["model_name", "result"],
+)
+response_cache_served_tokens_counter = Counter(
+    "response_cache_served_tokens",
+    "Total tokens of the replayed responses by model name and billing policy",
+    ["model_name", "billing_policy"],
+)
+
+
+def is_enabled_for(user: User) -> bool:
+    return settings.RESPONSE_CACHE_ENABLED and not (user.profile_data or {}).get(
+        OPT_OUT_PROFILE_KEY
+    )
+
+
+def is_billed() -> bool:
+    return settings.RESPONSE_CACHE_BILLING_POLICY == BILLING_POLICY_BILL
+
+
+def get_key(user_uid: UUID, request: InferenceRequest) -> Optional[str]:
+    """
+    Returns None for the requests that are not deterministic
+    """
+    chat_request = request.chat_request
+    if chat_request.get("temperature") != 0 and chat_request.get("seed") is None:
+        return None
+    data = orjson.dumps(
+        [
+            str(user_uid),
+            request.model,
+            {key: value for key, value in chat_request.items() if key != "user"},
+        ],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(data).hexdigest()
+
+
+def record_result(model: str, is_hit: bool) -> None:
+    response_cache_requests_counter.labels(model, "hit" if is_hit else "miss").inc()
+
+
+def record_served_tokens(model: str, total_tokens: int) -> None:
+    response_cache_served_tokens_counter.labels(
+        model, settings.RESPONSE_CACHE_BILLING_POLICY
+    ).inc(total_tokens)
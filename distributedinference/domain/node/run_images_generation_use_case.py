@@ -1,12 +1,21 @@
+import asyncio
+import base64
+from typing import Dict
 from typing import Optional
+from uuid import UUID
 
 from openai.types.image import Image
 from openai.types.images_response import ImagesResponse
 
+import settings
 from distributedinference import api_logger
+from distributedinference.domain.node import image_generation_scheduler
 from distributedinference.domain.node import select_node_use_case
 from distributedinference.domain.node.entities import ConnectedNode
 from distributedinference.domain.node.entities import ImageGenerationWebsocketRequest
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -16,54 +25,127 @@ from distributedinference.utils.google_cloud_storage import GoogleCloudStorage
 logger = api_logger.get()
 
 
+# pylint: disable=R0913
 async def execute(
     websocket_request: ImageGenerationWebsocketRequest,
     model: str,
     response_format: str,
     connected_node_repository: ConnectedNodeRepository,
     gcs_client: GoogleCloudStorage,
+    scheduler: Optional[ImageGenerationScheduler] = None,
+    user_id: Optional[UUID] = None,
 ) -> ImagesResponse:
-    node = _select_node(connected_node_repository, model)
-    if not node:
-        logger.error(
-            f"No available nodes to process the image generation request {websocket_request.request_id}"
+    if not scheduler or not user_id:
+        node = _select_node(connected_node_repository, model)
+        if not node:
+            logger.error(
+                f"No available nodes to process the image generation request {websocket_request.request_id}"
+            )
+            raise error_responses.NoAvailableInferenceNodesError()
+        return await _run(
+            websocket_request,
+            node,
+            response_format,
+            connected_node_repository,
+            gcs_client,
+        )
+
+    cost = image_generation_scheduler.get_cost(
+        websocket_request.n, websocket_request.size, settings.IMAGE_GENERATION_STEPS
+    )
+    node = await scheduler.acquire(
+        model, user_id, cost, settings.IMAGE_GENERATION_QUEUE_TIMEOUT_SECONDS
+    )
+    try:
+        return await _run(
+            websocket_request,
+            node,
+            response_format,
+            connected_node_repository,
+            gcs_client,
         )
-        raise error_responses.NoAvailableInferenceNodesError()
+    finally:
+        scheduler.release(node.uid, cost)
 
+
+async def _run(
+    websocket_request: ImageGenerationWebsocketRequest,
+    node: ConnectedNode,
+    response_format: str,
+    connected_node_repository: ConnectedNodeRepository,
+    gcs_client: GoogleCloudStorage,
+) -> ImagesResponse:
     await connected_node_repository.send_image_generation_request(
         node.uid, websocket_request
     )
 
-    response = await connected_node_repository.receive_for_image_generation_request(
-        node.uid, websocket_request.request_id
-    )
+    # Images sent in binary frames, by index. The upload of every image starts as
+    # soon as it is complete
+    binary_images: Dict[int, bytes] = {}
+    uploads: Dict[int, asyncio.Task] = {}
+
+    def _on_image(index: int, image: bytes) -> None:
+        if response_format == "b64_json":
+            binary_images[index] = image
+        else:
+            uploads[index] = asyncio.create_task(
+                gcs_client.upload_to_gcs(websocket_request.request_id, index, image)
+            )
+
+    try:
+        response = await connected_node_repository.receive_for_image_generation_request(
+            node.uid, websocket_request.request_id, _on_image
+        )
+    except BaseException:
+        # The request was cancelled or failed, the images are not returned
+        _cancel_uploads(uploads)
+        raise
     if not response or response.error is not None:
+        _cancel_uploads(uploads)
         logger.error(
             f"Image generation service request {websocket_request.request_id} failed with error response: {response.error if response else 'no response'}"
         )
         raise error_responses.InternalServerAPIError()
 
-    logger.info(f"Image generation service request: {response} received")
+    logger.info(
+        f"Image generation service request {websocket_request.request_id}: {len(response.images) + len(binary_images) + len(uploads)} images received"
+    )
+    if binary_images:
+        images = [
+            base64.b64encode(binary_images[index]).decode()
+            for index in sorted(binary_images)
+        ]
+    elif uploads:
+        images = await asyncio.gather(*[uploads[index] for index in sorted(uploads)])
     # Return base64 encoded images if it is requested
+    elif response_format == "b64_json":
+        images = response.images
+    else:
+        # Upload images to GCS in parallel and return URLs
+        images = await asyncio.gather(
+            *[
+                gcs_client.decode_b64_and_upload_to_gcs(
+                    websocket_request.request_id, idx, image
+                )
+                for idx, image in enumerate(response.images)
+            ]
+        )
     if response_format == "b64_json":
         return ImagesResponse(
-            created=len(response.images),
-            data=[Image(b64_json=image) for image in response.images],
+            created=len(images),
+            data=[Image(b64_json=image) for image in images],
         )
-    # Upload images to GCS and return URLs
     return ImagesResponse(
-        created=len(response.images),
-        data=[
-            Image(
-                url=await gcs_client.decode_b64_and_upload_to_gcs(
-                    websocket_request.request_id, idx, image
-                )
-            )
-            for idx, image in enumerate(response.images)
-        ],
+        created=len(images),
+        data=[Image(url=url) for url in images],
     )
 
 
+def _cancel_uploads(uploads: Dict[int, asyncio.Task]) -> None:
+    for upload in uploads.values():
+        upload.cancel()
+
+
 def _select_node(
     connected_node_repository: ConnectedNodeRepository,
     request_model: str,
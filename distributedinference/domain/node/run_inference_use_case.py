@@ -1,29 +1,42 @@
 from typing import AsyncGenerator
+from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from uuid import UUID
 
+import orjson
 from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk
 from prometheus_client import Gauge
-from prometheus_client import Histogram
 
 import settings
 from distributedinference import api_logger
 from distributedinference.analytics.analytics import Analytics
 from distributedinference.analytics.analytics import AnalyticsEvent
 from distributedinference.analytics.analytics import EventName
+from distributedinference.domain.metrics import node_latency_metrics
+from distributedinference.domain.node import hedged_dispatch
 from distributedinference.domain.node import is_inference_request_finished
 from distributedinference.domain.node import is_node_performant
 from distributedinference.domain.node import llm_inference_proxy
 from distributedinference.domain.node import node_status_transition
 from distributedinference.domain.node import peer_nodes_forwarding
+from distributedinference.domain.node import prefix_affinity
+from distributedinference.domain.node import response_cache
 from distributedinference.domain.node import select_node_use_case
+from distributedinference.domain.node import token_admission
 from distributedinference.domain.node import update_node_status_use_case
+from distributedinference.domain.node import worker_forwarding
+from distributedinference.domain.node.entities import CachedResponse
 from distributedinference.domain.node.entities import ConnectedNode
 from distributedinference.domain.node.entities import InferenceErrorStatusCodes
 from distributedinference.domain.node.entities import InferenceRequest
 from distributedinference.domain.node.entities import InferenceResponse
 from distributedinference.domain.node.entities import InferenceStatusCodes
+from distributedinference.domain.node.entities import NodeLatencyMetric
 from distributedinference.domain.node.entities import NodeMetricsIncrement
+from distributedinference.domain.node.entities import RequestTokens
 from distributedinference.domain.node.exceptions import NoAvailableNodesError
 from distributedinference.domain.node.node_status_transition import NodeStatusEvent
 from distributedinference.domain.node.time_tracker import TimeTracker
@@ -34,6 +47,15 @@ from distributedinference.repository.metrics_queue_repository import (
     MetricsQueueRepository,
 )
 from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
 from distributedinference.repository.tokens_repository import (
     DailyUserModelUsageIncrement,
 )
@@ -42,15 +64,13 @@ from distributedinference.repository.tokens_repository import UsageTokens
 from distributedinference.repository.tokens_queue_repository import (
     TokensQueueRepository,
 )
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.utils.timer import async_timer
 
 logger = api_logger.get()
 
-node_time_to_first_token_histogram = Histogram(
-    "node_time_to_first_token_histogram",
-    "Time to first token histogram in seconds by model and node uid",
-    ["model_name", "node_uid", "node_status"],
-    buckets=[0.01, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10],
-)
 llm_fallback_called_gauge = Gauge(
     "llm_fallback_called_gauge",
     "Indicates how many times the llm fallback is called",
@@ -70,6 +90,10 @@ class InferenceExecutor:
         metrics_queue_repository: MetricsQueueRepository,
         tokens_queue_repository: TokensQueueRepository,
         analytics: Analytics,
+        worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+        peer_capacity_repository: Optional[PeerCapacityRepository] = None,
+        node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
+        response_cache_repository: Optional[ResponseCacheRepository] = None,
     ):
         self.node_repository = node_repository
         self.connected_node_repository = connected_node_repository
@@ -77,8 +101,18 @@ class InferenceExecutor:
         self.metrics_queue_repository = metrics_queue_repository
         self.tokens_queue_repository = tokens_queue_repository
         self.analytics = analytics
+        self.worker_ipc_repository = worker_ipc_repository
+        self.peer_capacity_repository = peer_capacity_repository
+        self.node_status_queue_repository = node_status_queue_repository
+        self.response_cache_repository = response_cache_repository
 
         self.is_include_usage: bool = False
+        self.prefix_key: Optional[int] = None
+        # Estimated once, only when the token admission is enabled
+        self.request_tokens: Optional[RequestTokens] = None
+        # Set only when the response can be cached
+        self.cache_key: Optional[str] = None
+        self.cached_chunks: List[bytes] = []
         self.usage: Optional[CompletionUsage] = None
         self.request_successful = False
 
@@ -86,6 +120,7 @@ class InferenceExecutor:
         self.time_tracker = TimeTracker()
 
     # pylint: disable=too-many-branches, R0912, R0915
+    @async_timer("run_inference_use_case.execute")
     async def execute(
         self,
         user_uid: UUID,
@@ -93,6 +128,17 @@ class InferenceExecutor:
         forwarding_from: Optional[str],
         request: InferenceRequest,
     ) -> AsyncGenerator[InferenceResponse, None]:
+        cached_response = self._get_cached_response(user_uid, request)
+        if cached_response:
+            async for cached_chunk in self._replay_cached_response(
+                user_uid, request, cached_response
+            ):
+                yield cached_chunk
+            return
+        if prefix_affinity.is_enabled():
+            self.prefix_key = prefix_affinity.get_prefix_key(request.chat_request)
+            if self.prefix_key is None:
+                prefix_affinity.record_no_prefix(request.model)
         node = self._select_node(user_uid=user_uid, request=request)
         if forwarding_from:
             logger.debug(f"Received forwarding call from peer node {forwarding_from}")
@@ -103,69 +149,38 @@ class InferenceExecutor:
                     "No resources to serve the forwarding call, respond with error!"
                 )
                 raise NoAvailableNodesError()
-            # Check if usage is requested
-            is_include_usage: bool = bool(
-                (request.chat_request.get("stream_options") or {}).get("include_usage")
-            ) or not bool(request.chat_request.get("stream"))
-            # Forward requests to peer nodes
-            logger.info(
-                "No node for the requested model available, forwarding to peer nodes!"
-            )
-            usage = None
-            async for response in peer_nodes_forwarding.execute(api_key, request):
-                if not response:
-                    # Peer nodes also don't support this model, break and call the fallback solution
-                    break
-                if response.chunk:
-                    usage = response.chunk.usage
-                    if not is_include_usage:
-                        response.chunk.usage = None
-                    yield response
-                if response.error:
-                    # Peer nodes did the inference but there are errors in the response. Return so the error is handled higher
-                    logger.error(f"Peer nodes inference error: {response.error}")
-                    yield response
-                    return
-            if usage:
-                # Peer nodes did the inference, exit
-                logger.debug("Peer nodes completed this inference!")
-                return
-            llm_fallback_called_gauge.labels(request.model).inc()
-            logger.info(
-                "Peer nodes don't support this model, calling a fallback proxy!"
-            )
-            node_uid = settings.GALADRIEL_NODE_INFO_ID
-            usage = None
-            async for response in llm_inference_proxy.execute(request, node_uid):
-                if not response:
-                    raise NoAvailableNodesError()
-
-                if response.chunk:
-                    usage = response.chunk.usage if response.chunk else None
-                    if usage and not response.chunk.choices and not is_include_usage:
-                        # Last chunk but usage is not requested - skip the last chunk
-                        break
-                    if not is_include_usage:
-                        response.chunk.usage = None
+            async for response in self._execute_without_local_node(
+                user_uid, api_key, request
+            ):
                 yield response
-            if usage:
-                await self._save_usage(
-                    user_uid=user_uid,
-                    request=request,
-                    usage=usage,
-                    node_uid=node_uid,
-                )
             return
 
-        await self.connected_node_repository.send_inference_request(node.uid, request)
+        await self.connected_node_repository.send_inference_request(
+            node.uid, request, request_tokens=self.request_tokens
+        )
         self._initialise_metrics(request, node)
         try:
+            first_response: Optional[InferenceResponse] = None
+            is_first_response_received = False
+            if settings.INFERENCE_HEDGING_ENABLED:
+                node, first_response = await self._wait_first_response_hedged(
+                    user_uid, node, request
+                )
+                is_first_response_received = True
             while True:
-                response, is_finished = await self._get_chunk(node, request)
+                if is_first_response_received:
+                    is_first_response_received = False
+                    response, is_finished = await self._handle_response(
+                        node, first_response
+                    )
+                else:
+                    response, is_finished = await self._get_chunk(node, request)
                 if response:
+                    self._add_to_cached_response(response)
                     yield response
                 if is_finished:
                     break
+            self._save_cached_response()
 
             is_performant = is_node_performant.execute(
                 self.time_tracker.get_time_to_first_token(),
@@ -180,6 +195,126 @@ class InferenceExecutor:
             self.connected_node_repository.cleanup_request(node.uid, request.id)
             await self._log_metrics(user_uid, request, node)
 
+    async def _execute_without_local_node(
+        self, user_uid: UUID, api_key: str, request: InferenceRequest
+    ) -> AsyncGenerator[InferenceResponse, None]:
+        """
+        Served by a sibling worker, a peer backend or the fallback proxy
+        """
+        if self.worker_ipc_repository and self.worker_ipc_repository.is_enabled():
+            # Nodes connected to the other worker processes of this backend
+            is_served_by_worker = False
+            async for response in worker_forwarding.execute(
+                self.worker_ipc_repository, user_uid, api_key, request
+            ):
+                if not response:
+                    break
+                is_served_by_worker = True
+                yield response
+            if is_served_by_worker:
+                return
+        # Check if usage is requested
+        is_include_usage: bool = bool(
+            (request.chat_request.get("stream_options") or {}).get("include_usage")
+        ) or not bool(request.chat_request.get("stream"))
+        # Forward requests to peer nodes
+        logger.info(
+            "No node for the requested model available, forwarding to peer nodes!"
+        )
+        usage = None
+        async for response in peer_nodes_forwarding.execute(
+            api_key, request, self.peer_capacity_repository
+        ):
+            if not response:
+                # Peer nodes also don't support this model, break and call the fallback solution
+                break
+            if response.chunk:
+                usage = response.chunk.usage
+                if not is_include_usage:
+                    response.chunk.usage = None
+                yield response
+            if response.error:
+                # Peer nodes did the inference but there are errors in the response. Return so the error is handled higher
+                logger.error(f"Peer nodes inference error: {response.error}")
+                yield response
+                return
+        if usage:
+            # Peer nodes did the inference, exit
+            logger.debug("Peer nodes completed this inference!")
+            return
+        llm_fallback_called_gauge.labels(request.model).inc()
+        logger.info("Peer nodes don't support this model, calling a fallback proxy!")
+        node_uid = settings.GALADRIEL_NODE_INFO_ID
+        usage = None
+        async for response in llm_inference_proxy.execute(request, node_uid):
+            if not response:
+                raise NoAvailableNodesError()
+
+            if response.chunk:
+                usage = response.chunk.usage if response.chunk else None
+                if usage and not response.chunk.choices and not is_include_usage:
+                    # Last chunk but usage is not requested - skip the last chunk
+                    break
+                if not is_include_usage:
+                    response.chunk.usage = None
+            yield response
+        if usage:
+            await self._save_usage(
+                user_uid=user_uid,
+                request=request,
+                usage=usage,
+                node_uid=node_uid,
+            )
+
+    def _get_cached_response(
+        self, user_uid: UUID, request: InferenceRequest
+    ) -> Optional[CachedResponse]:
+        response_cache_repository = self.response_cache_repository
+        if not response_cache_repository:
+            return None
+        self.cache_key = response_cache.get_key(user_uid, request)
+        if not self.cache_key:
+            return None
+        cached_response = response_cache_repository.get(self.cache_key)
+        response_cache.record_result(request.model, cached_response is not None)
+        return cached_response
+
+    def _add_to_cached_response(self, response: InferenceResponse) -> None:
+        if self.cache_key and response.chunk:
+            self.cached_chunks.append(orjson.dumps(response.chunk.to_dict()))
+
+    def _save_cached_response(self) -> None:
+        response_cache_repository = self.response_cache_repository
+        if response_cache_repository and self.cache_key and self.request_successful:
+            response_cache_repository.put(
+                self.cache_key,
+                CachedResponse(chunks=self.cached_chunks, usage=self.usage),
+            )
+
+    async def _replay_cached_response(
+        self,
+        user_uid: UUID,
+        request: InferenceRequest,
+        cached_response: CachedResponse,
+    ) -> AsyncGenerator[InferenceResponse, None]:
+        for chunk in cached_response.chunks:
+            yield InferenceResponse(
+                node_id=settings.GALADRIEL_NODE_INFO_ID,
+                request_id=request.id,
+                chunk=ChatCompletionChunk(**orjson.loads(chunk)),
+            )
+        if cached_response.usage:
+            response_cache.record_served_tokens(
+                request.model, cached_response.usage.total_tokens
+            )
+            if response_cache.is_billed():
+                await self._save_usage(
+                    user_uid=user_uid,
+                    request=request,
+                    node_uid=settings.GALADRIEL_NODE_INFO_ID,
+                    usage=cached_response.usage,
+                )
+
     async def _get_chunk(
         self, node: ConnectedNode, request: InferenceRequest
     ) -> (Optional[InferenceResponse], bool):  # type: ignore
@@ -191,6 +326,11 @@ class InferenceExecutor:
         response = await self.connected_node_repository.receive_for_request(
             node.uid, request.id
         )
+        return await self._handle_response(node, response)
+
+    async def _handle_response(
+        self, node: ConnectedNode, response: Optional[InferenceResponse]
+    ) -> (Optional[InferenceResponse], bool):  # type: ignore
         if not response:
             # Nothing to check, we can mark node as unhealthy and break
             await self._mark_node_as_unhealthy(node)
@@ -226,7 +366,12 @@ class InferenceExecutor:
             await self._mark_node_as_unhealthy(node)
         return response, True
 
-    def _initialise_metrics(self, request: InferenceRequest, node: ConnectedNode):
+    def _initialise_metrics(
+        self,
+        request: InferenceRequest,
+        node: ConnectedNode,
+        start_time: Optional[float] = None,
+    ):
         self.metrics_increment = NodeMetricsIncrement(
             node_id=node.uid, model=node.model
         )
@@ -234,16 +379,49 @@ class InferenceExecutor:
         self.is_include_usage = bool(
             (request.chat_request.get("stream_options") or {}).get("include_usage")
         ) or not bool(request.chat_request.get("stream"))
-        self.time_tracker.start()
+        self.time_tracker.start(start_time)
+
+    async def _wait_first_response_hedged(
+        self, user_uid: UUID, node: ConnectedNode, request: InferenceRequest
+    ) -> Tuple[ConnectedNode, Optional[InferenceResponse]]:
+        result = await hedged_dispatch.wait_first_response(
+            node,
+            request,
+            self.time_tracker.start_time,
+            self.connected_node_repository,
+            lambda: self._select_node(user_uid, request, exclude_node_ids={node.uid}),
+            request_tokens=self.request_tokens,
+        )
+        if result.node is not node:
+            # Metrics and usage belong to the node that won
+            self._initialise_metrics(request, result.node, result.started_at)
+        return result.node, result.response
 
     def _select_node(
         self,
         user_uid: UUID,
         request: InferenceRequest,
+        exclude_node_ids: Optional[Set[UUID]] = None,
     ) -> Optional[ConnectedNode]:
-        node = select_node_use_case.execute(
-            request.model, self.connected_node_repository
-        )
+        if settings.TOKEN_ADMISSION_ENABLED and self.request_tokens is None:
+            self.request_tokens = token_admission.estimate_request_tokens(
+                request.chat_request
+            )
+        if exclude_node_ids:
+            node = select_node_use_case.execute(
+                request.model,
+                self.connected_node_repository,
+                exclude_node_ids,
+                request_tokens=self.request_tokens,
+                prefix_key=self.prefix_key,
+            )
+        else:
+            node = select_node_use_case.execute(
+                request.model,
+                self.connected_node_repository,
+                request_tokens=self.request_tokens,
+                prefix_key=self.prefix_key,
+            )
         if not node:
             return None
 
@@ -270,14 +448,20 @@ class InferenceExecutor:
             await self._save_usage(
                 user_uid=user_uid, request=request, node_uid=node.uid, usage=self.usage
             )
+            prefix_affinity.record_usage(
+                request.model, self.usage, self.prefix_key is not None
+            )
         # set only if we got at least one token
         ttft = self.time_tracker.get_time_to_first_token()
         if ttft is not None:
             self.metrics_increment.time_to_first_token = ttft
-            # add TTFT in histogram
-            node_time_to_first_token_histogram.labels(
-                request.model, node.uid, node.node_status.value
-            ).observe(ttft)
+            node_latency_metrics.record(
+                self.connected_node_repository,
+                node.uid,
+                request.model,
+                NodeLatencyMetric.TIME_TO_FIRST_TOKEN,
+                ttft,
+            )
         # use completion tokens / time elapsed to focus on the model generation performance
         throughput = self.time_tracker.get_throughput()
         if throughput:
@@ -321,10 +505,17 @@ class InferenceExecutor:
         if not self.is_node_marked_as_unhealthy:
             self.is_node_marked_as_unhealthy = True
             status = await node_status_transition.execute(
-                self.node_repository, node.uid, NodeStatusEvent.DEGRADED
+                self.node_repository,
+                node.uid,
+                NodeStatusEvent.DEGRADED,
+                connected_node_repository=self.connected_node_repository,
             )
             await update_node_status_use_case.execute(
-                node.uid, status, self.node_repository, self.connected_node_repository
+                node.uid,
+                status,
+                self.node_repository,
+                self.connected_node_repository,
+                self.node_status_queue_repository,
             )
             self.analytics.track_event(
                 node.user_id,
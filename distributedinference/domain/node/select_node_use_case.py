@@ -1,27 +1,53 @@
 import random
 from typing import Optional
+from typing import Set
+from uuid import UUID
 
 import settings
+from distributedinference.domain.node import prefix_affinity
+from distributedinference.domain.node import token_admission
 from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import RequestTokens
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
 
 
 def execute(
-    model: str, connected_node_repository: ConnectedNodeRepository
+    model: str,
+    connected_node_repository: ConnectedNodeRepository,
+    exclude_node_ids: Optional[Set[UUID]] = None,
+    request_tokens: Optional[RequestTokens] = None,
+    prefix_key: Optional[int] = None,
 ) -> Optional[ConnectedNode]:
-    nodes = connected_node_repository.get_nodes_by_model(model)
-    eligible_nodes = [node for node in nodes if _can_handle_new_request(node)]
+    """
+    With a prefix_key the node is picked by prefix affinity, otherwise randomly
+    """
+    if prefix_key is None:
+        nodes = connected_node_repository.get_nodes_by_model(model)
+    else:
+        nodes = list(connected_node_repository.get_nodes_by_prefix(model, prefix_key))
+    eligible_nodes = [
+        node
+        for node in nodes
+        if _can_handle_new_request(node, request_tokens)
+        and not (exclude_node_ids and node.uid in exclude_node_ids)
+    ]
+    if prefix_key is not None:
+        return prefix_affinity.select_node(model, nodes, eligible_nodes)
     if not eligible_nodes:
         return None
 
     return random.choice(eligible_nodes)
 
 
-def _can_handle_new_request(node: ConnectedNode) -> bool:
+def _can_handle_new_request(
+    node: ConnectedNode, request_tokens: Optional[RequestTokens] = None
+) -> bool:
     if not node.is_self_hosted and not node.node_status.is_healthy():
         return False
+    if token_admission.is_enabled(node):
+        return token_admission.can_admit(node, request_tokens)
     if node.is_datacenter_gpu():
         return (
             node.active_requests_count()
@@ -31,3 +57,21 @@ def _can_handle_new_request(node: ConnectedNode) -> bool:
         return node.active_requests_count() < settings.MAX_PARALLEL_REQUESTS_PER_NODE
 
     return node.active_requests_count() == 1
+
+
+def get_free_slots(node: ConnectedNode) -> int:
+    """
+    How many more requests the node accepts, consistent with the node selection
+    """
+    if not _can_handle_new_request(node):
+        return 0
+    if token_admission.is_enabled(node):
+        return token_admission.get_free_slots(node)
+    if node.is_datacenter_gpu():
+        return (
+            settings.MAX_PARALLEL_REQUESTS_PER_DATACENTER_NODE
+            - node.active_requests_count()
+        )
+    if node.can_handle_parallel_requests():
+        return settings.MAX_PARALLEL_REQUESTS_PER_NODE - node.active_requests_count()
+    return 1
@@ -23,6 +23,7 @@ async def execute(
             node_repository=node_repository,
             node_id=node_id,
             event=NodeStatusEvent.STOP,
+            connected_node_repository=connected_node_repository,
         )
         if not connected_node_repository.update_node_status(node_id, status):
             logger.error(
@@ -30,4 +31,6 @@ async def execute(
             )
 
     connected_nodes = connected_node_repository.get_locally_connected_nodes()
-    await node_repository.set_nodes_inactive(connected_nodes)
+    await node_repository.update_nodes_to_disconnected(
+        {node.uid: node.node_status for node in connected_nodes}
+    )
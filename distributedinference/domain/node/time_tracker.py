@@ -14,8 +14,8 @@ class TimeTracker:
         self.next_token_time: float = 0.0
         self.usage: Optional[CompletionUsage] = None
 
-    def start(self):
-        self.start_time = time.time()
+    def start(self, start_time: Optional[float] = None):
+        self.start_time = start_time or time.time()
 
     def chunk_received(self, chunk: Optional[ChatCompletionChunk]):
         if _is_chunk_with_tokens(chunk):
@@ -0,0 +1,110 @@
+"""
+Token based admission for datacenter nodes.
+
+Instead of a fixed number of parallel requests, a node admits a request if the
+estimated tokens of its in-flight requests stay within two budgets:
+
+* KV-cache: prompt + completion tokens, from the node's VRAM
+* throughput: completion tokens, that the node generates within a time window at
+  its benchmark tokens per second
+
+A node without in-flight requests always admits, so large prompts are still served.
+"""
+
+from typing import Mapping
+from typing import Optional
+
+import settings
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import RequestTokens
+
+# Rough average for English text, there is no tokenizer for every served model
+CHARS_PER_TOKEN = 4
+
+
+def is_enabled(node: ConnectedNode) -> bool:
+    return bool(
+        settings.TOKEN_ADMISSION_ENABLED
+        and node.is_datacenter_gpu()
+        and node.benchmark_tokens_per_second
+    )
+
+
+def estimate_request_tokens(chat_request: Mapping) -> RequestTokens:
+    chars = 0
+    for message in chat_request.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and isinstance(part.get("text"), str):
+                    chars += len(part["text"])
+    completion_tokens = (
+        chat_request.get("max_completion_tokens")
+        or chat_request.get("max_tokens")
+        or settings.TOKEN_ADMISSION_DEFAULT_COMPLETION_TOKENS
+    )
+    return RequestTokens(
+        prompt_tokens=chars // CHARS_PER_TOKEN, completion_tokens=completion_tokens
+    )
+
+
+def can_admit(
+    node: ConnectedNode, request_tokens: Optional[RequestTokens] = None
+) -> bool:
+    """
+    Without request_tokens the request is assumed to have a short prompt
+    """
+    active_requests = node.active_requests_count()
+    if not active_requests:
+        return True
+    if active_requests >= settings.TOKEN_ADMISSION_MAX_PARALLEL_REQUESTS:
+        return False
+    request_tokens = request_tokens or _get_default_request_tokens()
+    return (
+        node.active_tokens_count() + request_tokens.total_tokens
+        <= _get_kv_cache_budget(node)
+        and node.active_completion_tokens_count() + request_tokens.completion_tokens
+        <= _get_completion_budget(node)
+    )
+
+
+def get_free_slots(node: ConnectedNode) -> int:
+    """
+    How many more requests with a short prompt the node admits
+    """
+    active_requests = node.active_requests_count()
+    default_tokens = _get_default_request_tokens()
+    free_slots = max(
+        0,
+        min(
+            settings.TOKEN_ADMISSION_MAX_PARALLEL_REQUESTS - active_requests,
+            (_get_kv_cache_budget(node) - node.active_tokens_count())
+            // default_tokens.total_tokens,
+            (_get_completion_budget(node) - node.active_completion_tokens_count())
+            // default_tokens.completion_tokens,
+        ),
+    )
+    if not active_requests:
+        # A node without in-flight requests always admits one, see can_admit
+        return max(1, free_slots)
+    return free_slots
+
+
+def _get_kv_cache_budget(node: ConnectedNode) -> int:
+    return int(node.vram * settings.TOKEN_ADMISSION_KV_CACHE_TOKENS_PER_VRAM_MB)
+
+
+def _get_completion_budget(node: ConnectedNode) -> int:
+    return int(
+        (node.benchmark_tokens_per_second or 0)
+        * settings.TOKEN_ADMISSION_GENERATION_WINDOW_SECONDS
+    )
+
+
+def _get_default_request_tokens() -> RequestTokens:
+    return RequestTokens(
+        prompt_tokens=0,
+        completion_tokens=settings.TOKEN_ADMISSION_DEFAULT_COMPLETION_TOKENS,
+    )
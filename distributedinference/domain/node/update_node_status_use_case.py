@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from distributedinference.domain.node.entities import NodeStatus
@@ -5,6 +6,9 @@ from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
 from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
 
 
 async def execute(
@@ -12,6 +16,11 @@ async def execute(
     status: NodeStatus,
     node_repository: NodeRepository,
     connected_node_repository: ConnectedNodeRepository,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
 ) -> None:
-    connected_node_repository.update_node_status(node_uid, status)
+    is_connected = connected_node_repository.update_node_status(node_uid, status)
+    if is_connected and node_status_queue_repository:
+        # Saved to the database by node_status_update_job
+        node_status_queue_repository.push(node_uid)
+        return
     await node_repository.update_node_status(node_uid, status)
@@ -0,0 +1,76 @@
+from contextlib import aclosing
+from typing import AsyncGenerator
+from typing import Optional
+from uuid import UUID
+
+import settings
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import InferenceError
+from distributedinference.domain.node.entities import InferenceErrorStatusCodes
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import InferenceResponse
+from distributedinference.domain.node.entities import WorkerIpcMessageType
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    worker_ipc_repository: WorkerIpcRepository,
+    user_uid: UUID,
+    api_key: str,
+    request: InferenceRequest,
+) -> AsyncGenerator[Optional[InferenceResponse], None]:
+    """
+    Runs the request on a node owned by another worker process of this backend.
+    Sibling workers without a free node for the model answer immediately, so they
+    are tried one by one. The worker that runs the inference also saves the usage.
+
+    Yields None if no sibling worker could serve the request.
+    """
+    message = {
+        "type": WorkerIpcMessageType.INFERENCE.value,
+        "user_uid": str(user_uid),
+        "api_key": api_key,
+        "request": request.to_dict(),
+    }
+    for socket_path in worker_ipc_repository.get_sibling_socket_paths():
+        is_accepted = False
+        try:
+            async with aclosing(
+                worker_ipc_repository.stream(socket_path, message)
+            ) as stream:
+                async for data in stream:
+                    if data.get("type") == WorkerIpcMessageType.NO_NODE.value:
+                        break
+                    if (
+                        data.get("type")
+                        != WorkerIpcMessageType.INFERENCE_RESPONSE.value
+                    ):
+                        continue
+                    is_accepted = True
+                    yield InferenceResponse.from_dict(
+                        UUID(data["node_id"]), data["response"]
+                    )
+        except Exception:
+            logger.warning(
+                f"Worker IPC forwarding failed, socket={socket_path}, request_id={request.id}",
+                exc_info=True,
+            )
+            if is_accepted:
+                # Chunks were already streamed to the user, can't retry anywhere else
+                yield InferenceResponse(
+                    node_id=settings.GALADRIEL_NODE_INFO_ID,
+                    request_id=request.id,
+                    error=InferenceError(
+                        status_code=InferenceErrorStatusCodes.INTERNAL_SERVER_ERROR,
+                        message="Worker disconnected",
+                    ),
+                )
+                return
+            continue
+        if is_accepted:
+            return
+    yield None
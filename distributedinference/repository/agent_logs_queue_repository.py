@@ -0,0 +1,41 @@
+import asyncio
+from typing import List
+
+from distributedinference.domain.agent.entities import AgentLogInput
+
+
+class AgentLogsQueueRepository:
+    """
+    Agent logs acknowledged to the agents and waiting to be saved
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+
+    def push(self, agent_logs: AgentLogInput) -> bool:
+        """
+        Returns False when the queue is full, the logs are not added
+        """
+        try:
+            self.queue.put_nowait(agent_logs)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def get(self) -> AgentLogInput:
+        return await self.queue.get()
+
+    def fetch_bulk(self, max_logs: int) -> List[AgentLogInput]:
+        """
+        Queued logs without blocking, until there are at least max_logs of them
+        """
+        batch = []
+        count = 0
+        while count < max_logs:
+            try:
+                agent_logs = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            batch.append(agent_logs)
+            count += len(agent_logs.logs)
+        return batch
@@ -1,4 +1,7 @@
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 from uuid import UUID
 
 import sqlalchemy
@@ -59,6 +62,19 @@ WHERE
     AND nb.model_name = :model_name;
 """
 
+SQL_GET_NODE_BENCHMARKS = """
+SELECT
+    nb.node_id,
+    ni.user_profile_id,
+    nb.model_name,
+    nb.tokens_per_second AS benchmark_tokens_per_second,
+    ni.gpu_model,
+    ni.gpu_count
+FROM node_benchmark nb
+LEFT JOIN node_info ni on nb.node_id = ni.id
+WHERE ni.id = ANY(:ids);
+"""
+
 
 class BenchmarkRepository:
 
@@ -106,3 +122,26 @@ class BenchmarkRepository:
                     gpu_count=row.gpu_count,
                 )
         return None
+
+    @async_timer("benchmark_repository.get_node_benchmarks", logger=logger)
+    async def get_node_benchmarks(
+        self, keys: List[Tuple[UUID, UUID, str]]
+    ) -> Dict[Tuple[UUID, UUID, str], NodeBenchmark]:
+        """
+        Benchmarks of many nodes in one query, keys are
+        (user_profile_id, node_id, model_name) like in get_node_benchmark
+        """
+        data = {"ids": list({node_id for _, node_id, _ in keys})}
+        result = {}
+        async with self._session_provider_read.get() as session:
+            rows = await session.execute(sqlalchemy.text(SQL_GET_NODE_BENCHMARKS), data)
+            for row in rows:
+                key = (row.user_profile_id, row.node_id, row.model_name)
+                result[key] = NodeBenchmark(
+                    node_id=row.node_id,
+                    model_name=row.model_name,
+                    benchmark_tokens_per_second=row.benchmark_tokens_per_second,
+                    gpu_model=row.gpu_model,
+                    gpu_count=row.gpu_count,
+                )
+        return result
@@ -1,29 +1,47 @@
 import asyncio
-from dataclasses import asdict
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from uuid import UUID
 
+import orjson
 from fastapi import status as http_status
 from fastapi.encoders import jsonable_encoder
-from openai.types.chat import ChatCompletionChunk
 
 from distributedinference import api_logger
+from distributedinference.domain.node import node_frame_codec
 from distributedinference.domain.node.entities import ConnectedNode, BackendHost
+from distributedinference.domain.node.entities import EmbeddingWebsocketRequest
+from distributedinference.domain.node.entities import EmbeddingWebsocketResponse
 from distributedinference.domain.node.entities import ImageGenerationWebsocketRequest
 from distributedinference.domain.node.entities import ImageGenerationWebsocketResponse
 from distributedinference.domain.node.entities import InferenceError
 from distributedinference.domain.node.entities import InferenceErrorStatusCodes
 from distributedinference.domain.node.entities import InferenceRequest
 from distributedinference.domain.node.entities import InferenceResponse
-from distributedinference.domain.node.entities import InferenceStatusCodes
+from distributedinference.domain.node.entities import LatencyPercentiles
+from distributedinference.domain.node.entities import NodeLatency
+from distributedinference.domain.node.entities import NodeFrameEncoding
+from distributedinference.domain.node.entities import NodeLatencyMetric
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.entities import RequestTokens
+from distributedinference.utils.hash_ring import HashRing
+from distributedinference.utils.latency_sketch import LatencySketch
 
 logger = api_logger.get()
 
+# Relative error of the per node latency percentiles
+NODE_LATENCY_RELATIVE_ACCURACY = 0.01
+# The sketch counts are halved every this many values, recent latencies weigh more
+NODE_LATENCY_DECAY_COUNT = 1000
+# Same for the sketches of all the nodes of a model together
+MODEL_LATENCY_DECAY_COUNT = 10_000
 
+
+# pylint: disable=R0904
 class ConnectedNodeRepository:
     _max_parallel_requests_per_node: int
     _max_parallel_requests_per_datacenter_node: int
@@ -31,6 +49,12 @@ class ConnectedNodeRepository:
     # node_id: ConnectedNode
     _connected_nodes: Dict[UUID, ConnectedNode]
     _backend_host: Optional[BackendHost]
+    # node_id: latency sketch per metric, only for the locally connected nodes
+    _latency_sketches: Dict[UUID, Dict[NodeLatencyMetric, LatencySketch]]
+    # model: latency sketch per metric, of the values recorded for its nodes
+    _model_latency_sketches: Dict[str, Dict[NodeLatencyMetric, LatencySketch]]
+    # model: consistent hashing ring of the node ids, for prefix affinity routing
+    _hash_rings: Dict[str, HashRing[UUID]]
 
     def __init__(
         self,
@@ -43,6 +67,9 @@ class ConnectedNodeRepository:
             max_parallel_requests_per_datacenter_node
         )
         self._connected_nodes = {}
+        self._latency_sketches = {}
+        self._model_latency_sketches = {}
+        self._hash_rings = {}
         try:
             self._backend_host = BackendHost.from_value(hostname)
         except TypeError as e:
@@ -56,6 +83,9 @@ class ConnectedNodeRepository:
         """
         if connected_node.uid not in self._connected_nodes:
             self._connected_nodes[connected_node.uid] = connected_node
+            self._hash_rings.setdefault(connected_node.model, HashRing()).add(
+                connected_node.uid
+            )
             return True
         return False
 
@@ -75,11 +105,31 @@ class ConnectedNodeRepository:
                         ),
                     ).to_dict()
                 )
-            del self._connected_nodes[node_id]
+            node = self._connected_nodes.pop(node_id)
+            ring = self._hash_rings.get(node.model)
+            if ring:
+                ring.remove(node_id)
+                if not ring:
+                    del self._hash_rings[node.model]
+        self._latency_sketches.pop(node_id, None)
 
     def get_nodes_by_model(self, model: str) -> List[ConnectedNode]:
         return [node for node in self._connected_nodes.values() if node.model == model]
 
+    def get_nodes_by_prefix(
+        self, model: str, prefix_key: int
+    ) -> Iterator[ConnectedNode]:
+        """
+        The nodes of the model in consistent hashing order for the prefix key
+        """
+        ring = self._hash_rings.get(model)
+        if not ring:
+            return
+        for node_id in ring.iterate(prefix_key):
+            node = self._connected_nodes.get(node_id)
+            if node:
+                yield node
+
     async def close_node_connection(self, node_id: UUID):
         if node_id in self._connected_nodes:
             await self._connected_nodes[node_id].websocket.close(
@@ -87,6 +137,9 @@ class ConnectedNodeRepository:
                 reason="No Inference result",
             )
 
+    def get_connected_node(self, node_id: UUID) -> Optional[ConnectedNode]:
+        return self._connected_nodes.get(node_id)
+
     def get_locally_connected_nodes(self) -> List[ConnectedNode]:
         return list(self._connected_nodes.values())
 
@@ -94,12 +147,21 @@ class ConnectedNodeRepository:
         return list(self._connected_nodes.keys())
 
     async def send_inference_request(
-        self, node_id: UUID, request: InferenceRequest
+        self,
+        node_id: UUID,
+        request: InferenceRequest,
+        request_tokens: Optional[RequestTokens] = None,
     ) -> bool:
+        """
+        request_tokens, estimated when the token admission is enabled, count
+        towards the node's budgets until the request is cleaned up
+        """
         if node_id in self._connected_nodes:
             connected_node = self._connected_nodes[node_id]
             connected_node.request_incoming_queues[request.id] = asyncio.Queue()
-            await connected_node.websocket.send_json(asdict(request))
+            if request_tokens is not None:
+                connected_node.request_tokens[request.id] = request_tokens
+            await _send(connected_node, request.to_dict())
             return True
         return False
 
@@ -109,14 +171,24 @@ class ConnectedNodeRepository:
         if node_id in self._connected_nodes:
             connected_node = self._connected_nodes[node_id]
             connected_node.request_incoming_queues[request.request_id] = asyncio.Queue()
-            await connected_node.websocket.send_json(jsonable_encoder(request))
+            await _send(connected_node, jsonable_encoder(request))
+            return True
+        return False
+
+    async def send_embedding_request(
+        self, node_id: UUID, request: EmbeddingWebsocketRequest
+    ) -> bool:
+        if node_id in self._connected_nodes:
+            connected_node = self._connected_nodes[node_id]
+            connected_node.request_incoming_queues[request.request_id] = asyncio.Queue()
+            await _send(connected_node, request.model_dump())
             return True
         return False
 
     async def send_json_request(self, node_id: UUID, request: Dict) -> bool:
         if node_id in self._connected_nodes:
             connected_node = self._connected_nodes[node_id]
-            await connected_node.websocket.send_json(jsonable_encoder(request))
+            await _send(connected_node, jsonable_encoder(request))
             return True
         return False
 
@@ -127,23 +199,7 @@ class ConnectedNodeRepository:
             connected_node = self._connected_nodes[node_id]
             data = await connected_node.request_incoming_queues[request_id].get()
             try:
-                return InferenceResponse(
-                    node_id=node_id,
-                    request_id=data["request_id"],
-                    chunk=(
-                        ChatCompletionChunk(**data["chunk"])
-                        if data.get("chunk")
-                        else None
-                    ),
-                    error=(
-                        InferenceError(**data["error"]) if data.get("error") else None
-                    ),
-                    status=(
-                        InferenceStatusCodes(data["status"])
-                        if data.get("status")
-                        else None
-                    ),
-                )
+                return InferenceResponse.from_dict(node_id, data)
             except Exception:
                 logger.warning(f"Failed to parse chunk, request_id={request_id}")
                 return None
@@ -163,13 +219,46 @@ class ConnectedNodeRepository:
                     f"Received chunk for unknown request {request_id}, chunk: {parsed_data}"
                 )
 
+    def add_inference_response_chunks(
+        self, node_id: UUID, responses: List[Dict]
+    ) -> None:
+        """
+        Demultiplexes the responses of one frame, the queues are unbounded so
+        nothing is awaited
+        """
+        connected_node = self._connected_nodes.get(node_id)
+        if not connected_node:
+            return
+        queues = connected_node.request_incoming_queues
+        for response in responses:
+            request_id = response.get("request_id")
+            queue = queues.get(request_id) if request_id is not None else None
+            if queue:
+                queue.put_nowait(response)
+            else:
+                logger.error(
+                    f"Received chunk for unknown request {request_id}, chunk: {response}"
+                )
+
     async def receive_for_image_generation_request(
-        self, node_id: UUID, request_id: str
+        self,
+        node_id: UUID,
+        request_id: str,
+        on_image: Optional[Callable[[int, bytes], None]] = None,
     ) -> Optional[ImageGenerationWebsocketResponse]:
+        """
+        The images sent in binary chunk frames are given to on_image as soon as each
+        of them is complete, the response only has the base64 encoded images
+        """
         if node_id in self._connected_nodes:
             connected_node = self._connected_nodes[node_id]
-            data = await connected_node.request_incoming_queues[request_id].get()
+            queue = connected_node.request_incoming_queues[request_id]
             try:
+                data = await queue.get()
+                while "image_index" in data:
+                    if on_image:
+                        on_image(data["image_index"], data["image"])
+                    data = await queue.get()
                 return ImageGenerationWebsocketResponse(
                     node_id=node_id,
                     request_id=data["request_id"],
@@ -187,10 +276,49 @@ class ConnectedNodeRepository:
                 del connected_node.request_incoming_queues[request_id]
         return None
 
+    async def receive_for_embedding_request(
+        self, node_id: UUID, request_id: str
+    ) -> Optional[EmbeddingWebsocketResponse]:
+        if node_id in self._connected_nodes:
+            connected_node = self._connected_nodes[node_id]
+            data = await connected_node.request_incoming_queues[request_id].get()
+            try:
+                error = data.get("error")
+                if error is not None:
+                    # The disconnect error of deregister_node is an InferenceError
+                    return EmbeddingWebsocketResponse(
+                        node_id=node_id,
+                        request_id=data["request_id"],
+                        embeddings=[],
+                        prompt_tokens=0,
+                        error=(
+                            str(error.get("message"))
+                            if isinstance(error, dict)
+                            else str(error)
+                        ),
+                    )
+                # Not validated, a batch has up to millions of floats
+                return EmbeddingWebsocketResponse.model_construct(
+                    node_id=node_id,
+                    request_id=data["request_id"],
+                    embeddings=data["embeddings"],
+                    prompt_tokens=data["prompt_tokens"],
+                    error=None,
+                )
+            except Exception:
+                logger.warning(
+                    f"Failed to parse embedding response, request_id={request_id}"
+                )
+                return None
+            finally:
+                connected_node.request_incoming_queues.pop(request_id, None)
+        return None
+
     def cleanup_request(self, node_id: UUID, request_id: str) -> None:
         if node_id in self._connected_nodes:
             connected_node = self._connected_nodes[node_id]
             del connected_node.request_incoming_queues[request_id]
+            connected_node.request_tokens.pop(request_id, None)
 
     def update_node_status(self, node_id: UUID, status: NodeStatus) -> bool:
         if node_id in self._connected_nodes:
@@ -200,3 +328,87 @@ class ConnectedNodeRepository:
 
     def get_backend_host(self) -> Optional[BackendHost]:
         return self._backend_host
+
+    def record_node_latency(
+        self, node_id: UUID, metric: NodeLatencyMetric, seconds: float
+    ) -> None:
+        node = self._connected_nodes.get(node_id)
+        if not node:
+            return
+        sketches = self._latency_sketches.setdefault(node_id, {})
+        if metric not in sketches:
+            sketches[metric] = LatencySketch(
+                NODE_LATENCY_RELATIVE_ACCURACY, decay_count=NODE_LATENCY_DECAY_COUNT
+            )
+        sketches[metric].add(seconds)
+        model_sketches = self._model_latency_sketches.setdefault(node.model, {})
+        if metric not in model_sketches:
+            model_sketches[metric] = LatencySketch(
+                NODE_LATENCY_RELATIVE_ACCURACY, decay_count=MODEL_LATENCY_DECAY_COUNT
+            )
+        model_sketches[metric].add(seconds)
+
+    def get_node_latency_percentile(
+        self,
+        node_id: UUID,
+        metric: NodeLatencyMetric,
+        percentile: float,
+        min_count: int = 1,
+    ) -> Optional[float]:
+        """
+        Returns None until the node has min_count values of the metric
+        """
+        sketch = self._latency_sketches.get(node_id, {}).get(metric)
+        if not sketch or sketch.count < min_count:
+            return None
+        return sketch.get_quantile(percentile)
+
+    def get_model_latency_percentile(
+        self,
+        model: str,
+        metric: NodeLatencyMetric,
+        percentile: float,
+        min_count: int = 1,
+    ) -> Optional[float]:
+        """
+        Percentile of the metric over the values recorded for the locally connected
+        nodes of the model, None until there are min_count values
+        """
+        sketch = self._model_latency_sketches.get(model, {}).get(metric)
+        if not sketch or sketch.count < min_count:
+            return None
+        return sketch.get_quantile(percentile)
+
+    def get_node_latencies(self) -> List[NodeLatency]:
+        return [
+            NodeLatency(
+                node_id=node.uid,
+                model=node.model,
+                rtt=self._get_latency_percentiles(node.uid, NodeLatencyMetric.RTT),
+                time_to_first_token=self._get_latency_percentiles(
+                    node.uid, NodeLatencyMetric.TIME_TO_FIRST_TOKEN
+                ),
+            )
+            for node in self._connected_nodes.values()
+        ]
+
+    def _get_latency_percentiles(
+        self, node_id: UUID, metric: NodeLatencyMetric
+    ) -> LatencyPercentiles:
+        sketch = self._latency_sketches.get(node_id, {}).get(metric)
+        if not sketch:
+            return LatencyPercentiles(count=0)
+        return LatencyPercentiles(
+            count=sketch.count,
+            p50=sketch.get_quantile(0.5),
+            p90=sketch.get_quantile(0.9),
+            p99=sketch.get_quantile(0.99),
+        )
+
+
+async def _send(connected_node: ConnectedNode, message: Dict) -> None:
+    if connected_node.frame_encoding is NodeFrameEncoding.CBOR:
+        await connected_node.websocket.send_bytes(node_frame_codec.encode(message))
+    else:
+        # orjson encodes the large chat requests several times faster than json
+        await connected_node.websocket.send_text(orjson.dumps(message).decode())
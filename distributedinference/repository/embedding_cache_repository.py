@@ -0,0 +1,179 @@
+import fcntl
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+from distributedinference import api_logger
+
+logger = api_logger.get()
+
+KEY_SIZE = 32
+# key, sequence number of the write
+_SLOT_HEADER = struct.Struct(f"<{KEY_SIZE}sQ")
+# sequence number of the last write, shared by the processes using the directory
+_SEQUENCE = struct.Struct("<Q")
+
+
+class EmbeddingCacheRepository:
+    """
+    Embedding vectors as float32 bytes by content key, in two tiers:
+
+    * memory: least recently used vectors are evicted above max_bytes
+    * disk (optional): memory-mapped files with a fixed number of slots per vector
+      size, the oldest slot is overwritten. Survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        disk_directory: Optional[str] = None,
+        disk_slots: int = 0,
+    ):
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._size = 0
+        self._disk_directory = disk_directory
+        self._disk_slots = disk_slots
+        # vector size in bytes: file
+        self._disk_files: Dict[int, _DiskFile] = {}
+        if disk_directory:
+            os.makedirs(disk_directory, exist_ok=True)
+            # The files written before a restart
+            for name in os.listdir(disk_directory):
+                if name.startswith("embeddings-") and name.endswith(".keys"):
+                    self._get_disk_file(int(name[len("embeddings-") : -len(".keys")]))
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+            return vector
+        for disk_file in self._disk_files.values():
+            vector = disk_file.get(key)
+            if vector is not None:
+                self._put_memory(key, vector)
+                return vector
+        return None
+
+    def put(self, key: bytes, vector: bytes) -> None:
+        self._put_memory(key, vector)
+        if self._disk_directory:
+            self._get_disk_file(len(vector)).put(key, vector)
+
+    def _put_memory(self, key: bytes, vector: bytes) -> None:
+        if len(vector) > self._max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = vector
+        self._size += len(vector)
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _get_disk_file(self, vector_size: int) -> "_DiskFile":
+        disk_file = self._disk_files.get(vector_size)
+        if not disk_file:
+            disk_file = self._disk_files[vector_size] = _DiskFile(
+                os.path.join(self._disk_directory, f"embeddings-{vector_size}"),  # type: ignore
+                vector_size,
+                self._disk_slots,
+            )
+        return disk_file
+
+
+class _DiskFile:
+    """
+    A ring of slots, the vectors are in `<path>.f32` and the key and write sequence
+    number of every slot in `<path>.keys`. The processes sharing the directory take
+    the next slot from the sequence number in `<path>.sequence`, under an exclusive
+    lock of that file, and a read checks the slot header so a vector overwritten by
+    another process is a miss.
+    """
+
+    def __init__(self, path: str, vector_size: int, slots: int):
+        self._vector_size = vector_size
+        self._slots = slots
+        self._vectors = _open_mmap(f"{path}.f32", vector_size * slots)
+        self._keys = _open_mmap(f"{path}.keys", _SLOT_HEADER.size * slots)
+        self._sequence = _open_mmap(f"{path}.sequence", _SEQUENCE.size)
+        # pylint: disable=R1732
+        self._lock_file = open(f"{path}.sequence", "rb")
+        # key: slot, the slot may have been overwritten by another process since
+        self._index: Dict[bytes, int] = {}
+        last_sequence = 0
+        for slot in range(slots):
+            key, sequence = _SLOT_HEADER.unpack_from(
+                self._keys, slot * _SLOT_HEADER.size
+            )
+            if sequence:
+                self._index[key] = slot
+                last_sequence = max(last_sequence, sequence)
+        with self._locked():
+            # Slots written before the sequence file existed
+            if _SEQUENCE.unpack_from(self._sequence)[0] < last_sequence:
+                _SEQUENCE.pack_into(self._sequence, 0, last_sequence)
+        logger.info(f"Loaded {len(self._index)} cached embeddings from {path}")
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        slot = self._index.get(key)
+        if slot is None:
+            return None
+        offset = slot * _SLOT_HEADER.size
+        stored_key, sequence = _SLOT_HEADER.unpack_from(self._keys, offset)
+        if stored_key != key or not sequence:
+            # Overwritten by another process
+            del self._index[key]
+            return None
+        start = slot * self._vector_size
+        vector = self._vectors[start : start + self._vector_size]
+        # A writer empties the header before the vector, so an unchanged header
+        # means the vector was not overwritten while it was copied
+        if _SLOT_HEADER.unpack_from(self._keys, offset) != (key, sequence):
+            del self._index[key]
+            return None
+        return vector
+
+    def put(self, key: bytes, vector: bytes) -> None:
+        if self.get(key) is not None:
+            return
+        with self._locked():
+            sequence = _SEQUENCE.unpack_from(self._sequence)[0] + 1
+            _SEQUENCE.pack_into(self._sequence, 0, sequence)
+            slot = sequence % self._slots
+            previous_key, previous_sequence = _SLOT_HEADER.unpack_from(
+                self._keys, slot * _SLOT_HEADER.size
+            )
+            if previous_sequence:
+                if self._index.get(previous_key) == slot:
+                    del self._index[previous_key]
+                # Emptied first, so a crash or a reader while writing does not see
+                # the previous key pointing to a partially written vector
+                _SLOT_HEADER.pack_into(
+                    self._keys, slot * _SLOT_HEADER.size, bytes(KEY_SIZE), 0
+                )
+            start = slot * self._vector_size
+            self._vectors[start : start + self._vector_size] = vector
+            _SLOT_HEADER.pack_into(self._keys, slot * _SLOT_HEADER.size, key, sequence)
+        self._index[key] = slot
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+
+def _open_mmap(path: str, size: int) -> mmap.mmap:
+    with open(path, "a+b") as file:
+        if os.path.getsize(path) != size:
+            file.truncate(size)
+        return mmap.mmap(file.fileno(), size)
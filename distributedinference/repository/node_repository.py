@@ -11,6 +11,7 @@ from uuid_extensions import uuid7
 
 from distributedinference import api_logger
 from distributedinference.domain.node.entities import ConnectedNode, BackendHost
+from distributedinference.domain.node.entities import NodeConnection
 from distributedinference.domain.node.entities import NodeHealth
 from distributedinference.domain.node.entities import NodeMetrics
 from distributedinference.domain.node.entities import NodeMetricsIncrement
@@ -72,22 +73,20 @@ FROM node_metrics
 WHERE node_metrics.node_info_id = ANY(:node_ids) AND node_metrics.status = :status;
 """
 
-SQL_UPDATE_CONNECTED_AT = """
+SQL_UPDATE_NODE_STATUS = """
 UPDATE node_metrics
 SET
-    connected_at = :connected_at,
-    connected_host = :connected_host,
     status = :status,
     last_updated_at = :last_updated_at
 WHERE node_info_id = :id;
 """
 
-SQL_UPDATE_NODE_STATUS = """
+SQL_UPDATE_NODES_STATUS = """
 UPDATE node_metrics
 SET
     status = :status,
     last_updated_at = :last_updated_at
-WHERE node_info_id = :id;
+WHERE node_info_id = ANY(:ids);
 """
 
 SQL_CREATE_NODE_METRICS = """
@@ -152,14 +151,14 @@ UPDATE node_metrics SET
 WHERE node_info_id = :node_info_id;
 """
 
-SQL_UPDATE_NODE_CONNECTION_TIMESTAMP_AND_STATUS = """
+SQL_UPDATE_NODES_TO_DISCONNECTED = """
 UPDATE node_metrics
 SET
     status = :status,
-    connected_at = :connected_at,
-    connected_host = :connected_host,
+    connected_at = NULL,
+    connected_host = NULL,
     last_updated_at = :last_updated_at
-WHERE node_info_id = :id;
+WHERE node_info_id = ANY(:ids);
 """
 
 SQL_GET_CONNECTED_NODE_COUNT = """
@@ -232,6 +231,12 @@ FROM node_metrics
 WHERE node_info_id = :node_id
 """
 
+SQL_GET_NODES_STATUS = """
+SELECT node_info_id, status
+FROM node_metrics
+WHERE node_info_id = ANY(:node_ids);
+"""
+
 SQL_INSERT_NODE_HEALTH = """
 INSERT INTO node_health (
     id,
@@ -421,17 +426,33 @@ class NodeRepository:
             await session.execute(sqlalchemy.text(SQL_CREATE_NODE_METRICS), data)
             await session.commit()
 
-    @async_timer("node_repository.update_node_connection_timestamp", logger=logger)
-    async def update_node_to_disconnected(self, node_id: UUID, status: NodeStatus):
-        data = {
-            "id": node_id,
-            "connected_at": None,
-            "connected_host": None,
-            "status": status.value,
-            "last_updated_at": utcnow(),
-        }
+    @async_timer("node_repository.set_nodes_connection_timestamp", logger=logger)
+    async def set_nodes_connection_timestamp(self, connections: List[NodeConnection]):
+        """
+        Same as set_node_connection_timestamp for many nodes in one transaction
+        """
+        data = [
+            {
+                "id": str(uuid7()),
+                "node_id": connection.node_id,
+                "requests_served_increment": 0,
+                "requests_successful_increment": 0,
+                "requests_failed_increment": 0,
+                "time_to_first_token": None,
+                "inference_tokens_per_second": None,
+                "rtt": None,
+                "uptime_increment": 0,
+                "connected_at": connection.connected_at,
+                "connected_host": connection.connected_host,
+                "model_name": connection.model_name,
+                "status": connection.status.value,
+                "created_at": utcnow(),
+                "last_updated_at": utcnow(),
+            }
+            for connection in connections
+        ]
         async with self._session_provider.get() as session:
-            await session.execute(sqlalchemy.text(SQL_UPDATE_CONNECTED_AT), data)
+            await session.execute(sqlalchemy.text(SQL_CREATE_NODE_METRICS), data)
             await session.commit()
 
     @async_timer("node_repository.update_node_status", logger=logger)
@@ -445,6 +466,22 @@ class NodeRepository:
             await session.execute(sqlalchemy.text(SQL_UPDATE_NODE_STATUS), data)
             await session.commit()
 
+    @async_timer("node_repository.update_nodes_status", logger=logger)
+    async def update_nodes_status(self, statuses: Dict[UUID, NodeStatus]):
+        """
+        One UPDATE per distinct status, all in a single transaction
+        """
+        last_updated_at = utcnow()
+        async with self._session_provider.get() as session:
+            for status, node_ids in _group_by_status(statuses).items():
+                data = {
+                    "ids": node_ids,
+                    "status": status.value,
+                    "last_updated_at": last_updated_at,
+                }
+                await session.execute(sqlalchemy.text(SQL_UPDATE_NODES_STATUS), data)
+            await session.commit()
+
     @async_timer("node_repository.increment_node_metrics", logger=logger)
     async def increment_node_metrics(self, metrics: NodeMetricsIncrement):
         data = {
@@ -462,20 +499,21 @@ class NodeRepository:
             await session.execute(sqlalchemy.text(SQL_INCREMENT_NODE_METRICS), data)
             await session.commit()
 
-    @async_timer("node_repository.set_nodes_inactive", logger=logger)
-    async def set_nodes_inactive(self, nodes: List[ConnectedNode]):
+    @async_timer("node_repository.update_nodes_to_disconnected", logger=logger)
+    async def update_nodes_to_disconnected(self, statuses: Dict[UUID, NodeStatus]):
+        """
+        One UPDATE per distinct status, all in a single transaction
+        """
+        last_updated_at = utcnow()
         async with self._session_provider.get() as session:
-            for node in nodes:
+            for status, node_ids in _group_by_status(statuses).items():
                 data = {
-                    "id": node.uid,
-                    "status": node.node_status.value,
-                    "connected_at": None,
-                    "connected_host": None,
-                    "last_updated_at": utcnow(),
+                    "ids": node_ids,
+                    "status": status.value,
+                    "last_updated_at": last_updated_at,
                 }
                 await session.execute(
-                    sqlalchemy.text(SQL_UPDATE_NODE_CONNECTION_TIMESTAMP_AND_STATUS),
-                    data,
+                    sqlalchemy.text(SQL_UPDATE_NODES_TO_DISCONNECTED), data
                 )
             await session.commit()
 
@@ -531,6 +569,13 @@ class NodeRepository:
                 return NodeStatus(row.status)
             return None
 
+    @async_timer("node_repository.get_nodes_status", logger=logger)
+    async def get_nodes_status(self, node_ids: List[UUID]) -> Dict[UUID, NodeStatus]:
+        data = {"node_ids": node_ids}
+        async with self._session_provider_read.get() as session:
+            rows = await session.execute(sqlalchemy.text(SQL_GET_NODES_STATUS), data)
+            return {row.node_info_id: NodeStatus(row.status) for row in rows}
+
     @async_timer("node_repository.save_node_health", logger=logger)
     async def save_node_health(self, node_id: UUID, health: NodeHealth):
         data = {
@@ -575,6 +620,13 @@ class NodeRepository:
             return [(row.node_info_id, NodeStatus(row.status)) for row in result]
 
 
+def _group_by_status(statuses: Dict[UUID, NodeStatus]) -> Dict[NodeStatus, List[UUID]]:
+    node_ids_by_status: Dict[NodeStatus, List[UUID]] = {}
+    for node_id, status in statuses.items():
+        node_ids_by_status.setdefault(status, []).append(node_id)
+    return node_ids_by_status
+
+
 def _get_healthcheck_power_percent(health: NodeHealth):
     if not health.gpus or health.gpus[0].power_percent is None:
         return []
@@ -0,0 +1,21 @@
+from typing import Set
+from uuid import UUID
+
+
+class NodeStatusQueueRepository:
+    """
+    Locally connected nodes whose status changed in memory but is not yet saved to
+    the database. A node is queued only once no matter how many times its status
+    changes, the job saves its latest status.
+    """
+
+    def __init__(self) -> None:
+        self._node_ids: Set[UUID] = set()
+
+    def push(self, node_id: UUID) -> None:
+        self._node_ids.add(node_id)
+
+    def pop_all(self) -> Set[UUID]:
+        node_ids = self._node_ids
+        self._node_ids = set()
+        return node_ids
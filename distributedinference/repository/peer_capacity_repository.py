@@ -0,0 +1,136 @@
+import ipaddress
+import time
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import aiohttp
+
+from distributedinference import api_logger
+from distributedinference.domain.node.entities import ModelCapacity
+from distributedinference.domain.node.entities import PeerCapacity
+
+logger = api_logger.get()
+
+
+@dataclass
+class _CircuitBreaker:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    is_trial_running: bool = False
+
+
+class PeerCapacityRepository:
+    """
+    Capacity summaries gossiped by the peer backends and a circuit breaker per peer.
+
+    A peer's breaker opens after `failure_threshold` consecutive failures. After
+    `reset_seconds` a single trial request is let through, success closes the breaker.
+    """
+
+    def __init__(
+        self,
+        peer_ips: List[str],
+        max_age_seconds: float,
+        failure_threshold: int,
+        reset_seconds: float,
+    ):
+        self._peer_ips = [ip for ip in peer_ips if _is_valid_ip(ip)]
+        self._max_age_seconds = max_age_seconds
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        # peer_ip: PeerCapacity
+        self._capacities: Dict[str, PeerCapacity] = {}
+        self._breakers: Dict[str, _CircuitBreaker] = {
+            ip: _CircuitBreaker() for ip in self._peer_ips
+        }
+
+    def get_peer_ips(self) -> List[str]:
+        return list(self._peer_ips)
+
+    def set_capacity(self, peer_ip: str, models: Dict[str, ModelCapacity]) -> None:
+        self._capacities[peer_ip] = PeerCapacity(
+            peer_ip=peer_ip, models=models, updated_at=time.monotonic()
+        )
+        # The failures counted are consecutive, an open breaker is closed by a
+        # successful trial request instead
+        breaker = self._breakers.get(peer_ip)
+        if breaker and breaker.opened_at is None:
+            breaker.failures = 0
+
+    def get_capacity(self, peer_ip: str) -> Optional[PeerCapacity]:
+        """
+        Returns None if the peer has not shared its capacity recently
+        """
+        capacity = self._capacities.get(peer_ip)
+        if not capacity:
+            return None
+        if time.monotonic() - capacity.updated_at > self._max_age_seconds:
+            return None
+        return capacity
+
+    def is_available(self, peer_ip: str) -> bool:
+        breaker = self._breakers.get(peer_ip)
+        if not breaker or breaker.opened_at is None:
+            return True
+        if time.monotonic() - breaker.opened_at < self._reset_seconds:
+            return False
+        # Half open, only one trial request at a time
+        return not breaker.is_trial_running
+
+    def record_attempt(self, peer_ip: str) -> None:
+        breaker = self._breakers.get(peer_ip)
+        if breaker and breaker.opened_at is not None:
+            breaker.is_trial_running = True
+
+    def record_attempt_ended(self, peer_ip: str) -> None:
+        """
+        The attempt was cancelled or its stream closed without an outcome, another
+        trial request may be let through
+        """
+        breaker = self._breakers.get(peer_ip)
+        if breaker:
+            breaker.is_trial_running = False
+
+    def record_success(self, peer_ip: str) -> None:
+        if peer_ip in self._breakers:
+            self._breakers[peer_ip] = _CircuitBreaker()
+
+    def record_failure(self, peer_ip: str) -> None:
+        breaker = self._breakers.get(peer_ip)
+        if not breaker:
+            return
+        breaker.failures += 1
+        breaker.is_trial_running = False
+        if breaker.opened_at is not None or breaker.failures >= self._failure_threshold:
+            if breaker.opened_at is None:
+                logger.warning(f"Circuit breaker opened for peer {peer_ip}")
+            breaker.opened_at = time.monotonic()
+
+    async def fetch_capacity(
+        self, peer_ip: str, timeout_seconds: float
+    ) -> Optional[Dict[str, ModelCapacity]]:
+        timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(f"http://{peer_ip}/v1/network/capacity") as response:
+                if response.status != 200:
+                    logger.debug(
+                        f"Peer {peer_ip} capacity request failed, status={response.status}"
+                    )
+                    return None
+                response_json = await response.json()
+        return {
+            model: ModelCapacity.from_dict(capacity)
+            for model, capacity in response_json["models"].items()
+        }
+
+
+def _is_valid_ip(ip: str) -> bool:
+    try:
+        ipaddress.ip_address(ip)
+        return True
+    except ValueError:
+        if ip:
+            logger.error(f"Invalid peer node IP address: {ip}")
+        return False
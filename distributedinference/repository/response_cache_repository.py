@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from typing import Tuple
+
+from distributedinference.domain.node.entities import CachedResponse
+
+
+class ResponseCacheRepository:
+    """
+    In memory cache of completed inference responses. Entries expire after
+    ttl_seconds, above max_bytes the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        # key: (expires_at, response), least recently used first
+        self._entries: OrderedDict[str, Tuple[float, CachedResponse]] = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: CachedResponse) -> bool:
+        """
+        Returns False if the response alone is larger than the cache
+        """
+        if response.size > self._max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, response)
+        self._size += response.size
+        while self._size > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+        return True
+
+    def _remove(self, key: str) -> None:
+        _, response = self._entries.pop(key)
+        self._size -= response.size
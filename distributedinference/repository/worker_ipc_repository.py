@@ -0,0 +1,183 @@
+import asyncio
+import fcntl
+import glob
+import os
+from typing import Any
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import orjson
+
+from distributedinference import api_logger
+
+logger = api_logger.get()
+
+SOCKET_PREFIX = "worker-"
+SOCKET_SUFFIX = ".sock"
+PRIMARY_LOCK_FILE = "primary.lock"
+# Inference requests can carry very long prompts in a single line
+STREAM_LIMIT_BYTES = 64 * 1024 * 1024
+
+IpcHandler = Callable[[Dict], AsyncIterator[Dict]]
+
+
+class WorkerIpcRepository:
+    """
+    Local IPC between the worker processes of the same backend.
+
+    Every worker listens on its own Unix socket `worker-<pid>.sock` in `ipc_dir`.
+    A client sends one newline delimited JSON message per connection and reads
+    newline delimited JSON messages back until the server closes the connection.
+    If `ipc_dir` is not set the backend runs with a single worker and IPC is disabled.
+    """
+
+    def __init__(self, ipc_dir: Optional[str]):
+        self._ipc_dir = ipc_dir
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handler: Optional[IpcHandler] = None
+        self._primary_lock_file: Optional[Any] = None
+        self._pid = os.getpid()
+
+    def is_enabled(self) -> bool:
+        return bool(self._ipc_dir)
+
+    def get_socket_path(self) -> Optional[str]:
+        if not self._ipc_dir:
+            return None
+        return os.path.join(self._ipc_dir, f"{SOCKET_PREFIX}{self._pid}{SOCKET_SUFFIX}")
+
+    async def start_server(self, handler: IpcHandler) -> None:
+        socket_path = self.get_socket_path()
+        if not socket_path or not self._ipc_dir:
+            return
+        os.makedirs(self._ipc_dir, exist_ok=True)
+        self._remove_stale_sockets()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self._handler = handler
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=socket_path, limit=STREAM_LIMIT_BYTES
+        )
+        logger.info(f"Worker IPC server listening on {socket_path}")
+
+    async def stop_server(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        socket_path = self.get_socket_path()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        if self._primary_lock_file:
+            self._primary_lock_file.close()
+            self._primary_lock_file = None
+
+    def try_become_primary(self) -> bool:
+        """
+        Exactly one worker holds the primary lock, used to run jobs that must not
+        run once per worker. Without IPC the only worker is always primary.
+        """
+        if not self._ipc_dir:
+            return True
+        if self._primary_lock_file:
+            return True
+        os.makedirs(self._ipc_dir, exist_ok=True)
+        # pylint: disable=R1732
+        lock_file = open(
+            os.path.join(self._ipc_dir, PRIMARY_LOCK_FILE), "a+", encoding="utf-8"
+        )
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._primary_lock_file = lock_file
+        return True
+
+    def get_sibling_socket_paths(self) -> List[str]:
+        if not self._ipc_dir:
+            return []
+        result = []
+        for socket_path in glob.glob(
+            os.path.join(self._ipc_dir, f"{SOCKET_PREFIX}*{SOCKET_SUFFIX}")
+        ):
+            pid = _get_pid(socket_path)
+            if pid is None or pid == self._pid or not _is_process_alive(pid):
+                continue
+            result.append(socket_path)
+        return result
+
+    async def stream(
+        self, socket_path: str, message: Dict
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        Raises OSError if the sibling worker is not reachable
+        """
+        reader, writer = await asyncio.open_unix_connection(
+            socket_path, limit=STREAM_LIMIT_BYTES
+        )
+        try:
+            writer.write(orjson.dumps(message) + b"\n")
+            await writer.drain()
+            while line := await reader.readline():
+                yield orjson.loads(line)
+        finally:
+            writer.close()
+
+    async def request(self, socket_path: str, message: Dict) -> Optional[Dict]:
+        async for response in self.stream(socket_path, message):
+            return response
+        return None
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            line = await reader.readline()
+            if not line or not self._handler:
+                return
+            message = orjson.loads(line)
+            async for response in self._handler(message):
+                writer.write(orjson.dumps(response) + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.warning("Worker IPC client disconnected")
+        except Exception:
+            logger.error("Failed to handle worker IPC message", exc_info=True)
+        finally:
+            writer.close()
+
+    def _remove_stale_sockets(self) -> None:
+        if not self._ipc_dir:
+            return
+        for socket_path in glob.glob(
+            os.path.join(self._ipc_dir, f"{SOCKET_PREFIX}*{SOCKET_SUFFIX}")
+        ):
+            pid = _get_pid(socket_path)
+            if pid is not None and not _is_process_alive(pid):
+                try:
+                    os.remove(socket_path)
+                except OSError:
+                    pass
+
+
+def _get_pid(socket_path: str) -> Optional[int]:
+    name = os.path.basename(socket_path)
+    try:
+        return int(name[len(SOCKET_PREFIX) : -len(SOCKET_SUFFIX)])
+    except ValueError:
+        return None
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -15,7 +15,13 @@ from distributedinference import dependencies
 from distributedinference.analytics.analytics import Analytics
 from distributedinference.analytics.analytics import AnalyticsEvent
 from distributedinference.analytics.analytics import EventName
+from distributedinference.domain.agent.logs.agent_logs_admission import (
+    AgentLogsAdmission,
+)
 from distributedinference.domain.user.entities import User
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
 from distributedinference.repository.agent_logs_repository import AgentLogsRepository
 from distributedinference.repository.agent_repository import AgentRepository
 from distributedinference.repository.aws_storage_repository import AWSStorageRepository
@@ -214,9 +220,21 @@ async def add_logs(
     logs_repository: AgentLogsRepository = Depends(
         dependencies.get_agent_logs_repository
     ),
+    admission: Optional[AgentLogsAdmission] = Depends(
+        dependencies.get_agent_logs_admission
+    ),
+    logs_queue_repository: Optional[AgentLogsQueueRepository] = Depends(
+        dependencies.get_agent_logs_queue_repository
+    ),
 ):
     return await add_agent_logs_service.execute(
-        agent_id, request, user, agent_repository, logs_repository
+        agent_id,
+        request,
+        user,
+        agent_repository,
+        logs_repository,
+        admission=admission,
+        queue_repository=logs_queue_repository,
     )
 
 
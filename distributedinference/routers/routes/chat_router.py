@@ -18,6 +18,18 @@ from distributedinference.repository.tokens_queue_repository import (
 )
 from distributedinference.repository.node_repository import NodeRepository
 from distributedinference.repository.tokens_repository import TokensRepository
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
 from distributedinference.repository.rate_limit_repository import RateLimitRepository
 from distributedinference.service.auth import authentication
 from distributedinference.service.completions import chat_completions_handler_service
@@ -59,6 +71,18 @@ async def completions(
         dependencies.get_tokens_queue_repository
     ),
     analytics: Analytics = Depends(dependencies.get_analytics),
+    worker_ipc_repository: WorkerIpcRepository = Depends(
+        dependencies.get_worker_ipc_repository
+    ),
+    peer_capacity_repository: PeerCapacityRepository = Depends(
+        dependencies.get_peer_capacity_repository
+    ),
+    node_status_queue_repository: NodeStatusQueueRepository = Depends(
+        dependencies.get_node_status_queue_repository
+    ),
+    response_cache_repository: ResponseCacheRepository = Depends(
+        dependencies.get_response_cache_repository
+    ),
 ):
     # analytics.track_event(user.uid, AnalyticsEvent(EventName.CHAT_COMPLETIONS, {}))
     return await chat_completions_handler_service.execute(
@@ -73,4 +97,8 @@ async def completions(
         metrics_queue_repository,
         tokens_queue_repository,
         analytics,
+        worker_ipc_repository,
+        peer_capacity_repository,
+        node_status_queue_repository,
+        response_cache_repository,
     )
@@ -27,6 +27,18 @@ from distributedinference.repository.tokens_queue_repository import (
     TokensQueueRepository,
 )
 from distributedinference.repository.tokens_repository import TokensRepository
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
 from distributedinference.repository.user_node_repository import UserNodeRepository
 from distributedinference.repository.user_repository import UserRepository
 from distributedinference.service import error_responses
@@ -217,7 +229,7 @@ async def list_nodes(
     response_description="Returns a chat completion object, or a streamed sequence of chat completion chunk objects if the request is streamed.",
     response_model=ChatCompletion,
 )
-# pylint: disable=too-many-arguments, R0801
+# pylint: disable=too-many-arguments, R0801, R0914
 async def completions(
     request: ChatCompletionRequest,
     response: Response,
@@ -239,6 +251,18 @@ async def completions(
     ),
     user_repository: UserRepository = Depends(dependencies.get_user_repository),
     analytics: Analytics = Depends(dependencies.get_analytics),
+    worker_ipc_repository: WorkerIpcRepository = Depends(
+        dependencies.get_worker_ipc_repository
+    ),
+    peer_capacity_repository: PeerCapacityRepository = Depends(
+        dependencies.get_peer_capacity_repository
+    ),
+    node_status_queue_repository: NodeStatusQueueRepository = Depends(
+        dependencies.get_node_status_queue_repository
+    ),
+    response_cache_repository: ResponseCacheRepository = Depends(
+        dependencies.get_response_cache_repository
+    ),
 ):
     analytics.track_event(
         user.uid, AnalyticsEvent(EventName.DASHBOARD_CHAT_COMPLETIONS, {})
@@ -270,6 +294,10 @@ async def completions(
         metrics_queue_repository,
         tokens_queue_repository,
         analytics,
+        worker_ipc_repository,
+        peer_capacity_repository,
+        node_status_queue_repository,
+        response_cache_repository,
     )
 
 
@@ -1,13 +1,19 @@
+from typing import Optional
+
 from fastapi import APIRouter
 from fastapi import Depends
 from openai.types import CreateEmbeddingResponse
 
 from distributedinference import api_logger
 from distributedinference import dependencies
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
 from distributedinference.domain.user.entities import User
 from distributedinference.repository.embedding_api_repository import (
     EmbeddingApiRepository,
 )
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
 from distributedinference.service.auth import authentication
 from distributedinference.service.embedding import embedding_service
 from distributedinference.service.embedding.entities import EmbeddingRequest
@@ -31,6 +37,14 @@ async def completions(
     embedding_repository: EmbeddingApiRepository = Depends(
         dependencies.get_embedding_api_repository
     ),
+    embedding_batcher: Optional[EmbeddingBatcher] = Depends(
+        dependencies.get_embedding_batcher
+    ),
+    embedding_cache_repository: Optional[EmbeddingCacheRepository] = Depends(
+        dependencies.get_embedding_cache_repository
+    ),
     _: User = Depends(authentication.validate_api_key_header),
 ):
-    return await embedding_service.execute(request, embedding_repository)
+    return await embedding_service.execute(
+        request, embedding_repository, embedding_batcher, embedding_cache_repository
+    )
@@ -14,6 +14,9 @@ from distributedinference import dependencies
 from distributedinference.analytics.analytics import Analytics
 from distributedinference.analytics.analytics import AnalyticsEvent
 from distributedinference.analytics.analytics import EventName
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
 from distributedinference.domain.user.entities import User
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
@@ -39,6 +42,7 @@ logger = api_logger.get()
     response_description="Returns a list of image objects.",
     response_model=ImagesResponse,
 )
+# pylint: disable=too-many-arguments
 async def generations(
     request: ImageGenerationRequest,
     user: User = Depends(authentication.validate_api_key_header),
@@ -49,12 +53,17 @@ async def generations(
     gcs_client: GoogleCloudStorage = Depends(
         dependencies.get_google_cloud_storage_client
     ),
+    scheduler: Optional[ImageGenerationScheduler] = Depends(
+        dependencies.get_image_generation_scheduler
+    ),
 ):
     analytics.track_event(user.uid, AnalyticsEvent(EventName.IMAGE_GENERATION, {}))
     return await images_generations_handler_service.execute(
         request,
         connected_node_repository,
         gcs_client,
+        scheduler,
+        user.uid,
     )
 
 
@@ -95,6 +104,9 @@ async def edits(
     gcs_client: GoogleCloudStorage = Depends(
         dependencies.get_google_cloud_storage_client
     ),
+    scheduler: Optional[ImageGenerationScheduler] = Depends(
+        dependencies.get_image_generation_scheduler
+    ),
 ):
     analytics.track_event(api_user.uid, AnalyticsEvent(EventName.IMAGE_EDIT, {}))
     image_bytes = await image.read()
@@ -112,4 +124,6 @@ async def edits(
         request,
         connected_node_repository,
         gcs_client,
+        scheduler,
+        api_user.uid,
     )
@@ -9,11 +9,21 @@ from distributedinference.analytics.analytics import (
     EventName,
 )
 from distributedinference.domain.user.entities import User
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
 from distributedinference.repository.node_repository import NodeRepository
 from distributedinference.repository.tokens_repository import TokensRepository
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
 from distributedinference.service.auth import authentication
+from distributedinference.service.network import get_network_capacity_service
 from distributedinference.service.network import get_network_stats_service
+from distributedinference.service.network import get_node_latencies_service
+from distributedinference.service.network.entities import NetworkCapacityResponse
 from distributedinference.service.network.entities import NetworkStatsResponse
+from distributedinference.service.network.entities import NodeLatenciesResponse
 
 TAG = "Network"
 router = APIRouter(prefix="/network")
@@ -35,3 +45,41 @@ async def network_stats(
 ):
     analytics.track_event(user.uid, AnalyticsEvent(EventName.GET_NETWORK_STATS, {}))
     return await get_network_stats_service.execute(node_repository, tokens_repository)
+
+
+# Polled by the peer backends, only reachable from their IPs
+@router.get(
+    "/capacity",
+    include_in_schema=False,
+    response_model=NetworkCapacityResponse,
+)
+async def network_capacity(
+    connected_node_repository: ConnectedNodeRepository = Depends(
+        dependencies.get_connected_node_repository
+    ),
+    worker_ipc_repository: WorkerIpcRepository = Depends(
+        dependencies.get_worker_ipc_repository
+    ),
+):
+    return await get_network_capacity_service.execute(
+        connected_node_repository, worker_ipc_repository
+    )
+
+
+# Per node percentiles, Prometheus only gets them aggregated by model
+@router.get(
+    "/nodes/latency",
+    include_in_schema=False,
+    response_model=NodeLatenciesResponse,
+)
+async def node_latencies(
+    connected_node_repository: ConnectedNodeRepository = Depends(
+        dependencies.get_connected_node_repository
+    ),
+    worker_ipc_repository: WorkerIpcRepository = Depends(
+        dependencies.get_worker_ipc_repository
+    ),
+):
+    return await get_node_latencies_service.execute(
+        connected_node_repository, worker_ipc_repository
+    )
@@ -10,7 +10,11 @@ from distributedinference import dependencies
 from distributedinference.analytics.analytics import Analytics
 from distributedinference.analytics.analytics import AnalyticsEvent
 from distributedinference.analytics.analytics import EventName
+from distributedinference.domain.node import node_frame_codec
 from distributedinference.domain.user.entities import User
+from distributedinference.domain.node.node_connect_pipeline import (
+    NodeConnectPipeline,
+)
 from distributedinference.repository.benchmark_repository import BenchmarkRepository
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
@@ -57,12 +61,12 @@ async def websocket_endpoint(
     connected_node_repository: ConnectedNodeRepository = Depends(
         dependencies.get_connected_node_repository
     ),
-    benchmark_repository: BenchmarkRepository = Depends(
-        dependencies.get_benchmark_repository
-    ),
     user_repository: UserRepository = Depends(dependencies.get_user_repository),
     analytics: Analytics = Depends(dependencies.get_analytics),
     protocol_handler: ProtocolHandler = Depends(dependencies.get_protocol_handler),
+    node_connect_pipeline: NodeConnectPipeline = Depends(
+        dependencies.get_node_connect_pipeline
+    ),
 ):
     user = await authentication.validate_api_key(
         websocket.headers.get("Authorization"),
@@ -87,9 +91,10 @@ async def websocket_endpoint(
         websocket.headers.get("Model-Type"),
         node_repository,
         connected_node_repository,
-        benchmark_repository,
+        node_connect_pipeline,
         analytics,
         protocol_handler,
+        node_frame_codec.get_encoding(websocket.scope.get("subprotocols", [])),
     )
 
 
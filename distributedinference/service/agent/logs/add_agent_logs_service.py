@@ -1,9 +1,16 @@
+from typing import Optional
 from uuid import UUID
 
 from distributedinference.domain.agent.entities import AgentLog
 from distributedinference.domain.agent.entities import AgentLogInput
 from distributedinference.domain.agent.logs import add_agent_logs_use_case
+from distributedinference.domain.agent.logs.agent_logs_admission import (
+    AgentLogsAdmission,
+)
 from distributedinference.domain.user.entities import User
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
 from distributedinference.repository.agent_logs_repository import AgentLogsRepository
 from distributedinference.repository.agent_repository import AgentRepository
 from distributedinference.service import error_responses
@@ -22,7 +29,14 @@ async def execute(
     user: User,
     agent_repository: AgentRepository,
     repository: AgentLogsRepository,
+    admission: Optional[AgentLogsAdmission] = None,
+    queue_repository: Optional[AgentLogsQueueRepository] = None,
 ) -> AddLogsResponse:
+    if admission and queue_repository:
+        return await _add_buffered(
+            agent_id, request, user, agent_repository, admission, queue_repository
+        )
+
     agent = await agent_repository.get_agent(agent_id)
     if not agent or agent.user_profile_id != user.uid:
         raise error_responses.NotFoundAPIError("Agent with given ID not found")
@@ -38,6 +52,28 @@ async def execute(
     return AddLogsResponse()
 
 
+async def _add_buffered(
+    agent_id: UUID,
+    request: AddLogsRequest,
+    user: User,
+    agent_repository: AgentRepository,
+    admission: AgentLogsAdmission,
+    queue_repository: AgentLogsQueueRepository,
+) -> AddLogsResponse:
+    owner = await admission.get_owner(agent_id, agent_repository)
+    if owner != user.uid:
+        raise error_responses.NotFoundAPIError("Agent with given ID not found")
+
+    if not admission.try_acquire(agent_id, len(request.logs)):
+        raise error_responses.RateLimitError({})
+
+    # Saved by save_agent_logs_job, a full queue means the database is behind
+    if not queue_repository.push(_format_input(agent_id, request)):
+        raise error_responses.RateLimitError({})
+
+    return AddLogsResponse()
+
+
 def _format_input(agent_id: UUID, request: AddLogsRequest) -> AgentLogInput:
     return AgentLogInput(
         agent_id=agent_id,
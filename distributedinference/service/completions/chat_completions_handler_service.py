@@ -7,6 +7,7 @@ from starlette.responses import StreamingResponse
 import settings
 from distributedinference import api_logger
 from distributedinference.analytics.analytics import Analytics
+from distributedinference.domain.node import response_cache
 from distributedinference.domain.rate_limit import rate_limit_use_case
 from distributedinference.domain.user.entities import User
 from distributedinference.repository.connected_node_repository import (
@@ -21,6 +22,18 @@ from distributedinference.repository.tokens_queue_repository import (
 from distributedinference.repository.node_repository import NodeRepository
 from distributedinference.repository.rate_limit_repository import RateLimitRepository
 from distributedinference.repository.tokens_repository import TokensRepository
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
 from distributedinference.service import error_responses
 from distributedinference.service.completions import chat_completions_service
 from distributedinference.service.completions import chat_completions_stream_service
@@ -29,6 +42,7 @@ from distributedinference.service.completions.entities import ChatCompletionRequ
 from distributedinference.service.completions.streaming_response import (
     StreamingResponseWithStatusCode,
 )
+from distributedinference.service.completions.streaming_response import coalesce
 from distributedinference.service.completions.utils import rate_limit_to_headers
 from distributedinference.service.error_responses import RateLimitError
 from distributedinference.utils.timer import async_timer
@@ -36,7 +50,7 @@ from distributedinference.utils.timer import async_timer
 logger = api_logger.get()
 
 
-# pylint: disable=R0913, R0801
+# pylint: disable=R0913, R0801, R0914
 @async_timer("chat_completions_handler_service.execute", logger=logger)
 async def execute(
     request: ChatCompletionRequest,
@@ -50,9 +64,15 @@ async def execute(
     metrics_queue_repository: MetricsQueueRepository,
     tokens_queue_repository: TokensQueueRepository,
     analytics: Analytics,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+    peer_capacity_repository: Optional[PeerCapacityRepository] = None,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
+    response_cache_repository: Optional[ResponseCacheRepository] = None,
 ) -> Union[StreamingResponse, ChatCompletion]:
 
     _request_checks(request)
+    if not response_cache.is_enabled_for(user):
+        response_cache_repository = None
 
     rate_limit_info = await rate_limit_use_case.execute(
         request.model, user, tokens_repository, rate_limit_repository
@@ -76,18 +96,25 @@ async def execute(
             "Connection": "keep-alive",
             **rate_limit_headers,
         }
+        content = chat_completions_stream_service.execute(
+            user,
+            forwarding_from,
+            request,
+            node_repository=node_repository,
+            connected_node_repository=connected_node_repository,
+            tokens_repository=tokens_repository,
+            metrics_queue_repository=metrics_queue_repository,
+            tokens_queue_repository=tokens_queue_repository,
+            analytics=analytics,
+            worker_ipc_repository=worker_ipc_repository,
+            peer_capacity_repository=peer_capacity_repository,
+            node_status_queue_repository=node_status_queue_repository,
+            response_cache_repository=response_cache_repository,
+        )
+        if settings.SSE_COALESCE_MAX_DELAY_SECONDS > 0:
+            content = coalesce(content, settings.SSE_COALESCE_MAX_DELAY_SECONDS)
         return StreamingResponseWithStatusCode(
-            chat_completions_stream_service.execute(
-                user,
-                forwarding_from,
-                request,
-                node_repository=node_repository,
-                connected_node_repository=connected_node_repository,
-                tokens_repository=tokens_repository,
-                metrics_queue_repository=metrics_queue_repository,
-                tokens_queue_repository=tokens_queue_repository,
-                analytics=analytics,
-            ),
+            content,
             headers=headers,
             media_type="text/event-stream",
         )
@@ -102,6 +129,10 @@ async def execute(
         metrics_queue_repository=metrics_queue_repository,
         tokens_queue_repository=tokens_queue_repository,
         analytics=analytics,
+        worker_ipc_repository=worker_ipc_repository,
+        peer_capacity_repository=peer_capacity_repository,
+        node_status_queue_repository=node_status_queue_repository,
+        response_cache_repository=response_cache_repository,
     )
 
 
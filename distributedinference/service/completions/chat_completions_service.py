@@ -1,12 +1,7 @@
 import time
-from typing import List
 from typing import Optional
 
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat import ChatCompletionMessageToolCall
 from openai.types.chat import CompletionCreateParams
-from openai.types.chat.chat_completion import Choice
-from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
 from uuid_extensions import uuid7
 
 from distributedinference import api_logger
@@ -26,9 +21,21 @@ from distributedinference.repository.tokens_repository import TokensRepository
 from distributedinference.repository.tokens_queue_repository import (
     TokensQueueRepository,
 )
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
 from distributedinference.service import error_responses
-from distributedinference.service.completions import (
-    convert_tool_call_chunks_to_non_streaming,
+from distributedinference.service.completions.completion_accumulator import (
+    CompletionAccumulator,
 )
 from distributedinference.service.completions.entities import ChatCompletion
 from distributedinference.service.completions.entities import ChatCompletionRequest
@@ -49,6 +56,10 @@ async def execute(
     metrics_queue_repository: MetricsQueueRepository,
     tokens_queue_repository: TokensQueueRepository,
     analytics: Analytics,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+    peer_capacity_repository: Optional[PeerCapacityRepository] = None,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
+    response_cache_repository: Optional[ResponseCacheRepository] = None,
 ) -> ChatCompletion:
     try:
         chat_request: CompletionCreateParams = await request.to_openai_chat_completion()
@@ -61,8 +72,7 @@ async def execute(
         chat_request=chat_request,
     )
     try:
-        response = ""
-        tool_response_chunks = []
+        accumulator = CompletionAccumulator()
         usage = None
         executor = InferenceExecutor(
             node_repository=node_repository,
@@ -71,6 +81,10 @@ async def execute(
             metrics_queue_repository=metrics_queue_repository,
             tokens_queue_repository=tokens_queue_repository,
             analytics=analytics,
+            worker_ipc_repository=worker_ipc_repository,
+            peer_capacity_repository=peer_capacity_repository,
+            node_status_queue_repository=node_status_queue_repository,
+            response_cache_repository=response_cache_repository,
         )
         async for inference_response in executor.execute(
             user_uid=user.uid,
@@ -95,34 +109,13 @@ async def execute(
             if not response_chunk:
                 continue
 
-            if choices := response_chunk.choices:
-                first_choice = choices[0]
-                content = first_choice.delta.content
-                if content:
-                    response += content
-
-                if tool_calls := first_choice.delta.tool_calls:
-                    # tool_calls is a list, need to extend!
-                    tool_response_chunks.extend(tool_calls)
+            accumulator.add(response_chunk)
             if response_chunk.usage:
                 usage = response_chunk.usage
 
-        # TODO: we dont return all the fields, eg refusal
-        response_message = ChatCompletionMessage(role="assistant")
-        if response:
-            response_message.content = response
-        response_message.tool_calls = _get_formatted_tool_calls_response(
-            tool_response_chunks
-        )
         return ChatCompletion(
             id="id",
-            choices=[
-                Choice(
-                    finish_reason="stop",
-                    index=0,
-                    message=response_message,
-                )
-            ],
+            choices=accumulator.get_choices(),
             created=int(time.time()),
             model=request.model,
             object="chat.completion",
@@ -130,11 +123,3 @@ async def execute(
         )
     except NoAvailableNodesError:
         raise error_responses.NoAvailableInferenceNodesError()
-
-
-def _get_formatted_tool_calls_response(
-    tool_response_chunks: List[ChoiceDeltaToolCall],
-) -> Optional[List[ChatCompletionMessageToolCall]]:
-    if not tool_response_chunks:
-        return None
-    return convert_tool_call_chunks_to_non_streaming.execute(tool_response_chunks)
@@ -20,13 +20,25 @@ from distributedinference.repository.tokens_repository import TokensRepository
 from distributedinference.repository.tokens_queue_repository import (
     TokensQueueRepository,
 )
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
 from distributedinference.service import error_responses
 from distributedinference.service.completions.entities import ChatCompletionRequest
 
 logger = api_logger.get()
 
 
-# pylint: disable=R0801, R0913
+# pylint: disable=R0801, R0913, R0914
 async def execute(
     user: User,
     forwarding_from: Optional[str],
@@ -37,6 +49,10 @@ async def execute(
     metrics_queue_repository: MetricsQueueRepository,
     tokens_queue_repository: TokensQueueRepository,
     analytics: Analytics,
+    worker_ipc_repository: Optional[WorkerIpcRepository] = None,
+    peer_capacity_repository: Optional[PeerCapacityRepository] = None,
+    node_status_queue_repository: Optional[NodeStatusQueueRepository] = None,
+    response_cache_repository: Optional[ResponseCacheRepository] = None,
 ) -> AsyncIterable:
     try:
         chat_request: CompletionCreateParams = await request.to_openai_chat_completion()
@@ -56,6 +72,10 @@ async def execute(
             metrics_queue_repository=metrics_queue_repository,
             tokens_queue_repository=tokens_queue_repository,
             analytics=analytics,
+            worker_ipc_repository=worker_ipc_repository,
+            peer_capacity_repository=peer_capacity_repository,
+            node_status_queue_repository=node_status_queue_repository,
+            response_cache_repository=response_cache_repository,
         )
         async for inference_response in executor.execute(
             user_uid=user.uid,
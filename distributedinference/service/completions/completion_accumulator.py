@@ -0,0 +1,138 @@
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import cast
+from typing import get_args
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat import ChatCompletionMessage
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
+
+# The finish reasons of a non-streaming choice, others are reported as "stop"
+FinishReason = Literal[
+    "stop", "length", "tool_calls", "content_filter", "function_call"
+]
+FINISH_REASONS = get_args(FinishReason)
+
+
+class ToolCallMerger:
+    """
+    Merges the streamed tool call deltas by tool index, the arguments are joined once
+    when the tool calls are read
+    """
+
+    def __init__(self) -> None:
+        # tool index: tool call without the arguments, in the order of first delta
+        self._tool_calls: Dict[int, Dict] = {}
+        self._arguments: Dict[int, List[str]] = {}
+
+    def add(self, tool_call: ChoiceDeltaToolCall) -> None:
+        merged = self._tool_calls.get(tool_call.index)
+        if merged is None:
+            merged = self._tool_calls[tool_call.index] = {
+                "id": None,
+                "function": {"arguments": "", "name": None},
+                "type": None,
+            }
+            self._arguments[tool_call.index] = []
+        if tool_call.id is not None:
+            merged["id"] = tool_call.id
+        if tool_call.type is not None:
+            merged["type"] = tool_call.type
+        if tool_call.function:
+            if tool_call.function.name is not None:
+                merged["function"]["name"] = tool_call.function.name
+            if tool_call.function.arguments:
+                # Arguments are chunked, everything else, if present, is contained in a single chunk
+                self._arguments[tool_call.index].append(tool_call.function.arguments)
+
+    def get_tool_calls(self) -> List[ChatCompletionMessageToolCall]:
+        tool_calls = []
+        for index, merged in self._tool_calls.items():
+            tool_call = {
+                **merged,
+                "function": {
+                    **merged["function"],
+                    "arguments": "".join(self._arguments[index]),
+                },
+            }
+            tool_calls.append(
+                ChatCompletionMessageToolCall.construct(None, **tool_call)
+            )
+        return tool_calls
+
+
+class CompletionAccumulator:
+    """
+    Builds the choices of a non-streaming completion from the streamed chunks. The
+    content of every choice is collected in a list and joined once, so long
+    completions are not copied on every chunk.
+    """
+
+    def __init__(self) -> None:
+        self._choices: Dict[int, _ChoiceAccumulator] = {}
+        # Content of the first choice, bound once so a content only chunk is an append
+        self._add_content = self._get_choice_accumulator(0).content.append
+
+    def add(self, chunk: ChatCompletionChunk) -> None:
+        # Called for every token: a single choice chunk with only content, the
+        # common case, skips the loop and the choice lookup
+        choices = chunk.choices
+        if len(choices) == 1:
+            choice = choices[0]
+            delta = choice.delta
+            if not choice.index and not delta.tool_calls and not choice.finish_reason:
+                if delta.content:
+                    self._add_content(delta.content)
+                return
+        for choice in choices:
+            accumulator = self._get_choice_accumulator(choice.index)
+            delta = choice.delta
+            if delta.content:
+                accumulator.content.append(delta.content)
+            if delta.tool_calls or choice.finish_reason:
+                accumulator.add(choice)
+
+    def get_choices(self) -> List[Choice]:
+        return [
+            self._choices[index].get_choice(index) for index in sorted(self._choices)
+        ]
+
+    def _get_choice_accumulator(self, index: int) -> "_ChoiceAccumulator":
+        accumulator = self._choices.get(index)
+        if accumulator is None:
+            accumulator = self._choices[index] = _ChoiceAccumulator()
+        return accumulator
+
+
+class _ChoiceAccumulator:
+    def __init__(self) -> None:
+        self.content: List[str] = []
+        self.tool_calls = ToolCallMerger()
+        self.finish_reason: Optional[str] = None
+
+    def add(self, choice: ChunkChoice) -> None:
+        """
+        Tool calls and finish reason of the choice, the content is added by the caller
+        """
+        if choice.delta.tool_calls:
+            for tool_call in choice.delta.tool_calls:
+                self.tool_calls.add(tool_call)
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+
+    def get_choice(self, index: int) -> Choice:
+        # TODO: we dont return all the fields, eg refusal
+        message = ChatCompletionMessage(role="assistant")
+        if self.content:
+            message.content = "".join(self.content)
+        message.tool_calls = self.tool_calls.get_tool_calls() or None
+        finish_reason = cast(
+            FinishReason,
+            self.finish_reason if self.finish_reason in FINISH_REASONS else "stop",
+        )
+        return Choice(finish_reason=finish_reason, index=index, message=message)
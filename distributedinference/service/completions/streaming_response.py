@@ -1,5 +1,8 @@
+import asyncio
 import json
+from typing import AsyncIterable
 from typing import AsyncIterator
+from typing import Optional
 
 from fastapi.responses import StreamingResponse
 from starlette.types import Send
@@ -113,3 +116,66 @@ class StreamingResponseWithStatusCode(StreamingResponse):
                 "more_body": False,
             }
         )
+
+
+async def coalesce(
+    content: AsyncIterable[str], max_delay_seconds: float
+) -> AsyncIterator[str]:
+    """
+    Joins the chunks arriving within `max_delay_seconds` of each other into one
+    write. The first chunk is never delayed, so the time to first token is the same.
+    Chunks read before an error are written before the error is raised.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = aiter(content)
+    next_chunk: Optional[asyncio.Task] = None
+    try:
+        chunk = await _next(iterator)
+        if chunk is None:
+            return
+        yield chunk
+        while True:
+            if next_chunk:
+                chunk = await next_chunk
+                next_chunk = None
+            else:
+                chunk = await _next(iterator)
+            if chunk is None:
+                return
+            buffer = [chunk]
+            deadline = loop.time() + max_delay_seconds
+            while (remaining := deadline - loop.time()) > 0:
+                next_chunk = asyncio.ensure_future(_next(iterator))
+                done, _ = await asyncio.wait({next_chunk}, timeout=remaining)
+                if not done:
+                    # Still running, it is awaited for the next write
+                    break
+                try:
+                    chunk = next_chunk.result()
+                except Exception:
+                    next_chunk = None
+                    yield "".join(buffer)
+                    raise
+                next_chunk = None
+                if chunk is None:
+                    yield "".join(buffer)
+                    return
+                buffer.append(chunk)
+            yield "".join(buffer)
+    finally:
+        if next_chunk:
+            # Cancelling the read also closes the content generator
+            next_chunk.cancel()
+        elif hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+async def _next(iterator: AsyncIterator[str]) -> Optional[str]:
+    """
+    None when the iterator is exhausted, StopAsyncIteration can not be set as the
+    result of a task
+    """
+    try:
+        return await anext(iterator)
+    except StopAsyncIteration:
+        return None
@@ -7,10 +7,14 @@ from openai.types import CreateEmbeddingResponse
 
 import settings
 from distributedinference.domain.embedding import create_embeddings_use_case
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
 from distributedinference.domain.embedding.entities import EmbeddingApiError
 from distributedinference.repository.embedding_api_repository import (
     EmbeddingApiRepository,
 )
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
 from distributedinference.service import error_responses
 from distributedinference.service.embedding.entities import EmbeddingRequest
 
@@ -20,6 +24,8 @@ MAX_BATCH_SIZE: int = 2048
 async def execute(
     request: EmbeddingRequest,
     repository: EmbeddingApiRepository,
+    batcher: Optional[EmbeddingBatcher] = None,
+    cache_repository: Optional[EmbeddingCacheRepository] = None,
 ) -> CreateEmbeddingResponse:
     if request.model not in settings.SUPPORTED_EMBEDDING_MODELS:
         raise error_responses.UnsupportedModelError(model_name=request.model)
@@ -31,7 +37,9 @@ async def execute(
         raise error_responses.ValidationTypeError(
             f"Maximum input array size for embeddings is {MAX_BATCH_SIZE}"
         )
-    return await _get_embedding_result(input_texts, request.encoding_format, repository)
+    return await _get_embedding_result(
+        input_texts, request.encoding_format, repository, batcher, cache_repository
+    )
 
 
 async def _get_input_texts(
@@ -61,10 +69,12 @@ async def _get_embedding_result(
     input_texts: Union[List[str], List[List[int]]],
     encoding_format: Optional[Literal["float", "base64"]],
     repository: EmbeddingApiRepository,
+    batcher: Optional[EmbeddingBatcher],
+    cache_repository: Optional[EmbeddingCacheRepository],
 ) -> CreateEmbeddingResponse:
     try:
         embeddings = await create_embeddings_use_case.execute(
-            input_texts, encoding_format, repository
+            input_texts, encoding_format, repository, batcher, cache_repository
         )
     except EmbeddingApiError as exc:
         raise error_responses.EmbeddingError(exc.status, exc.message)
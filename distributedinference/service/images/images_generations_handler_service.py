@@ -1,8 +1,14 @@
+from typing import Optional
+from uuid import UUID
+
 from openai.types.images_response import ImagesResponse
 from uuid_extensions import uuid7
 
 from distributedinference import api_logger
 from distributedinference.domain.node.entities import ImageGenerationWebsocketRequest
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -19,6 +25,8 @@ async def execute(
     request: ImageGenerationRequest,
     connected_node_repository: ConnectedNodeRepository,
     gcs_client: GoogleCloudStorage,
+    scheduler: Optional[ImageGenerationScheduler] = None,
+    user_id: Optional[UUID] = None,
 ) -> ImagesResponse:
     websocket_request = ImageGenerationWebsocketRequest(
         request_id=str(uuid7()),
@@ -33,4 +41,6 @@ async def execute(
         request.response_format,
         connected_node_repository,
         gcs_client,
+        scheduler,
+        user_id,
     )
@@ -1,8 +1,14 @@
+from typing import Optional
+from uuid import UUID
+
 from openai.types.images_response import ImagesResponse
 
 from distributedinference import api_logger
 from distributedinference.domain.node import run_images_generation_use_case
 from distributedinference.domain.node.entities import ImageGenerationWebsocketRequest
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -17,6 +23,8 @@ async def execute(
     response_format: str,
     connected_node_repository: ConnectedNodeRepository,
     gcs_client: GoogleCloudStorage,
+    scheduler: Optional[ImageGenerationScheduler] = None,
+    user_id: Optional[UUID] = None,
 ) -> ImagesResponse:
     logger.info(
         f"Executing image generation service request: {websocket_request.request_id}"
@@ -28,4 +36,6 @@ async def execute(
         response_format,
         connected_node_repository,
         gcs_client,
+        scheduler,
+        user_id,
     )
@@ -26,6 +26,10 @@ class IpWhitelistMiddleware(BaseHTTPMiddleware):
             ip_address = util.get_state(request, RequestStateKey.IP_ADDRESS)
             if not _is_tee_host_ip(ip_address):
                 raise error_responses.InvalidCredentialsAPIError()
+        if request.url.path in ("/v1/network/capacity", "/v1/network/nodes/latency"):
+            ip_address = util.get_state(request, RequestStateKey.IP_ADDRESS)
+            if not _is_peer_ip(ip_address):
+                raise error_responses.InvalidCredentialsAPIError()
         return await call_next(request)
 
 
@@ -41,3 +45,9 @@ def _is_tee_host_ip(ip_address: Optional[str]) -> bool:
         if ip == ip_address:
             return True
     return False
+
+
+def _is_peer_ip(ip_address: Optional[str]) -> bool:
+    if not settings.is_production():
+        return True
+    return bool(ip_address) and ip_address in settings.PEER_NODES_LIST
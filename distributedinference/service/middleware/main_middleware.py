@@ -37,11 +37,11 @@ class MainMiddleware(BaseHTTPMiddleware):
 
         try:
             logger.info(
-                f"REQUEST STARTED "
-                f"request_id={request_id} "
-                f"request_path={request.url.path} "
-                f"ip={ip_address} "
-                f"country={country} "
+                "REQUEST STARTED request_id=%s request_path=%s ip=%s country=%s ",
+                request_id,
+                request.url.path,
+                ip_address,
+                country,
             )
             before = time.time()
             response: Response = await call_next(request)
@@ -64,14 +64,14 @@ class MainMiddleware(BaseHTTPMiddleware):
             # )
 
             process_time = (time.time() - before) * 1000
-            formatted_process_time = "{0:.2f}".format(process_time)
             if response.status_code != 404:
                 logger.info(
-                    f"REQUEST COMPLETED "
-                    f"request_id={request_id} "
-                    f"request_path={request.url.path} "
-                    f"completed_in={formatted_process_time}ms "
-                    f"status_code={response.status_code}"
+                    "REQUEST COMPLETED request_id=%s request_path=%s "
+                    "completed_in=%.2fms status_code=%s",
+                    request_id,
+                    request.url.path,
+                    process_time,
+                    response.status_code,
                 )
             return await http_headers.add_response_headers(response)
         except Exception as error:
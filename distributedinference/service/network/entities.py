@@ -1,4 +1,7 @@
+from typing import Dict
 from typing import List
+from typing import Optional
+from uuid import UUID
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -25,6 +28,42 @@ class NetworkStatsResponse(BaseModel):
     )
 
 
+class ModelCapacityResponse(BaseModel):
+    nodes: int = Field(description="Connected nodes count")
+    free_slots: int = Field(description="Requests the nodes can accept right now")
+    average_time_to_first_token: Optional[float] = Field(
+        description="Average time to first token in seconds", default=None
+    )
+
+
+class NetworkCapacityResponse(BaseModel):
+    models: Dict[str, ModelCapacityResponse] = Field(
+        description="Capacity of the nodes connected to this backend by model name"
+    )
+
+
+class LatencyPercentilesResponse(BaseModel):
+    count: int = Field(description="Samples count")
+    p50: Optional[float] = Field(description="50th percentile in seconds", default=None)
+    p90: Optional[float] = Field(description="90th percentile in seconds", default=None)
+    p99: Optional[float] = Field(description="99th percentile in seconds", default=None)
+
+
+class NodeLatencyResponse(BaseModel):
+    node_id: UUID = Field(description="Node ID")
+    model: str = Field(description="Model name")
+    rtt: LatencyPercentilesResponse = Field(description="Ping round trip time")
+    time_to_first_token: LatencyPercentilesResponse = Field(
+        description="Time to first token"
+    )
+
+
+class NodeLatenciesResponse(BaseModel):
+    nodes: List[NodeLatencyResponse] = Field(
+        description="Latencies of the nodes connected to this backend"
+    )
+
+
 class GetUserApiKeyExampleResponse(BaseModel):
     api_key: str = Field(description="Example user API key")
 
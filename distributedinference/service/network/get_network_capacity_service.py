@@ -0,0 +1,24 @@
+from distributedinference.domain.node import get_capacity_summary
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.service.network.entities import ModelCapacityResponse
+from distributedinference.service.network.entities import NetworkCapacityResponse
+
+
+async def execute(
+    connected_node_repository: ConnectedNodeRepository,
+    worker_ipc_repository: WorkerIpcRepository,
+) -> NetworkCapacityResponse:
+    summary = await get_capacity_summary.execute(
+        connected_node_repository, worker_ipc_repository
+    )
+    return NetworkCapacityResponse(
+        models={
+            model: ModelCapacityResponse(**capacity.to_dict())
+            for model, capacity in summary.items()
+        }
+    )
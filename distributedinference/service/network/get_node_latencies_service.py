@@ -0,0 +1,23 @@
+from dataclasses import asdict
+
+from distributedinference.domain.node import get_node_latencies
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+from distributedinference.service.network.entities import NodeLatenciesResponse
+from distributedinference.service.network.entities import NodeLatencyResponse
+
+
+async def execute(
+    connected_node_repository: ConnectedNodeRepository,
+    worker_ipc_repository: WorkerIpcRepository,
+) -> NodeLatenciesResponse:
+    latencies = await get_node_latencies.execute(
+        connected_node_repository, worker_ipc_repository
+    )
+    return NodeLatenciesResponse(
+        nodes=[NodeLatencyResponse(**asdict(latency)) for latency in latencies]
+    )
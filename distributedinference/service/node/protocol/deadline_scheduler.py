@@ -0,0 +1,71 @@
+import asyncio
+import heapq
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from distributedinference import api_logger
+
+logger = api_logger.get()
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of per-node deadlines so a protocol tick only touches the nodes that
+    are due instead of scanning all of them.
+
+    Every key has at most one deadline, scheduling it again replaces the previous
+    one. Replaced and cancelled entries stay in the heap and are skipped when popped.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        # key: current deadline
+        self._deadlines: Dict[str, float] = {}
+
+    def schedule(self, key: str, deadline: float) -> None:
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        # Too many stale entries, e.g. after a lot of reschedules
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+
+    def cancel(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def pop_due(self, now: float) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def _compact(self) -> None:
+        self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+
+async def run_in_batches(
+    keys: List[str], send: Callable[[str], Awaitable[None]], batch_size: int
+) -> None:
+    """
+    Sends concurrently instead of awaiting every socket write one after another
+    """
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i : i + batch_size]
+        results = await asyncio.gather(
+            *[send(key) for key in batch], return_exceptions=True
+        )
+        for key, result in zip(batch, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send protocol message to node {key}: {result}")
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional
 
@@ -27,16 +28,15 @@ class PingRequest(BaseModel):
     )
 
 
-class PongResponse(BaseModel):
-    protocol_version: str = Field(
-        description="Protocol version of the ping-pong protocol"
-    )
-    message_type: PingPongMessageType = Field(description="Message type")
-    node_id: str = Field(description="Node ID")
-    nonce: str = Field(description="The same nonce as in the request")
-    api_ping_time: List[Optional[int]] = Field(
-        description="Ping time to Galadriel API in milliseconds"
-    )
+# Parsed by hand on every pong, see ping_pong_protocol._extract_and_validate
+@dataclass(slots=True)
+class PongResponse:
+    protocol_version: str
+    message_type: PingPongMessageType
+    node_id: str
+    nonce: str
+    # Ping time to Galadriel API in milliseconds
+    api_ping_time: List[Optional[int]]
 
 
 class NodeReconnectRequest(BaseModel):
@@ -17,6 +17,12 @@ from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
 from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    DeadlineScheduler,
+)
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    run_in_batches,
+)
 from distributedinference.service.node.protocol.health_check.entities import (
     HealthCheckMessageType,
 )
@@ -53,6 +59,8 @@ class HealthCheckProtocol:
         self.node_repository = node_repository
         self.connected_node_repository = connected_node_repository
         self.active_nodes: Dict[str, NodeHealthCheckInfo] = {}
+        # The next request time of every node that is not waiting for a response
+        self.scheduler = DeadlineScheduler()
         logger.info(f"{self.PROTOCOL_NAME}: Protocol initialized")
 
     async def handle(self, data: Any) -> Any:
@@ -107,6 +115,7 @@ class HealthCheckProtocol:
             + settings.NODE_HEALTH_CHECK_INTERVAL_SECONDS * 1000,
             last_request_nonce=None,
         )
+        self.scheduler.schedule(node_id, self.active_nodes[node_id].next_request_time)
         logger.info(
             f"{self.PROTOCOL_NAME}: Node {node_id} has been added to the active nodes"
         )
@@ -119,6 +128,7 @@ class HealthCheckProtocol:
             )
             return False
         del self.active_nodes[node_id]
+        self.scheduler.cancel(node_id)
         logger.info(
             f"{self.PROTOCOL_NAME}: Node {node_id} has been deleted from the active nodes"
         )
@@ -131,11 +141,15 @@ class HealthCheckProtocol:
         return False
 
     async def _send_health_check_requests(self):
-        current_time = _current_milli_time()
-        for node_id, node_info in self.active_nodes.items():
-            if current_time > node_info.next_request_time:
-                if not node_info.waiting_for_response:
-                    await self._send_health_check_request(node_id)
+        to_send = [
+            node_id
+            for node_id in self.scheduler.pop_due(_current_milli_time())
+            if node_id in self.active_nodes
+            and not self.active_nodes[node_id].waiting_for_response
+        ]
+        await run_in_batches(
+            to_send, self._send_health_check_request, settings.PROTOCOL_SEND_BATCH_SIZE
+        )
 
     async def _send_health_check_request(self, node_id: str):
         node_info = self.active_nodes[node_id]
@@ -164,6 +178,12 @@ class HealthCheckProtocol:
             logger.error(
                 f"{self.PROTOCOL_NAME}: Failed to send health check request to node {node_id}"
             )
+            # try again on the next run
+            self.scheduler.schedule(
+                node_id,
+                _current_milli_time()
+                + settings.PROTOCOL_RESPONSE_CHECK_INTERVAL_IN_SECONDS * 1000,
+            )
 
     async def _received_health_check_response(
         self, response: HealthCheckResponse, node_info: NodeHealthCheckInfo
@@ -173,6 +193,8 @@ class HealthCheckProtocol:
         )
         node_info.waiting_for_response = False
         node_info.last_request_nonce = None
+        if response.node_id in self.active_nodes:
+            self.scheduler.schedule(response.node_id, node_info.next_request_time)
 
         node_health = NodeHealth(
             node_id=node_info.node_uuid,
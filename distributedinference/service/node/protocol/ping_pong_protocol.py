@@ -1,17 +1,20 @@
+import logging
 import time
 import uuid
+from array import array
+from dataclasses import dataclass
+from dataclasses import field
 from typing import Any
 from typing import Dict
 from typing import Optional
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
-from pydantic import ConfigDict
-from pydantic import ValidationError
 
 import settings
 from distributedinference import api_logger
+from distributedinference.domain.metrics import node_latency_metrics
+from distributedinference.domain.node.entities import NodeLatencyMetric
 from distributedinference.domain.node.entities import NodeMetricsIncrement
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
@@ -19,6 +22,12 @@ from distributedinference.repository.connected_node_repository import (
 from distributedinference.repository.metrics_queue_repository import (
     MetricsQueueRepository,
 )
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    DeadlineScheduler,
+)
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    run_in_batches,
+)
 from distributedinference.service.node.protocol.entities import NodeReconnectRequest
 from distributedinference.service.node.protocol.entities import PingPongMessageType
 from distributedinference.service.node.protocol.entities import PingRequest
@@ -35,8 +44,19 @@ class PingPongConfig:
     ping_miss_threshold: int
 
 
+# RTT histogram with fixed 10 mSec wide bins, the last bin counts everything above
+RTT_HISTOGRAM_BIN_MSEC = 10
+RTT_HISTOGRAM_BINS = 100
+
+
+def _new_rtt_histogram() -> array:
+    return array("I", [0]) * RTT_HISTOGRAM_BINS
+
+
 # NodePingInfo class to store all the information of a active node
-class NodePingInfo(BaseModel):
+# One instance per connected node, slots keep it small and attribute access fast
+@dataclass(slots=True)
+class NodePingInfo:
     node_uuid: UUID  # the UUID of the node, need this to update the metrics
     model: str
     # Counters
@@ -44,18 +64,16 @@ class NodePingInfo(BaseModel):
     sum_rtt: float = 0  # the sum of all the rtt requests, used to get average rtt
     ping_streak: int = 0  # no of consecutive pings that the node has responded to
     miss_streak: int = 0  # no of consecutive pings that the node has missed
-    histogram: dict = {}  # Histogram of rtt values
+    # Histogram of rtt values, counts per RTT_HISTOGRAM_BIN_MSEC bin
+    histogram: array = field(default_factory=_new_rtt_histogram)
     # State
     next_ping_time: float = 0  # the scheduled time to send the next ping to the node
     waiting_for_pong: bool = False  # flag to check if the node is waiting for pong
-    ping_nonce: str = (
-        ""  # the nonce of the last ping sent to the node to avoid replay attacks
-    )
+    # the nonce of the last ping sent to the node to avoid replay attacks
+    ping_nonce: str = ""
     ping_sent_time: float = 0  # the time when the last ping was sent to the node
-    last_uptime_update_time_in_seconds: float = (
-        0  # the last timestamp in seconds that uptime has been updated
-    )
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    # the last timestamp in seconds that uptime has been updated
+    last_uptime_update_time_in_seconds: float = 0
 
 
 class PingPongProtocol:
@@ -87,6 +105,8 @@ class PingPongProtocol:
         # The main data structure that stores the active nodes
         # and its states related to the ping-pong protocol
         self.active_nodes: Dict[str, NodePingInfo] = {}
+        # The next ping time or pong timeout of every active node
+        self.scheduler = DeadlineScheduler()
         logger.info(f"{self.config.name}: Protocol initialized")
 
     # Handle the responses from the client
@@ -129,9 +149,37 @@ class PingPongProtocol:
             return
 
     # Regularly check if we have received the pong responses and to send ping messages
+    # Only the nodes with a due ping or pong timeout are processed
     async def run(self):
-        await self.send_pings()
-        await self.check_for_pongs()
+        current_time = _current_milli_time()
+        to_ping = []
+        for node_id in self.scheduler.pop_due(current_time):
+            node_info = self.active_nodes.get(node_id)
+            if node_info is None:
+                continue
+            if not node_info.waiting_for_pong:
+                to_ping.append(node_id)
+            elif round(current_time - node_info.ping_sent_time) > (
+                self.config.ping_timeout_in_msec
+            ):
+                # timed out, mark it as missed pong
+                await self.missed_pong(node_id, node_info)
+            else:
+                self.schedule_node(node_id)
+        await run_in_batches(
+            to_ping, self.send_ping_message, settings.PROTOCOL_SEND_BATCH_SIZE
+        )
+
+    # (Re)schedule the node's next deadline based on its state
+    def schedule_node(self, node_id: str):
+        node_info = self.active_nodes.get(node_id)
+        if node_info is None:
+            return
+        if node_info.waiting_for_pong:
+            deadline = node_info.ping_sent_time + self.config.ping_timeout_in_msec + 1
+        else:
+            deadline = node_info.next_ping_time + 1
+        self.scheduler.schedule(node_id, deadline)
 
     # Add a node to the active nodes dictionary
     # called when a new node connects to the server through websocket
@@ -149,13 +197,13 @@ class PingPongProtocol:
             sum_rtt=0,
             ping_streak=0,
             miss_streak=0,
-            histogram={},
             next_ping_time=current_time + self.config.ping_interval_in_msec,
             waiting_for_pong=False,
             ping_nonce="",
             ping_sent_time=current_time,
             last_uptime_update_time_in_seconds=time.time(),  # in seconds
         )
+        self.schedule_node(node_id)
         logger.info(
             f"{self.config.name}: Node {node_id} has been added to the active nodes"
         )
@@ -185,6 +233,7 @@ class PingPongProtocol:
         )
 
         del self.active_nodes[node_id]
+        self.scheduler.cancel(node_id)
         logger.info(
             f"{self.config.name}: Node {node_id} has been deleted from the active nodes"
         )
@@ -196,23 +245,6 @@ class PingPongProtocol:
                 return await self.remove_node(node_id)
         return False
 
-    async def send_pings(self):
-        current_time = _current_milli_time()
-        for node_id, node_info in self.active_nodes.items():
-            if current_time > node_info.next_ping_time:
-                if not node_info.waiting_for_pong:
-                    await self.send_ping_message(node_id)
-
-    async def check_for_pongs(self):
-        for node_id, node_info in self.active_nodes.items():
-            if node_info.waiting_for_pong:  # waiting for pong
-                if round(_current_milli_time() - node_info.ping_sent_time) > (
-                    self.config.ping_timeout_in_msec
-                ):
-                    await self.missed_pong(
-                        node_id, node_info
-                    )  # timed out, mark it as missed pong
-
     # Send a ping message to the client
     async def send_ping_message(self, node_id: str):
         node_info = self.active_nodes.get(node_id)
@@ -252,6 +284,12 @@ class PingPongProtocol:
                 logger.error(
                     f"{self.config.name}: Node {node_id} ping message sending failed, node_info = {node_info}"
                 )
+                # try again on the next run
+                self.scheduler.schedule(
+                    node_id,
+                    sent_time
+                    + settings.PROTOCOL_RESPONSE_CHECK_INTERVAL_IN_SECONDS * 1000,
+                )
                 return
 
             # Update the state and the counters after sending the ping
@@ -259,6 +297,7 @@ class PingPongProtocol:
             node_info.waiting_for_pong = True  # set the node to waiting for pong
             node_info.ping_nonce = nonce  # the nonce that was sent in the ping
             node_info.ping_sent_time = sent_time  # update the last ping time
+            self.schedule_node(node_id)  # wait for the pong until the timeout
 
             logger.info(
                 f"{self.config.name}: Sent ping to node {node_id}, sent time = {sent_time}, nonce = {nonce}"
@@ -277,6 +316,8 @@ class PingPongProtocol:
         node_info.ping_streak = 0  # reset the ping streak
         node_info.miss_streak += 1  # increment the miss streak
 
+        self.schedule_node(node_id)
+
         # If the ping is not responded more than X times, the node should be assumed to be dead.
         if node_info.miss_streak > 3:
             await self.remove_node(
@@ -302,17 +343,24 @@ class PingPongProtocol:
         node_info.miss_streak = 0  # resset miss streak if any
         node_info.ping_streak += 1  # increment the ping streak
         node_info.rtt = current_rtt  # calculate the rtt
+        node_latency_metrics.record(
+            self.connected_node_repository,
+            node_info.node_uuid,
+            node_info.model,
+            NodeLatencyMetric.RTT,
+            current_rtt / 1000,
+        )
 
-        hist_bin = int(node_info.rtt / 10)  # 1 bin for every 10 mSec
-        bin_str = f"{hist_bin * 10 + 1}-{hist_bin * 10 + 10}"
-
-        if bin_str in node_info.histogram:
-            node_info.histogram[bin_str] = node_info.histogram[bin_str] + 1
-        else:
-            node_info.histogram[bin_str] = 1
+        node_info.histogram[
+            min(
+                max(int(current_rtt), 0) // RTT_HISTOGRAM_BIN_MSEC,
+                RTT_HISTOGRAM_BINS - 1,
+            )
+        ] += 1
 
         node_info.waiting_for_pong = False  # reset the waiting for pong flag
         node_info.ping_sent_time = 0  # reset the ping sent time
+        self.schedule_node(node_id)
 
         current_time = time.time()
         uptime_increment = int(
@@ -330,10 +378,13 @@ class PingPongProtocol:
         logger.info(
             f"{self.config.name}: Received pong from node {node_id}, nonce = {node_info.ping_nonce}, rtt = {node_info.rtt} mSec, ping streak = {node_info.ping_streak}, miss streak = {node_info.miss_streak}, average rtt = {node_info.sum_rtt / node_info.ping_streak} mSec"
         )
-        logger.debug(f"{self.config.name}: Node {node_id} histogram of RTTs")
-        for bin_str, count in node_info.histogram.items():
-            if count > 0:
-                logger.debug(f"{self.config.name}: Range {bin_str} mSec -> {count}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s: Node %s histogram of RTTs (mSec range -> count): %s",
+                self.config.name,
+                node_id,
+                get_histogram_bins(node_info.histogram),
+            )
 
     # Check if the API ping time is significantly less than the RTT
     # True means the node is not connected to the closest backend server and should reconnect
@@ -393,24 +444,63 @@ def _current_milli_time():
     return time.time_ns() // 1_000_000
 
 
+def get_histogram_bins(histogram: array) -> Dict[str, int]:
+    """
+    Non-empty bins of the RTT histogram, keyed by their mSec range
+    """
+    bins = {}
+    for i, count in enumerate(histogram):
+        if not count:
+            continue
+        start = i * RTT_HISTOGRAM_BIN_MSEC
+        if i == RTT_HISTOGRAM_BINS - 1:
+            bins[f"{start}+"] = count
+        else:
+            bins[f"{start}-{start + RTT_HISTOGRAM_BIN_MSEC - 1}"] = count
+    return bins
+
+
+_MESSAGE_TYPES = {
+    message_type.value: message_type for message_type in PingPongMessageType
+}
+
+
+# Plain type checks instead of a pydantic model, this runs for every pong
 def _extract_and_validate(data: Any) -> PongResponse | None:
-    try:
-        pong_response = PongResponse(
-            protocol_version=data.get("protocol_version"),
-            message_type=data.get("message_type"),
-            node_id=data.get("node_id"),
-            nonce=data.get("nonce"),
-            api_ping_time=data.get("api_ping_time", []),
-        )
-        if (
-            pong_response.protocol_version is None
-            or pong_response.node_id is None
-            or pong_response.nonce is None
+    if not isinstance(data, dict):
+        return None
+    protocol_version = data.get("protocol_version")
+    node_id = data.get("node_id")
+    nonce = data.get("nonce")
+    if (
+        not isinstance(protocol_version, str)
+        or not isinstance(node_id, str)
+        or not isinstance(nonce, str)
+    ):
+        return None
+    message_type_value = data.get("message_type")
+    message_type = (
+        _MESSAGE_TYPES.get(message_type_value)
+        if isinstance(message_type_value, int)
+        else None
+    )
+    if message_type is None:
+        return None
+    api_ping_time = data.get("api_ping_time", [])
+    if not isinstance(api_ping_time, list):
+        return None
+    for ping_time in api_ping_time:
+        if ping_time is not None and (
+            isinstance(ping_time, bool) or not isinstance(ping_time, (int, float))
         ):
             return None
-        return pong_response
-    except ValidationError:
-        return None
+    return PongResponse(
+        protocol_version=protocol_version,
+        message_type=message_type,
+        node_id=node_id,
+        nonce=nonce,
+        api_ping_time=api_ping_time,
+    )
 
 
 def _pong_protocol_validations(
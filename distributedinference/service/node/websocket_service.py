@@ -1,9 +1,11 @@
 import time
 from datetime import datetime
-from typing import Dict
 from typing import Optional
+from typing import Tuple
+from typing import Union
 from uuid import UUID
 
+import cbor2
 import orjson
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
@@ -17,14 +19,22 @@ from distributedinference import api_logger
 from distributedinference.analytics.analytics import Analytics
 from distributedinference.analytics.analytics import AnalyticsEvent
 from distributedinference.analytics.analytics import EventName
+from distributedinference.domain.node import node_frame_codec
 from distributedinference.domain.node import node_status_transition
 from distributedinference.domain.node.entities import ConnectedNode, ModelType
 from distributedinference.domain.node.entities import FullNodeInfo
+from distributedinference.domain.node.entities import NodeBenchmark
+from distributedinference.domain.node.entities import NodeConnection
+from distributedinference.domain.node.entities import NodeFrameEncoding
 from distributedinference.domain.node.entities import NodeMetrics
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.exceptions import InvalidImageChunkError
+from distributedinference.domain.node.exceptions import NodeConnectRejectedError
+from distributedinference.domain.node.node_connect_pipeline import (
+    NodeConnectPipeline,
+)
 from distributedinference.domain.node.node_status_transition import NodeStatusEvent
 from distributedinference.domain.user.entities import User
-from distributedinference.repository.benchmark_repository import BenchmarkRepository
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -49,14 +59,18 @@ async def execute(
     model_type: Optional[str],
     node_repository: NodeRepository,
     connected_node_repository: ConnectedNodeRepository,
-    benchmark_repository: BenchmarkRepository,
+    node_connect_pipeline: NodeConnectPipeline,
     analytics: Analytics,
     protocol_handler: ProtocolHandler,
+    frame_encoding: NodeFrameEncoding = NodeFrameEncoding.JSON,
 ):
     logger.info(
         f"Node with user_id={user.uid}, node_id={node_info.node_id} and model_name={model_name} is trying to connect"
     )
-    await websocket.accept()
+    await websocket.accept(
+        subprotocol=node_frame_codec.get_subprotocol(frame_encoding),
+        headers=node_frame_codec.get_handshake_headers(),
+    )
 
     backend_host = connected_node_repository.get_backend_host()
     if backend_host is None:
@@ -66,34 +80,42 @@ async def execute(
         )
 
     # By default, the model type is LLM to support backward compatibility
-    enum_model_type = (
-        ModelType.DIFFUSION
-        if model_type and model_type.upper() == "DIFFUSION"
-        else ModelType.LLM
-    )
+    enum_model_type = ModelType.LLM
+    if model_type and model_type.upper() in ("DIFFUSION", "EMBEDDING"):
+        enum_model_type = ModelType[model_type.upper()]
 
-    await _check_before_connecting(
-        model_name,
-        enum_model_type,
-        node_info,
-        node_repository,
-        benchmark_repository,
-        user,
-    )
     formatted_model_name: str = model_name or ""
-
     node_uid = node_info.node_id
-    connect_time = time.time()
-    node_status = await node_status_transition.execute(
-        node_repository, node_uid, NodeStatusEvent.START, enum_model_type
-    )
-    await node_repository.set_node_connection_timestamp(
-        node_uid,
-        formatted_model_name,
-        datetime.fromtimestamp(connect_time),
-        backend_host,
-        node_status,
-    )
+    try:
+        async with node_connect_pipeline.admit():
+            node_metrics, benchmark = await _check_before_connecting(
+                model_name,
+                enum_model_type,
+                node_info,
+                node_connect_pipeline,
+                user,
+            )
+            connect_time = time.time()
+            node_status = node_status_transition.get_next_status(
+                node_uid,
+                node_metrics.status if node_metrics else None,
+                NodeStatusEvent.START,
+                enum_model_type,
+            )
+            await node_connect_pipeline.set_node_connection_timestamp(
+                NodeConnection(
+                    node_id=node_uid,
+                    model_name=formatted_model_name,
+                    connected_at=datetime.fromtimestamp(connect_time),
+                    connected_host=backend_host,
+                    status=node_status,
+                )
+            )
+    except NodeConnectRejectedError:
+        raise WebSocketException(
+            code=status.WS_1013_TRY_AGAIN_LATER,
+            reason="Too many nodes connecting, try again later",
+        )
     node = ConnectedNode(
         uid=node_uid,
         user_id=user.uid,
@@ -107,6 +129,10 @@ async def execute(
         is_self_hosted=user.is_self_hosted_nodes_provider(),
         node_status=node_status,
         version=Version(node_info.specs.version) if node_info.specs.version else None,
+        frame_encoding=frame_encoding,
+        benchmark_tokens_per_second=(
+            benchmark.benchmark_tokens_per_second if benchmark else None
+        ),
     )
     logger.info(f"Node {node_uid} connected")
     analytics.track_event(
@@ -142,11 +168,41 @@ async def execute(
         health_check_protocol.add_node(
             node_info.node_id, node_info.name, node_info.specs.version
         )
+    frame_decoder = node_frame_codec.FrameDecoder()
+    image_assembler = node_frame_codec.ImageChunkAssembler(
+        settings.IMAGE_CHUNKS_MAX_BYTES_PER_REQUEST
+    )
     try:
         while True:
-            data = await websocket.receive_text()
-            parsed_data = orjson.loads(data)
-            if "request_id" in parsed_data:
+            data: Union[str, bytes]
+            if frame_encoding is NodeFrameEncoding.CBOR:
+                data = await websocket.receive_bytes()
+            elif node.model_type is ModelType.DIFFUSION:
+                # Images may come in binary frames, see node_frame_codec
+                data = await _receive(websocket)
+            else:
+                data = await websocket.receive_text()
+            if isinstance(data, bytes) and node_frame_codec.is_image_chunk(data):
+                image = image_assembler.add(data)
+                if image:
+                    connected_node_repository.add_inference_response_chunks(
+                        node.uid, [image]
+                    )
+                continue
+            if frame_encoding is NodeFrameEncoding.CBOR:
+                parsed_data = frame_decoder.decode(data)  # type: ignore
+            else:
+                parsed_data = orjson.loads(data)
+            if "images" in parsed_data:
+                images_request_id = parsed_data.get("request_id")
+                if isinstance(images_request_id, str):
+                    image_assembler.finish(images_request_id)
+            responses = node_frame_codec.get_responses(parsed_data)
+            if responses is not None:
+                connected_node_repository.add_inference_response_chunks(
+                    node.uid, responses
+                )
+            elif "request_id" in parsed_data:
                 request_id = parsed_data["request_id"]
                 if request_id is not None:
                     await connected_node_repository.add_inference_response_chunk(
@@ -156,9 +212,8 @@ async def execute(
                     logger.error("Invalid request id")
             else:
                 # handle protocols
-                print("handling_protocols")
                 await protocol_handler.handle(parsed_data)
-    except orjson.JSONDecodeError:
+    except (orjson.JSONDecodeError, cbor2.CBORDecodeError, InvalidImageChunkError):
         await _websocket_error(
             analytics,
             node,
@@ -170,7 +225,7 @@ async def execute(
             health_check_protocol,
             user,
             analytics_event=EventName.WS_NODE_DISCONNECTED_WITH_ERROR,
-            log_message=f"Node {node_uid} disconnected, because of invalid JSON",
+            log_message=f"Node {node_uid} disconnected, because of an invalid message",
         )
     except WebSocketRequestValidationError as e:
         await _websocket_error(
@@ -218,6 +273,14 @@ async def execute(
         raise e
 
 
+async def _receive(websocket: WebSocket) -> Union[str, bytes]:
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message["bytes"]
+
+
 async def _websocket_error(
     analytics: Analytics,
     node: ConnectedNode,
@@ -233,8 +296,12 @@ async def _websocket_error(
 ):
     await ping_pong_protocol.remove_node(node_info.name)
     await health_check_protocol.remove_node(node_info.name)
-    node_status = await _get_new_node_stopped_status(node.uid, node_repository)
-    await node_repository.update_node_to_disconnected(node.uid, node_status)
+    node_status = await _get_new_node_stopped_status(
+        node.uid, node_repository, connected_node_repository
+    )
+    # Set in memory first so node_status_update_job doesn't overwrite it
+    connected_node_repository.update_node_status(node.uid, node_status)
+    await node_repository.update_nodes_to_disconnected({node.uid: node_status})
 
     connected_node_repository.deregister_node(node_uid)
     logger.info(f"{log_message}, status: {node_status}")
@@ -245,10 +312,15 @@ async def _websocket_error(
 
 
 async def _get_new_node_stopped_status(
-    node_id: UUID, node_repository: NodeRepository
+    node_id: UUID,
+    node_repository: NodeRepository,
+    connected_node_repository: ConnectedNodeRepository,
 ) -> NodeStatus:
     return await node_status_transition.execute(
-        node_repository, node_id, NodeStatusEvent.STOP
+        node_repository,
+        node_id,
+        NodeStatusEvent.STOP,
+        connected_node_repository=connected_node_repository,
     )
 
 
@@ -256,30 +328,32 @@ async def _check_before_connecting(
     model_name: Optional[str],
     enum_model_type: ModelType,
     node_info: FullNodeInfo,
-    node_repository: NodeRepository,
-    benchmark_repository: BenchmarkRepository,
+    node_connect_pipeline: NodeConnectPipeline,
     user: User,
-):
-    node_metrics: Dict[UUID, NodeMetrics] = (
-        await node_repository.get_node_metrics_by_ids([node_info.node_id])
-    )
-    if (
-        node_metrics.get(node_info.node_id)
-        and node_metrics[node_info.node_id].status.is_connected()
-    ):
+) -> Tuple[Optional[NodeMetrics], Optional[NodeBenchmark]]:
+    node_metrics = await node_connect_pipeline.get_node_metrics(node_info.node_id)
+    if node_metrics and node_metrics.status.is_connected():
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION,
             reason="A existing connection has already been established",
         )
     # Skip benchmarking check for diffusion models
     if enum_model_type is ModelType.DIFFUSION:
-        return
+        return node_metrics, None
 
     if not model_name:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION, reason='No "Model" header provided'
         )
-    benchmark = await benchmark_repository.get_node_benchmark(
+    # Embedding nodes are not benchmarked in tokens per second
+    if enum_model_type is ModelType.EMBEDDING:
+        if model_name not in settings.SUPPORTED_EMBEDDING_MODELS:
+            raise WebSocketException(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Unsupported embedding model",
+            )
+        return node_metrics, None
+    benchmark = await node_connect_pipeline.get_node_benchmark(
         user.uid, node_info.node_id, model_name
     )
     if not benchmark:
@@ -295,3 +369,4 @@ async def _check_before_connecting(
             code=status.WS_1008_POLICY_VIOLATION,
             reason="Benchmarking performance is too low",
         )
+    return node_metrics, benchmark
@@ -0,0 +1,82 @@
+import os
+from typing import AsyncGenerator
+from typing import Callable
+from typing import Dict
+from uuid import UUID
+
+from distributedinference import api_logger
+from distributedinference.domain.node import get_capacity_summary
+from distributedinference.domain.node import select_node_use_case
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import WorkerIpcMessageType
+from distributedinference.domain.node.exceptions import NoAvailableNodesError
+from distributedinference.domain.node.run_inference_use_case import InferenceExecutor
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+
+logger = api_logger.get()
+
+
+async def execute(
+    message: Dict,
+    connected_node_repository: ConnectedNodeRepository,
+    executor_factory: Callable[[], InferenceExecutor],
+) -> AsyncGenerator[Dict, None]:
+    """
+    Handles messages from the sibling worker processes of this backend.
+    """
+    message_type = message.get("type")
+    if message_type == WorkerIpcMessageType.GET_CONNECTED_NODES.value:
+        yield {
+            "type": WorkerIpcMessageType.CONNECTED_NODES.value,
+            "node_ids": [
+                str(node_id)
+                for node_id in connected_node_repository.get_locally_connected_node_keys()
+            ],
+        }
+        return
+    if message_type == WorkerIpcMessageType.GET_CAPACITY.value:
+        yield {
+            "type": WorkerIpcMessageType.CAPACITY.value,
+            "models": {
+                model: capacity.to_dict()
+                for model, capacity in get_capacity_summary.get_local(
+                    connected_node_repository
+                ).items()
+            },
+        }
+        return
+    if message_type == WorkerIpcMessageType.GET_NODE_LATENCIES.value:
+        yield {
+            "type": WorkerIpcMessageType.NODE_LATENCIES.value,
+            "nodes": [
+                latency.to_dict()
+                for latency in connected_node_repository.get_node_latencies()
+            ],
+        }
+        return
+    if message_type != WorkerIpcMessageType.INFERENCE.value:
+        logger.warning(f"Unknown worker IPC message type: {message_type}")
+        return
+
+    request = InferenceRequest(**message["request"])
+    if not select_node_use_case.execute(request.model, connected_node_repository):
+        yield {"type": WorkerIpcMessageType.NO_NODE.value}
+        return
+    executor = executor_factory()
+    try:
+        # forwarding_from makes the executor fail instead of forwarding further
+        async for response in executor.execute(
+            user_uid=UUID(message["user_uid"]),
+            api_key=message["api_key"],
+            forwarding_from=f"worker-{os.getpid()}",
+            request=request,
+        ):
+            yield {
+                "type": WorkerIpcMessageType.INFERENCE_RESPONSE.value,
+                "node_id": str(response.node_id),
+                "response": response.to_dict(),
+            }
+    except NoAvailableNodesError:
+        yield {"type": WorkerIpcMessageType.NO_NODE.value}
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class Batcher(Generic[K, V]):
+    """
+    Collects the keys requested concurrently and loads them with a single call.
+
+    A batch is loaded once it has `max_batch_size` keys or `max_delay_seconds` after
+    its first key was added. `load` returns the values by key, keys missing from the
+    result resolve to None. If `load` fails every caller in the batch gets the error.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        max_batch_size: int,
+        max_delay_seconds: float,
+    ):
+        self._load = load
+        self._max_batch_size = max_batch_size
+        self._max_delay_seconds = max_delay_seconds
+        self._pending: List[Tuple[K, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Keeps a reference to the running loads so they are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def get(self, key: K) -> Optional[V]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((key, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif not self._timer:
+            self._timer = loop.call_later(self._max_delay_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._load_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: List[Tuple[K, asyncio.Future]]) -> None:
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        try:
+            values = await self._load(keys)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch:
+            # The caller may have been cancelled in the meantime
+            if not future.done():
+                future.set_result(values.get(key))
@@ -1,6 +1,8 @@
 import asyncio
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from typing import Union
 from google.cloud import storage
 from distributedinference import api_logger
 import settings
@@ -13,35 +15,62 @@ URL_EXPIRATION_MINUTES = 2 * 60
 # pylint: disable=too-few-public-methods
 class GoogleCloudStorage:
     def __init__(self):
+        self.client = None
+        self.bucket = None
         if settings.is_production():
             try:
                 self.client = storage.Client()
+                # No request is made, the handle is reused for every upload
+                self.bucket = self.client.bucket(settings.GCS_BUCKET_NAME)
             except Exception as e:
                 logger.error(f"Error initializing Google Cloud Storage client: {e}")
                 self.client = None
-        else:
-            self.client = None
+        # Uploads and URL signing block, they get their own threads instead of
+        # queueing behind everything else in the default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.GCS_UPLOAD_MAX_WORKERS,
+            thread_name_prefix="gcs-upload",
+        )
 
     async def decode_b64_and_upload_to_gcs(
         self, request_id: str, idx: int, image_b64: str
     ) -> str:
+        """
+        Concurrent calls upload in parallel, up to GCS_UPLOAD_MAX_WORKERS at a time
+        """
         if not self.client:
             # TODO probably save it locally and return the path?
             return image_b64
-        image_bytes = base64.b64decode(image_b64)
-        blob_name = f"{request_id}_{idx}.png"
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, self._upload_to_gcs, blob_name, image_bytes
-        )
+        return await self._upload_and_sign(request_id, idx, image_b64)
 
-    def _upload_to_gcs(self, blob_name: str, image_bytes: bytes) -> str:
-        bucket = self.client.bucket(settings.GCS_BUCKET_NAME)
-        blob = bucket.blob(blob_name)
-        blob.upload_from_string(image_bytes, content_type="image/png")
-        url = blob.generate_signed_url(
-            version="v4",
-            expiration=timedelta(minutes=URL_EXPIRATION_MINUTES),
-            method="GET",
-        )
-        return url
+    async def upload_to_gcs(self, request_id: str, idx: int, image: bytes) -> str:
+        if not self.client:
+            return base64.b64encode(image).decode()
+        return await self._upload_and_sign(request_id, idx, image)
+
+    async def _upload_and_sign(
+        self, request_id: str, idx: int, image: Union[bytes, str]
+    ) -> str:
+        blob = self.bucket.blob(f"{request_id}_{idx}.png")  # type: ignore
+        loop = asyncio.get_running_loop()
+        # A GET URL can be signed before the object exists, so the signing does
+        # not wait for the upload
+        upload = loop.run_in_executor(self._executor, _upload, blob, image)
+        url = loop.run_in_executor(self._executor, _generate_signed_url, blob)
+        await asyncio.gather(upload, url)
+        return url.result()
+
+
+def _upload(blob: storage.Blob, image: Union[bytes, str]) -> None:
+    if isinstance(image, str):
+        # Decoded in the worker thread, a large image would block the event loop
+        image = base64.b64decode(image)
+    blob.upload_from_string(image, content_type="image/png")
+
+
+def _generate_signed_url(blob: storage.Blob) -> str:
+    return blob.generate_signed_url(
+        version="v4",
+        expiration=timedelta(minutes=URL_EXPIRATION_MINUTES),
+        method="GET",
+    )
@@ -0,0 +1,67 @@
+import bisect
+import hashlib
+from typing import Dict
+from typing import Generic
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# More points per member spread the keys more evenly
+VIRTUAL_NODES = 64
+
+
+def hash_bytes(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing(Generic[T]):
+    """
+    Consistent hashing ring, adding or removing a member only moves the keys of
+    that member.
+    """
+
+    def __init__(self, virtual_nodes: int = VIRTUAL_NODES):
+        self._virtual_nodes = virtual_nodes
+        # Sorted by position
+        self._points: List[Tuple[int, str]] = []
+        # str(member): member
+        self._members: Dict[str, T] = {}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def add(self, member: T) -> None:
+        name = str(member)
+        if name in self._members:
+            return
+        self._members[name] = member
+        for position in self._get_positions(name):
+            bisect.insort(self._points, (position, name))
+
+    def remove(self, member: T) -> None:
+        name = str(member)
+        if self._members.pop(name, None) is None:
+            return
+        self._points = [point for point in self._points if point[1] != name]
+
+    def iterate(self, key: int) -> Iterator[T]:
+        """
+        Yields every member once, clockwise from the key
+        """
+        if not self._points:
+            return
+        start = bisect.bisect_left(self._points, (key, ""))
+        seen = set()
+        for i in range(len(self._points)):
+            _, name = self._points[(start + i) % len(self._points)]
+            if name not in seen:
+                seen.add(name)
+                yield self._members[name]
+                if len(seen) == len(self._members):
+                    return
+
+    def _get_positions(self, name: str) -> List[int]:
+        return [hash_bytes(f"{name}-{i}".encode()) for i in range(self._virtual_nodes)]
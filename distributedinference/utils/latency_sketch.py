@@ -0,0 +1,80 @@
+"""
+Quantile sketch for latencies, based on DDSketch (https://arxiv.org/abs/1908.10693).
+
+Values are counted in logarithmically sized buckets, so any quantile is returned
+within `relative_accuracy` of the real value while the memory only depends on the
+range of the values, not on how many were added. With the default 1% accuracy the
+range from 1 mSec to 1 hour fits into ~750 buckets, in practice a node's latencies
+only touch a few dozen of them.
+
+With `decay_count` set, all the counts are halved whenever that many values were
+added since the last halving, so recent values weigh more than old ones.
+"""
+
+import math
+from typing import Dict
+from typing import Optional
+
+# Values below are counted as zero, latencies are in seconds
+MIN_VALUE = 1e-6
+
+
+class LatencySketch:
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+        decay_count: Optional[int] = None,
+    ):
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._max_buckets = max_buckets
+        self._decay_count = decay_count
+        self._added_since_decay = 0
+        # bucket index: count, bucket i holds values in (gamma^(i-1), gamma^i]
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        if self._decay_count:
+            self._added_since_decay += 1
+            if self._added_since_decay > self._decay_count:
+                self._decay()
+        self.count += 1
+        if value <= MIN_VALUE:
+            self._zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self._max_buckets:
+            self._collapse_lowest()
+
+    def get_quantile(self, quantile: float) -> Optional[float]:
+        """
+        Returns None if no values were added
+        """
+        if not self.count:
+            return None
+        rank = quantile * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+    def _decay(self) -> None:
+        self._added_since_decay = 1
+        self._buckets = {
+            index: count // 2 for index, count in self._buckets.items() if count > 1
+        }
+        self._zero_count //= 2
+        self.count = self._zero_count + sum(self._buckets.values())
+
+    def _collapse_lowest(self) -> None:
+        # Loses accuracy only for the fastest values, the tail stays accurate
+        lowest, second = sorted(self._buckets)[:2]
+        self._buckets[second] += self._buckets.pop(lowest)
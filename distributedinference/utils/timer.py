@@ -1,61 +1,106 @@
 """
-Timer decorator to profile the durations of function executions.
+Timer decorator and context manager to profile the durations of function executions.
+
+Durations are measured with `time.perf_counter_ns` and recorded into the
+`function_duration_seconds` Prometheus histogram labelled by name, which is exposed
+on `/v1/metrics`. Nothing is logged, so it is cheap enough for hot paths.
+`settings.TIMER_SAMPLE_RATE` controls which fraction of calls is measured.
 
 Usage:
 ```python
 from distributedinference.utils.timer import async_timer
+from distributedinference.utils.timer import timed
 
-logger = api_logger.get()
-
-@async_timer("my_file.do_stuff", logger=logger)
+# coroutine functions and async generator functions
+@async_timer("my_file.do_stuff")
 async def do_stuff():
     await asyncio.sleep(1)
-```
 
-In the logs you will see:
-{
-  "asctime": "2024-10-17 11:34:18,471",
-  "name": "DISTRIBUTED_INFERENCE",
-  "levelname": "INFO",
-  "message": "Timer: my_file.do_stuff took 1.001923 s",
-  "taskName": "Task-1"
-}
+# any block of code, works with both `with` and `async with`
+with timed("my_file.do_other_stuff"):
+    do_other_stuff()
+```
 
+p50/p99 per name in Prometheus:
+```
+histogram_quantile(0.99, sum by (name, le) (rate(function_duration_seconds_bucket[5m])))
+```
 """
 
+import functools
+import inspect
 import logging
-from datetime import datetime
-from datetime import timezone
+import random
+import time
+from contextlib import aclosing
 from typing import Optional
 
+from prometheus_client import Histogram
+
+import settings
+
+function_duration_histogram = Histogram(
+    "function_duration_seconds",
+    "Duration of timed functions and code blocks in seconds by name",
+    ["name"],
+    buckets=[
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+        60,
+    ],
+)
+
+
+def _is_sampled() -> bool:
+    sample_rate = settings.TIMER_SAMPLE_RATE
+    return sample_rate >= 1.0 or random.random() < sample_rate
+
+
+def record(name: str, duration_ns: int) -> None:
+    function_duration_histogram.labels(name).observe(duration_ns / 1_000_000_000)
+
 
 class Timer:
     """Measure elapsed time"""
 
-    started_at: datetime
-    ended_at: Optional[datetime] = None
-    message_at: Optional[datetime] = None
+    started_at: int
+    ended_at: Optional[int] = None
+    message_at: Optional[int] = None
 
     def __init__(self, text=None, iterable=None, logger=None, interval=None):
         self.text = text
         self.iterable = iterable
         self.interval = interval
         self.logger = logging.getLogger(__name__) if logger is None else logger
+        self.is_sampled = True
 
     @property
     def elapsed(self) -> float:
         """Elapsed time in seconds"""
         if self.ended_at is None:
-            return (datetime.now(timezone.utc) - self.started_at).total_seconds()
-        return (self.ended_at - self.started_at).total_seconds()
+            return (time.perf_counter_ns() - self.started_at) / 1_000_000_000
+        return (self.ended_at - self.started_at) / 1_000_000_000
 
     def _refresh(self, i):
         if self.interval is None:
             return
-        now = datetime.now(timezone.utc)
+        now = time.perf_counter_ns()
         if (
             self.message_at is None
-            or (now - self.message_at).total_seconds() > self.interval
+            or (now - self.message_at) / 1_000_000_000 > self.interval
         ):
             self.message_at = now
             self.logger.info("%s progress %d/%d", self.text, i, len(self))
@@ -68,21 +113,72 @@ class Timer:
             self._refresh(i)
             yield item
 
-    async def __aenter__(self):
-        self.started_at = datetime.now(timezone.utc)
+    def __enter__(self):
+        # Only named timers are sampled, unnamed ones are used for `elapsed`
+        self.is_sampled = self.text is None or _is_sampled()
+        self.started_at = time.perf_counter_ns()
         return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.ended_at = time.perf_counter_ns()
+        if self.text is not None and self.is_sampled:
+            record(self.text, self.ended_at - self.started_at)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        self.ended_at = datetime.now(timezone.utc)
-        if self.text is not None:
-            self.logger.info("Timer: %s took %f s", self.text, self.elapsed)
+        self.__exit__(exc_type, exc_val, exc_tb)
 
 
-def async_timer(name: str, logger: logging.Logger):
+def timed(name: str) -> Timer:
+    """
+    Context manager recording the duration of the block under `name`
+    """
+    return Timer(name)
+
+
+def async_timer(  # pylint: disable=W0613
+    name: str, logger: Optional[logging.Logger] = None
+):
+    """
+    Decorator for coroutine functions and async generator functions.
+    For async generators the duration is measured from the first iteration until
+    the generator is exhausted or closed.
+
+    `logger` is not used anymore, kept so existing call sites don't need changes.
+    """
+
     def decorator(function):
+        if inspect.isasyncgenfunction(function):
+
+            @functools.wraps(function)
+            async def generator_wrapper(*args, **kwargs):
+                # aclosing makes sure the wrapped generator's finally blocks run
+                # as soon as the consumer stops iterating
+                async with aclosing(function(*args, **kwargs)) as generator:
+                    if not _is_sampled():
+                        async for item in generator:
+                            yield item
+                        return
+                    started_at = time.perf_counter_ns()
+                    try:
+                        async for item in generator:
+                            yield item
+                    finally:
+                        record(name, time.perf_counter_ns() - started_at)
+
+            return generator_wrapper
+
+        @functools.wraps(function)
         async def wrapper(*args, **kwargs):
-            async with Timer(name, logger=logger):
+            if not _is_sampled():
+                return await function(*args, **kwargs)
+            started_at = time.perf_counter_ns()
+            try:
                 return await function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter_ns() - started_at)
 
         return wrapper
 
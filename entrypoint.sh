@@ -2,6 +2,13 @@
 nohup ./run_logrotate.sh &
 #cpu_units=$(getconf _NPROCESSORS_ONLN)
 #workers_to_spawn=$((cpu_units * 2 + 1))
-workers_to_spawn=1
+workers_to_spawn=${WORKERS_COUNT:-1}
+if [ "$workers_to_spawn" -gt 1 ]; then
+  # Workers route inference to each other's nodes over Unix sockets in this dir
+  export WORKER_IPC_DIR=${WORKER_IPC_DIR:-/tmp/galadriel-workers}
+  export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/galadriel-prometheus}
+  rm -rf "$WORKER_IPC_DIR" "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$WORKER_IPC_DIR" "$PROMETHEUS_MULTIPROC_DIR"
+fi
 echo "Starting service with ${workers_to_spawn} workers"
 exec gunicorn --log-level info --timeout 300 --bind 0.0.0.0:3000 --worker-class=uvicorn.workers.UvicornWorker --workers=$workers_to_spawn app:app
@@ -0,0 +1,91 @@
+"""
+Simple analytics script to read the timer histograms from the metrics endpoint.
+Prints out count, avg, p50 and p99 for each timed function.
+Percentiles are estimated from the histogram buckets the same way Prometheus
+`histogram_quantile` does (linear interpolation inside the bucket).
+The values are cumulative since the process start.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/analyse_timer_metrics.py --url http://127.0.0.1:5000/v1/metrics
+```
+"""
+
+import argparse
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+METRIC_NAME = "function_duration_seconds"
+
+
+def main(url: str):
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    buckets, sums, counts = _parse(response.text)
+    for name in sorted(counts, key=lambda n: sums[n], reverse=True):
+        _print_result(name, sorted(buckets[name]), sums[name], counts[name])
+
+
+def _parse(
+    text: str,
+) -> Tuple[Dict[str, List[Tuple[float, float]]], Dict[str, float], Dict[str, float]]:
+    buckets: Dict[str, List[Tuple[float, float]]] = {}
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for family in text_string_to_metric_families(text):
+        if family.name != METRIC_NAME:
+            continue
+        for sample in family.samples:
+            name = sample.labels.get("name")
+            if sample.name.endswith("_bucket"):
+                buckets.setdefault(name, []).append(
+                    (float(sample.labels["le"]), sample.value)
+                )
+            elif sample.name.endswith("_sum"):
+                sums[name] = sample.value
+            elif sample.name.endswith("_count"):
+                counts[name] = sample.value
+    return buckets, sums, counts
+
+
+def _quantile(quantile: float, buckets: List[Tuple[float, float]]) -> float:
+    total = buckets[-1][1]
+    if not total:
+        return 0.0
+    rank = quantile * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return previous_bound
+            in_bucket = count - previous_count
+            if not in_bucket:
+                return bound
+            return previous_bound + (bound - previous_bound) * (
+                (rank - previous_count) / in_bucket
+            )
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def _print_result(
+    name: str, buckets: List[Tuple[float, float]], total: float, count: float
+) -> None:
+    if not count:
+        return
+    print(name)
+    print("  count:", int(count))
+    print("  avg:", total / count)
+    print("  p50:", _quantile(0.5, buckets))
+    print("  p99:", _quantile(0.99, buckets))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5000/v1/metrics")
+    args = parser.parse_args()
+    main(args.url)
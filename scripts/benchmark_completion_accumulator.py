@@ -0,0 +1,143 @@
+"""
+Compares the backend CPU time of building a non-streaming answer from the streamed
+chunks of an 8k and a 32k token completion: the previous `response += content`
+with the tool call deltas collected in a list, and the `CompletionAccumulator`.
+
+Every chunk has one token, a second run streams the answer as tool call arguments.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_completion_accumulator.py --iterations 20
+```
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Callable
+from typing import List
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCallFunction
+
+from distributedinference.service.completions.completion_accumulator import (
+    CompletionAccumulator,
+)
+
+COMPLETION_TOKENS = [8_000, 32_000]
+WORDS = (
+    "the of and to in is that for it as with was on be by this are or from at an "
+    "which model network node inference token response request backend latency "
+    "throughput distributed compute GPU memory performance results between"
+).split()
+
+
+def main(iterations: int):
+    random.seed(0)
+    for completion_tokens in COMPLETION_TOKENS:
+        for name, chunks in [
+            ("content", _get_content_chunks(completion_tokens)),
+            ("tool call", _get_tool_call_chunks(completion_tokens)),
+        ]:
+            previous = _measure(lambda: _previous(chunks), iterations)
+            current = _measure(lambda: _current(chunks), iterations)
+            print(
+                f"{completion_tokens} tokens, {name}: previous {previous * 1000:.2f} ms, "
+                f"current {current * 1000:.2f} ms"
+            )
+
+
+def _get_content_chunks(tokens: int) -> List[ChatCompletionChunk]:
+    return [
+        _chunk(ChoiceDelta(content=f" {random.choice(WORDS)}")) for _ in range(tokens)
+    ]
+
+
+def _get_tool_call_chunks(tokens: int) -> List[ChatCompletionChunk]:
+    chunks = [
+        _chunk(
+            ChoiceDelta(
+                tool_calls=[
+                    ChoiceDeltaToolCall(
+                        index=0,
+                        id="call",
+                        type="function",
+                        function=ChoiceDeltaToolCallFunction(name="write"),
+                    )
+                ]
+            )
+        )
+    ]
+    for _ in range(tokens):
+        chunks.append(
+            _chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=0,
+                            function=ChoiceDeltaToolCallFunction(
+                                arguments=f" {random.choice(WORDS)}"
+                            ),
+                        )
+                    ]
+                )
+            )
+        )
+    return chunks
+
+
+def _chunk(delta: ChoiceDelta) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="id",
+        choices=[Choice(index=0, delta=delta)],
+        created=123,
+        model="model",
+        object="chat.completion.chunk",
+    )
+
+
+def _previous(chunks: List[ChatCompletionChunk]) -> None:
+    response = ""
+    tool_response_chunks = []
+    for chunk in chunks:
+        first_choice = chunk.choices[0]
+        if first_choice.delta.content:
+            response += first_choice.delta.content
+        if first_choice.delta.tool_calls:
+            tool_response_chunks.extend(first_choice.delta.tool_calls)
+    tool_calls = defaultdict(lambda: {"id": None, "arguments": "", "name": None})
+    for tool_call in tool_response_chunks:
+        if tool_call.id is not None:
+            tool_calls[str(tool_call.index)]["id"] = tool_call.id
+        if tool_call.function:
+            if tool_call.function.name is not None:
+                tool_calls[str(tool_call.index)]["name"] = tool_call.function.name
+            if tool_call.function.arguments:
+                tool_calls[str(tool_call.index)][
+                    "arguments"
+                ] += tool_call.function.arguments
+
+
+def _current(chunks: List[ChatCompletionChunk]) -> None:
+    accumulator = CompletionAccumulator()
+    for chunk in chunks:
+        accumulator.add(chunk)
+    accumulator.get_choices()
+
+
+def _measure(function: Callable, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -0,0 +1,122 @@
+"""
+Measures how long a single log call blocks the caller (the event loop in the API)
+with the old synchronous handlers and with the queued pipeline from `api_logger`.
+
+Both setups write JSON to a file and to the console (redirected to /dev/null).
+Only the time spent inside `logger.info` is measured, the queued setup is then
+flushed and the total time including the background writes is printed as well.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_logging.py --count 100000
+```
+"""
+
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from pythonjsonlogger import jsonlogger
+
+from distributedinference.api_logger import LOGGING_MESSAGE_FORMAT
+from distributedinference.api_logger import HighVolumeFilter
+from distributedinference.api_logger import NonBlockingQueueHandler
+
+
+def main(count: int, rate_limit: int):
+    with tempfile.TemporaryDirectory() as directory, open(
+        os.devnull, "w", encoding="utf-8"
+    ) as devnull:
+        sync_logger, sync_handlers = _get_sync_logger(directory, devnull)
+        caller_time = _run(sync_logger, count)
+        _print_result("synchronous handlers", count, caller_time, caller_time)
+        for handler in sync_handlers:
+            handler.close()
+
+        queued_logger, listener, handlers = _get_queued_logger(
+            directory, devnull, rate_limit=0
+        )
+        total_start = time.perf_counter()
+        caller_time = _run(queued_logger, count)
+        listener.stop()
+        total_time = time.perf_counter() - total_start
+        _print_result("queued pipeline", count, caller_time, total_time)
+        for handler in handlers:
+            handler.close()
+
+        if rate_limit:
+            queued_logger, listener, handlers = _get_queued_logger(
+                directory, devnull, rate_limit=rate_limit
+            )
+            total_start = time.perf_counter()
+            caller_time = _run(queued_logger, count)
+            listener.stop()
+            total_time = time.perf_counter() - total_start
+            _print_result(
+                f"queued pipeline, rate limit {rate_limit}/s",
+                count,
+                caller_time,
+                total_time,
+            )
+            for handler in handlers:
+                handler.close()
+
+
+def _get_handlers(directory: str, devnull):
+    file_handler = logging.FileHandler(os.path.join(directory, "logs.log"))
+    console_handler = logging.StreamHandler(devnull)
+    for handler in [file_handler, console_handler]:
+        handler.setFormatter(jsonlogger.JsonFormatter(LOGGING_MESSAGE_FORMAT))
+    return [console_handler, file_handler]
+
+
+def _get_sync_logger(directory: str, devnull):
+    handlers = _get_handlers(directory, devnull)
+    logger = logging.getLogger("benchmark_sync")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    for handler in handlers:
+        logger.addHandler(handler)
+    return logger, handlers
+
+
+def _get_queued_logger(directory: str, devnull, rate_limit: int):
+    handlers = _get_handlers(directory, devnull)
+    log_queue: queue.Queue = queue.Queue(maxsize=0)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(HighVolumeFilter(max_per_second=rate_limit))
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    logger = logging.getLogger(f"benchmark_queued_{rate_limit}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    return logger, listener, handlers
+
+
+def _run(logger: logging.Logger, count: int) -> float:
+    spent = 0.0
+    for i in range(count):
+        start = time.perf_counter()
+        logger.info("Timer: %s took %f s", "node_repository.get_node_status", i)
+        spent += time.perf_counter() - start
+    return spent
+
+
+def _print_result(name: str, count: int, caller_time: float, total_time: float):
+    print(name)
+    print(f"  caller time total: {caller_time:.3f} s")
+    print(f"  caller time per call: {caller_time / count * 1_000_000:.2f} us")
+    print(f"  total time incl. writes: {total_time:.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--rate-limit", type=int, default=200)
+    args = parser.parse_args()
+    main(args.count, args.rate_limit)
@@ -0,0 +1,146 @@
+"""
+Compares the bytes and the backend CPU time per streamed token of the JSON text
+frames with the binary CBOR frames (with the unchanged chunk envelope fields
+omitted), see `node_frame_codec`.
+
+Every frame is one OpenAI chat completion chunk with one token. Bytes are given raw
+and after permessage-deflate with context takeover (one zlib stream per connection).
+CPU time is the backend side decoding of a frame, the node side encoding is printed
+for reference.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_node_frames.py --tokens 100000
+```
+"""
+
+import argparse
+import json
+import random
+import time
+import zlib
+from typing import Callable
+from typing import Dict
+from typing import List
+
+import cbor2
+import orjson
+
+from distributedinference.domain.node.node_frame_codec import CHUNK_ENVELOPE_FIELDS
+from distributedinference.domain.node.node_frame_codec import FrameDecoder
+
+TOKENS_PER_REQUEST = 500
+# Token texts are drawn from these so the deflate numbers are not too optimistic
+WORDS = (
+    "the of and to in is that for it as with was on be by this are or from at an "
+    "which model network node inference token response request backend latency "
+    "throughput distributed compute GPU memory performance results between"
+).split()
+
+
+def main(tokens: int):
+    random.seed(0)
+    messages = _get_messages(tokens)
+
+    json_frames = [json.dumps(message).encode() for message in messages]
+    cbor_frames = _encode_cbor_delta(messages)
+
+    json_encode = _measure(lambda: [json.dumps(message) for message in messages])
+    cbor_encode = _measure(lambda: _encode_cbor_delta(messages))
+    json_decode = _measure(lambda: [orjson.loads(frame) for frame in json_frames])
+    cbor_decode = _measure(lambda: _decode_cbor(cbor_frames))
+
+    for name, frames, encode_time, decode_time in [
+        ("JSON", json_frames, json_encode, json_decode),
+        ("CBOR", cbor_frames, cbor_encode, cbor_decode),
+    ]:
+        print(
+            f"{name}: {_average_size(frames):.1f} B/token, "
+            f"{_deflated_size(frames):.1f} B/token deflated, "
+            f"backend decode {decode_time / tokens * 1_000_000:.2f} us/token, "
+            f"node encode {encode_time / tokens * 1_000_000:.2f} us/token"
+        )
+
+
+def _get_messages(tokens: int) -> List[Dict]:
+    messages = []
+    for i in range(tokens):
+        request_id = f"request-{i // TOKENS_PER_REQUEST}"
+        is_last = (i + 1) % TOKENS_PER_REQUEST == 0
+        messages.append(
+            {
+                "request_id": request_id,
+                "chunk": {
+                    "id": f"chatcmpl-{request_id}",
+                    "object": "chat.completion.chunk",
+                    "created": 1730000000,
+                    "model": "neuralmagic/Meta-Llama-3.1-8B-Instruct-FP8",
+                    "system_fingerprint": None,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {
+                                "role": None,
+                                "content": f" {random.choice(WORDS)}",
+                            },
+                            "finish_reason": "stop" if is_last else None,
+                            "logprobs": None,
+                        }
+                    ],
+                    "usage": None,
+                },
+                "status": 2 if is_last else 1,
+                "error": None,
+            }
+        )
+    return messages
+
+
+def _encode_cbor_delta(messages: List[Dict]) -> List[bytes]:
+    # What a node does: the envelope fields are only sent when they change
+    envelopes: Dict[str, Dict] = {}
+    frames = []
+    for message in messages:
+        envelope = envelopes.setdefault(message["request_id"], {})
+        chunk = {}
+        for field, value in message["chunk"].items():
+            if field in CHUNK_ENVELOPE_FIELDS:
+                if field in envelope and envelope[field] == value:
+                    continue
+                envelope[field] = value
+            chunk[field] = value
+        frames.append(cbor2.dumps({**message, "chunk": chunk}))
+    return frames
+
+
+def _decode_cbor(frames: List[bytes]) -> None:
+    decoder = FrameDecoder()
+    for frame in frames:
+        decoder.decode(frame)
+
+
+def _measure(function: Callable) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _average_size(frames: List[bytes]) -> float:
+    return sum(len(frame) for frame in frames) / len(frames)
+
+
+def _deflated_size(frames: List[bytes]) -> float:
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    size = 0
+    for frame in frames:
+        data = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        # permessage-deflate drops the empty block trailer of every message
+        size += len(data) - 4
+    return size / len(frames)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.tokens)
@@ -0,0 +1,167 @@
+"""
+Measures the per node memory and the CPU time per pong of the ping-pong protocol,
+comparing the previous pydantic NodePingInfo/PongResponse with the slots dataclasses.
+
+Memory is the tracemalloc size of `--nodes` NodePingInfo objects with a filled RTT
+histogram. CPU time is the time spent in `PingPongProtocol.handle` for one pong of
+every node, with the repositories replaced by no-op stubs.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_ping_pong_protocol.py --nodes 50000
+```
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Dict
+from typing import List
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+from pydantic import ConfigDict
+from pydantic import ValidationError
+
+import settings
+from distributedinference import api_logger
+from distributedinference.service.node.protocol import ping_pong_protocol
+from distributedinference.service.node.protocol.entities import PingPongMessageType
+from distributedinference.service.node.protocol.ping_pong_protocol import (
+    NodePingInfo,
+)
+from distributedinference.service.node.protocol.ping_pong_protocol import (
+    PingPongProtocol,
+)
+
+
+class LegacyNodePingInfo(BaseModel):
+    node_uuid: UUID
+    model: str
+    rtt: Optional[float] = None
+    sum_rtt: float = 0
+    ping_streak: int = 0
+    miss_streak: int = 0
+    histogram: Dict[str, int] = {}
+    next_ping_time: float = 0
+    waiting_for_pong: bool = False
+    ping_nonce: str = ""
+    ping_sent_time: float = 0
+    last_uptime_update_time_in_seconds: float = 0
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class LegacyPongResponse(BaseModel):
+    protocol_version: str
+    message_type: PingPongMessageType
+    node_id: str
+    nonce: str
+    api_ping_time: List[Optional[int]]
+
+
+class _NoOpRepository:
+    async def push(self, *args, **kwargs):
+        pass
+
+    async def send_json_request(self, *args, **kwargs):
+        return True
+
+
+def _legacy_extract_and_validate(data):
+    try:
+        return LegacyPongResponse(**data)
+    except ValidationError:
+        return None
+
+
+def main(nodes: int):
+    # Keeps the debug/info records out of the measurement
+    api_logger.get().setLevel(logging.WARNING)
+
+    legacy_size = _measure_memory(nodes, _new_legacy_node_info)
+    size = _measure_memory(nodes, _new_node_info)
+    print(f"memory per node: pydantic {legacy_size:.0f} B, slots {size:.0f} B")
+
+    original = ping_pong_protocol._extract_and_validate
+    ping_pong_protocol._extract_and_validate = _legacy_extract_and_validate
+    try:
+        legacy_time = asyncio.run(_measure_pongs(nodes, _new_legacy_node_info))
+    finally:
+        ping_pong_protocol._extract_and_validate = original
+    pong_time = asyncio.run(_measure_pongs(nodes, _new_node_info))
+    print(
+        f"CPU per pong: pydantic {legacy_time * 1_000_000:.2f} us, "
+        f"slots {pong_time * 1_000_000:.2f} us"
+    )
+
+
+def _new_legacy_node_info(node_uuid: UUID):
+    node_info = LegacyNodePingInfo(node_uuid=node_uuid, model="model", histogram={})
+    for rtt in range(0, 200, 7):
+        hist_bin = rtt // 10
+        node_info.histogram[f"{hist_bin * 10 + 1}-{hist_bin * 10 + 10}"] = 1
+    return node_info
+
+
+def _new_node_info(node_uuid: UUID):
+    node_info = NodePingInfo(node_uuid=node_uuid, model="model")
+    for rtt in range(0, 200, 7):
+        node_info.histogram[rtt // 10] += 1
+    return node_info
+
+
+def _measure_memory(nodes: int, new_node_info) -> float:
+    node_uuids = [uuid.uuid4() for _ in range(nodes)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    node_infos = [new_node_info(node_uuid) for node_uuid in node_uuids]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del node_infos
+    return size / nodes
+
+
+async def _measure_pongs(nodes: int, new_node_info) -> float:
+    protocol = PingPongProtocol(
+        _NoOpRepository(),
+        _NoOpRepository(),
+        settings.PING_PONG_PROTOCOL_NAME,
+        settings.GALADRIEL_PROTOCOL_CONFIG[settings.PING_PONG_PROTOCOL_NAME],
+    )
+    messages = []
+    for i in range(nodes):
+        node_id = f"node-{i}"
+        node_info = new_node_info(uuid.uuid4())
+        if isinstance(node_info, LegacyNodePingInfo):
+            # got_pong_on_time now indexes the histogram by bin number
+            node_info.histogram = defaultdict(int)
+        node_info.waiting_for_pong = True
+        node_info.ping_nonce = node_id
+        node_info.ping_sent_time = time.time_ns() // 1_000_000
+        protocol.active_nodes[node_id] = node_info
+        messages.append(
+            {
+                "protocol_version": protocol.config.version,
+                "message_type": PingPongMessageType.PONG.value,
+                "node_id": node_id,
+                "nonce": node_id,
+                "api_ping_time": [10, 20, 30],
+            }
+        )
+
+    start = time.perf_counter()
+    for message in messages:
+        await protocol.handle(message)
+    return (time.perf_counter() - start) / nodes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50_000)
+    args = parser.parse_args()
+    main(args.nodes)
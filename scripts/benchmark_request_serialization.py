@@ -0,0 +1,112 @@
+"""
+Compares the backend CPU time of turning a validated chat completion request into
+the bytes sent to the node, for prompts of 1k, 32k and 128k tokens:
+
+* previous: the OpenAI SDK's async_maybe_transform, asdict() and json encoding
+* current: `ChatCompletionRequest.to_openai_chat_completion`,
+  `InferenceRequest.to_dict` and orjson encoding
+
+The prompt is a conversation of messages of about 500 tokens each.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_request_serialization.py --iterations 20
+```
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict
+from typing import Callable
+
+import orjson
+from openai._utils import async_maybe_transform
+from openai.types.chat import completion_create_params
+
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.service.completions.entities import ChatCompletionRequest
+
+PROMPT_TOKENS = [1_000, 32_000, 128_000]
+TOKENS_PER_MESSAGE = 500
+CHARS_PER_TOKEN = 4
+WORDS = (
+    "the of and to in is that for it as with was on be by this are or from at an "
+    "which model network node inference token response request backend latency "
+    "throughput distributed compute GPU memory performance results between"
+).split()
+
+
+async def main(iterations: int):
+    random.seed(0)
+    for prompt_tokens in PROMPT_TOKENS:
+        request = _get_request(prompt_tokens)
+        previous = await _measure(lambda: _previous(request), iterations)
+        current = await _measure(lambda: _current(request), iterations)
+        assert orjson.loads(await _previous(request)) == orjson.loads(
+            await _current(request)
+        )
+        print(
+            f"{prompt_tokens} prompt tokens: previous {previous * 1000:.2f} ms, "
+            f"current {current * 1000:.2f} ms, {previous / current:.1f}x"
+        )
+
+
+def _get_request(prompt_tokens: int) -> ChatCompletionRequest:
+    messages = []
+    for i in range(max(1, prompt_tokens // TOKENS_PER_MESSAGE)):
+        text = ""
+        while len(text) < TOKENS_PER_MESSAGE * CHARS_PER_TOKEN:
+            text += f"{random.choice(WORDS)} "
+        messages.append(
+            {"role": "user" if i % 2 == 0 else "assistant", "content": text}
+        )
+    return ChatCompletionRequest(model="model", messages=messages, stream=True)
+
+
+async def _previous(request: ChatCompletionRequest) -> bytes:
+    chat_request = await async_maybe_transform(
+        {
+            "messages": request.messages,
+            "model": request.model,
+            "frequency_penalty": request.frequency_penalty,
+            "logit_bias": request.logit_bias,
+            "logprobs": request.logprobs,
+            "max_tokens": request.max_tokens,
+            "presence_penalty": request.presence_penalty,
+            "response_format": request.response_format,
+            "seed": request.seed,
+            "stop": request.stop,
+            "stream": request.stream,
+            "stream_options": request.stream_options,
+            "temperature": request.temperature,
+            "top_logprobs": request.top_logprobs,
+            "top_p": request.top_p,
+            "user": request.user,
+        },
+        completion_create_params.CompletionCreateParams,
+    )
+    message = asdict(InferenceRequest("id", request.model, chat_request))
+    # What starlette's send_json does
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+async def _current(request: ChatCompletionRequest) -> bytes:
+    chat_request = await request.to_openai_chat_completion()
+    return orjson.dumps(InferenceRequest("id", request.model, chat_request).to_dict())
+
+
+async def _measure(function: Callable, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await function()
+    return (time.perf_counter() - start) / iterations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,234 @@
+"""
+Measures the database time of stopping all nodes of a backend on shutdown and of the
+health check clean up of RUNNING nodes without a connected host, comparing the
+previous per node queries with the set based ones.
+
+Needs a local Postgres with the migrations applied (see database/README.md) and an
+existing user_profile, the benchmark nodes are inserted for this user and deleted
+at the end. The clean up measurement also stops the other RUNNING nodes without a
+connected host in the database, like the health check job would.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/benchmark_set_nodes_inactive.py --nodes 10000 \
+    --user-profile-id 066cc88e-e83c-7f5f-8000-8bf552a84935
+```
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict
+from typing import List
+from uuid import UUID
+
+import sqlalchemy
+
+from distributedinference import api_logger
+from distributedinference.domain.node import node_status_transition
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import ModelType
+from distributedinference.domain.node.entities import NodeConnection
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.jobs import health_check_job
+from distributedinference.domain.node.node_status_transition import NodeStatusEvent
+from distributedinference.repository import connection
+from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.user_node_repository import (
+    SQL_CREATE_NODE_INFO,
+)
+from distributedinference.repository.utils import utcnow
+
+# The per node update the set based ones replaced
+SQL_UPDATE_CONNECTED_AT = """
+UPDATE node_metrics
+SET
+    connected_at = :connected_at,
+    connected_host = :connected_host,
+    status = :status,
+    last_updated_at = :last_updated_at
+WHERE node_info_id = :id;
+"""
+
+SQL_DELETE_NODE_METRICS = """
+DELETE FROM node_metrics WHERE node_info_id = ANY(:ids);
+"""
+
+SQL_DELETE_NODE_INFO = """
+DELETE FROM node_info WHERE id = ANY(:ids);
+"""
+
+SQL_CLEAR_CONNECTED_HOST = """
+UPDATE node_metrics
+SET status = 'RUNNING', connected_host = NULL
+WHERE node_info_id = ANY(:ids);
+"""
+
+MODEL_NAME = "benchmark-model"
+
+
+async def main(nodes: int, user_profile_id: UUID):
+    # Keeps the per query timer logs out of the measurement
+    api_logger.get().setLevel(logging.WARNING)
+    connection.init_defaults()
+    node_repository = NodeRepository(
+        connection.get_session_provider(), connection.get_session_provider_read()
+    )
+    node_ids = [uuid.uuid4() for _ in range(nodes)]
+    await _insert_nodes(node_ids, user_profile_id)
+    try:
+        connected_nodes = [_get_connected_node(node_id) for node_id in node_ids]
+
+        await _connect_nodes(node_repository, node_ids)
+        legacy_time = await _measure(_legacy_set_nodes_inactive(connected_nodes))
+        await _connect_nodes(node_repository, node_ids)
+        bulk_time = await _measure(
+            node_repository.update_nodes_to_disconnected(
+                {node.uid: node.node_status for node in connected_nodes}
+            )
+        )
+        print(
+            f"set_nodes_inactive, {nodes} nodes: per node {legacy_time:.2f} s, "
+            f"set based {bulk_time:.2f} s"
+        )
+
+        await _clear_connected_host(node_ids)
+        legacy_time = await _measure(_legacy_clean_up(node_repository))
+        await _clear_connected_host(node_ids)
+        bulk_time = await _measure(
+            health_check_job._clean_up_running_nodes_without_connected_host(
+                node_repository
+            )
+        )
+        print(
+            f"clean up without connected host, {nodes} nodes: per node "
+            f"{legacy_time:.2f} s, set based {bulk_time:.2f} s"
+        )
+    finally:
+        await _delete_nodes(node_ids)
+
+
+async def _measure(coroutine) -> float:
+    start = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - start
+
+
+async def _legacy_set_nodes_inactive(nodes: List[ConnectedNode]) -> None:
+    async with connection.get_session_provider().get() as session:
+        for node in nodes:
+            await session.execute(
+                sqlalchemy.text(SQL_UPDATE_CONNECTED_AT),
+                _get_disconnected_data(node.uid, node.node_status),
+            )
+        await session.commit()
+
+
+async def _legacy_update_node_to_disconnected(
+    node_id: UUID, node_status: NodeStatus
+) -> None:
+    async with connection.get_session_provider().get() as session:
+        await session.execute(
+            sqlalchemy.text(SQL_UPDATE_CONNECTED_AT),
+            _get_disconnected_data(node_id, node_status),
+        )
+        await session.commit()
+
+
+def _get_disconnected_data(node_id: UUID, node_status: NodeStatus) -> Dict:
+    return {
+        "id": node_id,
+        "status": node_status.value,
+        "connected_at": None,
+        "connected_host": None,
+        "last_updated_at": utcnow(),
+    }
+
+
+async def _legacy_clean_up(node_repository: NodeRepository) -> None:
+    nodes = await node_repository.get_running_nodes_without_connected_host()
+    for uid, _ in nodes:
+        node_status = await node_status_transition.execute(
+            node_repository, uid, NodeStatusEvent.STOP
+        )
+        await _legacy_update_node_to_disconnected(uid, node_status)
+
+
+def _get_connected_node(node_id: UUID) -> ConnectedNode:
+    return ConnectedNode(
+        node_id,
+        uuid.uuid4(),
+        MODEL_NAME,
+        16000,
+        int(time.time()),
+        BackendHost.DISTRIBUTED_INFERENCE_EU,
+        None,
+        {},
+        NodeStatus.STOPPED,
+        ModelType.LLM,
+        False,
+        None,
+    )
+
+
+async def _insert_nodes(node_ids: List[UUID], user_profile_id: UUID) -> None:
+    now = utcnow()
+    data = [
+        {
+            "id": node_id,
+            "name": str(node_id),
+            "name_alias": f"benchmark-{i}",
+            "user_profile_id": user_profile_id,
+            "is_archived": False,
+            "created_at": now,
+            "last_updated_at": now,
+        }
+        for i, node_id in enumerate(node_ids)
+    ]
+    async with connection.get_session_provider().get() as session:
+        await session.execute(sqlalchemy.text(SQL_CREATE_NODE_INFO), data)
+        await session.commit()
+
+
+async def _connect_nodes(node_repository: NodeRepository, node_ids: List[UUID]):
+    await node_repository.set_nodes_connection_timestamp(
+        [
+            NodeConnection(
+                node_id=node_id,
+                model_name=MODEL_NAME,
+                connected_at=datetime.now(),
+                connected_host=BackendHost.DISTRIBUTED_INFERENCE_EU,
+                status=NodeStatus.RUNNING,
+            )
+            for node_id in node_ids
+        ]
+    )
+
+
+async def _clear_connected_host(node_ids: List[UUID]) -> None:
+    async with connection.get_session_provider().get() as session:
+        await session.execute(
+            sqlalchemy.text(SQL_CLEAR_CONNECTED_HOST), {"ids": node_ids}
+        )
+        await session.commit()
+
+
+async def _delete_nodes(node_ids: List[UUID]) -> None:
+    async with connection.get_session_provider().get() as session:
+        await session.execute(
+            sqlalchemy.text(SQL_DELETE_NODE_METRICS), {"ids": node_ids}
+        )
+        await session.execute(sqlalchemy.text(SQL_DELETE_NODE_INFO), {"ids": node_ids})
+        await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=10_000)
+    parser.add_argument("--user-profile-id", type=UUID, required=True)
+    args = parser.parse_args()
+    asyncio.run(main(args.nodes, args.user_profile_id))
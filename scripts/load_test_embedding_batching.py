@@ -0,0 +1,165 @@
+"""
+Load test of the embedding batching against a local stub embedding server.
+
+The stub serves the OpenAI embeddings API in a separate process, every call takes
+--upstream-latency-ms plus 0.05 ms per input and at most --upstream-concurrency
+calls run at the same time, like a GPU embedding server. Concurrent clients send
+single string requests, once straight to the repository and once through the
+`EmbeddingBatcher`, and the throughput and latencies are printed.
+
+Usage:
+```shell
+PYTHONPATH=. python scripts/load_test_embedding_batching.py --requests 2000 \
+    --concurrency 200
+```
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+from typing import List
+
+import orjson
+import uvicorn
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi import Response
+
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+
+PORT = 8765
+MODEL = "gte-large-en-v1.5"
+PER_INPUT_LATENCY_SECONDS = 0.00005
+
+
+def _get_stub_app(
+    upstream_latency_seconds: float, upstream_concurrency: int, dimensions: int
+):
+    app = FastAPI()
+    embedding = [0.1] * dimensions
+    semaphore = asyncio.Semaphore(upstream_concurrency)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        async with semaphore:
+            await asyncio.sleep(
+                upstream_latency_seconds + PER_INPUT_LATENCY_SECONDS * len(inputs)
+            )
+        return Response(
+            orjson.dumps(
+                {
+                    "object": "list",
+                    "model": MODEL,
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": embedding}
+                        for i in range(len(inputs))
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(inputs),
+                        "total_tokens": len(inputs),
+                    },
+                }
+            ),
+            media_type="application/json",
+        )
+
+    return app
+
+
+async def main(
+    requests: int,
+    concurrency: int,
+    upstream_latency_ms: float,
+    upstream_concurrency: int,
+    batch_delay_ms: float,
+    dimensions: int,
+):
+    server = multiprocessing.Process(
+        target=_run_stub_server,
+        args=(upstream_latency_ms / 1000, upstream_concurrency, dimensions),
+        daemon=True,
+    )
+    server.start()
+    await _wait_for_server()
+    try:
+        repository = EmbeddingApiRepository(f"http://127.0.0.1:{PORT}/v1", MODEL)
+        batcher = EmbeddingBatcher(repository, 2048, batch_delay_ms / 1000)
+        for name, create_embeddings in [
+            ("unbatched", repository.create_embeddings),
+            ("batched", batcher.create_embeddings),
+        ]:
+            latencies, total_time = await _run(create_embeddings, requests, concurrency)
+            print(
+                f"{name}: {requests / total_time:.0f} requests/s, "
+                f"p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+                f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms"
+            )
+    finally:
+        server.terminate()
+
+
+def _run_stub_server(
+    upstream_latency_seconds: float, upstream_concurrency: int, dimensions: int
+):
+    uvicorn.run(
+        _get_stub_app(upstream_latency_seconds, upstream_concurrency, dimensions),
+        port=PORT,
+        log_level="warning",
+    )
+
+
+async def _wait_for_server():
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", PORT)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+
+
+async def _run(create_embeddings, requests: int, concurrency: int):
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def _client():
+        for i in counter:
+            start = time.perf_counter()
+            await create_embeddings([f"text number {i}"], None)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_client() for _ in range(concurrency)])
+    return latencies, time.perf_counter() - start
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    return statistics.quantiles(values, n=100)[int(percentile * 100) - 1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--upstream-latency-ms", type=float, default=20)
+    parser.add_argument("--upstream-concurrency", type=int, default=8)
+    parser.add_argument("--batch-delay-ms", type=float, default=5)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.requests,
+            args.concurrency,
+            args.upstream_latency_ms,
+            args.upstream_concurrency,
+            args.batch_delay_ms,
+            args.dimensions,
+        )
+    )
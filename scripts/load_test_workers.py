@@ -0,0 +1,94 @@
+"""
+Sends concurrent streaming chat completions to compare the throughput of a single
+worker deployment against a multi worker one (WORKERS_COUNT in entrypoint.sh).
+Prints requests per second and latency percentiles (TTFT and total).
+
+Usage:
+python scripts/load_test_workers.py \
+  --base-url http://localhost:5000/v1 \
+  --api-key <api key> \
+  --model llama3.1:8b \
+  --concurrency 64 \
+  --requests 1000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+from typing import Optional
+
+import openai
+
+
+async def _run_request(
+    client: openai.AsyncOpenAI, model: str, ttfts: List[float], totals: List[float]
+) -> bool:
+    start = time.perf_counter()
+    first_token_time: Optional[float] = None
+    try:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": "Say hello"}],
+            max_tokens=16,
+            stream=True,
+        )
+        async for _ in stream:
+            if first_token_time is None:
+                first_token_time = time.perf_counter()
+    except Exception as e:
+        print("Request failed:", e)
+        return False
+    ttfts.append((first_token_time or time.perf_counter()) - start)
+    totals.append(time.perf_counter() - start)
+    return True
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def main(
+    base_url: str, api_key: str, model: str, concurrency: int, requests: int
+):
+    client = openai.AsyncOpenAI(base_url=base_url, api_key=api_key)
+    semaphore = asyncio.Semaphore(concurrency)
+    ttfts: List[float] = []
+    totals: List[float] = []
+
+    async def _limited():
+        async with semaphore:
+            return await _run_request(client, model, ttfts, totals)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[_limited() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+
+    print(f"requests: {requests}, failed: {results.count(False)}")
+    print(f"elapsed: {elapsed:.2f}s, rps: {results.count(True) / elapsed:.2f}")
+    for name, values in (("ttft", ttfts), ("total", totals)):
+        if not values:
+            continue
+        print(
+            f"{name}: avg={statistics.mean(values):.3f}s "
+            f"p50={_percentile(values, 0.5):.3f}s "
+            f"p95={_percentile(values, 0.95):.3f}s "
+            f"p99={_percentile(values, 0.99):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:5000/v1")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--model", default="llama3.1:8b")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.base_url, args.api_key, args.model, args.concurrency, args.requests)
+    )
@@ -23,6 +23,12 @@ API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1")
 API_PORT = int(os.getenv("API_PORT", 5000))
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")
 LOG_FILE_PATH = "logs/logs.log"
+# Max records waiting for the background log writer, records over the limit are dropped
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "100000"))
+# Max DEBUG/INFO records per second from a single log call site, 0 disables the limit
+LOG_RATE_LIMIT_PER_SECOND = int(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "200"))
+# Fraction of DEBUG/INFO records that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
 
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "passw0rd")
@@ -118,18 +124,92 @@ SUPPORTED_EMBEDDING_MODELS = [
     # https://huggingface.co/Alibaba-NLP/gte-large-en-v1.5
     "gte-large-en-v1.5",
 ]
+# Opt-in: embedding requests arriving within the delay are sent upstream together
+EMBEDDING_BATCHING_ENABLED = (
+    os.getenv("EMBEDDING_BATCHING_ENABLED", "false").lower() == "true"
+)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 2048))
+EMBEDDING_BATCH_MAX_DELAY_SECONDS = float(
+    os.getenv("EMBEDDING_BATCH_MAX_DELAY_SECONDS", 0.005)
+)
+# Opt-in: embeddings are created on the connected embedding nodes, batched like
+# with EMBEDDING_BATCHING_ENABLED. Falls back to EMBEDDING_API_BASE_URL when set
+EMBEDDING_NODES_ENABLED = (
+    os.getenv("EMBEDDING_NODES_ENABLED", "false").lower() == "true"
+)
+# Inputs per embedding node request, a batch is split between the nodes
+EMBEDDING_NODE_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_NODE_MAX_BATCH_SIZE", 256))
+EMBEDDING_NODE_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_NODE_TIMEOUT_SECONDS", 30))
+# Opt-in: embeddings are cached by model and input content
+EMBEDDING_CACHE_ENABLED = (
+    os.getenv("EMBEDDING_CACHE_ENABLED", "false").lower() == "true"
+)
+EMBEDDING_CACHE_MAX_BYTES = int(
+    os.getenv("EMBEDDING_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+)
+# Directory of the memory-mapped disk tier, surviving restarts. Off when not set
+EMBEDDING_CACHE_DISK_DIRECTORY = os.getenv("EMBEDDING_CACHE_DISK_DIRECTORY", None)
+# Vectors kept on disk per vector size, 262144 * 1024 dimensions * 4 bytes = 1GB
+EMBEDDING_CACHE_DISK_SLOTS = int(os.getenv("EMBEDDING_CACHE_DISK_SLOTS", 262144))
 
 MAX_PARALLEL_REQUESTS_PER_NODE = int(os.getenv("MAX_PARALLEL_REQUESTS_PER_NODE", "10"))
 MAX_PARALLEL_REQUESTS_PER_DATACENTER_NODE = int(
     os.getenv("MAX_PARALLEL_REQUESTS_PER_DATACENTER_NODE", "20")
 )
+# Opt-in: datacenter nodes admit requests by their estimated in-flight tokens
+# instead of MAX_PARALLEL_REQUESTS_PER_DATACENTER_NODE, see token_admission
+TOKEN_ADMISSION_ENABLED = (
+    os.getenv("TOKEN_ADMISSION_ENABLED", "false").lower() == "true"
+)
+# KV-cache budget, in prompt + completion tokens per MB of node VRAM
+TOKEN_ADMISSION_KV_CACHE_TOKENS_PER_VRAM_MB = float(
+    os.getenv("TOKEN_ADMISSION_KV_CACHE_TOKENS_PER_VRAM_MB", "2")
+)
+# Throughput budget, the in-flight completion tokens have to be generated within
+# this time at the node's benchmark tokens per second
+TOKEN_ADMISSION_GENERATION_WINDOW_SECONDS = float(
+    os.getenv("TOKEN_ADMISSION_GENERATION_WINDOW_SECONDS", "30")
+)
+# Expected completion tokens of requests without max_tokens
+TOKEN_ADMISSION_DEFAULT_COMPLETION_TOKENS = int(
+    os.getenv("TOKEN_ADMISSION_DEFAULT_COMPLETION_TOKENS", "512")
+)
+TOKEN_ADMISSION_MAX_PARALLEL_REQUESTS = int(
+    os.getenv("TOKEN_ADMISSION_MAX_PARALLEL_REQUESTS", "64")
+)
+
+# Node connects are admitted at this rate and concurrency, reads and writes of the
+# nodes connecting at the same time are batched, see NodeConnectPipeline
+NODE_CONNECT_MAX_CONCURRENT = int(os.getenv("NODE_CONNECT_MAX_CONCURRENT", "200"))
+NODE_CONNECT_PER_SECOND = float(os.getenv("NODE_CONNECT_PER_SECOND", "500"))
+# Nodes that would wait longer are rejected and reconnect later
+NODE_CONNECT_ADMISSION_TIMEOUT_SECONDS = float(
+    os.getenv("NODE_CONNECT_ADMISSION_TIMEOUT_SECONDS", "10")
+)
+NODE_CONNECT_BATCH_SIZE = int(os.getenv("NODE_CONNECT_BATCH_SIZE", "100"))
+NODE_CONNECT_BATCH_DELAY_SECONDS = float(
+    os.getenv("NODE_CONNECT_BATCH_DELAY_SECONDS", "0.02")
+)
+NODE_BENCHMARK_CACHE_TTL_SECONDS = float(
+    os.getenv("NODE_BENCHMARK_CACHE_TTL_SECONDS", "600")
+)
+# Nodes offering the binary (CBOR) WebSocket subprotocol get it, others use JSON
+NODE_BINARY_FRAMES_ENABLED = (
+    os.getenv("NODE_BINARY_FRAMES_ENABLED", "true").lower() == "true"
+)
 
 METRICS_JOB_TIMEOUT_BETWEEN_RUNS_SECONDS = int(
     os.getenv("METRICS_JOB_TIMEOUT_BETWEEN_RUNS_SECONDS", "300")
 )
+# Node status changes of the locally connected nodes are saved to the database in the background
+NODE_STATUS_JOB_TIMEOUT_BETWEEN_RUNS_SECONDS = float(
+    os.getenv("NODE_STATUS_JOB_TIMEOUT_BETWEEN_RUNS_SECONDS", "1")
+)
 
 # if prometheus py client will be used in multiprocessing mode, needs to point to an existing dir
 PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", None)
+# Fraction of calls measured by utils.timer, 1.0 measures every call
+TIMER_SAMPLE_RATE = float(os.getenv("TIMER_SAMPLE_RATE", "1.0"))
 
 STYTCH_PROJECT_ID = os.getenv("STYTCH_PROJECT_ID", None)
 STYTCH_SECRET = os.getenv("STYTCH_SECRET", None)
@@ -140,6 +220,8 @@ SESSION_DURATION_MINUTES = 2 * 24 * 60
 PROTOCOL_RESPONSE_CHECK_INTERVAL_IN_SECONDS = (
     3  # Protocol response check every 3 second
 )
+# Max protocol messages sent concurrently, the rest wait for the next batch
+PROTOCOL_SEND_BATCH_SIZE = int(os.getenv("PROTOCOL_SEND_BATCH_SIZE", 500))
 PING_PONG_PROTOCOL_NAME = "ping-pong"
 GALADRIEL_PROTOCOL_CONFIG = {
     PING_PONG_PROTOCOL_NAME: {
@@ -185,6 +267,48 @@ TOGETHER_AI_API_KEY = os.getenv("TOGETHER_AI_API_KEY", None)
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", None)
 
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "galadriel-imagegen-us")
+# Opt-in: image generation requests wait in a fair queue for diffusion node
+# capacity instead of failing when no node is free
+IMAGE_GENERATION_SCHEDULER_ENABLED = (
+    os.getenv("IMAGE_GENERATION_SCHEDULER_ENABLED", "false").lower() == "true"
+)
+# Denoising steps of an image, the requests do not have them
+IMAGE_GENERATION_STEPS = int(os.getenv("IMAGE_GENERATION_STEPS", 28))
+# Pixels times steps a diffusion node runs at the same time, 4 1024x1024 images
+IMAGE_GENERATION_NODE_CAPACITY = int(
+    os.getenv(
+        "IMAGE_GENERATION_NODE_CAPACITY", 4 * 1024 * 1024 * IMAGE_GENERATION_STEPS
+    )
+)
+IMAGE_GENERATION_MAX_QUEUED_JOBS = int(
+    os.getenv("IMAGE_GENERATION_MAX_QUEUED_JOBS", 1000)
+)
+IMAGE_GENERATION_QUEUE_TIMEOUT_SECONDS = float(
+    os.getenv("IMAGE_GENERATION_QUEUE_TIMEOUT_SECONDS", 60)
+)
+# Memory ceiling of the images in binary frames of one image generation request
+IMAGE_CHUNKS_MAX_BYTES_PER_REQUEST = int(
+    os.getenv("IMAGE_CHUNKS_MAX_BYTES_PER_REQUEST", 128 * 1024 * 1024)
+)
+# Threads uploading generated images and signing their URLs
+GCS_UPLOAD_MAX_WORKERS = int(os.getenv("GCS_UPLOAD_MAX_WORKERS", 16))
+
+# Opt-in: agent logs are acknowledged once queued and saved in batches by a job
+AGENT_LOGS_BUFFERED_ENABLED = (
+    os.getenv("AGENT_LOGS_BUFFERED_ENABLED", "false").lower() == "true"
+)
+# Requests waiting to be saved, above it the agents are rate limited
+AGENT_LOGS_QUEUE_MAX_SIZE = int(os.getenv("AGENT_LOGS_QUEUE_MAX_SIZE", 10000))
+AGENT_LOGS_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 0.5)
+)
+AGENT_LOGS_FLUSH_MAX_LOGS = int(os.getenv("AGENT_LOGS_FLUSH_MAX_LOGS", 5000))
+# A batch failing to save is retried with a doubling delay, then dropped
+AGENT_LOGS_SAVE_MAX_ATTEMPTS = int(os.getenv("AGENT_LOGS_SAVE_MAX_ATTEMPTS", 3))
+AGENT_LOGS_SAVE_RETRY_SECONDS = float(os.getenv("AGENT_LOGS_SAVE_RETRY_SECONDS", 1))
+AGENT_LOGS_OWNER_CACHE_TTL_SECONDS = float(
+    os.getenv("AGENT_LOGS_OWNER_CACHE_TTL_SECONDS", 60)
+)
 
 SLACK_CHANNEL_ID = os.getenv("SLACK_CHANNEL_ID")
 SLACK_OAUTH_TOKEN = os.getenv("SLACK_OAUTH_TOKEN")
@@ -192,9 +316,70 @@ SLACK_OAUTH_TOKEN = os.getenv("SLACK_OAUTH_TOKEN")
 _peer_nodes = os.getenv("PEER_NODES_LIST", "").split(";")
 # Remove duplicated nodes
 PEER_NODES_LIST = list(set(_peer_nodes))
+# How often the peer backends are asked for their free capacity per model
+PEER_CAPACITY_GOSSIP_INTERVAL_SECONDS = float(
+    os.getenv("PEER_CAPACITY_GOSSIP_INTERVAL_SECONDS", 2)
+)
+# Capacity older than this is ignored and the peer is treated as unknown
+PEER_CAPACITY_MAX_AGE_SECONDS = float(os.getenv("PEER_CAPACITY_MAX_AGE_SECONDS", 10))
+# Consecutive failures before requests stop being forwarded to a peer
+PEER_CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("PEER_CIRCUIT_BREAKER_FAILURE_THRESHOLD", 3)
+)
+PEER_CIRCUIT_BREAKER_RESET_SECONDS = float(
+    os.getenv("PEER_CIRCUIT_BREAKER_RESET_SECONDS", 30)
+)
+# If the first peer has not sent a chunk by then, the next peer is tried in parallel
+PEER_FORWARDING_FALLBACK_DELAY_SECONDS = float(
+    os.getenv("PEER_FORWARDING_FALLBACK_DELAY_SECONDS", 1)
+)
 
 HOSTNAME = os.getenv("HOSTNAME", "")
 
+# Opt-in: streamed chunks arriving within this delay are written to the client
+# together, 0 writes every chunk on its own
+SSE_COALESCE_MAX_DELAY_SECONDS = float(os.getenv("SSE_COALESCE_MAX_DELAY_SECONDS", "0"))
+
+# Opt-in: if a node has not sent the first token within the TTFT percentile of
+# the model's nodes, the request is sent to a second node and the first to answer wins
+INFERENCE_HEDGING_ENABLED = (
+    os.getenv("INFERENCE_HEDGING_ENABLED", "false").lower() == "true"
+)
+INFERENCE_HEDGING_PERCENTILE = float(os.getenv("INFERENCE_HEDGING_PERCENTILE", 0.95))
+# Used until enough TTFT samples are collected for the model
+INFERENCE_HEDGING_DEFAULT_DELAY_SECONDS = float(
+    os.getenv("INFERENCE_HEDGING_DEFAULT_DELAY_SECONDS", 2)
+)
+INFERENCE_HEDGING_MIN_DELAY_SECONDS = float(
+    os.getenv("INFERENCE_HEDGING_MIN_DELAY_SECONDS", 0.5)
+)
+# The losing node keeps generating, its chunks are discarded for at most this long
+INFERENCE_HEDGING_DRAIN_TIMEOUT_SECONDS = float(
+    os.getenv("INFERENCE_HEDGING_DRAIN_TIMEOUT_SECONDS", 300)
+)
+
+# Opt-in: requests with the same long prompt prefix are routed to the same node to
+# reuse its prefix cache, see prefix_affinity
+PREFIX_AFFINITY_ENABLED = (
+    os.getenv("PREFIX_AFFINITY_ENABLED", "false").lower() == "true"
+)
+# Shorter prompts are routed randomly
+PREFIX_AFFINITY_MIN_CHARS = int(os.getenv("PREFIX_AFFINITY_MIN_CHARS", 2000))
+# A node takes requests of its prefixes up to this times the average node load
+PREFIX_AFFINITY_LOAD_FACTOR = float(os.getenv("PREFIX_AFFINITY_LOAD_FACTOR", 1.25))
+
+# Opt-in: deterministic chat completions (temperature 0 or a fixed seed) are
+# answered from a per-user exact match cache, see response_cache
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600))
+# "bill": replayed usage is saved like a served request, "free": it is not
+RESPONSE_CACHE_BILLING_POLICY = os.getenv("RESPONSE_CACHE_BILLING_POLICY", "bill")
+
+# Directory for the Unix sockets between the worker processes of this backend.
+# Required when running more than one worker, not set means a single worker.
+WORKER_IPC_DIR = os.getenv("WORKER_IPC_DIR", None)
+
 # Solana devnet settings
 SOLANA_DEVNET_RPC_URL = os.getenv(
     "SOLANA_DEVNET_RPC_URL", "https://api.devnet.solana.com"
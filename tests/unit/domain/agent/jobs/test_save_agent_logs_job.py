@@ -0,0 +1,139 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import UUID
+
+import settings
+from distributedinference.domain.agent.entities import AgentLog
+from distributedinference.domain.agent.entities import AgentLogInput
+from distributedinference.domain.agent.jobs import save_agent_logs_job
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
+
+AGENT_ID = UUID("067865aa-8f86-7cb9-8000-f86624c51873")
+AGENT_INSTANCE_ID = UUID("067865aa-8f86-7cb9-8000-f86624c51874")
+
+
+def _get_agent_logs(count: int) -> AgentLogInput:
+    return AgentLogInput(
+        agent_id=AGENT_ID,
+        agent_instance_id=AGENT_INSTANCE_ID,
+        logs=[
+            AgentLog(text=f"text {i}", level="info", timestamp=1, signature=None)
+            for i in range(count)
+        ],
+    )
+
+
+async def test_saves_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_MAX_LOGS", 5)
+    repository = AsyncMock()
+    queue_repository = AgentLogsQueueRepository(10)
+    for _ in range(4):
+        queue_repository.push(_get_agent_logs(2))
+
+    task = asyncio.create_task(
+        save_agent_logs_job.execute(repository, queue_repository)
+    )
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [len(call.args[0]) for call in repository.add_bulk.call_args_list] == [3, 1]
+
+
+async def test_retries_after_error(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "AGENT_LOGS_SAVE_RETRY_SECONDS", 0)
+    repository = AsyncMock()
+    repository.add_bulk.side_effect = [Exception("database error"), None, None]
+    queue_repository = AgentLogsQueueRepository(10)
+
+    task = asyncio.create_task(
+        save_agent_logs_job.execute(repository, queue_repository)
+    )
+    queue_repository.push(_get_agent_logs(1))
+    await asyncio.sleep(0.01)
+    queue_repository.push(_get_agent_logs(1))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [call.args[0] for call in repository.add_bulk.call_args_list] == [
+        [_get_agent_logs(1)],
+        [_get_agent_logs(1)],
+        [_get_agent_logs(1)],
+    ]
+
+
+async def test_drops_batch_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "AGENT_LOGS_SAVE_RETRY_SECONDS", 0)
+    monkeypatch.setattr(settings, "AGENT_LOGS_SAVE_MAX_ATTEMPTS", 2)
+    repository = AsyncMock()
+    repository.add_bulk.side_effect = [
+        Exception("database error"),
+        Exception("database error"),
+        None,
+    ]
+    queue_repository = AgentLogsQueueRepository(10)
+
+    task = asyncio.create_task(
+        save_agent_logs_job.execute(repository, queue_repository)
+    )
+    queue_repository.push(_get_agent_logs(1))
+    await asyncio.sleep(0.01)
+    queue_repository.push(_get_agent_logs(2))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [call.args[0] for call in repository.add_bulk.call_args_list] == [
+        [_get_agent_logs(1)],
+        [_get_agent_logs(1)],
+        [_get_agent_logs(2)],
+    ]
+
+
+async def test_flushes_retried_batch_on_cancel(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "AGENT_LOGS_SAVE_RETRY_SECONDS", 60)
+    repository = AsyncMock()
+    repository.add_bulk.side_effect = [Exception("database error"), None]
+    queue_repository = AgentLogsQueueRepository(10)
+
+    task = asyncio.create_task(
+        save_agent_logs_job.execute(repository, queue_repository)
+    )
+    queue_repository.push(_get_agent_logs(1))
+    await asyncio.sleep(0.01)
+    # Waiting to retry the failed batch
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [call.args[0] for call in repository.add_bulk.call_args_list] == [
+        [_get_agent_logs(1)],
+        [_get_agent_logs(1)],
+    ]
+
+
+async def test_flushes_on_cancel(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_LOGS_FLUSH_INTERVAL_SECONDS", 60)
+    repository = AsyncMock()
+    queue_repository = AgentLogsQueueRepository(10)
+
+    task = asyncio.create_task(
+        save_agent_logs_job.execute(repository, queue_repository)
+    )
+    queue_repository.push(_get_agent_logs(1))
+    await asyncio.sleep(0.01)
+    # Waiting for the flush interval, with one request taken from the queue
+    queue_repository.push(_get_agent_logs(1))
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [call.args[0] for call in repository.add_bulk.call_args_list] == [
+        [_get_agent_logs(1)],
+        [_get_agent_logs(1)],
+    ]
@@ -0,0 +1,85 @@
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from uuid import UUID
+
+from distributedinference.domain.agent.logs import agent_logs_admission
+from distributedinference.domain.agent.logs.agent_logs_admission import (
+    AgentLogsAdmission,
+)
+
+AGENT_ID = UUID("067865aa-8f86-7cb9-8000-f86624c51873")
+USER_ID = UUID("067865aa-8f86-7cb9-8000-f86624c51874")
+
+
+def _mock_time(monkeypatch, now: float):
+    clock = MagicMock(return_value=now)
+    monkeypatch.setattr(agent_logs_admission.time, "monotonic", clock)
+    return clock
+
+
+async def test_get_owner_cached_until_expired(monkeypatch):
+    clock = _mock_time(monkeypatch, 100)
+    agent_repository = AsyncMock()
+    agent_repository.get_agent.return_value = MagicMock(user_profile_id=USER_ID)
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert await admission.get_owner(AGENT_ID, agent_repository) == USER_ID
+    clock.return_value = 159
+    assert await admission.get_owner(AGENT_ID, agent_repository) == USER_ID
+    assert agent_repository.get_agent.call_count == 1
+
+    clock.return_value = 161
+    assert await admission.get_owner(AGENT_ID, agent_repository) == USER_ID
+    assert agent_repository.get_agent.call_count == 2
+
+
+async def test_get_owner_missing_agent_not_cached(monkeypatch):
+    _mock_time(monkeypatch, 100)
+    agent_repository = AsyncMock()
+    agent_repository.get_agent.return_value = None
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert await admission.get_owner(AGENT_ID, agent_repository) is None
+    assert await admission.get_owner(AGENT_ID, agent_repository) is None
+    assert agent_repository.get_agent.call_count == 2
+
+
+def test_try_acquire_allows_one_batch_over_limit(monkeypatch):
+    _mock_time(monkeypatch, 100)
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert admission.try_acquire(AGENT_ID, 50)
+    assert admission.try_acquire(AGENT_ID, 50)
+    assert not admission.try_acquire(AGENT_ID, 1)
+
+
+def test_try_acquire_refills(monkeypatch):
+    clock = _mock_time(monkeypatch, 100)
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert admission.try_acquire(AGENT_ID, 70)
+    # 10 tokens of debt, refilled at one per second
+    clock.return_value = 110
+    assert not admission.try_acquire(AGENT_ID, 1)
+    clock.return_value = 111
+    assert admission.try_acquire(AGENT_ID, 1)
+
+
+def test_try_acquire_per_agent(monkeypatch):
+    _mock_time(monkeypatch, 100)
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert admission.try_acquire(AGENT_ID, 60)
+    assert not admission.try_acquire(AGENT_ID, 1)
+    assert admission.try_acquire(USER_ID, 1)
+
+
+def test_full_buckets_dropped(monkeypatch):
+    clock = _mock_time(monkeypatch, 100)
+    monkeypatch.setattr(agent_logs_admission, "MAX_TRACKED_AGENTS", 1)
+    admission = AgentLogsAdmission(60, 60, 60)
+
+    assert admission.try_acquire(AGENT_ID, 1)
+    clock.return_value = 200
+    assert admission.try_acquire(USER_ID, 1)
+    assert list(admission._buckets) == [USER_ID]
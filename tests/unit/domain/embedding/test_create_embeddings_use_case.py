@@ -0,0 +1,107 @@
+from typing import List
+from unittest.mock import AsyncMock
+
+import pytest
+from openai.types import CreateEmbeddingResponse
+from openai.types import Embedding
+from openai.types.create_embedding_response import Usage
+
+from distributedinference.domain.embedding import create_embeddings_use_case
+from distributedinference.domain.embedding import embedding_cache
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
+
+
+def _upstream_response(inputs: List, encoding_format) -> CreateEmbeddingResponse:
+    data = []
+    for i, text in enumerate(inputs):
+        vector = embedding_cache.to_vector([float(len(text)), 0.5])
+        data.append(
+            Embedding(
+                embedding=embedding_cache.from_vector(vector, encoding_format),  # type: ignore
+                index=i,
+                object="embedding",
+            )
+        )
+    return CreateEmbeddingResponse(
+        data=data,
+        model="model",
+        object="list",
+        usage=Usage(prompt_tokens=len(inputs), total_tokens=len(inputs)),
+    )
+
+
+@pytest.fixture
+def repository():
+    repository = AsyncMock(spec=EmbeddingApiRepository)
+    repository.model = "model"
+    repository.create_embeddings.side_effect = _upstream_response
+    return repository
+
+
+async def test_without_cache(repository):
+    response = await create_embeddings_use_case.execute(["a"], None, repository)
+
+    assert response.data[0].embedding == [1.0, 0.5]
+    repository.create_embeddings.assert_called_once_with(["a"], None)
+
+
+async def test_only_misses_sent_upstream(repository):
+    cache = EmbeddingCacheRepository(1024)
+    await create_embeddings_use_case.execute(
+        ["a", "bb"], "float", repository, None, cache
+    )
+
+    response = await create_embeddings_use_case.execute(
+        ["bb", "ccc", "a", "ccc"], "float", repository, None, cache
+    )
+
+    repository.create_embeddings.assert_called_with(["ccc"], "float")
+    assert [e.embedding for e in response.data] == [
+        [2.0, 0.5],
+        [3.0, 0.5],
+        [1.0, 0.5],
+        [3.0, 0.5],
+    ]
+    assert [e.index for e in response.data] == [0, 1, 2, 3]
+    assert response.usage.prompt_tokens == 1
+
+
+async def test_all_hits_not_sent_upstream(repository):
+    cache = EmbeddingCacheRepository(1024)
+    await create_embeddings_use_case.execute(["a"], "float", repository, None, cache)
+
+    response = await create_embeddings_use_case.execute(
+        ["a"], "float", repository, None, cache
+    )
+
+    assert repository.create_embeddings.call_count == 1
+    assert response.data[0].embedding == [1.0, 0.5]
+    assert response.usage.prompt_tokens == 0
+
+
+async def test_float_and_base64_served_from_same_vectors(repository):
+    cache = EmbeddingCacheRepository(1024)
+    await create_embeddings_use_case.execute(["a"], "float", repository, None, cache)
+
+    response = await create_embeddings_use_case.execute(
+        ["a"], "base64", repository, None, cache
+    )
+
+    assert repository.create_embeddings.call_count == 1
+    assert response.data[0].embedding == embedding_cache.from_vector(
+        embedding_cache.to_vector([1.0, 0.5]), "base64"
+    )
+
+
+async def test_texts_and_tokens_keyed_separately():
+    assert embedding_cache.get_key("model", "a") != embedding_cache.get_key(
+        "model", [97]
+    )
+    assert embedding_cache.get_key("model", "a") != embedding_cache.get_key(
+        "other", "a"
+    )
@@ -0,0 +1,84 @@
+import asyncio
+from typing import List
+from unittest.mock import AsyncMock
+
+import pytest
+from openai.types import CreateEmbeddingResponse
+from openai.types import Embedding
+from openai.types.create_embedding_response import Usage
+
+from distributedinference.domain.embedding.embedding_batcher import EmbeddingBatcher
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+
+
+def _upstream_response(inputs: List, _encoding_format) -> CreateEmbeddingResponse:
+    data = [
+        Embedding(embedding=[float(len(text))], index=i, object="embedding")
+        for i, text in enumerate(inputs)
+    ]
+    return CreateEmbeddingResponse(
+        # Upstream does not have to keep the order
+        data=list(reversed(data)),
+        model="model",
+        object="list",
+        usage=Usage(
+            prompt_tokens=sum(len(text) for text in inputs),
+            total_tokens=sum(len(text) for text in inputs),
+        ),
+    )
+
+
+@pytest.fixture
+def repository():
+    repository = AsyncMock(spec=EmbeddingApiRepository)
+    repository.create_embeddings.side_effect = _upstream_response
+    return repository
+
+
+async def test_concurrent_requests_batched(repository):
+    batcher = EmbeddingBatcher(repository, 100, 0.01)
+
+    first, second = await asyncio.gather(
+        batcher.create_embeddings(["a", "bbb"], None),
+        batcher.create_embeddings(["cc", "a"], None),
+    )
+
+    repository.create_embeddings.assert_awaited_once_with(["a", "bbb", "cc"], None)
+    assert [e.embedding for e in first.data] == [[1.0], [3.0]]
+    assert [e.index for e in first.data] == [0, 1]
+    assert [e.embedding for e in second.data] == [[2.0], [1.0]]
+    assert first.usage.prompt_tokens == 4
+    assert second.usage.prompt_tokens == 3
+
+
+async def test_batches_split_by_size_and_input_type(repository):
+    batcher = EmbeddingBatcher(repository, 2, 0.01)
+
+    texts, tokens = await asyncio.gather(
+        batcher.create_embeddings(["a", "bb", "ccc"], "float"),
+        batcher.create_embeddings([[1, 2], [3]], "float"),
+    )
+
+    calls = [call.args for call in repository.create_embeddings.await_args_list]
+    assert sorted(calls, key=str) == sorted(
+        [(["a", "bb"], "float"), (["ccc"], "float"), ([[1, 2], [3]], "float")],
+        key=str,
+    )
+    assert [e.embedding for e in texts.data] == [[1.0], [2.0], [3.0]]
+    assert [e.embedding for e in tokens.data] == [[2.0], [1.0]]
+
+
+async def test_upstream_error_fails_every_request(repository):
+    repository.create_embeddings.side_effect = RuntimeError("upstream down")
+    batcher = EmbeddingBatcher(repository, 100, 0.01)
+
+    results = await asyncio.gather(
+        batcher.create_embeddings(["a"], None),
+        batcher.create_embeddings(["b"], None),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    repository.create_embeddings.assert_awaited_once()
@@ -0,0 +1,128 @@
+import time
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from distributedinference.domain.embedding.embedding_node_dispatcher import (
+    EmbeddingNodeDispatcher,
+)
+from distributedinference.domain.embedding.entities import EmbeddingApiError
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import ModelType
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.embedding_api_repository import (
+    EmbeddingApiRepository,
+)
+
+MODEL = "gte-large-en-v1.5"
+
+
+def _node(websocket) -> ConnectedNode:
+    return ConnectedNode(
+        uid=uuid4(),
+        user_id=uuid4(),
+        model=MODEL,
+        model_type=ModelType.EMBEDDING,
+        vram=90000,
+        connected_at=int(time.time()),
+        connected_host=BackendHost.from_value("distributed-inference-us"),
+        websocket=websocket,
+        request_incoming_queues={},
+        node_status=NodeStatus.RUNNING,
+    )
+
+
+@pytest.fixture
+def connected_node_repository():
+    return ConnectedNodeRepository(10, 10, "distributed-inference-us")
+
+
+def _add_node(connected_node_repository, error=None) -> ConnectedNode:
+    """
+    A node answering every request with the input lengths as embeddings
+    """
+    websocket = MagicMock()
+    node = _node(websocket)
+
+    async def _send_text(text):
+        request = orjson.loads(text)
+        connected_node_repository.add_inference_response_chunks(
+            node.uid,
+            [
+                {
+                    "request_id": request["request_id"],
+                    "embeddings": [[float(len(i))] for i in request["input"]],
+                    "prompt_tokens": len(request["input"]),
+                    "error": error,
+                }
+            ],
+        )
+
+    websocket.send_text = AsyncMock(side_effect=_send_text)
+    connected_node_repository.register_node(node)
+    return node
+
+
+def _dispatcher(connected_node_repository, upstream=None, timeout_seconds=1):
+    return EmbeddingNodeDispatcher(
+        MODEL, connected_node_repository, upstream, 2, timeout_seconds
+    )
+
+
+async def test_batch_split_between_nodes(connected_node_repository):
+    nodes = [_add_node(connected_node_repository) for _ in range(3)]
+
+    response = await _dispatcher(connected_node_repository).create_embeddings(
+        ["a", "bb", "ccc", "dddd", "eeeee"], "float"
+    )
+
+    assert [e.embedding for e in response.data] == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [e.index for e in response.data] == [0, 1, 2, 3, 4]
+    assert response.usage.prompt_tokens == 5
+    assert sum(node.websocket.send_text.call_count for node in nodes) == 3
+    assert all(node.active_requests_count() == 0 for node in nodes)
+
+
+async def test_no_nodes_falls_back_to_upstream(connected_node_repository):
+    upstream = AsyncMock(spec=EmbeddingApiRepository)
+    upstream.create_embeddings.return_value = "upstream response"
+
+    response = await _dispatcher(connected_node_repository, upstream).create_embeddings(
+        ["a"], None
+    )
+
+    assert response == "upstream response"
+    upstream.create_embeddings.assert_called_once_with(["a"], "float")
+
+
+async def test_no_nodes_without_upstream(connected_node_repository):
+    with pytest.raises(EmbeddingApiError) as e:
+        await _dispatcher(connected_node_repository).create_embeddings(["a"], None)
+    assert e.value.status == 503
+
+
+async def test_node_error(connected_node_repository):
+    _add_node(connected_node_repository, error="out of memory")
+
+    with pytest.raises(EmbeddingApiError) as e:
+        await _dispatcher(connected_node_repository).create_embeddings(["a"], None)
+    assert e.value.status == 502
+
+
+async def test_node_timeout(connected_node_repository):
+    node = _node(AsyncMock())
+    connected_node_repository.register_node(node)
+
+    with pytest.raises(EmbeddingApiError) as e:
+        await _dispatcher(
+            connected_node_repository, timeout_seconds=0.01
+        ).create_embeddings(["a"], None)
+    assert e.value.status == 504
+    assert node.active_requests_count() == 0
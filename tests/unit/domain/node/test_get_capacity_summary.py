@@ -0,0 +1,92 @@
+import time
+from unittest.mock import MagicMock
+from uuid import uuid1
+
+from distributedinference.domain.node import get_capacity_summary
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import ModelType
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+
+# node_id: median time to first token
+_TIME_TO_FIRST_TOKENS = {}
+
+
+def _node(model="model", ttft=None, model_type=ModelType.LLM):
+    node = ConnectedNode(
+        uid=uuid1(),
+        user_id=uuid1(),
+        model=model,
+        vram=16000,
+        connected_at=int(time.time()),
+        connected_host=BackendHost.DISTRIBUTED_INFERENCE_US,
+        websocket=MagicMock(),
+        request_incoming_queues={},
+        node_status=NodeStatus.RUNNING,
+        model_type=model_type,
+    )
+    _TIME_TO_FIRST_TOKENS[node.uid] = ttft
+    return node
+
+
+def _connected_node_repository(nodes):
+    repository = MagicMock(spec=ConnectedNodeRepository)
+    repository.get_locally_connected_nodes.return_value = nodes
+    repository.get_node_latency_percentile.side_effect = (
+        lambda node_id, *_: _TIME_TO_FIRST_TOKENS[node_id]
+    )
+    return repository
+
+
+async def test_local_summary():
+    repository = _connected_node_repository(
+        [
+            _node(ttft=1.0),
+            _node(ttft=3.0),
+            _node(model="other"),
+            _node(model="flux", model_type=ModelType.DIFFUSION),
+        ]
+    )
+
+    summary = await get_capacity_summary.execute(repository)
+
+    assert set(summary.keys()) == {"model", "other"}
+    assert summary["model"].nodes == 2
+    assert summary["model"].free_slots > 0
+    assert summary["model"].average_time_to_first_token == 2.0
+    assert summary["other"].average_time_to_first_token is None
+
+
+async def test_merges_sibling_workers():
+    repository = _connected_node_repository([_node(ttft=1.0)])
+    worker_ipc_repository = MagicMock(spec=WorkerIpcRepository)
+    worker_ipc_repository.is_enabled.return_value = True
+    worker_ipc_repository.get_sibling_socket_paths.return_value = ["worker-1.sock"]
+
+    async def _request(*_):
+        return {
+            "type": "capacity",
+            "models": {
+                "model": {
+                    "nodes": 1,
+                    "free_slots": 3,
+                    "average_time_to_first_token": 3.0,
+                }
+            },
+        }
+
+    worker_ipc_repository.request = _request
+
+    summary = await get_capacity_summary.execute(repository, worker_ipc_repository)
+
+    local_free_slots = get_capacity_summary.get_local(repository)["model"].free_slots
+    assert summary["model"].nodes == 2
+    assert summary["model"].free_slots == local_free_slots + 3
+    assert summary["model"].average_time_to_first_token == 2.0
@@ -1,4 +1,5 @@
 import time
+import uuid
 import pytest
 
 from uuid import UUID
@@ -129,6 +130,9 @@ async def test_check_node_health_unhealthy(
         ),
     )
     mock_send_health_check_inference.return_value = unhealthy_response
+    mock_connected_node_repository.get_connected_node = MagicMock(
+        return_value=mock_node
+    )
 
     await health_check_job._check_node_health(
         mock_node,
@@ -349,13 +353,62 @@ async def test_node_connection_inconsistent(
     mock_node_repository.get_connected_nodes_to_the_current_backend.return_value = [
         mock_node.uid
     ]
-    mock_node_repository.update_node_to_disconnected = AsyncMock()
+    mock_node_repository.get_nodes_status = AsyncMock(
+        return_value={mock_node.uid: NodeStatus.RUNNING}
+    )
+    mock_node_repository.update_nodes_to_disconnected = AsyncMock()
 
     await health_check_job._check_connected_nodes_consistency(
         connected_node_repository=mock_connected_node_repository,
         node_repository=mock_node_repository,
     )
 
-    mock_node_repository.update_node_to_disconnected.assert_called_once_with(
-        mock_node.uid, NodeStatus.STOPPED
+    mock_node_repository.get_nodes_status.assert_called_once_with([mock_node.uid])
+    mock_node_repository.update_nodes_to_disconnected.assert_called_once_with(
+        {mock_node.uid: NodeStatus.STOPPED}
+    )
+
+
+async def test_node_connection_consistent(
+    create_mock_node, mock_node_repository, mock_connected_node_repository
+):
+    mock_node = create_mock_node()
+    mock_connected_node_repository.get_locally_connected_node_keys.return_value = [
+        mock_node.uid
+    ]
+    mock_connected_node_repository._backend_host = mock_node.connected_host
+    mock_node_repository.get_connected_nodes_to_the_current_backend.return_value = [
+        mock_node.uid
+    ]
+    mock_node_repository.update_nodes_to_disconnected = AsyncMock()
+
+    await health_check_job._check_connected_nodes_consistency(
+        connected_node_repository=mock_connected_node_repository,
+        node_repository=mock_node_repository,
+    )
+
+    mock_node_repository.update_nodes_to_disconnected.assert_not_called()
+
+
+async def test_clean_up_running_nodes_without_connected_host(mock_node_repository):
+    node_ids = [uuid.uuid4() for _ in range(3)]
+    mock_node_repository.get_running_nodes_without_connected_host = AsyncMock(
+        return_value=[
+            (node_ids[0], NodeStatus.RUNNING),
+            (node_ids[1], NodeStatus.RUNNING_BENCHMARKING),
+            (node_ids[2], NodeStatus.RUNNING_DISABLED),
+        ]
+    )
+    mock_node_repository.update_nodes_to_disconnected = AsyncMock()
+
+    await health_check_job._clean_up_running_nodes_without_connected_host(
+        mock_node_repository
+    )
+
+    mock_node_repository.update_nodes_to_disconnected.assert_called_once_with(
+        {
+            node_ids[0]: NodeStatus.STOPPED,
+            node_ids[1]: NodeStatus.STOPPED_BENCHMARK_FAILED,
+            node_ids[2]: NodeStatus.STOPPED_DISABLED,
+        }
     )
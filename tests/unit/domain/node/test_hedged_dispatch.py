@@ -0,0 +1,227 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from uuid import uuid1
+
+from openai.types.chat import ChatCompletionChunk
+from packaging.version import Version
+
+from distributedinference.domain.node import hedged_dispatch
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import InferenceStatusCodes
+from distributedinference.domain.node.entities import NodeLatencyMetric
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+
+REQUEST_ID = "request-id"
+
+original_settings = hedged_dispatch.settings
+
+
+def setup_function():
+    hedged_dispatch.settings = MagicMock()
+    hedged_dispatch.settings.INFERENCE_HEDGING_PERCENTILE = 0.95
+    hedged_dispatch.settings.INFERENCE_HEDGING_DEFAULT_DELAY_SECONDS = 0.01
+    hedged_dispatch.settings.INFERENCE_HEDGING_MIN_DELAY_SECONDS = 0.01
+    hedged_dispatch.settings.INFERENCE_HEDGING_DRAIN_TIMEOUT_SECONDS = 1
+
+
+def teardown_function():
+    hedged_dispatch.settings = original_settings
+
+
+def _node():
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock()
+    return ConnectedNode(
+        uid=uuid1(),
+        user_id=uuid1(),
+        model="model",
+        vram=16000,
+        connected_at=int(time.time()),
+        connected_host=BackendHost.DISTRIBUTED_INFERENCE_US,
+        websocket=websocket,
+        request_incoming_queues={},
+        node_status=NodeStatus.RUNNING,
+        version=Version("0.0.16"),
+    )
+
+
+def _chunk_data():
+    chunk = ChatCompletionChunk(
+        id=REQUEST_ID,
+        choices=[],
+        created=1,
+        model="model",
+        object="chat.completion.chunk",
+    )
+    return {"request_id": REQUEST_ID, "chunk": chunk.model_dump()}
+
+
+def _done_data():
+    return {"request_id": REQUEST_ID, "status": InferenceStatusCodes.DONE.value}
+
+
+async def _setup():
+    repository = ConnectedNodeRepository(10, 20, "distributed-inference-us")
+    primary, hedge = _node(), _node()
+    repository.register_node(primary)
+    repository.register_node(hedge)
+    request = InferenceRequest(id=REQUEST_ID, model="model", chat_request={})
+    await repository.send_inference_request(primary.uid, request)
+    return repository, primary, hedge, request
+
+
+async def test_fast_primary_not_hedged():
+    repository, primary, hedge, request = await _setup()
+    await repository.add_inference_response_chunk(
+        primary.uid, REQUEST_ID, _chunk_data()
+    )
+    select_hedge_node = MagicMock(return_value=hedge)
+
+    result = await hedged_dispatch.wait_first_response(
+        primary, request, 1.0, repository, select_hedge_node
+    )
+
+    assert result.node is primary
+    assert result.response.chunk.id == REQUEST_ID
+    select_hedge_node.assert_not_called()
+    hedge.websocket.send_text.assert_not_called()
+
+
+async def test_slow_primary_loses_to_hedge():
+    repository, primary, hedge, request = await _setup()
+
+    async def _hedge_responds():
+        while REQUEST_ID not in hedge.request_incoming_queues:
+            await asyncio.sleep(0.001)
+        await repository.add_inference_response_chunk(
+            hedge.uid, REQUEST_ID, _chunk_data()
+        )
+
+    responder = asyncio.create_task(_hedge_responds())
+    result = await hedged_dispatch.wait_first_response(
+        primary, request, 1.0, repository, lambda: hedge
+    )
+    await responder
+
+    assert result.node is hedge
+    assert result.started_at > 1.0
+    assert result.response.chunk.id == REQUEST_ID
+    # The loser keeps its slot until it finished generating
+    assert primary.active_requests_count() == 1
+    await repository.add_inference_response_chunk(
+        primary.uid, REQUEST_ID, _chunk_data()
+    )
+    await repository.add_inference_response_chunk(primary.uid, REQUEST_ID, _done_data())
+    await asyncio.gather(*hedged_dispatch._drain_tasks)
+    assert primary.active_requests_count() == 0
+    assert hedge.active_requests_count() == 1
+
+
+async def test_loser_finished_with_winner_cleaned_up():
+    repository, primary, hedge, request = await _setup()
+
+    async def _both_respond():
+        while REQUEST_ID not in hedge.request_incoming_queues:
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.001)
+        await repository.add_inference_response_chunk(
+            hedge.uid, REQUEST_ID, _done_data()
+        )
+        await repository.add_inference_response_chunk(
+            primary.uid, REQUEST_ID, _chunk_data()
+        )
+
+    responder = asyncio.create_task(_both_respond())
+    result = await hedged_dispatch.wait_first_response(
+        primary, request, 1.0, repository, lambda: hedge
+    )
+    await responder
+
+    assert result.node is primary
+    # The last response of the loser was already received, nothing left to drain
+    assert not hedged_dispatch._drain_tasks
+    assert hedge.active_requests_count() == 0
+
+
+async def test_no_hedge_node_waits_for_primary():
+    repository, primary, _, request = await _setup()
+
+    async def _primary_responds():
+        await asyncio.sleep(0.05)
+        await repository.add_inference_response_chunk(
+            primary.uid, REQUEST_ID, _chunk_data()
+        )
+
+    responder = asyncio.create_task(_primary_responds())
+    result = await hedged_dispatch.wait_first_response(
+        primary, request, 1.0, repository, lambda: None
+    )
+    await responder
+
+    assert result.node is primary
+    assert result.started_at == 1.0
+
+
+def test_delay_from_percentile_of_model_nodes():
+    repository = ConnectedNodeRepository(10, 20, "distributed-inference-us")
+    first, second = _node(), _node()
+    repository.register_node(first)
+    repository.register_node(second)
+    assert hedged_dispatch.get_delay("model", repository) == 0.01
+    for i in range(1, 101):
+        node = first if i % 2 else second
+        repository.record_node_latency(
+            node.uid, NodeLatencyMetric.TIME_TO_FIRST_TOKEN, i / 100
+        )
+    assert abs(hedged_dispatch.get_delay("model", repository) - 0.95) < 0.02
+    assert hedged_dispatch.get_delay("other", repository) == 0.01
+
+
+async def test_cancelled_while_waiting_cancels_receive():
+    repository, primary, hedge, request = await _setup()
+    receive_cancelled = asyncio.Event()
+
+    async def _receive(*_):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            receive_cancelled.set()
+            raise
+
+    repository.receive_for_request = _receive
+    hedged_dispatch.settings.INFERENCE_HEDGING_MIN_DELAY_SECONDS = 10
+
+    waiting = asyncio.create_task(
+        hedged_dispatch.wait_first_response(
+            primary, request, 1.0, repository, lambda: hedge
+        )
+    )
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert receive_cancelled.is_set()
+
+
+async def test_hedge_send_failure_cleans_up_hedge():
+    repository, primary, hedge, request = await _setup()
+    hedge.websocket.send_text = AsyncMock(side_effect=Exception("disconnected"))
+
+    try:
+        await hedged_dispatch.wait_first_response(
+            primary, request, 1.0, repository, lambda: hedge
+        )
+        assert False
+    except Exception as e:
+        assert str(e) == "disconnected"
+
+    assert REQUEST_ID not in hedge.request_incoming_queues
+    assert hedge.active_requests_count() == 0
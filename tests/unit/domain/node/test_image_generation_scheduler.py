@@ -0,0 +1,176 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+
+from distributedinference.domain.node import image_generation_scheduler
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import ModelType
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.service import error_responses
+
+MODEL = "flux"
+USER_A = UUID("00000000-0000-0000-0000-00000000000a")
+USER_B = UUID("00000000-0000-0000-0000-00000000000b")
+
+
+def _node(node_status=NodeStatus.RUNNING) -> ConnectedNode:
+    return ConnectedNode(
+        uid=uuid4(),
+        user_id=uuid4(),
+        model=MODEL,
+        model_type=ModelType.DIFFUSION,
+        vram=24000,
+        connected_at=int(time.time()),
+        connected_host=BackendHost.from_value("distributed-inference-us"),
+        websocket=MagicMock(),
+        request_incoming_queues={},
+        node_status=node_status,
+    )
+
+
+@pytest.fixture
+def connected_node_repository():
+    return ConnectedNodeRepository(10, 10, "distributed-inference-us")
+
+
+def _scheduler(connected_node_repository, max_queued_jobs=100):
+    return ImageGenerationScheduler(
+        connected_node_repository, 10, max_queued_jobs, poll_seconds=0.01
+    )
+
+
+def test_get_cost():
+    assert image_generation_scheduler.get_cost(2, "512x512", 10) == 2 * 512 * 512 * 10
+    assert image_generation_scheduler.get_cost(1, None, 1) == 1024 * 1024
+
+
+async def test_least_loaded_node_with_capacity(connected_node_repository):
+    nodes = [_node(), _node()]
+    for node in nodes:
+        connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+
+    first = await scheduler.acquire(MODEL, USER_A, 6, 1)
+    second = await scheduler.acquire(MODEL, USER_A, 6, 1)
+
+    assert {first.uid, second.uid} == {node.uid for node in nodes}
+
+
+async def test_unhealthy_node_not_used(connected_node_repository):
+    connected_node_repository.register_node(_node(NodeStatus.STOPPED))
+    scheduler = _scheduler(connected_node_repository)
+
+    with pytest.raises(error_responses.NoAvailableInferenceNodesError):
+        await scheduler.acquire(MODEL, USER_A, 1, 0.05)
+
+
+async def test_job_waits_for_release(connected_node_repository):
+    node = _node()
+    connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+    await scheduler.acquire(MODEL, USER_A, 6, 1)
+
+    waiting = asyncio.create_task(scheduler.acquire(MODEL, USER_A, 6, 1))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    scheduler.release(node.uid, 6)
+    assert (await waiting).uid == node.uid
+    assert scheduler.get_running_cost(node.uid) == 6
+
+
+async def test_job_bigger_than_capacity_runs_on_idle_node(connected_node_repository):
+    node = _node()
+    connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+
+    assert (await scheduler.acquire(MODEL, USER_A, 100, 1)).uid == node.uid
+
+
+async def test_waiting_job_uses_new_node(connected_node_repository):
+    scheduler = _scheduler(connected_node_repository)
+    waiting = asyncio.create_task(scheduler.acquire(MODEL, USER_A, 1, 1))
+    await asyncio.sleep(0.02)
+
+    node = _node()
+    connected_node_repository.register_node(node)
+
+    assert (await waiting).uid == node.uid
+
+
+async def test_users_share_fairly(connected_node_repository):
+    node = _node()
+    connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+    await scheduler.acquire(MODEL, USER_A, 10, 1)
+    dispatched = []
+
+    async def _acquire(user_id, name):
+        await scheduler.acquire(MODEL, user_id, 10, 1)
+        dispatched.append(name)
+
+    tasks = [asyncio.create_task(_acquire(USER_A, f"a{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(_acquire(USER_B, "b0")))
+    await asyncio.sleep(0)
+
+    for _ in range(4):
+        scheduler.release(node.uid, 10)
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    # A already runs a job, B's first job goes ahead of A's queued ones
+    assert dispatched == ["b0", "a0", "a1", "a2"]
+
+
+async def test_timeout(connected_node_repository):
+    node = _node()
+    connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+    await scheduler.acquire(MODEL, USER_A, 10, 1)
+
+    with pytest.raises(error_responses.NoAvailableInferenceNodesError):
+        await scheduler.acquire(MODEL, USER_A, 10, 0.05)
+
+    # The timed out job is skipped
+    scheduler.release(node.uid, 10)
+    assert scheduler.get_running_cost(node.uid) == 0
+
+
+async def test_queue_full_rejected(connected_node_repository):
+    scheduler = _scheduler(connected_node_repository, max_queued_jobs=1)
+    waiting = asyncio.create_task(scheduler.acquire(MODEL, USER_A, 1, 1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(error_responses.NoAvailableInferenceNodesError):
+        await scheduler.acquire(MODEL, USER_B, 1, 1)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+
+async def test_cancelled_job_does_not_hold_capacity(connected_node_repository):
+    node = _node()
+    connected_node_repository.register_node(node)
+    scheduler = _scheduler(connected_node_repository)
+    await scheduler.acquire(MODEL, USER_A, 10, 1)
+    waiting = asyncio.create_task(scheduler.acquire(MODEL, USER_B, 10, 1))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    scheduler.release(node.uid, 10)
+
+    assert scheduler.get_running_cost(node.uid) == 0
@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import UUID
+
+import pytest
+
+from distributedinference.domain.node.entities import NodeBenchmark
+from distributedinference.domain.node.entities import NodeMetrics
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.exceptions import NodeConnectRejectedError
+from distributedinference.domain.node.node_connect_pipeline import (
+    NodeConnectPipeline,
+)
+from distributedinference.repository.benchmark_repository import BenchmarkRepository
+from distributedinference.repository.node_repository import NodeRepository
+
+USER_ID = UUID("06706644-2409-7efd-8000-3371c5d632d3")
+NODE_IDS = [
+    UUID("40c95432-8b2c-4208-bdf4-84f49ff957a3"),
+    UUID("40c95432-8b2c-4208-bdf4-84f49ff957a4"),
+]
+
+
+@pytest.fixture
+def node_repository():
+    repository = AsyncMock(spec=NodeRepository)
+    repository.get_node_metrics_by_ids = AsyncMock(
+        side_effect=lambda ids: {
+            node_id: NodeMetrics(status=NodeStatus.STOPPED) for node_id in ids
+        }
+    )
+    return repository
+
+
+@pytest.fixture
+def benchmark_repository():
+    repository = AsyncMock(spec=BenchmarkRepository)
+    repository.get_node_benchmarks = AsyncMock(
+        side_effect=lambda keys: {
+            key: NodeBenchmark(
+                node_id=key[1],
+                model_name=key[2],
+                benchmark_tokens_per_second=100,
+                gpu_model="NVIDIA GeForce RTX 4090",
+            )
+            for key in keys
+        }
+    )
+    return repository
+
+
+def _get_pipeline(node_repository, benchmark_repository, **kwargs):
+    config = {
+        "max_concurrent_connects": 200,
+        "connects_per_second": 500,
+        "admission_timeout_seconds": 10,
+        "batch_size": 100,
+        "batch_delay_seconds": 0.001,
+        "benchmark_cache_ttl_seconds": 600,
+    }
+    config.update(kwargs)
+    return NodeConnectPipeline(node_repository, benchmark_repository, **config)
+
+
+async def test_concurrent_node_metrics_read_in_one_query(
+    node_repository, benchmark_repository
+):
+    pipeline = _get_pipeline(node_repository, benchmark_repository)
+
+    results = await asyncio.gather(
+        *[pipeline.get_node_metrics(node_id) for node_id in NODE_IDS]
+    )
+
+    assert [result.status for result in results] == [NodeStatus.STOPPED] * 2
+    node_repository.get_node_metrics_by_ids.assert_called_once_with(NODE_IDS)
+
+
+async def test_node_benchmark_cached(node_repository, benchmark_repository):
+    pipeline = _get_pipeline(node_repository, benchmark_repository)
+
+    first = await pipeline.get_node_benchmark(USER_ID, NODE_IDS[0], "model")
+    second = await pipeline.get_node_benchmark(USER_ID, NODE_IDS[0], "model")
+
+    assert first == second
+    benchmark_repository.get_node_benchmarks.assert_called_once()
+
+
+async def test_missing_node_benchmark_not_cached(node_repository):
+    benchmark_repository = AsyncMock(spec=BenchmarkRepository)
+    benchmark_repository.get_node_benchmarks = AsyncMock(return_value={})
+    pipeline = _get_pipeline(node_repository, benchmark_repository)
+
+    assert await pipeline.get_node_benchmark(USER_ID, NODE_IDS[0], "model") is None
+    assert await pipeline.get_node_benchmark(USER_ID, NODE_IDS[0], "model") is None
+    assert benchmark_repository.get_node_benchmarks.call_count == 2
+
+
+async def test_admit_rejects_when_rate_exceeded(node_repository, benchmark_repository):
+    pipeline = _get_pipeline(
+        node_repository,
+        benchmark_repository,
+        connects_per_second=1,
+        admission_timeout_seconds=0.5,
+    )
+
+    async with pipeline.admit():
+        pass
+    with pytest.raises(NodeConnectRejectedError):
+        async with pipeline.admit():
+            pass
+
+
+async def test_admit_rejects_when_concurrency_exceeded(
+    node_repository, benchmark_repository
+):
+    pipeline = _get_pipeline(
+        node_repository,
+        benchmark_repository,
+        max_concurrent_connects=1,
+        admission_timeout_seconds=0.01,
+    )
+
+    async with pipeline.admit():
+        with pytest.raises(NodeConnectRejectedError):
+            async with pipeline.admit():
+                pass
@@ -0,0 +1,175 @@
+from unittest.mock import patch
+
+import cbor2
+import pytest
+
+from distributedinference.domain.node import node_frame_codec
+from distributedinference.domain.node.entities import NodeFrameEncoding
+from distributedinference.domain.node.exceptions import InvalidImageChunkError
+from distributedinference.domain.node.node_frame_codec import FrameDecoder
+
+ENVELOPE = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion.chunk",
+    "created": 1700000000,
+    "model": "model",
+}
+
+
+def _frame(chunk, status=1, request_id="request-id") -> bytes:
+    return cbor2.dumps({"request_id": request_id, "chunk": chunk, "status": status})
+
+
+def test_get_encoding():
+    assert (
+        node_frame_codec.get_encoding([node_frame_codec.BINARY_SUBPROTOCOL])
+        is NodeFrameEncoding.CBOR
+    )
+    assert node_frame_codec.get_encoding([]) is NodeFrameEncoding.JSON
+    with patch.object(node_frame_codec.settings, "NODE_BINARY_FRAMES_ENABLED", False):
+        assert (
+            node_frame_codec.get_encoding([node_frame_codec.BINARY_SUBPROTOCOL])
+            is NodeFrameEncoding.JSON
+        )
+
+
+def test_decode_restores_omitted_envelope_fields():
+    decoder = FrameDecoder()
+
+    first = decoder.decode(_frame({**ENVELOPE, "choices": [{"delta": "a"}]}))
+    second = decoder.decode(_frame({"choices": [{"delta": "b"}]}))
+
+    assert first["chunk"] == {**ENVELOPE, "choices": [{"delta": "a"}]}
+    assert second["chunk"] == {**ENVELOPE, "choices": [{"delta": "b"}]}
+
+
+def test_decode_keeps_requests_apart():
+    decoder = FrameDecoder()
+    decoder.decode(_frame({**ENVELOPE, "id": "a"}, request_id="a"))
+    decoder.decode(_frame({**ENVELOPE, "id": "b"}, request_id="b"))
+
+    assert decoder.decode(_frame({}, request_id="a"))["chunk"]["id"] == "a"
+    assert decoder.decode(_frame({}, request_id="b"))["chunk"]["id"] == "b"
+
+
+def test_decode_forgets_finished_request():
+    decoder = FrameDecoder()
+    decoder.decode(_frame(ENVELOPE))
+    decoder.decode(_frame({"usage": {}}, status=2))
+
+    assert decoder.decode(_frame({})) == {
+        "request_id": "request-id",
+        "chunk": {},
+        "status": 1,
+    }
+
+
+def test_decode_protocol_message_unchanged():
+    message = {"protocol": "ping-pong", "data": {"nonce": "nonce"}}
+
+    assert FrameDecoder().decode(cbor2.dumps(message)) == message
+
+
+def test_decode_invalid_frame():
+    with pytest.raises(cbor2.CBORDecodeError):
+        FrameDecoder().decode(cbor2.dumps([1, 2, 3]))
+    with pytest.raises(cbor2.CBORDecodeError):
+        FrameDecoder().decode(b"\xff\x00")
+
+
+def test_decode_multiplexed_responses():
+    decoder = FrameDecoder()
+    decoder.decode(
+        cbor2.dumps(
+            {
+                "responses": [
+                    {"request_id": "a", "chunk": {**ENVELOPE, "id": "a"}},
+                    {"request_id": "b", "chunk": {**ENVELOPE, "id": "b"}},
+                ]
+            }
+        )
+    )
+
+    message = decoder.decode(
+        cbor2.dumps(
+            {
+                "responses": [
+                    {"request_id": "b", "chunk": {}},
+                    {"request_id": "a", "chunk": {}},
+                ]
+            }
+        )
+    )
+
+    assert [response["chunk"]["id"] for response in message["responses"]] == [
+        "b",
+        "a",
+    ]
+
+
+def _chunks(request_id, index, image, size):
+    return [
+        node_frame_codec.encode_image_chunk(
+            request_id, index, i, image[i : i + size], i + size >= len(image)
+        )
+        for i in range(0, len(image), size)
+    ]
+
+
+def test_image_chunk_not_cbor_map():
+    chunk = node_frame_codec.encode_image_chunk("request-id", 0, 0, b"png", True)
+
+    assert node_frame_codec.is_image_chunk(chunk)
+    assert not node_frame_codec.is_image_chunk(_frame({}))
+
+
+def test_image_chunks_assembled():
+    assembler = node_frame_codec.ImageChunkAssembler(1000)
+    chunks = _chunks("request-id", 1, b"0123456789", 4)
+
+    assert assembler.add(chunks[0]) is None
+    assert assembler.add(chunks[1]) is None
+    assert assembler.add(chunks[2]) == {
+        "request_id": "request-id",
+        "image_index": 1,
+        "image": b"0123456789",
+    }
+
+
+def test_image_chunks_of_requests_interleaved():
+    assembler = node_frame_codec.ImageChunkAssembler(1000)
+    a = _chunks("a", 0, b"aaaa", 2)
+    b = _chunks("b", 0, b"bbbb", 2)
+
+    assert assembler.add(a[0]) is None
+    assert assembler.add(b[0]) is None
+    assert assembler.add(b[1])["image"] == b"bbbb"
+    assert assembler.add(a[1])["image"] == b"aaaa"
+
+
+def test_image_chunks_over_limit():
+    assembler = node_frame_codec.ImageChunkAssembler(6)
+    chunks = _chunks("request-id", 0, b"01234567", 4) + _chunks(
+        "request-id", 1, b"0", 1
+    )
+
+    assert assembler.add(chunks[0]) is None
+    assert assembler.add(chunks[1]) == {
+        "request_id": "request-id",
+        "images": [],
+        "error": "Images exceed the size limit",
+    }
+    # The rest of the request is dropped
+    assert assembler.add(chunks[2]) is None
+
+
+def test_image_chunk_out_of_order():
+    assembler = node_frame_codec.ImageChunkAssembler(1000)
+    chunks = _chunks("request-id", 0, b"01234567", 4)
+
+    assert assembler.add(chunks[1])["error"] == "Image 0 chunk out of order"
+
+
+def test_image_chunk_truncated():
+    with pytest.raises(InvalidImageChunkError):
+        node_frame_codec.ImageChunkAssembler(1000).add(b"GI")
@@ -118,6 +118,17 @@ async def test_diffusion_node_transition():
     assert result == NodeStatus.RUNNING
 
 
+async def test_embedding_node_transition():
+    node_repository = _get_node_repository(None)
+    result = await node_status_transition.execute(
+        node_repository,
+        NODE_ID,
+        NodeStatusEvent.START,
+        node_model_type=ModelType.EMBEDDING,
+    )
+    assert result == NodeStatus.RUNNING
+
+
 async def test_is_active():
     status = NodeStatus.RUNNING
     assert status.is_active()
@@ -0,0 +1,71 @@
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+from uuid_extensions import uuid7
+
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.jobs import node_status_update_job as job
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+
+
+def _connected_node_repository(nodes):
+    repository = MagicMock(spec=ConnectedNodeRepository)
+    repository.get_connected_node = MagicMock(side_effect=nodes.get)
+    return repository
+
+
+async def test_saves_latest_status_once():
+    node_id = uuid7()
+    node = MagicMock(node_status=NodeStatus.RUNNING)
+    queue = NodeStatusQueueRepository()
+    queue.push(node_id)
+    queue.push(node_id)
+    node.node_status = NodeStatus.RUNNING_DEGRADED
+    node_repository = AsyncMock(spec=NodeRepository)
+
+    await job._save_node_statuses(
+        queue, node_repository, _connected_node_repository({node_id: node})
+    )
+
+    node_repository.update_nodes_status.assert_awaited_once_with(
+        {node_id: NodeStatus.RUNNING_DEGRADED}
+    )
+    assert not queue.pop_all()
+
+
+async def test_skips_disconnected_nodes():
+    queue = NodeStatusQueueRepository()
+    queue.push(uuid7())
+    node_repository = AsyncMock(spec=NodeRepository)
+
+    await job._save_node_statuses(
+        queue, node_repository, _connected_node_repository({})
+    )
+
+    node_repository.update_nodes_status.assert_not_called()
+
+
+async def test_failed_save_is_retried():
+    node_id = uuid7()
+    queue = NodeStatusQueueRepository()
+    queue.push(node_id)
+    node_repository = AsyncMock(spec=NodeRepository)
+    node_repository.update_nodes_status.side_effect = Exception("db down")
+
+    with pytest.raises(Exception):
+        await job._save_node_statuses(
+            queue,
+            node_repository,
+            _connected_node_repository(
+                {node_id: MagicMock(node_status=NodeStatus.RUNNING)}
+            ),
+        )
+
+    assert queue.pop_all() == {node_id}
@@ -0,0 +1,214 @@
+import asyncio
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+from distributedinference.domain.node import peer_nodes_forwarding
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import ModelCapacity
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+
+FAST_PEER = "10.0.0.1"
+SLOW_PEER = "10.0.0.2"
+FULL_PEER = "10.0.0.3"
+UNKNOWN_PEER = "10.0.0.4"
+
+original_open_stream = peer_nodes_forwarding._open_stream
+original_settings = peer_nodes_forwarding.settings
+
+
+def setup_function():
+    peer_nodes_forwarding.settings = MagicMock()
+    peer_nodes_forwarding.settings.PEER_FORWARDING_FALLBACK_DELAY_SECONDS = 0.01
+
+
+def teardown_function():
+    peer_nodes_forwarding._open_stream = original_open_stream
+    peer_nodes_forwarding.settings = original_settings
+
+
+def _repository():
+    repository = PeerCapacityRepository(
+        [UNKNOWN_PEER, FULL_PEER, SLOW_PEER, FAST_PEER],
+        max_age_seconds=10,
+        failure_threshold=1,
+        reset_seconds=30,
+    )
+    repository.set_capacity(
+        FAST_PEER,
+        {
+            "model": ModelCapacity(
+                nodes=1, free_slots=1, average_time_to_first_token=0.1
+            )
+        },
+    )
+    repository.set_capacity(
+        SLOW_PEER,
+        {"model": ModelCapacity(nodes=1, free_slots=1, average_time_to_first_token=2)},
+    )
+    repository.set_capacity(FULL_PEER, {"model": ModelCapacity(nodes=1, free_slots=0)})
+    return repository
+
+
+def _request():
+    return InferenceRequest(
+        id="request-id",
+        model="model",
+        chat_request={"model": "model", "messages": []},
+    )
+
+
+def _completion(chunks):
+    completion = MagicMock()
+    completion.close = AsyncMock()
+
+    async def _iterate():
+        for chunk in chunks:
+            yield chunk
+
+    completion.__aiter__ = lambda _: _iterate()
+    return completion
+
+
+def test_candidates_ordered_by_capacity_and_ttft():
+    repository = _repository()
+    assert peer_nodes_forwarding.get_candidate_peers("model", repository) == [
+        FAST_PEER,
+        SLOW_PEER,
+        UNKNOWN_PEER,
+    ]
+
+
+def test_candidates_skip_open_circuit_breaker():
+    repository = _repository()
+    repository.record_failure(FAST_PEER)
+    assert peer_nodes_forwarding.get_candidate_peers("model", repository) == [
+        SLOW_PEER,
+        UNKNOWN_PEER,
+    ]
+
+
+async def test_no_repository():
+    responses = [
+        r async for r in peer_nodes_forwarding.execute("key", _request(), None)
+    ]
+    assert responses == [None]
+
+
+async def test_failed_peer_falls_back_to_next():
+    repository = _repository()
+    completion = _completion(["chunk-2"])
+
+    async def _open_stream(_api_key, _chat_request, peer_ip):
+        if peer_ip == FAST_PEER:
+            return peer_ip, None
+        return peer_ip, (peer_ip, completion, "chunk-1")
+
+    peer_nodes_forwarding._open_stream = _open_stream
+
+    responses = [
+        r async for r in peer_nodes_forwarding.execute("key", _request(), repository)
+    ]
+
+    assert [r.chunk for r in responses] == ["chunk-1", "chunk-2"]
+    assert not repository.is_available(FAST_PEER)
+    completion.close.assert_awaited()
+
+
+async def test_slow_peer_hedged_with_fallback():
+    repository = _repository()
+    slow_completion = _completion([])
+    fallback_completion = _completion(["chunk-2"])
+    is_slow_cancelled = False
+
+    async def _open_stream(_api_key, _chat_request, peer_ip):
+        nonlocal is_slow_cancelled
+        if peer_ip == FAST_PEER:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                is_slow_cancelled = True
+                raise
+            return peer_ip, (peer_ip, slow_completion, "never")
+        return peer_ip, (peer_ip, fallback_completion, "chunk-1")
+
+    peer_nodes_forwarding._open_stream = _open_stream
+
+    responses = [
+        r async for r in peer_nodes_forwarding.execute("key", _request(), repository)
+    ]
+
+    assert [r.chunk for r in responses] == ["chunk-1", "chunk-2"]
+    assert is_slow_cancelled
+
+
+async def test_all_peers_fail():
+    repository = _repository()
+
+    async def _open_stream(_api_key, _chat_request, peer_ip):
+        return peer_ip, None
+
+    peer_nodes_forwarding._open_stream = _open_stream
+
+    responses = [
+        r async for r in peer_nodes_forwarding.execute("key", _request(), repository)
+    ]
+    assert responses == [None]
+
+
+def _half_open_repository():
+    repository = PeerCapacityRepository(
+        [FAST_PEER, SLOW_PEER],
+        max_age_seconds=10,
+        failure_threshold=1,
+        reset_seconds=0,
+    )
+    repository.record_failure(FAST_PEER)
+    repository.record_failure(SLOW_PEER)
+    return repository
+
+
+async def test_trial_lost_race_ends_attempt():
+    repository = _half_open_repository()
+    fast_completion = _completion(["chunk-2"])
+    slow_completion = _completion(["chunk-2"])
+    responded = asyncio.Event()
+
+    async def _open_stream(_api_key, _chat_request, peer_ip):
+        if peer_ip == FAST_PEER:
+            await responded.wait()
+            return peer_ip, (peer_ip, fast_completion, "chunk-1")
+        responded.set()
+        return peer_ip, (peer_ip, slow_completion, "chunk-1")
+
+    peer_nodes_forwarding._open_stream = _open_stream
+
+    responses = [
+        r async for r in peer_nodes_forwarding.execute("key", _request(), repository)
+    ]
+
+    assert [r.chunk for r in responses] == ["chunk-1", "chunk-2"]
+    fast_completion.close.assert_awaited()
+    slow_completion.close.assert_awaited()
+    assert repository.is_available(FAST_PEER)
+    assert repository.is_available(SLOW_PEER)
+
+
+async def test_cancelled_trial_ends_attempt():
+    repository = _half_open_repository()
+
+    async def _open_stream(_api_key, _chat_request, peer_ip):
+        if peer_ip == FAST_PEER:
+            await asyncio.sleep(10)
+        return peer_ip, (peer_ip, _completion(["chunk-2"]), "chunk-1")
+
+    peer_nodes_forwarding._open_stream = _open_stream
+
+    stream = peer_nodes_forwarding.execute("key", _request(), repository)
+    assert (await anext(stream)).chunk == "chunk-1"
+    # The consumer stops before the end of the stream
+    await stream.aclose()
+
+    assert repository.is_available(FAST_PEER)
+    assert repository.is_available(SLOW_PEER)
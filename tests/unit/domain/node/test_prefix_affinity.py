@@ -0,0 +1,102 @@
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid1
+
+import settings
+from distributedinference.domain.node import prefix_affinity
+from distributedinference.domain.node import select_node_use_case
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.repository.connected_node_repository import (
+    ConnectedNodeRepository,
+)
+
+SYSTEM_PROMPT = "You are an agent. " * 200
+
+
+def _create_node(active_requests: int = 0) -> ConnectedNode:
+    node = ConnectedNode(
+        uuid1(),
+        uuid1(),
+        "model",
+        90000,
+        int(time.time()),
+        BackendHost.DISTRIBUTED_INFERENCE_EU,
+        MagicMock(),
+        {},
+        NodeStatus.RUNNING,
+    )
+    for i in range(active_requests):
+        node.request_incoming_queues[str(i)] = MagicMock()
+    return node
+
+
+def _get_repository(nodes) -> ConnectedNodeRepository:
+    repository = ConnectedNodeRepository(10, 20, "distributed-inference-eu")
+    for node in nodes:
+        repository.register_node(node)
+    return repository
+
+
+def _chat_request(user_message: str):
+    return {
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message},
+        ]
+    }
+
+
+def test_short_prompt_has_no_prefix_key():
+    assert prefix_affinity.get_prefix_key(_chat_request("hi")) is not None
+    assert (
+        prefix_affinity.get_prefix_key(
+            {"messages": [{"role": "user", "content": "hi"}]}
+        )
+        is None
+    )
+
+
+def test_prefix_key_ignores_messages_after_prefix():
+    assert prefix_affinity.get_prefix_key(
+        _chat_request("first")
+    ) == prefix_affinity.get_prefix_key(_chat_request("second"))
+
+
+def test_same_prefix_routed_to_same_node():
+    repository = _get_repository([_create_node() for _ in range(5)])
+    prefix_key = prefix_affinity.get_prefix_key(_chat_request("hi"))
+
+    selected = {
+        select_node_use_case.execute("model", repository, prefix_key=prefix_key).uid
+        for _ in range(10)
+    }
+
+    assert len(selected) == 1
+
+
+def test_spills_to_next_node_under_load():
+    nodes = [_create_node() for _ in range(3)]
+    repository = _get_repository(nodes)
+    prefix_key = prefix_affinity.get_prefix_key(_chat_request("hi"))
+    home, second, _ = list(repository.get_nodes_by_prefix("model", prefix_key))
+    for i in range(4):
+        home.request_incoming_queues[str(i)] = MagicMock()
+
+    with patch.object(settings, "MAX_PARALLEL_REQUESTS_PER_DATACENTER_NODE", 20):
+        selected = select_node_use_case.execute(
+            "model", repository, prefix_key=prefix_key
+        )
+
+    assert selected is second
+
+
+def test_falls_back_to_least_loaded_node():
+    nodes = [_create_node(active_requests=3), _create_node(active_requests=1)]
+
+    with patch.object(settings, "PREFIX_AFFINITY_LOAD_FACTOR", 0.1):
+        selected = prefix_affinity.select_node("model", nodes, nodes)
+
+    assert selected is nodes[1]
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+from uuid import uuid1
+
+import settings
+from distributedinference.domain.node import response_cache
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.user.entities import User
+
+USER_UUID = uuid1()
+
+
+def _request(**params) -> InferenceRequest:
+    return InferenceRequest(
+        id=str(uuid1()),
+        model="model",
+        chat_request={"messages": [{"role": "user", "content": "hi"}], **params},
+    )
+
+
+def _user(profile_data=None) -> User:
+    return User(
+        uid=USER_UUID,
+        name="name",
+        email="email",
+        usage_tier_id=uuid1(),
+        profile_data=profile_data,
+    )
+
+
+def test_only_deterministic_requests_have_key():
+    assert response_cache.get_key(USER_UUID, _request(temperature=1)) is None
+    assert response_cache.get_key(USER_UUID, _request(temperature=0)) is not None
+    assert response_cache.get_key(USER_UUID, _request(seed=1)) is not None
+
+
+def test_key_ignores_end_user_and_request_id():
+    assert response_cache.get_key(
+        USER_UUID, _request(temperature=0, user="a")
+    ) == response_cache.get_key(USER_UUID, _request(temperature=0, user="b"))
+
+
+def test_key_differs_between_users_and_params():
+    key = response_cache.get_key(USER_UUID, _request(temperature=0))
+
+    assert response_cache.get_key(uuid1(), _request(temperature=0)) != key
+    assert response_cache.get_key(USER_UUID, _request(temperature=0, seed=1)) != key
+
+
+def test_user_opt_out():
+    with patch.object(settings, "RESPONSE_CACHE_ENABLED", True):
+        assert response_cache.is_enabled_for(_user())
+        assert not response_cache.is_enabled_for(
+            _user({response_cache.OPT_OUT_PROFILE_KEY: True})
+        )
+    assert not response_cache.is_enabled_for(_user())
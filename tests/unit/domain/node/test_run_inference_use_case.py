@@ -12,6 +12,7 @@ from openai.types.chat.chat_completion_chunk import Choice
 from openai.types.chat.chat_completion_chunk import ChoiceDelta
 from packaging.version import Version
 
+import settings
 from distributedinference.domain.node import run_inference_use_case as use_case
 from distributedinference.domain.node.entities import BackendHost, ConnectedNode
 from distributedinference.domain.node.entities import InferenceError
@@ -20,11 +21,18 @@ from distributedinference.domain.node.entities import InferenceRequest
 from distributedinference.domain.node.entities import InferenceResponse
 from distributedinference.domain.node.entities import InferenceStatusCodes
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.entities import RequestTokens
 from distributedinference.domain.node.exceptions import NoAvailableNodesError
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
 from distributedinference.repository.node_repository import NodeRepository
+from distributedinference.repository.node_status_queue_repository import (
+    NodeStatusQueueRepository,
+)
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
 from distributedinference.repository.tokens_repository import TokensRepository
 from distributedinference.service.completions.entities import ChatCompletionRequest
 from distributedinference.service.completions.entities import Message
@@ -223,13 +231,44 @@ async def test_success(connected_node_factory):
     assert responses[1].request_id == "request_id"
     assert responses[1].chunk.choices[0].finish_reason == "stop"
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
     )
 
 
+async def test_request_tokens_estimated_once(monkeypatch, connected_node_factory):
+    monkeypatch.setattr(settings, "TOKEN_ADMISSION_ENABLED", True)
+    request_tokens = RequestTokens(prompt_tokens=10, completion_tokens=20)
+    estimate_request_tokens = MagicMock(return_value=request_tokens)
+    monkeypatch.setattr(
+        use_case.token_admission, "estimate_request_tokens", estimate_request_tokens
+    )
+    use_case.select_node_use_case.execute.return_value = connected_node_factory(
+        TEST_NODE_ID
+    )
+    request = InferenceRequest(
+        id="request_id", model="model-1", chat_request={"messages": []}
+    )
+    executor = use_case.InferenceExecutor(
+        MagicMock(NodeRepository),
+        MagicMock(ConnectedNodeRepository),
+        MagicMock(TokensRepository),
+        AsyncMock(),
+        AsyncMock(),
+        MagicMock(),
+    )
+
+    executor._select_node(USER_UUID, request)
+    executor._select_node(USER_UUID, request, exclude_node_ids={TEST_NODE_ID})
+
+    estimate_request_tokens.assert_called_once_with(request.chat_request)
+    assert executor.request_tokens is request_tokens
+    for call in use_case.select_node_use_case.execute.call_args_list:
+        assert call.kwargs["request_tokens"] is request_tokens
+
+
 async def test_no_nodes_forward_to_peers():
     mock_node_repository = MagicMock(NodeRepository)
     mock_connected_node_repository = MagicMock(ConnectedNodeRepository)
@@ -520,7 +559,7 @@ async def test_streaming_no_usage(connected_node_factory):
     assert responses[2].chunk.usage is None
 
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
@@ -607,7 +646,7 @@ async def test_streaming_usage_includes_extra_chunk(connected_node_factory):
     assert responses[1].request_id == "request_id"
     assert responses[1].chunk.choices[0].finish_reason == "stop"
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
@@ -692,7 +731,7 @@ async def test_old_node_still_works(connected_node_factory):
     assert responses[2].chunk.usage is not None
 
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
@@ -759,7 +798,7 @@ async def test_inference_error_stops_loop(connected_node_factory):
     assert responses[0].error.status_code == InferenceErrorStatusCodes.NOT_FOUND
     assert responses[0].error.message == "No model found"
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
@@ -770,9 +809,9 @@ async def test_inference_error_marks_node_as_unhealthy(connected_node_factory):
     mock_node_repository = MagicMock(NodeRepository)
     mock_connected_node_repository = MagicMock(ConnectedNodeRepository)
     mock_tokens_repository = MagicMock(TokensRepository)
-    use_case.select_node_use_case.execute.return_value = connected_node_factory(
-        TEST_NODE_ID
-    )
+    node = connected_node_factory(TEST_NODE_ID)
+    use_case.select_node_use_case.execute.return_value = node
+    mock_connected_node_repository.get_connected_node.return_value = node
 
     mock_connected_node_repository.send_inference_request = AsyncMock()
     mock_connected_node_repository.receive_for_request = AsyncMock(
@@ -828,7 +867,7 @@ async def test_inference_error_marks_node_as_unhealthy(connected_node_factory):
     assert responses[0].error.status_code == InferenceErrorStatusCodes.NOT_FOUND
     assert responses[0].error.message == "No model found"
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
@@ -838,6 +877,70 @@ async def test_inference_error_marks_node_as_unhealthy(connected_node_factory):
     )
 
 
+async def test_inference_error_queues_node_status_update(connected_node_factory):
+    mock_node_repository = MagicMock(NodeRepository)
+    mock_connected_node_repository = MagicMock(ConnectedNodeRepository)
+    mock_tokens_repository = MagicMock(TokensRepository)
+    node = connected_node_factory(TEST_NODE_ID)
+    use_case.select_node_use_case.execute.return_value = node
+    mock_connected_node_repository.get_connected_node.return_value = node
+
+    mock_connected_node_repository.send_inference_request = AsyncMock()
+    mock_connected_node_repository.receive_for_request = AsyncMock(
+        side_effect=[
+            InferenceResponse(
+                node_id=TEST_NODE_ID,
+                request_id="request_id",
+                chunk=None,
+                error=InferenceError(
+                    status_code=InferenceErrorStatusCodes.NOT_FOUND,
+                    message="No model found",
+                ),
+            ),
+        ]
+    )
+    mock_connected_node_repository.cleanup_request = AsyncMock()
+    mock_node_repository.update_node_status = AsyncMock()
+    node_status_queue_repository = NodeStatusQueueRepository()
+
+    chat_input = await ChatCompletionRequest(
+        model="llama3",
+        messages=[Message(role="user", content="asd")],
+        stream=True,
+        stream_options=StreamOptions(include_usage=True),
+    ).to_openai_chat_completion()
+    request = InferenceRequest(
+        id="request_id",
+        model="model-1",
+        chat_request=chat_input,
+    )
+
+    responses = []
+    executor = use_case.InferenceExecutor(
+        mock_node_repository,
+        mock_connected_node_repository,
+        mock_tokens_repository,
+        AsyncMock(),
+        AsyncMock(),
+        MagicMock(),
+        node_status_queue_repository=node_status_queue_repository,
+    )
+    async for response in executor.execute(
+        USER_UUID,
+        API_KEY,
+        None,
+        request,
+    ):
+        responses.append(response)
+
+    mock_node_repository.get_node_status.assert_not_called()
+    mock_node_repository.update_node_status.assert_not_called()
+    mock_connected_node_repository.update_node_status.assert_called_once_with(
+        TEST_NODE_ID, NodeStatus.RUNNING_DEGRADED
+    )
+    assert node_status_queue_repository.pop_all() == {TEST_NODE_ID}
+
+
 async def test_inference_client_error_not_marks_node_as_unhealthy(
     connected_node_factory,
 ):
@@ -902,10 +1005,90 @@ async def test_inference_client_error_not_marks_node_as_unhealthy(
     assert responses[0].error.status_code == InferenceErrorStatusCodes.BAD_REQUEST
     assert responses[0].error.message == "Client error"
     mock_connected_node_repository.send_inference_request.assert_awaited_once_with(
-        TEST_NODE_ID, request
+        TEST_NODE_ID, request, request_tokens=None
     )
     mock_connected_node_repository.cleanup_request.assert_called_once_with(
         TEST_NODE_ID, "request_id"
     )
     # Node status MUST not be updated if it's a client side error
     mock_node_repository.update_node_status.assert_not_called()
+
+
+async def test_deterministic_response_replayed_from_cache(connected_node_factory):
+    mock_connected_node_repository = MagicMock(ConnectedNodeRepository)
+    mock_connected_node_repository.send_inference_request = AsyncMock()
+    mock_connected_node_repository.receive_for_request = AsyncMock(
+        side_effect=[
+            InferenceResponse(
+                node_id=TEST_NODE_ID,
+                request_id="request_id",
+                chunk=ChatCompletionChunk(
+                    id="chunk",
+                    choices=[
+                        Choice(
+                            delta=ChoiceDelta(content="cached", role="assistant"),
+                            index=0,
+                            finish_reason="stop",
+                        )
+                    ],
+                    created=123,
+                    model="llama3",
+                    object="chat.completion.chunk",
+                ),
+                status=InferenceStatusCodes.RUNNING,
+            ),
+            InferenceResponse(
+                node_id=TEST_NODE_ID,
+                request_id="request_id",
+                chunk=LAST_CHUNK,
+                status=InferenceStatusCodes.RUNNING,
+            ),
+            InferenceResponse(
+                node_id=TEST_NODE_ID,
+                request_id="request_id",
+                status=InferenceStatusCodes.DONE,
+            ),
+        ]
+    )
+    use_case.select_node_use_case.execute.return_value = connected_node_factory(
+        TEST_NODE_ID
+    )
+    response_cache_repository = ResponseCacheRepository(1024 * 1024, 60)
+    chat_input = await ChatCompletionRequest(
+        model="llama3",
+        messages=[Message(role="user", content="asd")],
+        temperature=0,
+    ).to_openai_chat_completion()
+
+    results = []
+    tokens_queue_repositories = []
+    for _ in range(2):
+        tokens_queue_repository = AsyncMock()
+        tokens_queue_repositories.append(tokens_queue_repository)
+        executor = use_case.InferenceExecutor(
+            MagicMock(NodeRepository),
+            mock_connected_node_repository,
+            MagicMock(TokensRepository),
+            AsyncMock(),
+            tokens_queue_repository,
+            MagicMock(),
+            response_cache_repository=response_cache_repository,
+        )
+        request = InferenceRequest(
+            id="request_id", model="model-1", chat_request=chat_input
+        )
+        results.append(
+            [
+                response
+                async for response in executor.execute(
+                    USER_UUID, API_KEY, None, request
+                )
+            ]
+        )
+
+    mock_connected_node_repository.send_inference_request.assert_awaited_once()
+    assert [r.chunk for r in results[1]] == [r.chunk for r in results[0] if r.chunk]
+    assert results[1][0].chunk.choices[0].delta.content == "cached"
+    usage = tokens_queue_repositories[1].push_token_usage.call_args[0][0]
+    assert usage.producer_node_info_id == settings.GALADRIEL_NODE_INFO_ID
+    assert usage.total_tokens == 30
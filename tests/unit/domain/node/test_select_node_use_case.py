@@ -12,6 +12,7 @@ import settings
 from distributedinference.domain.node.entities import BackendHost
 from distributedinference.domain.node.entities import ConnectedNode
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.entities import RequestTokens
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -91,6 +92,39 @@ def test_select_node_after_reaching_maximum_parallel_requests(
     assert use_case.execute("model", connected_node_repository) is None
 
 
+def test_select_datacenter_node_by_request_tokens(connected_node_repository):
+    node = _create_node(UUIDS[0], "model")
+    node.vram = 90000
+    node.benchmark_tokens_per_second = 1000
+    node.request_incoming_queues["0"] = asyncio.Queue()
+    node.request_tokens["0"] = RequestTokens(prompt_tokens=100_000, completion_tokens=1)
+    connected_node_repository.get_nodes_by_model.return_value = [node]
+
+    with patch.multiple(
+        settings,
+        TOKEN_ADMISSION_ENABLED=True,
+        TOKEN_ADMISSION_KV_CACHE_TOKENS_PER_VRAM_MB=1,
+    ):
+        # Over the 90000 tokens KV-cache budget, even with a single request in flight
+        assert (
+            use_case.execute(
+                "model",
+                connected_node_repository,
+                request_tokens=RequestTokens(prompt_tokens=10, completion_tokens=10),
+            )
+            is None
+        )
+        node.request_tokens["0"] = RequestTokens(prompt_tokens=100, completion_tokens=1)
+        assert (
+            use_case.execute(
+                "model",
+                connected_node_repository,
+                request_tokens=RequestTokens(prompt_tokens=10, completion_tokens=10),
+            )
+            is node
+        )
+
+
 def test_select_datacenter_node_after_reaching_maximum_parallel_requests(
     connected_node_repository,
 ):
@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+from uuid_extensions import uuid7
+
+from distributedinference.domain.node import token_admission
+from distributedinference.domain.node.entities import BackendHost
+from distributedinference.domain.node.entities import ConnectedNode
+from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.entities import RequestTokens
+
+NODE_UUID = UUID("06752f3c-14a1-7837-8000-dfbea843ac25")
+
+
+@pytest.fixture(autouse=True)
+def token_admission_settings():
+    with patch.multiple(
+        token_admission.settings,
+        TOKEN_ADMISSION_ENABLED=True,
+        TOKEN_ADMISSION_KV_CACHE_TOKENS_PER_VRAM_MB=1,
+        TOKEN_ADMISSION_GENERATION_WINDOW_SECONDS=10,
+        TOKEN_ADMISSION_DEFAULT_COMPLETION_TOKENS=500,
+        TOKEN_ADMISSION_MAX_PARALLEL_REQUESTS=64,
+    ):
+        yield
+
+
+def _create_node(*request_tokens: RequestTokens) -> ConnectedNode:
+    # KV-cache budget 90000 tokens, throughput budget 10000 completion tokens
+    node = ConnectedNode(
+        uid=NODE_UUID,
+        user_id=uuid7(),
+        model="model",
+        vram=90000,
+        connected_at=123,
+        websocket=MagicMock(),
+        request_incoming_queues={},
+        node_status=NodeStatus.RUNNING,
+        connected_host=BackendHost.DISTRIBUTED_INFERENCE_EU,
+        benchmark_tokens_per_second=1000,
+    )
+    for i, tokens in enumerate(request_tokens):
+        node.request_incoming_queues[str(i)] = asyncio.Queue()
+        node.request_tokens[str(i)] = tokens
+    return node
+
+
+def test_estimate_request_tokens():
+    tokens = token_admission.estimate_request_tokens(
+        {
+            "messages": [
+                {"role": "system", "content": "a" * 400},
+                {"role": "user", "content": [{"type": "text", "text": "b" * 400}]},
+            ],
+            "max_tokens": 100,
+        }
+    )
+
+    assert tokens == RequestTokens(prompt_tokens=200, completion_tokens=100)
+
+
+def test_estimate_request_tokens_default_completion():
+    tokens = token_admission.estimate_request_tokens({"messages": []})
+
+    assert tokens == RequestTokens(prompt_tokens=0, completion_tokens=500)
+
+
+def test_is_enabled_only_for_benchmarked_datacenter_nodes():
+    node = _create_node()
+    assert token_admission.is_enabled(node)
+
+    node.benchmark_tokens_per_second = None
+    assert not token_admission.is_enabled(node)
+
+    node = _create_node()
+    node.vram = 16000
+    assert not token_admission.is_enabled(node)
+
+
+def test_idle_node_admits_large_prompt():
+    node = _create_node()
+
+    assert token_admission.can_admit(node, RequestTokens(200_000, 500))
+
+
+def test_kv_cache_budget():
+    node = _create_node(RequestTokens(80_000, 500))
+
+    assert token_admission.can_admit(node, RequestTokens(9_000, 500))
+    assert not token_admission.can_admit(node, RequestTokens(10_000, 500))
+
+
+def test_throughput_budget():
+    node = _create_node(*[RequestTokens(10, 500)] * 19)
+
+    assert token_admission.can_admit(node, RequestTokens(10, 500))
+    assert not token_admission.can_admit(node, RequestTokens(10, 501))
+
+
+def test_max_parallel_requests():
+    node = _create_node(*[RequestTokens(1, 1)] * 64)
+
+    assert not token_admission.can_admit(node, RequestTokens(1, 1))
+
+
+def test_get_free_slots():
+    # 10000 completion tokens, 500 per request
+    assert token_admission.get_free_slots(_create_node()) == 20
+    # 10000 - 5000 completion tokens left, 500 per request
+    node = _create_node(RequestTokens(1000, 5000))
+    assert token_admission.get_free_slots(node) == 10
+    node = _create_node(RequestTokens(1000, 10_000))
+    assert token_admission.get_free_slots(node) == 0
+
+
+def test_get_free_slots_idle_node_admits_one():
+    node = _create_node()
+    node.benchmark_tokens_per_second = 10
+
+    assert token_admission.get_free_slots(node) == 1
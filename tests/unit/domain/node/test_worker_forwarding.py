@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import settings
+from distributedinference.domain.node import worker_forwarding
+from distributedinference.domain.node.entities import ChatCompletionChunk
+from distributedinference.domain.node.entities import InferenceErrorStatusCodes
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+USER_UID = UUID("066d0263-61d3-76a4-8000-6b1403cac403")
+NODE_UID = UUID("40c95432-8b2c-4208-bdf4-84f49ff957a3")
+
+
+def _request():
+    return InferenceRequest(
+        id="request-id",
+        model="model",
+        chat_request={"messages": [{"role": "user", "content": "hello"}]},
+    )
+
+
+def _chunk_message():
+    chunk = ChatCompletionChunk(
+        id="request-id",
+        choices=[],
+        created=1,
+        model="model",
+        object="chat.completion.chunk",
+    )
+    return {
+        "type": "inference_response",
+        "node_id": str(NODE_UID),
+        "response": {"request_id": "request-id", "chunk": chunk.model_dump()},
+    }
+
+
+def _repository(streams):
+    repository = MagicMock(spec=WorkerIpcRepository)
+    repository.get_sibling_socket_paths.return_value = list(streams.keys())
+
+    async def _stream(socket_path, _message):
+        result = streams[socket_path]
+        if isinstance(result, Exception):
+            raise result
+        for message in result:
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    repository.stream = _stream
+    return repository
+
+
+async def _collect(repository):
+    return [
+        response
+        async for response in worker_forwarding.execute(
+            repository, USER_UID, "api-key", _request()
+        )
+    ]
+
+
+async def test_no_siblings():
+    assert await _collect(_repository({})) == [None]
+
+
+async def test_skips_worker_without_node():
+    repository = _repository(
+        {
+            "worker-1.sock": [{"type": "no_node"}],
+            "worker-2.sock": ConnectionRefusedError(),
+            "worker-3.sock": [_chunk_message()],
+        }
+    )
+
+    responses = await _collect(repository)
+
+    assert len(responses) == 1
+    assert responses[0].node_id == NODE_UID
+    assert responses[0].chunk.id == "request-id"
+
+
+async def test_worker_disconnects_after_accepting():
+    repository = _repository(
+        {
+            "worker-1.sock": [_chunk_message(), ConnectionResetError()],
+            "worker-2.sock": [_chunk_message()],
+        }
+    )
+
+    responses = await _collect(repository)
+
+    assert len(responses) == 2
+    assert responses[1].node_id == settings.GALADRIEL_NODE_INFO_ID
+    assert (
+        responses[1].error.status_code
+        == InferenceErrorStatusCodes.INTERNAL_SERVER_ERROR
+    )
@@ -1,14 +1,22 @@
 import asyncio
 import time
+from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from uuid import UUID
 from uuid import uuid1
 
+import cbor2
+import orjson
 import pytest
 
 from distributedinference.domain.node.entities import BackendHost, ConnectedNode
+from distributedinference.domain.node.entities import EmbeddingWebsocketRequest
 from distributedinference.domain.node.entities import InferenceErrorStatusCodes
+from distributedinference.domain.node.entities import InferenceRequest
+from distributedinference.domain.node.entities import NodeFrameEncoding
+from distributedinference.domain.node.entities import NodeLatencyMetric
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.entities import RequestTokens
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -178,3 +186,240 @@ async def test_deregister_node_sends_error_on_disconnect(
         error_response["error"]["status_code"]
         == InferenceErrorStatusCodes.UNPROCESSABLE_ENTITY.value
     )
+
+
+def test_node_latency(connected_node_repository, connected_node_factory):
+    connected_node_repository.register_node(connected_node_factory("1"))
+    for rtt in [0.1, 0.2, 0.3]:
+        connected_node_repository.record_node_latency("1", NodeLatencyMetric.RTT, rtt)
+    # not connected
+    connected_node_repository.record_node_latency("2", NodeLatencyMetric.RTT, 1)
+
+    latencies = connected_node_repository.get_node_latencies()
+
+    assert len(latencies) == 1
+    assert latencies[0].node_id == "1"
+    assert latencies[0].rtt.count == 3
+    assert abs(latencies[0].rtt.p50 - 0.2) < 0.01
+    assert latencies[0].time_to_first_token.count == 0
+    assert latencies[0].time_to_first_token.p50 is None
+    assert (
+        connected_node_repository.get_node_latency_percentile(
+            "2", NodeLatencyMetric.RTT, 0.5
+        )
+        is None
+    )
+
+
+def test_node_latency_removed_on_deregister(
+    connected_node_repository, connected_node_factory
+):
+    connected_node_repository.register_node(connected_node_factory("1"))
+    connected_node_repository.record_node_latency("1", NodeLatencyMetric.RTT, 0.1)
+
+    connected_node_repository.deregister_node("1")
+
+    assert (
+        connected_node_repository.get_node_latency_percentile(
+            "1", NodeLatencyMetric.RTT, 0.5
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "frame_encoding", [NodeFrameEncoding.JSON, NodeFrameEncoding.CBOR]
+)
+async def test_send_inference_request_frame_encoding(
+    connected_node_repository, connected_node_factory, frame_encoding
+):
+    node = connected_node_factory(NODE_UUID)
+    node.websocket = AsyncMock()
+    node.frame_encoding = frame_encoding
+    connected_node_repository.register_node(node)
+    request = InferenceRequest(
+        id="request-id", model="model", chat_request={"messages": []}
+    )
+
+    assert await connected_node_repository.send_inference_request(NODE_UUID, request)
+
+    if frame_encoding is NodeFrameEncoding.CBOR:
+        node.websocket.send_text.assert_not_called()
+        assert cbor2.loads(node.websocket.send_bytes.call_args[0][0])["id"] == (
+            "request-id"
+        )
+    else:
+        node.websocket.send_bytes.assert_not_called()
+        message = orjson.loads(node.websocket.send_text.call_args[0][0])
+        assert message == {
+            "id": "request-id",
+            "model": "model",
+            "chat_request": {"messages": []},
+        }
+
+
+def test_add_inference_response_chunks(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.request_incoming_queues = {"a": asyncio.Queue(), "b": asyncio.Queue()}
+    connected_node_repository.register_node(node)
+    responses = [
+        {"request_id": "a", "chunk": {"id": "1"}},
+        {"request_id": "b", "chunk": {"id": "2"}},
+        {"request_id": "a", "chunk": {"id": "3"}},
+        {"request_id": "unknown", "chunk": {"id": "4"}},
+    ]
+
+    connected_node_repository.add_inference_response_chunks(NODE_UUID, responses)
+
+    queue_a = node.request_incoming_queues["a"]
+    assert [queue_a.get_nowait(), queue_a.get_nowait()] == [
+        responses[0],
+        responses[2],
+    ]
+    assert node.request_incoming_queues["b"].get_nowait() == responses[1]
+
+
+async def test_request_tokens_tracked_until_cleanup(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.websocket = AsyncMock()
+    connected_node_repository.register_node(node)
+    request = InferenceRequest(
+        id="request-id",
+        model="model",
+        chat_request={"messages": []},
+    )
+
+    await connected_node_repository.send_inference_request(
+        NODE_UUID, request, request_tokens=RequestTokens(10, 10)
+    )
+    assert node.active_tokens_count() == 20
+
+    connected_node_repository.cleanup_request(NODE_UUID, "request-id")
+    assert node.active_tokens_count() == 0
+
+
+async def test_embedding_request_round_trip(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.websocket = AsyncMock()
+    connected_node_repository.register_node(node)
+    request = EmbeddingWebsocketRequest(
+        request_id="request-id", model="model", input=["a"], encoding_format="float"
+    )
+
+    assert await connected_node_repository.send_embedding_request(NODE_UUID, request)
+    assert orjson.loads(node.websocket.send_text.call_args[0][0]) == {
+        "request_id": "request-id",
+        "model": "model",
+        "input": ["a"],
+        "encoding_format": "float",
+    }
+    connected_node_repository.add_inference_response_chunks(
+        NODE_UUID,
+        [{"request_id": "request-id", "embeddings": [[0.5]], "prompt_tokens": 1}],
+    )
+
+    response = await connected_node_repository.receive_for_embedding_request(
+        NODE_UUID, "request-id"
+    )
+    assert response.embeddings == [[0.5]]
+    assert response.prompt_tokens == 1
+    assert response.error is None
+    assert node.active_requests_count() == 0
+
+
+async def test_embedding_request_node_disconnected(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.websocket = AsyncMock()
+    connected_node_repository.register_node(node)
+    request = EmbeddingWebsocketRequest(
+        request_id="request-id", model="model", input=["a"], encoding_format="float"
+    )
+    await connected_node_repository.send_embedding_request(NODE_UUID, request)
+    receive = asyncio.create_task(
+        connected_node_repository.receive_for_embedding_request(NODE_UUID, "request-id")
+    )
+    await asyncio.sleep(0)
+
+    connected_node_repository.deregister_node(NODE_UUID)
+
+    assert (await receive).error == "Node disconnected"
+
+
+async def test_image_generation_request_binary_images(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.request_incoming_queues["request-id"] = asyncio.Queue()
+    connected_node_repository.register_node(node)
+    connected_node_repository.add_inference_response_chunks(
+        NODE_UUID,
+        [
+            {"request_id": "request-id", "image_index": 1, "image": b"b"},
+            {"request_id": "request-id", "image_index": 0, "image": b"a"},
+            {"request_id": "request-id", "images": [], "error": None},
+        ],
+    )
+    images = {}
+
+    response = await connected_node_repository.receive_for_image_generation_request(
+        NODE_UUID, "request-id", images.__setitem__
+    )
+
+    assert images == {0: b"a", 1: b"b"}
+    assert response.images == []
+    assert response.error is None
+    assert node.active_requests_count() == 0
+
+
+async def test_request_tokens_not_tracked_without_estimate(
+    connected_node_repository, connected_node_factory
+):
+    node = connected_node_factory(NODE_UUID)
+    node.websocket = AsyncMock()
+    connected_node_repository.register_node(node)
+    request = InferenceRequest(
+        id="request-id",
+        model="model",
+        chat_request={"messages": [{"content": "a" * 40}], "max_tokens": 10},
+    )
+
+    await connected_node_repository.send_inference_request(NODE_UUID, request)
+
+    assert node.active_requests_count() == 1
+    assert node.active_tokens_count() == 0
+
+
+def test_model_latency(connected_node_repository, connected_node_factory):
+    connected_node_repository.register_node(connected_node_factory("1"))
+    connected_node_repository.register_node(connected_node_factory("2"))
+    connected_node_repository.register_node(connected_node_factory("3", model="other"))
+    for node_id, ttft in [("1", 0.1), ("2", 0.2), ("2", 0.3), ("3", 5)]:
+        connected_node_repository.record_node_latency(
+            node_id, NodeLatencyMetric.TIME_TO_FIRST_TOKEN, ttft
+        )
+
+    percentile = connected_node_repository.get_model_latency_percentile(
+        "model", NodeLatencyMetric.TIME_TO_FIRST_TOKEN, 0.5
+    )
+
+    assert abs(percentile - 0.2) < 0.01
+    assert (
+        connected_node_repository.get_model_latency_percentile(
+            "model", NodeLatencyMetric.TIME_TO_FIRST_TOKEN, 0.5, min_count=4
+        )
+        is None
+    )
+    assert (
+        connected_node_repository.get_model_latency_percentile(
+            "model", NodeLatencyMetric.RTT, 0.5
+        )
+        is None
+    )
@@ -0,0 +1,82 @@
+from distributedinference.repository.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+)
+
+
+def _key(value: int) -> bytes:
+    return bytes([value]) * 32
+
+
+def test_get_missing():
+    assert EmbeddingCacheRepository(100).get(_key(1)) is None
+
+
+def test_evicts_least_recently_used_above_max_bytes():
+    repository = EmbeddingCacheRepository(100)
+    repository.put(_key(1), b"a" * 40)
+    repository.put(_key(2), b"b" * 40)
+    repository.get(_key(1))
+
+    repository.put(_key(3), b"c" * 40)
+
+    assert repository.get(_key(1)) == b"a" * 40
+    assert repository.get(_key(2)) is None
+    assert repository.get(_key(3)) == b"c" * 40
+
+
+def test_disk_survives_restart(tmp_path):
+    repository = EmbeddingCacheRepository(100, str(tmp_path), 4)
+    repository.put(_key(1), b"a" * 8)
+    repository.put(_key(2), b"b" * 16)
+
+    repository = EmbeddingCacheRepository(100, str(tmp_path), 4)
+
+    assert repository.get(_key(1)) == b"a" * 8
+    assert repository.get(_key(2)) == b"b" * 16
+
+
+def test_disk_used_after_memory_eviction(tmp_path):
+    repository = EmbeddingCacheRepository(8, str(tmp_path), 4)
+    repository.put(_key(1), b"a" * 8)
+    repository.put(_key(2), b"b" * 8)
+
+    assert repository.get(_key(1)) == b"a" * 8
+
+
+def test_disk_overwrites_oldest_slot(tmp_path):
+    repository = EmbeddingCacheRepository(0, str(tmp_path), 2)
+    repository.put(_key(1), b"a" * 8)
+    repository.put(_key(2), b"b" * 8)
+    repository.put(_key(3), b"c" * 8)
+
+    repository = EmbeddingCacheRepository(0, str(tmp_path), 2)
+
+    assert repository.get(_key(1)) is None
+    assert repository.get(_key(2)) == b"b" * 8
+    assert repository.get(_key(3)) == b"c" * 8
+
+
+def test_disk_shared_by_two_instances(tmp_path):
+    repository_a = EmbeddingCacheRepository(0, str(tmp_path), 1)
+    repository_b = EmbeddingCacheRepository(0, str(tmp_path), 1)
+    repository_a.put(_key(1), b"a" * 8)
+
+    repository_b.put(_key(2), b"b" * 8)
+
+    assert repository_a.get(_key(1)) is None
+    assert repository_b.get(_key(2)) == b"b" * 8
+
+
+def test_disk_instances_take_different_slots(tmp_path):
+    repository_a = EmbeddingCacheRepository(0, str(tmp_path), 4)
+    repository_a.put(_key(0), b"0" * 8)
+    repository_b = EmbeddingCacheRepository(0, str(tmp_path), 4)
+    repository_a.put(_key(1), b"a" * 8)
+
+    repository_b.put(_key(2), b"b" * 8)
+
+    assert repository_a.get(_key(1)) == b"a" * 8
+    assert repository_b.get(_key(2)) == b"b" * 8
+    repository_c = EmbeddingCacheRepository(0, str(tmp_path), 4)
+    assert repository_c.get(_key(1)) == b"a" * 8
+    assert repository_c.get(_key(2)) == b"b" * 8
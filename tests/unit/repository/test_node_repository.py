@@ -17,6 +17,9 @@ from distributedinference.repository.node_repository import NodeRepository
 from distributedinference.repository.node_repository import (
     SQL_INCREMENT_NODE_METRICS,
 )
+from distributedinference.repository.node_repository import (
+    SQL_UPDATE_NODES_TO_DISCONNECTED,
+)
 
 MAX_PARALLEL_REQUESTS = 10
 MAX_PARALLEL_DATACENTER_REQUESTS = 20
@@ -111,3 +114,30 @@ async def test_save_node_metrics(node_repository, session_provider):
 
     # Check if the commit was called
     mock_session.commit.assert_called_once()
+
+
+async def test_update_nodes_to_disconnected_one_update_per_status(
+    node_repository, session_provider, connected_node_factory
+):
+    nodes = [
+        connected_node_factory(uuid7(), node_status=NodeStatus.STOPPED),
+        connected_node_factory(uuid7(), node_status=NodeStatus.STOPPED_DEGRADED),
+        connected_node_factory(uuid7(), node_status=NodeStatus.STOPPED),
+    ]
+    mock_session = AsyncMock()
+    session_provider.get.return_value.__aenter__.return_value = mock_session
+
+    await node_repository.update_nodes_to_disconnected(
+        {node.uid: node.node_status for node in nodes}
+    )
+
+    assert mock_session.execute.call_count == 2
+    updates = {}
+    for args, _ in mock_session.execute.call_args_list:
+        assert args[0].text == SQL_UPDATE_NODES_TO_DISCONNECTED
+        updates[args[1]["status"]] = args[1]["ids"]
+    assert updates == {
+        NodeStatus.STOPPED.value: [nodes[0].uid, nodes[2].uid],
+        NodeStatus.STOPPED_DEGRADED.value: [nodes[1].uid],
+    }
+    mock_session.commit.assert_called_once()
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from distributedinference.domain.node.entities import ModelCapacity
+from distributedinference.repository import peer_capacity_repository
+from distributedinference.repository.peer_capacity_repository import (
+    PeerCapacityRepository,
+)
+
+PEER_IP = "10.0.0.1"
+
+
+@pytest.fixture
+def mock_time():
+    original = peer_capacity_repository.time
+    peer_capacity_repository.time = MagicMock()
+    peer_capacity_repository.time.monotonic.return_value = 100.0
+    yield peer_capacity_repository.time
+    peer_capacity_repository.time = original
+
+
+@pytest.fixture
+def repository(mock_time):
+    return PeerCapacityRepository(
+        [PEER_IP, "", "not-an-ip"],
+        max_age_seconds=10,
+        failure_threshold=2,
+        reset_seconds=30,
+    )
+
+
+def test_invalid_ips_skipped(repository):
+    assert repository.get_peer_ips() == [PEER_IP]
+
+
+def test_capacity_expires(repository, mock_time):
+    repository.set_capacity(PEER_IP, {"model": ModelCapacity(nodes=1, free_slots=2)})
+    assert repository.get_capacity(PEER_IP).models["model"].free_slots == 2
+
+    mock_time.monotonic.return_value = 111.0
+    assert repository.get_capacity(PEER_IP) is None
+
+
+def test_circuit_breaker(repository, mock_time):
+    repository.record_failure(PEER_IP)
+    assert repository.is_available(PEER_IP)
+    repository.record_failure(PEER_IP)
+    assert not repository.is_available(PEER_IP)
+
+    # Half open, only a single trial request
+    mock_time.monotonic.return_value = 131.0
+    assert repository.is_available(PEER_IP)
+    repository.record_attempt(PEER_IP)
+    assert not repository.is_available(PEER_IP)
+
+    # Failed trial opens the breaker again
+    repository.record_failure(PEER_IP)
+    assert not repository.is_available(PEER_IP)
+
+    mock_time.monotonic.return_value = 162.0
+    repository.record_attempt(PEER_IP)
+    repository.record_success(PEER_IP)
+    assert repository.is_available(PEER_IP)
+
+
+def test_ended_trial_lets_another_through(repository, mock_time):
+    repository.record_failure(PEER_IP)
+    repository.record_failure(PEER_IP)
+    mock_time.monotonic.return_value = 131.0
+    repository.record_attempt(PEER_IP)
+    assert not repository.is_available(PEER_IP)
+
+    repository.record_attempt_ended(PEER_IP)
+
+    assert repository.is_available(PEER_IP)
+
+
+def test_gossip_success_resets_failures(repository):
+    repository.record_failure(PEER_IP)
+    repository.set_capacity(PEER_IP, {"model": ModelCapacity(nodes=1, free_slots=2)})
+    repository.record_failure(PEER_IP)
+    assert repository.is_available(PEER_IP)
+    repository.record_failure(PEER_IP)
+    assert not repository.is_available(PEER_IP)
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from distributedinference.domain.node.entities import CachedResponse
+from distributedinference.repository import response_cache_repository
+from distributedinference.repository.response_cache_repository import (
+    ResponseCacheRepository,
+)
+
+
+def _response(size: int) -> CachedResponse:
+    return CachedResponse(chunks=[b"x" * size], usage=None)
+
+
+def test_get_missing():
+    assert ResponseCacheRepository(100, 60).get("key") is None
+
+
+def test_evicts_least_recently_used_above_max_bytes():
+    repository = ResponseCacheRepository(100, 60)
+    repository.put("a", _response(40))
+    repository.put("b", _response(40))
+    repository.get("a")
+
+    repository.put("c", _response(40))
+
+    assert repository.get("a") is not None
+    assert repository.get("b") is None
+    assert repository.get("c") is not None
+    assert repository.size == 80
+
+
+def test_rejects_response_larger_than_cache():
+    repository = ResponseCacheRepository(100, 60)
+
+    assert not repository.put("a", _response(101))
+    assert repository.get("a") is None
+    assert repository.size == 0
+
+
+def test_expires_after_ttl():
+    repository = ResponseCacheRepository(100, 60)
+    with patch.object(response_cache_repository.time, "monotonic", return_value=0):
+        repository.put("a", _response(10))
+    with patch.object(response_cache_repository.time, "monotonic", return_value=61):
+        assert repository.get("a") is None
+    assert repository.size == 0
@@ -0,0 +1,56 @@
+import os
+
+from distributedinference.repository.worker_ipc_repository import (
+    WorkerIpcRepository,
+)
+
+
+async def _echo_handler(message):
+    for i in range(message["count"]):
+        yield {"index": i}
+
+
+async def test_stream_round_trip(tmp_path):
+    repository = WorkerIpcRepository(str(tmp_path))
+    await repository.start_server(_echo_handler)
+    try:
+        responses = [
+            response
+            async for response in repository.stream(
+                repository.get_socket_path(), {"count": 3}
+            )
+        ]
+        assert responses == [{"index": 0}, {"index": 1}, {"index": 2}]
+        assert await repository.request(repository.get_socket_path(), {"count": 1}) == {
+            "index": 0
+        }
+    finally:
+        await repository.stop_server()
+    assert not os.path.exists(repository.get_socket_path())
+
+
+async def test_disabled_without_dir():
+    repository = WorkerIpcRepository(None)
+    await repository.start_server(_echo_handler)
+    assert not repository.is_enabled()
+    assert repository.try_become_primary()
+    assert repository.get_sibling_socket_paths() == []
+
+
+def test_sibling_socket_paths_skip_own_and_dead_workers(tmp_path):
+    repository = WorkerIpcRepository(str(tmp_path))
+    parent_socket = tmp_path / f"worker-{os.getppid()}.sock"
+    parent_socket.touch()
+    (tmp_path / f"worker-{os.getpid()}.sock").touch()
+    # Pids are capped well below this value, the process can't exist
+    (tmp_path / "worker-99999999.sock").touch()
+
+    assert repository.get_sibling_socket_paths() == [str(parent_socket)]
+
+
+def test_only_one_primary(tmp_path):
+    first = WorkerIpcRepository(str(tmp_path))
+    second = WorkerIpcRepository(str(tmp_path))
+
+    assert first.try_become_primary()
+    assert not second.try_become_primary()
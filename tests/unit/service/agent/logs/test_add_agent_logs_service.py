@@ -8,7 +8,13 @@ from uuid_extensions import uuid7
 from distributedinference.domain.agent.entities import Agent
 from distributedinference.domain.agent.entities import AgentLog
 from distributedinference.domain.agent.entities import AgentLogInput
+from distributedinference.domain.agent.logs.agent_logs_admission import (
+    AgentLogsAdmission,
+)
 from distributedinference.domain.user.entities import User
+from distributedinference.repository.agent_logs_queue_repository import (
+    AgentLogsQueueRepository,
+)
 from distributedinference.service import error_responses
 from distributedinference.service.agent.entities import AddLogsRequest
 from distributedinference.service.agent.entities import Log
@@ -156,3 +162,138 @@ async def test_rate_limited():
         )
         assert e is not None
     service.add_agent_logs_use_case.execute.assert_not_called()
+
+
+def _get_agent(user_profile_id: UUID) -> Agent:
+    return Agent(
+        id=AGENT_ID,
+        name="name",
+        created_at=datetime(2021, 1, 1),
+        docker_image="docker_image",
+        docker_image_hash="docker_image_hash",
+        env_vars={},
+        last_updated_at=datetime(2021, 1, 1),
+        user_profile_id=user_profile_id,
+    )
+
+
+async def test_buffered_success():
+    service.add_agent_logs_use_case = AsyncMock()
+
+    agent_repo = AsyncMock()
+    user = _get_user()
+    agent_repo.get_agent.return_value = _get_agent(user.uid)
+    repo = AsyncMock()
+    queue_repo = AgentLogsQueueRepository(10)
+    for _ in range(2):
+        await service.execute(
+            AGENT_ID,
+            _get_request_input(),
+            user,
+            agent_repo,
+            repo,
+            admission=AgentLogsAdmission(60, 60, 60),
+            queue_repository=queue_repo,
+        )
+
+    assert (
+        queue_repo.fetch_bulk(10)
+        == [
+            AgentLogInput(
+                agent_id=AGENT_ID,
+                agent_instance_id=AGENT_INSTANCE_ID,
+                logs=[
+                    AgentLog(
+                        text="text",
+                        level=SUPPORTED_LOG_LEVELS[0],
+                        timestamp=1,
+                        signature="asd",
+                    )
+                ],
+            )
+        ]
+        * 2
+    )
+    repo.get_count_by_agent.assert_not_called()
+    service.add_agent_logs_use_case.execute.assert_not_called()
+
+
+async def test_buffered_owner_cached():
+    agent_repo = AsyncMock()
+    user = _get_user()
+    agent_repo.get_agent.return_value = _get_agent(user.uid)
+    admission = AgentLogsAdmission(60, 60, 60)
+    for _ in range(3):
+        await service.execute(
+            AGENT_ID,
+            _get_request_input(),
+            user,
+            agent_repo,
+            AsyncMock(),
+            admission=admission,
+            queue_repository=AgentLogsQueueRepository(10),
+        )
+    agent_repo.get_agent.assert_called_once_with(AGENT_ID)
+
+
+async def test_buffered_agent_user_invalid():
+    agent_repo = AsyncMock()
+    agent_repo.get_agent.return_value = _get_agent(uuid7())
+    queue_repo = AgentLogsQueueRepository(10)
+    with pytest.raises(error_responses.NotFoundAPIError):
+        await service.execute(
+            AGENT_ID,
+            _get_request_input(),
+            _get_user(),
+            agent_repo,
+            AsyncMock(),
+            admission=AgentLogsAdmission(60, 60, 60),
+            queue_repository=queue_repo,
+        )
+    assert queue_repo.fetch_bulk(10) == []
+
+
+async def test_buffered_rate_limited():
+    agent_repo = AsyncMock()
+    user = _get_user()
+    agent_repo.get_agent.return_value = _get_agent(user.uid)
+    admission = AgentLogsAdmission(60, 1, 60)
+    queue_repo = AgentLogsQueueRepository(10)
+    await service.execute(
+        AGENT_ID,
+        _get_request_input(),
+        user,
+        agent_repo,
+        AsyncMock(),
+        admission=admission,
+        queue_repository=queue_repo,
+    )
+    with pytest.raises(error_responses.RateLimitError):
+        await service.execute(
+            AGENT_ID,
+            _get_request_input(),
+            user,
+            agent_repo,
+            AsyncMock(),
+            admission=admission,
+            queue_repository=queue_repo,
+        )
+    assert len(queue_repo.fetch_bulk(10)) == 1
+
+
+async def test_buffered_queue_full():
+    agent_repo = AsyncMock()
+    user = _get_user()
+    agent_repo.get_agent.return_value = _get_agent(user.uid)
+    queue_repo = AgentLogsQueueRepository(1)
+    queue_repo.push(AgentLogInput(AGENT_ID, AGENT_INSTANCE_ID, []))
+    with pytest.raises(error_responses.RateLimitError):
+        await service.execute(
+            AGENT_ID,
+            _get_request_input(),
+            user,
+            agent_repo,
+            AsyncMock(),
+            admission=AgentLogsAdmission(60, 60, 60),
+            queue_repository=queue_repo,
+        )
@@ -1,12 +1,18 @@
 from typing import List
 
+from openai.types.chat import ChatCompletionChunk
 from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_chunk import Choice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
 from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
 from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCallFunction
 from openai.types.chat.chat_completion_message_tool_call import Function
 
-from distributedinference.service.completions import (
-    convert_tool_call_chunks_to_non_streaming as service,
+from distributedinference.service.completions.completion_accumulator import (
+    CompletionAccumulator,
+)
+from distributedinference.service.completions.completion_accumulator import (
+    ToolCallMerger,
 )
 
 
@@ -39,14 +45,21 @@ def _get_chunks(index: int, call_id: str) -> List[ChoiceDeltaToolCall]:
     ]
 
 
+def _merge(tool_chunks: List[ChoiceDeltaToolCall]):
+    merger = ToolCallMerger()
+    for tool_call in tool_chunks:
+        merger.add(tool_call)
+    return merger.get_tool_calls()
+
+
 def test_empty():
-    response = service.execute([])
+    response = _merge([])
     assert response == []
 
 
 def test_success():
     chunks = _get_chunks(0, "chatcmpl-tool-ad426b705e034077afa7c7d251a777b8")
-    response = service.execute(chunks)
+    response = _merge(chunks)
     assert response == [
         ChatCompletionMessageToolCall(
             id="chatcmpl-tool-ad426b705e034077afa7c7d251a777b8",
@@ -64,7 +77,7 @@ def test_success_multiple_calls():
     other_chunks = _get_chunks(1, "chatcmpl-tool-1")
     other_chunks[0].function.name = "other_name"
     chunks.extend(other_chunks)
-    response = service.execute(chunks)
+    response = _merge(chunks)
     assert response == [
         ChatCompletionMessageToolCall(
             id="chatcmpl-tool-0",
@@ -92,9 +105,70 @@ def test_malformed():
             id="asd",
         ),
     ]
-    response = service.execute(chunks)
+    response = _merge(chunks)
     assert response == [
         ChatCompletionMessageToolCall.construct(
             None, **{"id": "asd", "function": {"name": None, "arguments": ""}}
         )
     ]
+
+
+def _chunk(*choices: Choice) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="id",
+        choices=list(choices),
+        created=123,
+        model="model",
+        object="chat.completion.chunk",
+    )
+
+
+def test_accumulator_without_chunks():
+    choices = CompletionAccumulator().get_choices()
+
+    assert len(choices) == 1
+    assert choices[0].finish_reason == "stop"
+    assert choices[0].message.content is None
+    assert choices[0].message.tool_calls is None
+
+
+def test_accumulator_multiple_choices():
+    accumulator = CompletionAccumulator()
+    for i in range(3):
+        accumulator.add(
+            _chunk(
+                Choice(index=1, delta=ChoiceDelta(content=f"b{i}")),
+                Choice(index=0, delta=ChoiceDelta(content=f"a{i}")),
+            )
+        )
+    accumulator.add(
+        _chunk(
+            Choice(index=0, delta=ChoiceDelta(), finish_reason="length"),
+            Choice(index=1, delta=ChoiceDelta(), finish_reason="stop"),
+        )
+    )
+
+    choices = accumulator.get_choices()
+
+    assert [choice.index for choice in choices] == [0, 1]
+    assert choices[0].message.content == "a0a1a2"
+    assert choices[0].finish_reason == "length"
+    assert choices[1].message.content == "b0b1b2"
+    assert choices[1].finish_reason == "stop"
+
+
+def test_accumulator_tool_calls():
+    accumulator = CompletionAccumulator()
+    for tool_call in _get_chunks(0, "chatcmpl-tool-0"):
+        accumulator.add(
+            _chunk(Choice(index=0, delta=ChoiceDelta(tool_calls=[tool_call])))
+        )
+    accumulator.add(
+        _chunk(Choice(index=0, delta=ChoiceDelta(), finish_reason="tool_calls"))
+    )
+
+    (choice,) = accumulator.get_choices()
+
+    assert choice.finish_reason == "tool_calls"
+    assert choice.message.content is None
+    assert choice.message.tool_calls[0].function.arguments == '{"query": "Hello"}'
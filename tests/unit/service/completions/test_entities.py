@@ -0,0 +1,79 @@
+from openai._utils import async_maybe_transform
+from openai.types.chat import completion_create_params
+
+from distributedinference.service.completions.entities import ChatCompletionRequest
+
+REQUEST = {
+    "model": "model",
+    "messages": [
+        {"role": "system", "content": "You are a helpful assistant.", "name": "sys"},
+        {"role": "user", "content": "Hello!"},
+        {
+            "role": "assistant",
+            "content": None,
+            "function_call": {"name": "get_weather", "arguments": "{}"},
+        },
+    ],
+    "response_format": {
+        "type": "json_schema",
+        "json_schema": {"name": "weather", "schema": {"type": "object"}},
+    },
+    "stream": True,
+    "stream_options": {"include_usage": True},
+    "stop": ["\n"],
+    "logit_bias": {"1": 2},
+    "tools": [
+        {
+            "type": "function",
+            "function": {"name": "get_weather", "parameters": {"type": "object"}},
+        }
+    ],
+    "tool_choice": {"type": "function", "function": {"name": "get_weather"}},
+}
+
+
+async def _sdk_transform(request: ChatCompletionRequest):
+    dict_input = {
+        field: getattr(request, field)
+        for field in [
+            "messages",
+            "model",
+            "frequency_penalty",
+            "logit_bias",
+            "logprobs",
+            "max_tokens",
+            "presence_penalty",
+            "response_format",
+            "seed",
+            "stop",
+            "stream",
+            "stream_options",
+            "temperature",
+            "top_logprobs",
+            "top_p",
+            "user",
+            "tool_choice",
+            "tools",
+        ]
+    }
+    return await async_maybe_transform(
+        dict_input, completion_create_params.CompletionCreateParams
+    )
+
+
+async def test_to_openai_chat_completion_matches_sdk_transform():
+    request = ChatCompletionRequest(**REQUEST)
+
+    assert await request.to_openai_chat_completion() == await _sdk_transform(request)
+
+
+async def test_to_openai_chat_completion_skips_empty_tools():
+    request = ChatCompletionRequest(
+        model="model", messages=[{"role": "user", "content": "Hello!"}]
+    )
+
+    result = await request.to_openai_chat_completion()
+
+    assert result["messages"] == [{"role": "user", "content": "Hello!"}]
+    assert "tools" not in result
+    assert "tool_choice" not in result
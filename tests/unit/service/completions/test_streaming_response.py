@@ -1,9 +1,13 @@
+import asyncio
 from typing import AsyncIterable
 
+import pytest
+
 from distributedinference.service import error_responses
 from distributedinference.service.completions.streaming_response import (
     StreamingResponseWithStatusCode,
 )
+from distributedinference.service.completions.streaming_response import coalesce
 
 
 def start_chunk(status: int):
@@ -199,3 +203,32 @@ async def test_streaming_chunk_raises_unexpected_error():
     )
     assert responses[2]["type"] == "http.response.body"
     assert responses[2]["more_body"] is False
+
+
+async def timed_chunks(delays) -> AsyncIterable:
+    for i, delay in enumerate(delays):
+        await asyncio.sleep(delay)
+        yield f"{i}"
+
+
+async def test_coalesce_joins_chunks_within_delay():
+    # 0 is written at once, 1-3 arrive within the delay, 4 only after it
+    content = timed_chunks([0, 0, 0, 0, 0.3])
+
+    writes = [chunk async for chunk in coalesce(content, 0.1)]
+
+    assert writes == ["0", "123", "4"]
+
+
+async def test_coalesce_writes_buffered_chunks_before_error():
+    async def failing_chunks():
+        yield "0"
+        yield "1"
+        raise error_responses.InternalServerAPIError()
+
+    writes = []
+    with pytest.raises(error_responses.InternalServerAPIError):
+        async for chunk in coalesce(failing_chunks(), 0.1):
+            writes.append(chunk)
+
+    assert writes == ["0", "1"]
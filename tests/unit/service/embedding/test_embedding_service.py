@@ -44,7 +44,7 @@ async def test_success():
     )
     assert response == _get_default_response()
     service.create_embeddings_use_case.execute.assert_called_with(
-        ["asd", "fgh"], None, repo
+        ["asd", "fgh"], None, repo, None, None
     )
 
 
@@ -59,7 +59,7 @@ async def test_converts_to_list():
     )
     assert response == _get_default_response()
     service.create_embeddings_use_case.execute.assert_called_with(
-        ["asd"], "base64", repo
+        ["asd"], "base64", repo, None, None
     )
 
 
@@ -74,7 +74,7 @@ async def test_converts_list_of_ints():
     )
     assert response == _get_default_response()
     service.create_embeddings_use_case.execute.assert_called_with(
-        [[1, 2, 3]], "float", repo
+        [[1, 2, 3]], "float", repo, None, None
     )
 
 
@@ -1,3 +1,4 @@
+import asyncio
 import time
 from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
@@ -8,10 +9,14 @@ import pytest
 from openai.types.images_response import ImagesResponse
 from packaging.version import Version
 
+import settings
 from distributedinference.domain.node import run_images_generation_use_case
 from distributedinference.domain.node.entities import BackendHost, ConnectedNode
 from distributedinference.domain.node.entities import ImageGenerationWebsocketResponse
 from distributedinference.domain.node.entities import NodeStatus
+from distributedinference.domain.node.image_generation_scheduler import (
+    ImageGenerationScheduler,
+)
 from distributedinference.repository.connected_node_repository import (
     ConnectedNodeRepository,
 )
@@ -202,3 +207,154 @@ async def test_execute_internal_server_error(
             connected_node_repository,
             gsc_client,
         )
+
+
+@pytest.mark.asyncio
+async def test_execute_binary_images_uploaded_as_received(
+    connected_node_repository,
+    image_generation_request,
+    gsc_client,
+):
+    mock_node = create_mock_node()
+    run_images_generation_use_case._select_node = MagicMock(return_value=mock_node)
+    uploaded = []
+
+    async def _upload(request_id, index, image):
+        uploaded.append(index)
+        return f"https://example.com/{index}.png"
+
+    gsc_client.upload_to_gcs = AsyncMock(side_effect=_upload)
+
+    async def _receive(node_id, request_id, on_image):
+        on_image(1, b"second")
+        on_image(0, b"first")
+        # Uploads run while the rest of the images are received
+        await asyncio.sleep(0)
+        assert sorted(uploaded) == [0, 1]
+        return ImageGenerationWebsocketResponse(
+            node_id=node_id, request_id=request_id, images=[], error=None
+        )
+
+    connected_node_repository.receive_for_image_generation_request = AsyncMock(
+        side_effect=_receive
+    )
+
+    response = await generation_handler_service.execute(
+        image_generation_request,
+        connected_node_repository,
+        gsc_client,
+    )
+
+    assert [image.url for image in response.data] == [
+        "https://example.com/0.png",
+        "https://example.com/1.png",
+    ]
+    gsc_client.decode_b64_and_upload_to_gcs.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_execute_binary_images_b64_json(
+    connected_node_repository,
+    image_generation_request,
+    gsc_client,
+):
+    run_images_generation_use_case._select_node = MagicMock(
+        return_value=create_mock_node()
+    )
+    image_generation_request.response_format = "b64_json"
+
+    async def _receive(node_id, request_id, on_image):
+        on_image(0, b"png")
+        return ImageGenerationWebsocketResponse(
+            node_id=node_id, request_id=request_id, images=[], error=None
+        )
+
+    connected_node_repository.receive_for_image_generation_request = AsyncMock(
+        side_effect=_receive
+    )
+
+    response = await generation_handler_service.execute(
+        image_generation_request,
+        connected_node_repository,
+        gsc_client,
+    )
+
+    assert [image.b64_json for image in response.data] == ["cG5n"]
+    gsc_client.upload_to_gcs.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_execute_scheduled_node_released(
+    connected_node_repository,
+    image_generation_request,
+    gsc_client,
+):
+    mock_node = create_mock_node()
+    scheduler = MagicMock(spec=ImageGenerationScheduler)
+    scheduler.acquire = AsyncMock(return_value=mock_node)
+    connected_node_repository.receive_for_image_generation_request = AsyncMock(
+        return_value=None
+    )
+
+    with pytest.raises(error_responses.InternalServerAPIError):
+        await generation_handler_service.execute(
+            image_generation_request,
+            connected_node_repository,
+            gsc_client,
+            scheduler,
+            USER_UUID,
+        )
+
+    cost = 1024 * 1024 * settings.IMAGE_GENERATION_STEPS
+    scheduler.acquire.assert_called_once_with(
+        image_generation_request.model,
+        USER_UUID,
+        cost,
+        settings.IMAGE_GENERATION_QUEUE_TIMEOUT_SECONDS,
+    )
+    scheduler.release.assert_called_once_with(mock_node.uid, cost)
+
+
+@pytest.mark.asyncio
+async def test_execute_cancelled_cancels_uploads(
+    connected_node_repository,
+    image_generation_request,
+    gsc_client,
+):
+    run_images_generation_use_case._select_node = MagicMock(
+        return_value=create_mock_node()
+    )
+    upload_cancelled = asyncio.Event()
+    receiving = asyncio.Event()
+
+    async def _upload(request_id, index, image):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            upload_cancelled.set()
+            raise
+
+    gsc_client.upload_to_gcs = AsyncMock(side_effect=_upload)
+
+    async def _receive(node_id, request_id, on_image):
+        on_image(0, b"first")
+        receiving.set()
+        await asyncio.Event().wait()
+
+    connected_node_repository.receive_for_image_generation_request = AsyncMock(
+        side_effect=_receive
+    )
+
+    task = asyncio.create_task(
+        generation_handler_service.execute(
+            image_generation_request,
+            connected_node_repository,
+            gsc_client,
+        )
+    )
+    await receiving.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait_for(upload_cancelled.wait(), 1)
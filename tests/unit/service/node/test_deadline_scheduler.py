@@ -0,0 +1,67 @@
+import asyncio
+
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    DeadlineScheduler,
+)
+from distributedinference.service.node.protocol.deadline_scheduler import (
+    run_in_batches,
+)
+
+
+def test_pop_due_in_deadline_order():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("b", 20)
+    scheduler.schedule("a", 10)
+    scheduler.schedule("c", 30)
+
+    assert scheduler.pop_due(25) == ["a", "b"]
+    assert scheduler.pop_due(25) == []
+    assert len(scheduler) == 1
+    assert scheduler.pop_due(30) == ["c"]
+
+
+def test_reschedule_replaces_deadline():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("a", 10)
+    scheduler.schedule("a", 50)
+
+    assert scheduler.pop_due(20) == []
+    assert scheduler.pop_due(50) == ["a"]
+
+
+def test_cancel():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("a", 10)
+    scheduler.cancel("a")
+
+    assert "a" not in scheduler
+    assert scheduler.pop_due(100) == []
+
+
+def test_stale_entries_compacted():
+    scheduler = DeadlineScheduler()
+    for i in range(1000):
+        scheduler.schedule("a", i)
+    assert len(scheduler._heap) < 100
+    assert scheduler.pop_due(1000) == ["a"]
+
+
+async def test_run_in_batches_concurrently():
+    running = 0
+    max_running = 0
+    sent = []
+
+    async def _send(key):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0)
+        running -= 1
+        if key == "fail":
+            raise ConnectionError()
+        sent.append(key)
+
+    await run_in_batches(["a", "b", "fail", "c", "d"], _send, batch_size=2)
+
+    assert sent == ["a", "b", "c", "d"]
+    assert max_running == 2
@@ -13,6 +13,12 @@ from distributedinference.repository.metrics_queue_repository import (
     MetricsQueueRepository,
 )
 from distributedinference.service.node.protocol.ping_pong_protocol import NodePingInfo
+from distributedinference.service.node.protocol.ping_pong_protocol import (
+    RTT_HISTOGRAM_BINS,
+)
+from distributedinference.service.node.protocol.ping_pong_protocol import (
+    get_histogram_bins,
+)
 from distributedinference.service.node.protocol.ping_pong_protocol import (
     PingPongProtocol,
 )
@@ -227,6 +233,8 @@ async def test_job_check_for_pongs(ping_pong_protocol):
             next_ping_time=(current_time - 1000),
         ),
     }
+    for node_id in ping_pong_protocol.active_nodes:
+        ping_pong_protocol.schedule_node(node_id)
 
     # Execute
     await ping_pong_protocol.run()
@@ -316,3 +324,97 @@ async def test_execute_metrics_update_when_removing_node(ping_pong_protocol):
     ping_pong_protocol.metrics_queue_repository.push.assert_called_once_with(
         node_metrics
     )
+
+
+@pytest.mark.asyncio
+async def test_run_only_pings_due_nodes(ping_pong_protocol):
+    for i in range(100):
+        ping_pong_protocol.add_node(NODE_UUID, f"node-{i}", "model")
+    current_time = time.time_ns() // 1_000_000
+    for i in range(10):
+        ping_pong_protocol.active_nodes[f"node-{i}"].next_ping_time = current_time - 1
+        ping_pong_protocol.schedule_node(f"node-{i}")
+
+    await ping_pong_protocol.run()
+
+    assert (
+        ping_pong_protocol.connected_node_repository.send_json_request.await_count == 10
+    )
+    waiting = [
+        node_id
+        for node_id, node_info in ping_pong_protocol.active_nodes.items()
+        if node_info.waiting_for_pong
+    ]
+    assert waiting == [f"node-{i}" for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_removed_node_not_pinged(ping_pong_protocol):
+    ping_pong_protocol.add_node(NODE_UUID, NODE_NAME, "model")
+    ping_pong_protocol.active_nodes[NODE_NAME].next_ping_time = 0
+    ping_pong_protocol.schedule_node(NODE_NAME)
+    await ping_pong_protocol.remove_node(NODE_NAME)
+
+    await ping_pong_protocol.run()
+
+    ping_pong_protocol.connected_node_repository.send_json_request.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_got_pong_on_time_histogram(ping_pong_protocol):
+    node_info = NodePingInfo(node_uuid=NODE_UUID, model="model")
+    ping_pong_protocol.active_nodes[NODE_NAME] = node_info
+
+    for rtt in [5, 9, 15, 5000]:
+        node_info.ping_sent_time = 1000
+        await ping_pong_protocol.got_pong_on_time(NODE_NAME, node_info, 1000 + rtt)
+
+    assert node_info.histogram[0] == 2
+    assert node_info.histogram[1] == 1
+    assert node_info.histogram[RTT_HISTOGRAM_BINS - 1] == 1
+    assert get_histogram_bins(node_info.histogram) == {
+        "0-9": 2,
+        "10-19": 1,
+        f"{(RTT_HISTOGRAM_BINS - 1) * 10}+": 1,
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data",
+    [
+        "not a dict",
+        {"message_type": 2, "node_id": NODE_NAME, "nonce": NODE_NONCE},
+        {
+            "protocol_version": "1.0",
+            "message_type": 99,
+            "node_id": NODE_NAME,
+            "nonce": NODE_NONCE,
+        },
+        {
+            "protocol_version": "1.0",
+            "message_type": 2,
+            "node_id": NODE_NAME,
+            "nonce": 123,
+        },
+        {
+            "protocol_version": "1.0",
+            "message_type": 2,
+            "node_id": NODE_NAME,
+            "nonce": NODE_NONCE,
+            "api_ping_time": [10, "20"],
+        },
+    ],
+)
+async def test_handler_invalid_pong_ignored(ping_pong_protocol, data):
+    ping_pong_protocol.active_nodes[NODE_NAME] = NodePingInfo(
+        node_uuid=NODE_UUID,
+        model="model",
+        waiting_for_pong=True,
+        ping_nonce=NODE_NONCE,
+    )
+
+    await ping_pong_protocol.handle(data)
+
+    assert ping_pong_protocol.active_nodes[NODE_NAME].waiting_for_pong
+    assert ping_pong_protocol.active_nodes[NODE_NAME].ping_streak == 0
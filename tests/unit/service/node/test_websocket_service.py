@@ -4,6 +4,8 @@ from unittest.mock import AsyncMock
 from unittest.mock import Mock
 from uuid import UUID
 
+import cbor2
+import orjson
 import pytest
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
@@ -11,8 +13,12 @@ from fastapi import status
 from fastapi.exceptions import WebSocketException
 
 import settings
+from distributedinference.domain.node import node_connect_pipeline
+from distributedinference.domain.node import node_frame_codec
 from distributedinference.domain.node.entities import FullNodeInfo
+from distributedinference.domain.node.entities import ModelType
 from distributedinference.domain.node.entities import NodeBenchmark
+from distributedinference.domain.node.entities import NodeFrameEncoding
 from distributedinference.domain.node.entities import NodeMetrics
 from distributedinference.domain.node.entities import NodeSpecs
 from distributedinference.domain.node.entities import NodeStatus
@@ -55,6 +61,23 @@ NODE_INFO = FullNodeInfo(
 )
 
 
+def _benchmarks_mock(return_value=None) -> AsyncMock:
+    async def get_node_benchmarks(keys):
+        if not return_value:
+            return {}
+        return {key: return_value for key in keys}
+
+    return AsyncMock(side_effect=get_node_benchmarks)
+
+
+def _get_pipeline(
+    node_repository: AsyncMock, benchmark_repository: AsyncMock
+) -> node_connect_pipeline.NodeConnectPipeline:
+    return node_connect_pipeline.NodeConnectPipeline(
+        node_repository, benchmark_repository, 200, 500, 10, 100, 0.001, 600
+    )
+
+
 @pytest.fixture
 def node_repository() -> AsyncMock(spec=NodeRepository):
     node_repository = AsyncMock(spec=NodeRepository)
@@ -67,6 +90,7 @@ def node_repository() -> AsyncMock(spec=NodeRepository):
 def connected_node_repository() -> AsyncMock(spec=ConnectedNodeRepository):
     repository = AsyncMock(spec=ConnectedNodeRepository)
     repository.register_node = Mock(return_value=True)
+    repository.get_connected_node = Mock(return_value=None)
     return repository
 
 
@@ -89,7 +113,7 @@ async def test_execute_node_no_model_header(
     node_repository.register_node = Mock(return_value=False)
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(return_value=None)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(return_value=None)
 
     with pytest.raises(
         WebSocketException, match='No "Model" header provided'
@@ -102,7 +126,7 @@ async def test_execute_node_no_model_header(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -110,7 +134,7 @@ async def test_execute_node_no_model_header(
     assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_not_called()
-    node_repository.set_node_connection_timestamp.assert_not_called()
+    node_repository.set_nodes_connection_timestamp.assert_not_called()
 
 
 async def test_execute_node_no_benchmark(
@@ -132,7 +156,7 @@ async def test_execute_node_no_benchmark(
     node_repository.register_node = Mock(return_value=False)
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(return_value=None)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(return_value=None)
 
     with pytest.raises(
         WebSocketException, match="Benchmarking is not completed"
@@ -145,7 +169,7 @@ async def test_execute_node_no_benchmark(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -153,7 +177,7 @@ async def test_execute_node_no_benchmark(
     assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_not_called()
-    node_repository.set_node_connection_timestamp.assert_not_called()
+    node_repository.set_nodes_connection_timestamp.assert_not_called()
 
 
 async def test_execute_node_benchmark_too_low(
@@ -175,7 +199,7 @@ async def test_execute_node_benchmark_too_low(
     node_repository.register_node = Mock(return_value=False)
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -195,7 +219,7 @@ async def test_execute_node_benchmark_too_low(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -203,7 +227,7 @@ async def test_execute_node_benchmark_too_low(
     assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_not_called()
-    node_repository.set_node_connection_timestamp.assert_not_called()
+    node_repository.set_nodes_connection_timestamp.assert_not_called()
 
 
 async def test_execute_node_benchmark_405b_enough(
@@ -226,7 +250,7 @@ async def test_execute_node_benchmark_405b_enough(
 
     model_name = next(iter(settings.MINIMUM_COMPLETIONS_TOKENS_PER_SECOND_PER_MODEL))
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model_name",
@@ -251,7 +275,7 @@ async def test_execute_node_benchmark_405b_enough(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -259,7 +283,7 @@ async def test_execute_node_benchmark_405b_enough(
     assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_called_once()
-    node_repository.set_node_connection_timestamp.assert_called_once()
+    node_repository.set_nodes_connection_timestamp.assert_called_once()
 
 
 async def test_node_already_connected_with_other_worker(
@@ -288,7 +312,7 @@ async def test_node_already_connected_with_other_worker(
     connected_node_repository.register_node = Mock(return_value=False)
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -309,7 +333,7 @@ async def test_node_already_connected_with_other_worker(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -317,7 +341,7 @@ async def test_node_already_connected_with_other_worker(
     assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_not_called()
-    node_repository.set_node_connection_timestamp.assert_not_called()
+    node_repository.set_nodes_connection_timestamp.assert_not_called()
 
 
 async def test_execute_node_already_connected(
@@ -339,7 +363,7 @@ async def test_execute_node_already_connected(
     connected_node_repository.register_node = Mock(return_value=False)
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -360,7 +384,7 @@ async def test_execute_node_already_connected(
             None,
             node_repository,
             connected_node_repository,
-            benchmark_repository,
+            _get_pipeline(node_repository, benchmark_repository),
             Mock(),
             Mock(),
         )
@@ -390,7 +414,7 @@ async def test_execute_websocket_disconnect(
     )
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -407,7 +431,7 @@ async def test_execute_websocket_disconnect(
         None,
         node_repository,
         connected_node_repository,
-        benchmark_repository,
+        _get_pipeline(node_repository, benchmark_repository),
         Mock(),
         protocol_handler,
     )
@@ -416,9 +440,9 @@ async def test_execute_websocket_disconnect(
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_called_once()
     connected_node_repository.deregister_node.assert_called_once_with(NODE_UUID)
-    node_repository.set_node_connection_timestamp.assert_called_once()
-    node_repository.update_node_to_disconnected.assert_called_once_with(
-        NODE_UUID, NodeStatus.STOPPED
+    node_repository.set_nodes_connection_timestamp.assert_called_once()
+    node_repository.update_nodes_to_disconnected.assert_called_once_with(
+        {NODE_UUID: NodeStatus.STOPPED}
     )
 
 
@@ -455,7 +479,7 @@ async def test_execute_protocols(
     )
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -472,7 +496,7 @@ async def test_execute_protocols(
         None,
         node_repository,
         connected_node_repository,
-        benchmark_repository,
+        _get_pipeline(node_repository, benchmark_repository),
         Mock(),
         protocol_handler,
     )
@@ -497,9 +521,9 @@ async def test_execute_protocols(
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_called_once()
     connected_node_repository.deregister_node.assert_called_once_with(NODE_UUID)
-    node_repository.set_node_connection_timestamp.assert_called_once()
-    node_repository.update_node_to_disconnected.assert_called_once_with(
-        NODE_UUID, NodeStatus.STOPPED
+    node_repository.set_nodes_connection_timestamp.assert_called_once()
+    node_repository.update_nodes_to_disconnected.assert_called_once_with(
+        {NODE_UUID: NodeStatus.STOPPED}
     )
 
 
@@ -508,7 +532,7 @@ async def test_execute_node_image_generation_model(
     connected_node_repository: AsyncMock,
 ):
     websocket = AsyncMock(spec=WebSocket)
-    websocket.receive_text = AsyncMock()
+    websocket.receive = AsyncMock(return_value={"type": "websocket.disconnect"})
 
     user = User(
         uid=uuid.uuid4(),
@@ -533,7 +557,7 @@ async def test_execute_node_image_generation_model(
     protocol_handler.get = Mock(side_effect=[ping_pong_protocol, health_check_protocol])
 
     benchmark_repository = AsyncMock(spec=BenchmarkRepository)
-    benchmark_repository.get_node_benchmark = AsyncMock(
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
         return_value=NodeBenchmark(
             node_id=NODE_UUID,
             model_name="model",
@@ -550,13 +574,253 @@ async def test_execute_node_image_generation_model(
         "DIFFUSION",
         node_repository,
         connected_node_repository,
-        benchmark_repository,
+        _get_pipeline(node_repository, benchmark_repository),
         Mock(),
         protocol_handler,
     )
 
     websocket.accept.assert_called_once()
     connected_node_repository.register_node.assert_called_once()
-    node_repository.set_node_connection_timestamp.assert_called_once()
+    node_repository.set_nodes_connection_timestamp.assert_called_once()
     ping_pong_protocol.add_node.assert_called_once()
     health_check_protocol.add_node.assert_not_called()
+
+
+async def test_execute_node_image_generation_binary_images(
+    node_repository: AsyncMock,
+    connected_node_repository: AsyncMock,
+):
+    websocket = AsyncMock(spec=WebSocket)
+    chunks = [
+        node_frame_codec.encode_image_chunk("request-id", 0, 0, b"01", False),
+        node_frame_codec.encode_image_chunk("request-id", 0, 2, b"23", True),
+    ]
+    websocket.receive = AsyncMock(
+        side_effect=[
+            {"type": "websocket.receive", "bytes": chunks[0]},
+            {"type": "websocket.receive", "bytes": chunks[1]},
+            {"type": "websocket.disconnect"},
+        ]
+    )
+    connected_node_repository.add_inference_response_chunks = Mock()
+
+    user = User(
+        uid=uuid.uuid4(),
+        name="test_name",
+        email="test_user_email",
+        usage_tier_id=UUID("06706644-2409-7efd-8000-3371c5d632d3"),
+    )
+
+    node_metrics = NodeMetrics(status=NodeStatus.STOPPED)
+    node_repository.get_node_metrics_by_ids = AsyncMock(
+        return_value={NODE_UUID: node_metrics}
+    )
+    connected_node_repository.register_node = Mock(return_value=True)
+
+    ping_pong_protocol = AsyncMock(spec=PingPongProtocol)
+    ping_pong_protocol.add_node = Mock()
+    ping_pong_protocol.remove_node = AsyncMock()
+    health_check_protocol = AsyncMock(spec=PingPongProtocol)
+    health_check_protocol.add_node = Mock()
+    health_check_protocol.remove_node = AsyncMock()
+    protocol_handler = AsyncMock(spec=ProtocolHandler)
+    protocol_handler.get = Mock(side_effect=[ping_pong_protocol, health_check_protocol])
+
+    benchmark_repository = AsyncMock(spec=BenchmarkRepository)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
+        return_value=NodeBenchmark(
+            node_id=NODE_UUID,
+            model_name="model",
+            benchmark_tokens_per_second=10000,
+            gpu_model="NVIDIA GeForce RTX 4090",
+        )
+    )
+
+    await websocket_service.execute(
+        websocket,
+        user,
+        NODE_INFO,
+        "model",
+        "DIFFUSION",
+        node_repository,
+        connected_node_repository,
+        _get_pipeline(node_repository, benchmark_repository),
+        Mock(),
+        protocol_handler,
+    )
+
+    connected_node_repository.add_inference_response_chunks.assert_called_once_with(
+        NODE_UUID,
+        [{"request_id": "request-id", "image_index": 0, "image": b"0123"}],
+    )
+
+
+async def test_execute_node_embedding_model(
+    node_repository: AsyncMock,
+    connected_node_repository: AsyncMock,
+):
+    websocket = AsyncMock(spec=WebSocket)
+    websocket.receive_text = AsyncMock()
+
+    user = User(
+        uid=uuid.uuid4(),
+        name="test_name",
+        email="test_user_email",
+        usage_tier_id=UUID("06706644-2409-7efd-8000-3371c5d632d3"),
+    )
+
+    node_metrics = NodeMetrics(status=NodeStatus.STOPPED)
+    node_repository.get_node_metrics_by_ids = AsyncMock(
+        return_value={NODE_UUID: node_metrics}
+    )
+    connected_node_repository.register_node = Mock(return_value=True)
+
+    ping_pong_protocol = AsyncMock(spec=PingPongProtocol)
+    ping_pong_protocol.add_node = Mock()
+    ping_pong_protocol.remove_node = AsyncMock()
+    health_check_protocol = AsyncMock(spec=PingPongProtocol)
+    health_check_protocol.add_node = Mock()
+    health_check_protocol.remove_node = AsyncMock()
+    protocol_handler = AsyncMock(spec=ProtocolHandler)
+    protocol_handler.get = Mock(side_effect=[ping_pong_protocol, health_check_protocol])
+
+    benchmark_repository = AsyncMock(spec=BenchmarkRepository)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
+        return_value=NodeBenchmark(
+            node_id=NODE_UUID,
+            model_name="model",
+            benchmark_tokens_per_second=10000,
+            gpu_model="NVIDIA GeForce RTX 4090",
+        )
+    )
+
+    await websocket_service.execute(
+        websocket,
+        user,
+        NODE_INFO,
+        settings.SUPPORTED_EMBEDDING_MODELS[0],
+        "EMBEDDING",
+        node_repository,
+        connected_node_repository,
+        _get_pipeline(node_repository, benchmark_repository),
+        Mock(),
+        protocol_handler,
+    )
+
+    websocket.accept.assert_called_once()
+    connected_node_repository.register_node.assert_called_once()
+    node_repository.set_nodes_connection_timestamp.assert_called_once()
+    ping_pong_protocol.add_node.assert_called_once()
+    health_check_protocol.add_node.assert_not_called()
+    benchmark_repository.get_node_benchmarks.assert_not_called()
+    node = connected_node_repository.register_node.call_args[0][0]
+    assert node.model_type is ModelType.EMBEDDING
+    assert node.node_status is NodeStatus.RUNNING
+
+
+async def test_execute_binary_frames(
+    node_repository: AsyncMock,
+    connected_node_repository: AsyncMock,
+):
+    websocket = AsyncMock(spec=WebSocket)
+    frame = {"request_id": "request-id", "chunk": {"id": "chunk-id"}, "status": 1}
+    websocket.receive_bytes = AsyncMock(
+        side_effect=[cbor2.dumps(frame), WebSocketDisconnect]
+    )
+    ping_pong_protocol = AsyncMock(spec=PingPongProtocol)
+    ping_pong_protocol.add_node = Mock()
+    protocol_handler = AsyncMock(spec=ProtocolHandler)
+    protocol_handler.get = Mock(return_value=ping_pong_protocol)
+    user = User(
+        uid=uuid.uuid4(),
+        name="test_name",
+        email="test_user_email",
+        usage_tier_id=UUID("06706644-2409-7efd-8000-3371c5d632d3"),
+    )
+    benchmark_repository = AsyncMock(spec=BenchmarkRepository)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
+        return_value=NodeBenchmark(
+            node_id=NODE_UUID,
+            model_name="model",
+            benchmark_tokens_per_second=10000,
+            gpu_model="NVIDIA GeForce RTX 4090",
+        )
+    )
+
+    await websocket_service.execute(
+        websocket,
+        user,
+        NODE_INFO,
+        "model",
+        None,
+        node_repository,
+        connected_node_repository,
+        _get_pipeline(node_repository, benchmark_repository),
+        Mock(),
+        protocol_handler,
+        NodeFrameEncoding.CBOR,
+    )
+
+    websocket.accept.assert_called_once_with(
+        subprotocol=node_frame_codec.BINARY_SUBPROTOCOL,
+        headers=node_frame_codec.get_handshake_headers(),
+    )
+    websocket.receive_text.assert_not_called()
+    node = connected_node_repository.register_node.call_args[0][0]
+    assert node.frame_encoding is NodeFrameEncoding.CBOR
+    connected_node_repository.add_inference_response_chunk.assert_called_once_with(
+        NODE_UUID, "request-id", frame
+    )
+
+
+async def test_execute_multiplexed_responses(
+    node_repository: AsyncMock,
+    connected_node_repository: AsyncMock,
+):
+    websocket = AsyncMock(spec=WebSocket)
+    responses = [
+        {"request_id": "request-1", "chunk": {"id": "1"}, "status": 1},
+        {"request_id": "request-2", "chunk": {"id": "2"}, "status": 1},
+    ]
+    websocket.receive_text = AsyncMock(
+        side_effect=[orjson.dumps({"responses": responses}), WebSocketDisconnect]
+    )
+    connected_node_repository.add_inference_response_chunks = Mock()
+    ping_pong_protocol = AsyncMock(spec=PingPongProtocol)
+    ping_pong_protocol.add_node = Mock()
+    protocol_handler = AsyncMock(spec=ProtocolHandler)
+    protocol_handler.get = Mock(return_value=ping_pong_protocol)
+    user = User(
+        uid=uuid.uuid4(),
+        name="test_name",
+        email="test_user_email",
+        usage_tier_id=UUID("06706644-2409-7efd-8000-3371c5d632d3"),
+    )
+    benchmark_repository = AsyncMock(spec=BenchmarkRepository)
+    benchmark_repository.get_node_benchmarks = _benchmarks_mock(
+        return_value=NodeBenchmark(
+            node_id=NODE_UUID,
+            model_name="model",
+            benchmark_tokens_per_second=10000,
+            gpu_model="NVIDIA GeForce RTX 4090",
+        )
+    )
+
+    await websocket_service.execute(
+        websocket,
+        user,
+        NODE_INFO,
+        "model",
+        None,
+        node_repository,
+        connected_node_repository,
+        _get_pipeline(node_repository, benchmark_repository),
+        Mock(),
+        protocol_handler,
+    )
+
+    connected_node_repository.add_inference_response_chunks.assert_called_once_with(
+        NODE_UUID, responses
+    )
+    connected_node_repository.add_inference_response_chunk.assert_not_called()
+    protocol_handler.handle.assert_not_called()
@@ -0,0 +1,90 @@
+import logging
+import queue
+import time
+from unittest.mock import MagicMock
+
+from distributedinference import api_logger
+from distributedinference.api_logger import HighVolumeFilter
+from distributedinference.api_logger import NonBlockingQueueHandler
+
+
+def _record(level: int = logging.INFO, lineno: int = 1) -> logging.LogRecord:
+    return logging.LogRecord(
+        name="test",
+        level=level,
+        pathname="file.py",
+        lineno=lineno,
+        msg="message %s",
+        args=("arg",),
+        exc_info=None,
+    )
+
+
+def setup_function():
+    api_logger.time = MagicMock()
+    api_logger.time.monotonic.return_value = 100.0
+
+
+def teardown_function():
+    api_logger.time = time
+
+
+def test_rate_limit_drops_over_limit():
+    log_filter = HighVolumeFilter(max_per_second=2)
+    results = [log_filter.filter(_record()) for _ in range(4)]
+    assert results == [True, True, False, False]
+
+
+def test_rate_limit_is_per_call_site():
+    log_filter = HighVolumeFilter(max_per_second=1)
+    assert log_filter.filter(_record(lineno=1))
+    assert log_filter.filter(_record(lineno=2))
+    assert not log_filter.filter(_record(lineno=1))
+
+
+def test_rate_limit_refills_and_reports_suppressed():
+    log_filter = HighVolumeFilter(max_per_second=1)
+    assert log_filter.filter(_record())
+    assert not log_filter.filter(_record())
+    assert not log_filter.filter(_record())
+
+    api_logger.time.monotonic.return_value = 101.0
+    record = _record()
+    assert log_filter.filter(record)
+    assert record.suppressed == 2
+
+
+def test_rate_limit_never_drops_warnings():
+    log_filter = HighVolumeFilter(max_per_second=1, sample_rate=0.0)
+    assert all(log_filter.filter(_record(logging.ERROR)) for _ in range(10))
+
+
+def test_sample_rate_zero_drops_info():
+    log_filter = HighVolumeFilter(max_per_second=0, sample_rate=0.0)
+    assert not log_filter.filter(_record())
+
+
+def test_rate_limit_disabled():
+    log_filter = HighVolumeFilter(max_per_second=0)
+    assert all(log_filter.filter(_record()) for _ in range(1000))
+
+
+def test_queue_handler_does_not_format():
+    log_queue: queue.Queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    record = _record()
+    handler.handle(record)
+
+    queued = log_queue.get_nowait()
+    assert queued is record
+    assert queued.args == ("arg",)
+
+
+def test_queue_handler_drops_when_full():
+    log_queue: queue.Queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.handle(_record())
+    handler.handle(_record())
+
+    assert log_queue.qsize() == 1
+    assert handler.dropped_count == 1
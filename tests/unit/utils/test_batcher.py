@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from distributedinference.utils.batcher import Batcher
+
+
+async def test_concurrent_gets_loaded_once():
+    load = AsyncMock(side_effect=lambda keys: {key: key * 2 for key in keys})
+    batcher = Batcher(load, 100, 0.001)
+
+    results = await asyncio.gather(*[batcher.get(key) for key in [1, 2, 2, 3]])
+
+    assert results == [2, 4, 4, 6]
+    load.assert_called_once_with([1, 2, 3])
+
+
+async def test_flushes_when_batch_is_full():
+    load = AsyncMock(side_effect=lambda keys: {key: key for key in keys})
+    batcher = Batcher(load, 2, 10)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*[batcher.get(key) for key in [1, 2]]), 1
+    )
+
+    assert results == [1, 2]
+    load.assert_called_once_with([1, 2])
+
+
+async def test_missing_key_returns_none():
+    batcher = Batcher(AsyncMock(return_value={1: "a"}), 100, 0.001)
+
+    results = await asyncio.gather(batcher.get(1), batcher.get(2))
+
+    assert results == ["a", None]
+
+
+async def test_load_error_raised_to_all_callers():
+    batcher = Batcher(AsyncMock(side_effect=ValueError("db")), 100, 0.001)
+
+    results = await asyncio.gather(
+        batcher.get(1), batcher.get(2), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        await batcher.get(3)
@@ -0,0 +1,79 @@
+import asyncio
+import base64
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from distributedinference.utils import google_cloud_storage
+from distributedinference.utils.google_cloud_storage import GoogleCloudStorage
+
+
+def _gcs(upload_seconds: float = 0) -> GoogleCloudStorage:
+    client = MagicMock()
+
+    def _blob(name):
+        blob = MagicMock()
+        blob.upload_from_string.side_effect = lambda *_, **__: time.sleep(
+            upload_seconds
+        )
+        blob.generate_signed_url.return_value = f"https://signed/{name}"
+        return blob
+
+    client.bucket.return_value.blob.side_effect = _blob
+    with patch.object(
+        google_cloud_storage.settings, "is_production", return_value=True
+    ), patch.object(google_cloud_storage.storage, "Client", return_value=client):
+        return GoogleCloudStorage()
+
+
+async def test_upload_returns_signed_url():
+    gcs = _gcs()
+
+    url = await gcs.decode_b64_and_upload_to_gcs(
+        "request", 1, base64.b64encode(b"png").decode()
+    )
+
+    assert url == "https://signed/request_1.png"
+    blob = gcs.bucket.blob.call_args_list[0]
+    assert blob.args == ("request_1.png",)
+
+
+async def test_image_decoded_before_upload():
+    gcs = _gcs()
+    blobs = []
+    gcs.bucket.blob.side_effect = lambda name: blobs.append(MagicMock()) or blobs[-1]
+
+    await gcs.decode_b64_and_upload_to_gcs(
+        "request", 0, base64.b64encode(b"png").decode()
+    )
+
+    blobs[0].upload_from_string.assert_called_once_with(
+        b"png", content_type="image/png"
+    )
+
+
+async def test_bucket_handle_reused():
+    gcs = _gcs()
+
+    await gcs.decode_b64_and_upload_to_gcs("request", 0, "")
+    await gcs.decode_b64_and_upload_to_gcs("request", 1, "")
+
+    gcs.client.bucket.assert_called_once()
+
+
+async def test_concurrent_uploads_in_parallel():
+    gcs = _gcs(upload_seconds=0.1)
+
+    start = time.perf_counter()
+    urls = await asyncio.gather(
+        *[gcs.decode_b64_and_upload_to_gcs("request", i, "") for i in range(8)]
+    )
+
+    assert time.perf_counter() - start < 0.4
+    assert urls == [f"https://signed/request_{i}.png" for i in range(8)]
+
+
+async def test_without_client_returns_image():
+    gcs = GoogleCloudStorage()
+
+    assert await gcs.decode_b64_and_upload_to_gcs("request", 0, "image") == "image"
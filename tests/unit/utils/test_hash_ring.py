@@ -0,0 +1,40 @@
+import random
+
+from distributedinference.utils.hash_ring import HashRing
+
+
+def _get_owners(ring: HashRing, keys):
+    return {key: next(ring.iterate(key)) for key in keys}
+
+
+def test_empty():
+    assert list(HashRing().iterate(1)) == []
+
+
+def test_iterate_yields_every_member_once():
+    ring = HashRing()
+    for member in ["a", "b", "c"]:
+        ring.add(member)
+
+    assert sorted(ring.iterate(12345)) == ["a", "b", "c"]
+
+
+def test_remove_only_moves_keys_of_removed_member():
+    rng = random.Random(0)
+    keys = [rng.getrandbits(64) for _ in range(1000)]
+    ring = HashRing()
+    for member in ["a", "b", "c", "d"]:
+        ring.add(member)
+    before = _get_owners(ring, keys)
+
+    ring.remove("b")
+    after = _get_owners(ring, keys)
+
+    assert len(ring) == 3
+    for key in keys:
+        if before[key] != "b":
+            assert after[key] == before[key]
+        else:
+            assert after[key] != "b"
+    # Virtual nodes spread the keys roughly evenly
+    assert 150 < sum(1 for owner in before.values() if owner == "b") < 350
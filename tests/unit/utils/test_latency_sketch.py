@@ -0,0 +1,49 @@
+import random
+
+from distributedinference.utils.latency_sketch import LatencySketch
+
+
+def test_empty():
+    assert LatencySketch().get_quantile(0.5) is None
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-2, 1) for _ in range(10_000))
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    for quantile in [0.5, 0.9, 0.99]:
+        expected = values[int(quantile * (len(values) - 1))]
+        assert abs(sketch.get_quantile(quantile) - expected) <= expected * 0.011
+
+
+def test_zero_values():
+    sketch = LatencySketch()
+    for value in [0, 0, 0, 1]:
+        sketch.add(value)
+
+    assert sketch.get_quantile(0.5) == 0
+    assert abs(sketch.get_quantile(1) - 1) < 0.01
+
+
+def test_max_buckets_keeps_tail_accurate():
+    sketch = LatencySketch(relative_accuracy=0.01, max_buckets=10)
+    for i in range(1, 1001):
+        sketch.add(i / 1000)
+
+    assert len(sketch._buckets) == 10
+    assert abs(sketch.get_quantile(0.999) - 0.999) < 0.01
+
+
+def test_decay_favours_recent_values():
+    sketch = LatencySketch(decay_count=100)
+    for _ in range(1000):
+        sketch.add(1)
+    for _ in range(200):
+        sketch.add(2)
+
+    assert sketch.count < 200
+    assert abs(sketch.get_quantile(0.5) - 2) < 0.03
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from distributedinference.utils import timer
+from distributedinference.utils.timer import async_timer
+from distributedinference.utils.timer import timed
+
+
+def _get_count(name: str) -> float:
+    for metric in timer.function_duration_histogram.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels["name"] == name:
+                return sample.value
+    return 0
+
+
+@pytest.fixture(autouse=True)
+def sample_rate():
+    original = timer.settings
+    timer.settings = MagicMock()
+    timer.settings.TIMER_SAMPLE_RATE = 1.0
+    yield timer.settings
+    timer.settings = original
+
+
+async def test_coroutine_recorded():
+    @async_timer("test_timer.coroutine")
+    async def function(value):
+        return value
+
+    assert await function(1) == 1
+    assert _get_count("test_timer.coroutine") == 1
+
+
+async def test_coroutine_exception_recorded():
+    @async_timer("test_timer.coroutine_exception")
+    async def function():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        await function()
+    assert _get_count("test_timer.coroutine_exception") == 1
+
+
+async def test_async_generator_recorded():
+    @async_timer("test_timer.generator")
+    async def function():
+        for i in range(3):
+            yield i
+
+    assert [i async for i in function()] == [0, 1, 2]
+    assert _get_count("test_timer.generator") == 1
+
+
+async def test_async_generator_closed_early_runs_finally():
+    is_cleaned_up = False
+
+    @async_timer("test_timer.generator_closed")
+    async def function():
+        nonlocal is_cleaned_up
+        try:
+            for i in range(3):
+                yield i
+        finally:
+            is_cleaned_up = True
+
+    generator = function()
+    assert await generator.__anext__() == 0
+    await generator.aclose()
+
+    assert is_cleaned_up
+    assert _get_count("test_timer.generator_closed") == 1
+
+
+async def test_not_sampled(sample_rate):
+    sample_rate.TIMER_SAMPLE_RATE = 0.0
+
+    @async_timer("test_timer.not_sampled")
+    async def function():
+        return 1
+
+    assert await function() == 1
+    assert _get_count("test_timer.not_sampled") == 0
+
+
+async def test_context_manager_sync_and_async():
+    with timed("test_timer.block"):
+        pass
+    async with timed("test_timer.block"):
+        pass
+    assert _get_count("test_timer.block") == 2